@@ -16,6 +16,7 @@ from jwt import PyJWTError, ExpiredSignatureError
 
 from database import get_db
 from models import Donations as Donation, Donors as Donor, Organizations as Organization, Users as User
+from analytics import cohort_cube
 
 router = APIRouter(prefix="/api/donations", tags=["Donations"])
 
@@ -321,6 +322,7 @@ async def create_donation(
     )
 
     db.add(db_donation)
+    cohort_cube.record_donation(db, db_donation)
     db.commit()
     db.refresh(db_donation)
 
@@ -376,12 +378,17 @@ async def update_donation(
     # Verify access
     verify_organization_access(current_user, db_donation.organization_id)
 
+    # Lock the donor and snapshot their gifts so the cohort cube can apply the difference
+    cohort_cube.lock_donor(db, db_donation.organization_id, db_donation.donor_id)
+    gifts_before = cohort_cube.donor_gifts(db, db_donation.donor_id)
+
     # Update fields
     update_data = donation_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_donation, field, value)
 
     db_donation.updated_at = datetime.utcnow()
+    cohort_cube.record_donor_change(db, db_donation.organization_id, db_donation.donor_id, gifts_before)
     db.commit()
     db.refresh(db_donation)
 
@@ -432,7 +439,10 @@ async def delete_donation(
     # Verify access
     verify_organization_access(current_user, db_donation.organization_id)
 
+    cohort_cube.lock_donor(db, db_donation.organization_id, db_donation.donor_id)
+    gifts_before = cohort_cube.donor_gifts(db, db_donation.donor_id)
     db.delete(db_donation)
+    cohort_cube.record_donor_change(db, db_donation.organization_id, db_donation.donor_id, gifts_before)
     db.commit()
 
     return None
@@ -13,13 +13,14 @@ from uuid import UUID, uuid4
 from datetime import datetime
 from decimal import Decimal
 
-from database import get_db
+from database import get_db, get_public_write_db
 from models import (
     Donations as Donation,
     Donors as Donor,
     Campaigns as Campaign,
     Organizations as Organization
 )
+from analytics import cohort_cube
 
 router = APIRouter(prefix="/api/public", tags=["Public Donations"])
 
@@ -147,7 +148,7 @@ def update_campaign_stats(db: Session, campaign: Campaign, amount: float):
 @router.post("/donations", response_model=DonationResponse)
 async def create_public_donation(
         donation_data: DonationCreate,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_public_write_db)
 ):
     """
     Create a new donation from the public donation form.
@@ -217,6 +218,7 @@ async def create_public_donation(
         )
 
         db.add(new_donation)
+        cohort_cube.record_donation(db, new_donation)
 
         # Update donor statistics
         update_donor_stats(db, donor, donation_data.amount)
@@ -256,7 +258,7 @@ async def create_public_donation(
 @router.post("/donations/confirm", response_model=DonationConfirmResponse)
 async def confirm_donation(
         donation_id: UUID,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_public_write_db)
 ):
     """
     Confirm a donation and return confirmation details.
@@ -1,15 +1,13 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, case
+from sqlalchemy import func, case
 from datetime import date, timedelta
 from uuid import UUID
 from typing import Dict, List
 
-from database import get_db
-from models_major_gifts import (
-    GiftGoal, DonorMeeting, MajorGiftOfficer, MajorGiftPortfolio
-)
-from models import Donation, Party  # assuming these exist globally
+from database import get_read_db, get_heavy_db
+from models import Donations as Donation
+from analytics import cohort_cube
 
 router = APIRouter(prefix="/analytics", tags=["Donor Analytics"])
 
@@ -20,53 +18,23 @@ router = APIRouter(prefix="/analytics", tags=["Donor Analytics"])
 @router.get("/{organization_id}/donor-retention", response_model=Dict)
 def donor_retention(
         organization_id: UUID,
-        period: str = Query("year", description="Choose 'month' or 'year'"),
-        db: Session = Depends(get_db)
+        period: str = Query("year", description="Choose 'month', 'quarter' or 'year'"),
+        db: Session = Depends(get_heavy_db)
 ):
-    """Calculate donor retention = (# repeat donors) / (# donors last period) * 100"""
+    """Donor retention = (# donors who gave last period and this period) / (# donors last period) * 100"""
+    if period not in cohort_cube.GRAINS:
+        raise HTTPException(status_code=400, detail="period must be 'month', 'quarter' or 'year'")
 
-    today = date.today()
-    if period == "month":
-        prev_start = today.replace(day=1) - timedelta(days=30)
-        prev_end = today.replace(day=1)
-        curr_start = today.replace(day=1)
-        curr_end = today
-    else:
-        prev_start = date(today.year - 1, 1, 1)
-        prev_end = date(today.year - 1, 12, 31)
-        curr_start = date(today.year, 1, 1)
-        curr_end = today
-
-    prev_donors = db.query(func.distinct(Donation.party_id)).filter(
-        Donation.organization_id == organization_id,
-        Donation.received_date >= prev_start,
-        Donation.received_date <= prev_end
-    ).subquery()
-
-    curr_donors = db.query(func.distinct(Donation.party_id)).filter(
-        Donation.organization_id == organization_id,
-        Donation.received_date >= curr_start,
-        Donation.received_date <= curr_end
-    ).subquery()
-
-    retained = db.query(func.count(func.distinct(Donation.party_id))).filter(
-        Donation.organization_id == organization_id,
-        Donation.party_id.in_(prev_donors)
-    ).filter(
-        Donation.party_id.in_(curr_donors)
-    ).scalar() or 0
-
-    prev_total = db.query(func.count(func.distinct(Donation.party_id))).filter(
-        Donation.organization_id == organization_id,
-        Donation.received_date >= prev_start,
-        Donation.received_date <= prev_end
-    ).scalar() or 1
+    current = cohort_cube.period_summaries(db, organization_id, period, periods=1)[0]
+    retained = current["retained_donors"]
+    prev_total = current["previous_donors"]
 
-    retention_rate = (retained / prev_total) * 100
+    retention_rate = (retained / prev_total) * 100 if prev_total else 0
 
     return {
         "organization_id": str(organization_id),
         "period": period,
+        "period_start": current["period"].isoformat(),
         "retained_donors": retained,
         "previous_donors": prev_total,
         "retention_rate": round(retention_rate, 2)
@@ -79,26 +47,18 @@ def donor_retention(
 @router.get("/{organization_id}/donor-cohorts", response_model=Dict)
 def donor_cohorts(
         organization_id: UUID,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_heavy_db)
 ):
     """Return yearly donor acquisition and retention cohorts"""
-    year_expr = extract('year', Donation.received_date)
-
-    donors_by_year = db.query(
-        year_expr.label('year'),
-        func.count(func.distinct(Donation.party_id)).label('donor_count'),
-        func.sum(Donation.intent_amount).label('total_amount')
-    ).filter(
-        Donation.organization_id == organization_id
-    ).group_by(year_expr).order_by('year').all()
-
     cohorts = [
         {
-            "year": int(r.year),
-            "donor_count": r.donor_count,
-            "total_amount": float(r.total_amount or 0)
+            "year": cohort["cohort_period"].year,
+            "donor_count": cohort["initial_donors"],
+            "still_active": cohort["still_active"],
+            "retention_rate": cohort["retention_rate"],
+            "total_amount": cohort["lifetime_revenue"]
         }
-        for r in donors_by_year
+        for cohort in cohort_cube.cohort_matrix(db, organization_id, "year")
     ]
 
     return {
@@ -113,33 +73,34 @@ def donor_cohorts(
 @router.get("/{organization_id}/churn-prediction", response_model=Dict)
 def churn_prediction(
         organization_id: UUID,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Predict donors at risk of churn.
     Simple heuristic: donors who haven't given in 12+ months.
     """
+    # Loaded on first use to keep numpy out of worker startup
+    from analytics.donor_features import donor_contacts, lapsed_donors, load_features
 
-    today = date.today()
+    frame = load_features(db, organization_id)
+    today = frame.as_of
     cutoff = today - timedelta(days=365)
 
-    donors_last_year = db.query(
-        Party.id,
-        Party.donor_level,
-        func.max(Donation.received_date).label('last_donation_date')
-    ).join(Donation, Party.id == Donation.party_id).filter(
-        Donation.organization_id == organization_id
-    ).group_by(Party.id, Party.donor_level).all()
+    # Last gift dates come from the donor feature store
+    lapsed = lapsed_donors(frame, days=365)
+    levels = donor_contacts(db, frame.donor_id[lapsed])
 
     churn_risks = []
-    for d in donors_last_year:
-        if d.last_donation_date < cutoff:
-            churn_risks.append({
-                "party_id": str(d.id),
-                "donor_level": d.donor_level,
-                "last_donation_date": d.last_donation_date.isoformat(),
-                "days_since_last_gift": (today - d.last_donation_date).days
-            })
+    for i in lapsed:
+        last_donation_date = frame.last_gift_date[i].item()
+        donor = levels.get(frame.donor_id[i])
+        churn_risks.append({
+            "donor_id": str(frame.donor_id[i]),
+            "party_id": str(frame.party_id[i]) if frame.party_id[i] else None,
+            "donor_level": donor.donor_level if donor else None,
+            "last_donation_date": last_donation_date.isoformat(),
+            "days_since_last_gift": (today - last_donation_date).days
+        })
 
     return {
         "organization_id": str(organization_id),
@@ -155,7 +116,7 @@ def churn_prediction(
 @router.get("/{organization_id}/donor-ltv", response_model=Dict)
 def donor_ltv(
         organization_id: UUID,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Compute Lifetime Value (LTV) per donor:
@@ -198,7 +159,7 @@ def donor_ltv(
 @router.get("/{organization_id}/reactivation-potential", response_model=Dict)
 def reactivation_potential(
         organization_id: UUID,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Identify lapsed donors with high reactivation potential.
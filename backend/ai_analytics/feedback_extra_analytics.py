@@ -12,13 +12,14 @@ Covers:
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, extract, case
+from sqlalchemy import func, and_, or_, case
 from datetime import datetime, timedelta, date
 from typing import Optional, List
 from decimal import Decimal
 import uuid
 from uuid import UUID
-from database import get_db
+from database import get_db, get_read_db
+from utils import in_range, month_range, year_range
 from models import (
     Organizations, Donors as Donor, Donations as Donation, Campaigns as Campaign, Programs,
     MajorGiftOfficer, DonorMeetings, SolicitationProposals,
@@ -39,7 +40,7 @@ router = APIRouter(prefix="/api/v1/analytics", tags=["Enhanced Analytics"])
 async def get_second_gift_tracking(
         organization_id: str,
         period: str = Query("12m", regex="^(3m|6m|12m|24m)$"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -144,7 +145,7 @@ async def get_second_gift_tracking(
 @router.get("/{organization_id}/acquisition/cost-recovery")
 async def get_acquisition_cost_recovery(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -204,7 +205,7 @@ async def get_acquisition_cost_recovery(
 async def get_revenue_diversification(
         organization_id: str,
         period: str = Query("12m"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -588,7 +589,7 @@ async def get_multi_year_comparison(
         organization_id: str,
         metric: str = Query("revenue", regex="^(revenue|donors|gifts|retention|new_donors|lapsed)$"),
         years: int = Query(3, ge=1, le=10),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -608,35 +609,36 @@ async def get_multi_year_comparison(
         if metric == "revenue":
             value = db.query(func.sum(Donation.amount)).filter(
                 Donation.organization_id == org_id,
-                extract('year', Donation.donation_date) == year
+                in_range(Donation.donation_date, year_range(year))
             ).scalar() or 0
         elif metric == "donors":
             value = db.query(func.count(func.distinct(Donation.donor_id))).filter(
                 Donation.organization_id == org_id,
-                extract('year', Donation.donation_date) == year
+                in_range(Donation.donation_date, year_range(year))
             ).scalar() or 0
         elif metric == "gifts":
             value = db.query(func.count(Donation.id)).filter(
                 Donation.organization_id == org_id,
-                extract('year', Donation.donation_date) == year
+                in_range(Donation.donation_date, year_range(year))
             ).scalar() or 0
         elif metric == "new_donors":
             value = db.query(func.count(Donor.id)).filter(
                 Donor.organization_id == org_id,
-                extract('year', Donor.first_donation_date) == year
+                in_range(Donor.first_donation_date, year_range(year))
             ).scalar() or 0
         elif metric == "retention":
             prev_year_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
                 Donation.organization_id == org_id,
-                extract('year', Donation.donation_date) == year - 1
+                in_range(Donation.donation_date, year_range(year - 1))
             ).scalar() or 0
 
             retained = db.query(func.count(func.distinct(Donation.donor_id))).filter(
                 Donation.organization_id == org_id,
-                extract('year', Donation.donation_date) == year,
+                in_range(Donation.donation_date, year_range(year)),
                 Donation.donor_id.in_(
                     db.query(Donation.donor_id).filter(
-                        extract('year', Donation.donation_date) == year - 1
+                        Donation.organization_id == org_id,
+                        in_range(Donation.donation_date, year_range(year - 1))
                     )
                 )
             ).scalar() or 0
@@ -675,7 +677,7 @@ async def get_multi_year_comparison(
 @router.get("/{organization_id}/cashflow/three-year-grid")
 async def get_three_year_cashflow_grid(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -695,8 +697,7 @@ async def get_three_year_cashflow_grid(
                 func.count(func.distinct(Donation.donor_id)).label('donors')
             ).filter(
                 Donation.organization_id == org_id,
-                extract('year', Donation.donation_date) == year,
-                extract('month', Donation.donation_date) == month
+                in_range(Donation.donation_date, month_range(year, month))
             ).first()
 
             monthly.append({
@@ -713,7 +714,7 @@ async def get_three_year_cashflow_grid(
             func.count(func.distinct(Donation.donor_id)).label('donors')
         ).filter(
             Donation.organization_id == org_id,
-            extract('year', Donation.donation_date) == year
+            in_range(Donation.donation_date, year_range(year))
         ).first()
 
         grid_data.append({
@@ -753,7 +754,7 @@ async def get_three_year_cashflow_grid(
 @router.get("/{organization_id}/org-info")
 async def get_organization_info(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -842,7 +843,7 @@ async def get_okrs_with_context(
 @router.get("/{organization_id}/donor-acquisition/second-gift-conversion")
 async def get_second_gift_conversion(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -989,7 +990,7 @@ async def get_second_gift_conversion(
 @router.get("/{organization_id}/donor-acquisition/break-even-analysis")
 async def get_break_even_analysis(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -1103,7 +1104,7 @@ async def get_break_even_analysis(
 @router.get("/{organization_id}/donor-acquisition/channel-break-even")
 async def get_channel_break_even(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -1178,7 +1179,7 @@ async def get_channel_break_even(
 @router.get("/{organization_id}/donor-acquisition/spend-vs-ltv")
 async def get_spend_vs_ltv(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -1239,7 +1240,7 @@ async def get_spend_vs_ltv(
 @router.get("/{organization_id}/stewardship/touchpoints")
 async def get_stewardship_touchpoints(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -1353,7 +1354,7 @@ async def get_stewardship_touchpoints(
 @router.get("/{organization_id}/stewardship/thank-you-timeliness")
 async def get_thank_you_timeliness(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -1432,7 +1433,7 @@ async def get_thank_you_timeliness(
 @router.get("/{organization_id}/donor-experience/dx-score")
 async def get_dx_score(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -1543,7 +1544,7 @@ async def get_dx_score(
 @router.get("/{organization_id}/stewardship/plan-progress")
 async def get_plan_progress(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
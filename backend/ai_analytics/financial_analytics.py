@@ -21,7 +21,7 @@ from datetime import datetime, timedelta, date
 from uuid import UUID
 from decimal import Decimal
 from pydantic import BaseModel, Field
-from database import get_db
+from database import get_read_db
 from models import (
     Organizations, Donations, DonationLines, Donors, Campaigns,
     Programs, Expenses, ExpenseCategories, Pledges, PledgeInstallments,
@@ -243,7 +243,7 @@ def get_fiscal_year_start(org_fiscal_year_end: int = 12) -> date:
 def get_cash_flow(
         organization_id: UUID,
         period: str = Query("12m", description="Period: 3m, 6m, 12m, 24m"),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Get monthly cash flow data (inflows and outflows)."""
 
@@ -332,7 +332,7 @@ def get_cash_flow(
 def get_burn_rate(
         organization_id: UUID,
 
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Calculate monthly burn rate based on expenses."""
 
@@ -399,7 +399,7 @@ def get_burn_rate(
 @router.get("/{organization_id}/runway")
 def get_runway(
         organization_id: UUID,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Calculate financial runway based on current cash and burn rate."""
 
@@ -472,7 +472,7 @@ def get_runway(
 def get_revenue_streams(
         organization_id: UUID,
         period: str = Query("12m", description="Period: 3m, 6m, 12m, 24m"),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Break down revenue by source/type."""
     start_date = get_date_range(period)
@@ -557,7 +557,7 @@ def get_revenue_streams(
 def get_expense_breakdown(
         organization_id: UUID,
         period: str = Query("12m", description="Period: 3m, 6m, 12m, 24m"),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Break down expenses by category."""
     start_date = get_date_range(period)
@@ -613,7 +613,7 @@ def get_expense_breakdown(
 def get_financial_ratios(
         organization_id: UUID,
         period: str = Query("12m", description="Period: 3m, 6m, 12m, 24m"),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Calculate key financial health ratios."""
     start_date = get_date_range(period)
@@ -688,7 +688,7 @@ def get_financial_ratios(
 def get_budget_variance(
         organization_id: UUID,
         period: str = Query("12m", description="Period: 3m, 6m, 12m, 24m"),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Compare budget to actual spending by program."""
     start_date = get_date_range(period)
@@ -756,47 +756,19 @@ def get_budget_variance(
 @router.get("/{organization_id}/financial-forecast")
 def get_financial_forecast(
         organization_id: UUID,
-        months: int = Query(6, description="Number of months to forecast"),
-        db: Session = Depends(get_db)
+        months: int = Query(6, ge=1, le=24, description="Number of months to forecast"),
+        db: Session = Depends(get_read_db)
 ):
-    """Project revenue and expenses for coming months."""
+    """
+    Project revenue and expenses for coming months from the seasonal-trend
+    forecasts of both series (analytics/forecast_engine.py).
+    """
+    from analytics.forecast_engine import load_forecast
 
-    # Get historical monthly data (last 6 months)
-    six_months_ago = datetime.now() - timedelta(days=180)
-
-    # Monthly revenue
-    monthly_revenue = (
-        db.query(
-            extract('month', Donations.donation_date).label('month'),
-            func.sum(Donations.amount).label('amount')
-        )
-        .filter(
-            Donations.organization_id == organization_id,
-            Donations.donation_date >= six_months_ago
-        )
-        .group_by(extract('month', Donations.donation_date))
-        .all()
-    )
-
-    # Monthly expenses
-    monthly_expenses = (
-        db.query(
-            extract('month', Expenses.expense_date).label('month'),
-            func.sum(Expenses.amount).label('amount')
-        )
-        .filter(
-            Expenses.organization_id == organization_id,
-            Expenses.expense_date >= six_months_ago
-        )
-        .group_by(extract('month', Expenses.expense_date))
-        .all()
-    )
+    revenue = load_forecast(db, organization_id, "revenue")
+    expenses = load_forecast(db, organization_id, "expenses")
 
-    # Calculate averages
-    avg_revenue = sum(safe_float(r.amount) for r in monthly_revenue) / max(len(monthly_revenue), 1)
-    avg_expenses = sum(safe_float(e.amount) for e in monthly_expenses) / max(len(monthly_expenses), 1)
-
-    # Get recurring revenue
+    # Recurring gifts are already part of the revenue history; reported for context
     recurring = (
                 db.query(func.sum(RecurringGifts.amount))
                 .filter(
@@ -810,23 +782,19 @@ def get_financial_forecast(
 
     # Generate forecast
     forecast = []
-    current = datetime.now()
     cumulative_balance = 0
 
-    for i in range(1, months + 1):
-        month_date = current + timedelta(days=i * 30)
-
-        # Simple forecast: average + recurring
-        projected_revenue = avg_revenue + recurring_monthly
-        projected_expenses = avg_expenses
-        net = projected_revenue - projected_expenses
+    for rev, exp in zip(revenue.future(months), expenses.future(months)):
+        net = rev.predicted - exp.predicted
         cumulative_balance += net
 
         forecast.append({
-            "month": month_date.strftime("%Y-%m"),
-            "month_name": month_date.strftime("%B %Y"),
-            "projected_revenue": safe_round(projected_revenue),
-            "projected_expenses": safe_round(projected_expenses),
+            "month": rev.period.strftime("%Y-%m"),
+            "month_name": rev.period.strftime("%B %Y"),
+            "projected_revenue": safe_round(rev.predicted),
+            "revenue_range": [safe_round(rev.lower_bound), safe_round(rev.upper_bound)],
+            "projected_expenses": safe_round(exp.predicted),
+            "expense_range": [safe_round(exp.lower_bound), safe_round(exp.upper_bound)],
             "projected_net": safe_round(net),
             "cumulative_balance": safe_round(cumulative_balance)
         })
@@ -836,9 +804,11 @@ def get_financial_forecast(
         "forecast_months": months,
         "forecast": forecast,
         "assumptions": {
-            "base_monthly_revenue": safe_round(avg_revenue),
+            "base_monthly_revenue": safe_round(revenue.mean_monthly(6)),
             "recurring_monthly": safe_round(recurring_monthly),
-            "base_monthly_expenses": safe_round(avg_expenses)
+            "base_monthly_expenses": safe_round(expenses.mean_monthly(6)),
+            "revenue_model": revenue.model_info(),
+            "expense_model": expenses.model_info()
         },
         "projected_year_end": {
             "total_revenue": safe_round(sum(f["projected_revenue"] for f in forecast)),
@@ -854,7 +824,7 @@ def get_financial_forecast(
 @router.get("/{organization_id}/donor-concentration")
 def get_donor_concentration(
         organization_id: UUID,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Calculate donor concentration using HHI."""
 
@@ -934,7 +904,7 @@ def get_donor_concentration(
 @router.get("/{organization_id}/receivables")
 def get_receivables(
         organization_id: UUID,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Analyze outstanding pledges and aging receivables."""
 
@@ -1005,7 +975,7 @@ def get_receivables(
 @router.get("/{organization_id}/donor-financial-summary")
 def get_donor_financial_summary(
         organization_id: UUID,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Summary of donor financial contributions."""
 
@@ -1048,7 +1018,7 @@ def get_donor_financial_summary(
 @router.get("/{organization_id}/campaign-roi")
 def get_campaign_roi(
         organization_id: UUID,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Calculate ROI for campaigns."""
 
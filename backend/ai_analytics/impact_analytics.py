@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, case
+from sqlalchemy import func, case
 from datetime import date
 from uuid import UUID
 from typing import Dict, List
 
-from database import get_db
+from database import get_read_db
+from utils import in_range, year_range
 from models import (
     Programs,
     OutcomeMetrics,
@@ -24,7 +25,7 @@ router = APIRouter(prefix="/api/v1/analytics", tags=["Impact Analytics"])
 # 1️⃣ Program List
 # ==========================================================
 @router.get("/{organization_id}/programs/list", response_model=Dict)
-def list_programs(organization_id: UUID, db: Session = Depends(get_db)):
+def list_programs(organization_id: UUID, db: Session = Depends(get_read_db)):
     """List all active programs for an organization."""
     programs = (
         db.query(Programs.id, Programs.name, Programs.description, Programs.budget, Programs.status)
@@ -58,7 +59,7 @@ def impact_outcomes(
         organization_id: UUID,
         program: UUID = Query(..., description="Program ID"),
         period: str = Query("year", description="Time period (month, quarter, year)"),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Return key outcome metrics by period."""
     today = date.today()
@@ -77,7 +78,7 @@ def impact_outcomes(
             OutcomeMetrics.organization_id == organization_id,
             OutcomeMetrics.program_id == program
         )
-        .filter(extract("year", OutcomeRecords.recorded_at) == year)
+        .filter(in_range(OutcomeRecords.recorded_at, year_range(year)))
         .group_by(OutcomeMetrics.name, OutcomeMetrics.unit, OutcomeMetrics.target_value)
         .all()
     )
@@ -107,7 +108,7 @@ def impact_outcomes(
 def impact_beneficiaries(
         organization_id: UUID,
         program: UUID = Query(..., description="Program ID"),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Aggregate total beneficiaries served, by gender and calculated age group."""
 
@@ -169,7 +170,7 @@ def impact_beneficiaries(
 # 4️⃣ SDG Alignment
 # ==========================================================
 @router.get("/{organization_id}/impact/sdg-alignment", response_model=Dict)
-def sdg_alignment(organization_id: UUID, db: Session = Depends(get_db)):
+def sdg_alignment(organization_id: UUID, db: Session = Depends(get_read_db)):
     """List Sustainable Development Goals aligned with programs."""
     alignments = (
         db.query(
@@ -212,7 +213,7 @@ def sdg_alignment(organization_id: UUID, db: Session = Depends(get_db)):
 def cost_effectiveness(
         organization_id: UUID,
         program: UUID = Query(..., description="Program ID"),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Cost per beneficiary (program efficiency)."""
     # Get program budget
@@ -252,7 +253,7 @@ def cost_effectiveness(
 # 6️⃣ Social Return on Investment (SROI)
 # ==========================================================
 @router.get("/{organization_id}/impact/social-return", response_model=Dict)
-def social_return(organization_id: UUID, db: Session = Depends(get_db)):
+def social_return(organization_id: UUID, db: Session = Depends(get_read_db)):
     """Estimate SROI = Social value created / investment."""
     impacts = (
         db.query(
@@ -307,7 +308,7 @@ def social_return(organization_id: UUID, db: Session = Depends(get_db)):
 def impact_stories(
         organization_id: UUID,
         limit: int = Query(5, ge=1, le=20),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Fetch qualitative impact stories (latest success stories/testimonials)."""
     stories = (
@@ -347,7 +348,7 @@ def impact_stories(
 # 8️⃣ Geographic Reach
 # ==========================================================
 @router.get("/{organization_id}/impact/geographic-reach", response_model=Dict)
-def geographic_reach(organization_id: UUID, db: Session = Depends(get_db)):
+def geographic_reach(organization_id: UUID, db: Session = Depends(get_read_db)):
     """Summarize impact by geography (state, country, region)."""
     rows = (
         db.query(
@@ -406,7 +407,7 @@ def geographic_reach(organization_id: UUID, db: Session = Depends(get_db)):
 def program_summary(
         organization_id: UUID,
         program_id: UUID,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Get comprehensive summary for a single program."""
 
@@ -16,15 +16,8 @@ from enum import Enum
 import csv
 import io
 
-# PDF generation
-from reportlab.lib import colors as pdf_colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-
 # Import from your existing codebase
-from database import get_db
+from database import get_db, get_read_db, get_heavy_read_db
 from models import (
     Donations as Donation,
     Donors as Donor,
@@ -34,6 +27,14 @@ from models import (
     # Communications  # Uncomment after adding the model
 )
 from user_management.auth_dependencies import get_current_user
+from analytics.deadlines_service import get_deadlines, invalidate_deadlines
+from ai_analytics.thank_you_dispatch import (
+    SEND_METHOD_CHANNELS,
+    ThankYouJob,
+    get_job_status,
+    list_job_statuses,
+    thank_you_dispatcher,
+)
 
 router = APIRouter(prefix="/api/v1", tags=["Quick Actions"])
 
@@ -120,7 +121,7 @@ class CreateTaskRequest(BaseModel):
 
 # ============== SEND THANK YOU API ==============
 
-@router.post("/communications/thank-you/{organization_id}")
+@router.post("/communications/thank-you/{organization_id}", status_code=202)
 async def send_thank_you(
         organization_id: str,
         request: ThankYouRequest,
@@ -128,187 +129,87 @@ async def send_thank_you(
         current_user = Depends(get_current_user)
 ):
     """
-    Send thank you communications to selected donors
+    Queue thank you communications to selected donors.
+
+    Returns immediately with a job; rendering, recording and delivery run in
+    the background (see ai_analytics.thank_you_dispatch). Poll the status URL
+    for progress.
     """
+    if request.send_method not in SEND_METHOD_CHANNELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"send_method must be one of: {', '.join(SEND_METHOD_CHANNELS)}"
+        )
+
     try:
-        # Get donor details
-        donors = db.query(Donor).filter(
+        donor_count = db.query(func.count(Donor.id)).filter(
             Donor.organization_id == organization_id,
             Donor.id.in_(request.donor_ids)
-        ).all()
+        ).scalar()
 
-        if not donors:
+        if not donor_count:
             raise HTTPException(status_code=404, detail="No donors found")
 
         # Get organization details for the letter
-        org = db.query(Organization).filter(
+        org_name = db.query(Organization.name).filter(
             Organization.id == organization_id
-        ).first()
+        ).scalar()
 
-        sent_count = 0
-        failed_count = 0
-        communications = []
-
-        for donor in donors:
-            try:
-                # Get donor's most recent donation for personalization
-                recent_donation = db.query(Donation).filter(
-                    Donation.donor_id == donor.id,
-                    Donation.organization_id == organization_id
-                ).order_by(Donation.donation_date.desc()).first()
-
-                # Generate thank you content based on template
-                subject, content = generate_thank_you_content(
-                    donor=donor,
-                    donation=recent_donation,
-                    organization=org,
-                    template_type=request.template_type,
-                    custom_message=request.custom_message
-                )
-
-                if request.subject:
-                    subject = request.subject
-
-                # For now, we'll just track it without the Communications table
-                # Once you add the Communications model, uncomment this:
-
-                communication = Communications(
-                    organization_id=organization_id,
-                    donor_id=donor.id,
-                    communication_type="thank_you",
-                    channel=request.send_method,
-                    subject=subject,
-                    content=content,
-                    status="sent",
-                    sent_at=datetime.now(),
-                    sent_by=current_user.id
-                )
-                db.add(communication)
-
-
-                communications.append({
-                    "donor_id": str(donor.id),
-                    "donor_name": f"{donor.first_name} {donor.last_name}",
-                    "email": donor.email,
-                    "subject": subject,
-                    "status": "sent"
-                })
-                sent_count += 1
-
-                # TODO: Integrate with actual email service (SendGrid, SES, etc.)
-                # Example with SendGrid:
-                # from sendgrid import SendGridAPIClient
-                # from sendgrid.helpers.mail import Mail
-                # message = Mail(
-                #     from_email='noreply@yourorg.com',
-                #     to_emails=donor.email,
-                #     subject=subject,
-                #     html_content=content
-                # )
-                # sg = SendGridAPIClient(os.environ.get('SENDGRID_API_KEY'))
-                # sg.send(message)
-
-            except Exception as e:
-                failed_count += 1
-                communications.append({
-                    "donor_id": str(donor.id),
-                    "donor_name": f"{donor.first_name} {donor.last_name}",
-                    "status": "failed",
-                    "error": str(e)
-                })
-
-        db.commit()
+        job = await thank_you_dispatcher.submit(ThankYouJob(
+            organization_id=organization_id,
+            donor_ids=list(dict.fromkeys(request.donor_ids)),
+            template_type=request.template_type,
+            channels=SEND_METHOD_CHANNELS[request.send_method],
+            org_name=org_name,
+            subject=request.subject,
+            custom_message=request.custom_message,
+            sent_by=current_user.id
+        ))
 
         return {
             "success": True,
-            "sent_count": sent_count,
-            "failed_count": failed_count,
-            "communications": communications,
-            "message": f"Successfully prepared {sent_count} thank you messages"
+            "job_id": job.id,
+            "status": "queued",
+            "queued_count": donor_count,
+            "status_url": f"/api/v1/communications/thank-you/{organization_id}/jobs/{job.id}",
+            "message": f"Queued thank you messages for {donor_count} donors"
         }
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def generate_thank_you_content(donor, donation, organization, template_type, custom_message=None):
-    """Generate thank you letter content based on template type"""
-
-    org_name = organization.name if organization else "Our Organization"
-    donor_name = f"{donor.first_name} {donor.last_name}"
-
-    # Handle case where there's no recent donation
-    if donation:
-        amount_str = f"${float(donation.amount):,.2f}"
-        date_str = donation.donation_date.strftime('%B %d, %Y') if donation.donation_date else "recently"
-    else:
-        amount_str = "your generous gift"
-        date_str = "recently"
-
-    if template_type == "major_gift":
-        subject = f"Your Extraordinary Generosity - Thank You, {donor.first_name}!"
-        content = f"""Dear {donor_name},
-
-On behalf of everyone at {org_name}, I want to express our deepest gratitude for your extraordinary gift of {amount_str} received on {date_str}.
-
-Your remarkable generosity places you among our most valued supporters and will have a transformative impact on our mission. Gifts of this magnitude allow us to expand our programs and reach more people in need.
-
-{custom_message if custom_message else ''}
-
-We would love to schedule a personal meeting to share more about how your gift is making a difference. Please let us know a convenient time.
-
-With heartfelt appreciation,
-
-{org_name} Leadership Team"""
-
-    elif template_type == "first_time":
-        subject = f"Welcome to the {org_name} Family!"
-        content = f"""Dear {donor_name},
-
-Welcome! Your first gift of {amount_str} means the world to us at {org_name}.
-
-As a new member of our donor family, you've taken the first step in creating lasting change. We're thrilled to have you join our community of supporters who share our vision for a better tomorrow.
-
-{custom_message if custom_message else ''}
-
-We look forward to keeping you updated on the impact of your generosity.
-
-With warm regards,
-
-{org_name} Team"""
-
-    elif template_type == "recurring":
-        subject = f"Thank You for Your Continued Support!"
-        content = f"""Dear {donor_name},
-
-Thank you for your continued commitment to {org_name} through your recurring gift of {amount_str}.
-
-Monthly donors like you provide the reliable foundation that allows us to plan ahead and maximize our impact. Your ongoing support is truly invaluable.
-
-{custom_message if custom_message else ''}
-
-Gratefully yours,
-
-{org_name} Team"""
-
-    else:  # standard
-        subject = f"Thank You for Your Gift to {org_name}"
-        content = f"""Dear {donor_name},
-
-Thank you for your generous gift of {amount_str} to {org_name}.
-
-Your support makes a real difference in our ability to fulfill our mission and serve our community. We are deeply grateful for your trust in our work.
-
-{custom_message if custom_message else ''}
-
-With sincere appreciation,
+@router.get("/communications/thank-you/{organization_id}/jobs")
+async def list_thank_you_jobs(
+        organization_id: str,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_user)
+):
+    """
+    Recent thank you jobs of this organization
+    """
+    return {
+        "organization_id": organization_id,
+        "jobs": list_job_statuses(db, organization_id)
+    }
 
-{org_name} Team"""
 
-    return subject, content
+@router.get("/communications/thank-you/{organization_id}/jobs/{job_id}")
+async def get_thank_you_job(
+        organization_id: str,
+        job_id: str,
+        db: Session = Depends(get_db),
+        current_user = Depends(get_current_user)
+):
+    """
+    Progress of a thank you job
+    """
+    job = get_job_status(db, organization_id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Thank you job not found")
+    return job
 
 
 # ============== EXPORT DATA API ==============
@@ -317,7 +218,7 @@ With sincere appreciation,
 async def export_data(
         organization_id: str,
         request: ExportRequest,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_heavy_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -557,6 +458,13 @@ def generate_csv_response(data, headers, title):
 
 def generate_pdf_response(data, headers, title, org_name, date_from, date_to):
     """Generate PDF file response"""
+    # reportlab is imported on first use to keep it out of worker startup
+    from reportlab.lib import colors as pdf_colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+
     buffer = io.BytesIO()
 
     doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
@@ -670,6 +578,7 @@ async def create_task(
         db.add(task)
         db.commit()
         db.refresh(task)
+        invalidate_deadlines(organization_id)
 
         return {
             "success": True,
@@ -695,145 +604,22 @@ async def create_task(
 async def get_upcoming_deadlines(
         organization_id: str,
         days: int = 30,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
     Get upcoming deadlines and events for the dashboard
     """
     try:
-        deadlines = []
-        today = datetime.now()
-        end_date = today + timedelta(days=days)
-
-        # 1. Campaign end dates
-        campaigns = db.query(Campaign).filter(
-            Campaign.organization_id == organization_id,
-            Campaign.status == 'active',
-            Campaign.end_date >= today,
-            Campaign.end_date <= end_date
-        ).order_by(Campaign.end_date).all()
-
-        for campaign in campaigns:
-            # Get campaign progress
-            raised = db.query(func.sum(Donation.amount)).filter(
-                Donation.campaign_id == campaign.id
-            ).scalar() or 0
-            progress = (float(raised) / float(campaign.goal_amount) * 100) if campaign.goal_amount else 0
-
-            deadlines.append({
-                "id": str(campaign.id),
-                "type": "campaign_end",
-                "title": f"{campaign.name} ends",
-                "date": campaign.end_date.isoformat(),
-                "days_until": (campaign.end_date.date() - today.date()).days,
-                "priority": "high" if (campaign.end_date.date() - today.date()).days <= 7 else "medium",
-                "details": {
-                    "progress": round(progress, 1),
-                    "raised": float(raised),
-                    "goal": float(campaign.goal_amount) if campaign.goal_amount else 0
-                },
-                "icon": "target"
-            })
-
-        # 2. Tasks due
-        tasks = db.query(Task).filter(
-            Task.organization_id == organization_id,
-            Task.status.in_(['pending', 'in_progress']),
-            Task.due_date >= today,
-            Task.due_date <= end_date
-        ).order_by(Task.due_date).limit(10).all()
-
-        for task in tasks:
-            deadlines.append({
-                "id": str(task.id),
-                "type": "task",
-                "title": task.title,
-                "date": task.due_date.isoformat(),
-                "days_until": (task.due_date.date() - today.date()).days,
-                "priority": task.priority,
-                "details": {
-                    "task_type": task.task_type if hasattr(task, 'task_type') else "general",
-                    "status": task.status
-                },
-                "icon": "check-circle"
-            })
-
-        # 3. Major donor anniversaries (donors with gifts > $10,000 last year)
-        one_year_ago_start = today.replace(year=today.year - 1) - timedelta(days=7)
-        one_year_ago_end = today.replace(year=today.year - 1) + timedelta(days=days)
-
-        anniversary_donations = db.query(Donation).join(Donor).filter(
-            Donation.organization_id == organization_id,
-            Donation.amount >= 10000,
-            Donation.donation_date >= one_year_ago_start,
-            Donation.donation_date <= one_year_ago_end
-        ).all()
-
-        for donation in anniversary_donations:
-            donor = db.query(Donor).filter(Donor.id == donation.donor_id).first()
-            if donor and donation.donation_date:
-                anniversary_date = donation.donation_date.replace(year=today.year)
-                if anniversary_date.date() >= today.date():
-                    deadlines.append({
-                        "id": f"anniversary-{donation.id}",
-                        "type": "anniversary",
-                        "title": f"{donor.first_name} {donor.last_name} - Gift Anniversary",
-                        "date": anniversary_date.isoformat(),
-                        "days_until": (anniversary_date.date() - today.date()).days,
-                        "priority": "medium",
-                        "details": {
-                            "donor_name": f"{donor.first_name} {donor.last_name}",
-                            "last_gift": float(donation.amount),
-                            "donor_id": str(donor.id)
-                        },
-                        "icon": "gift"
-                    })
-
-        # 4. Stewardship touchpoints (tasks with stewardship type)
-        if hasattr(Task, 'task_type'):
-            stewardship_tasks = db.query(Task).filter(
-                Task.organization_id == organization_id,
-                Task.task_type == 'stewardship',
-                Task.status.in_(['pending', 'in_progress']),
-                Task.due_date >= today,
-                Task.due_date <= end_date
-            ).order_by(Task.due_date).all()
-
-            for task in stewardship_tasks:
-                # Avoid duplicates
-                if not any(d['id'] == str(task.id) for d in deadlines):
-                    deadlines.append({
-                        "id": str(task.id),
-                        "type": "stewardship",
-                        "title": task.title,
-                        "date": task.due_date.isoformat(),
-                        "days_until": (task.due_date.date() - today.date()).days,
-                        "priority": task.priority,
-                        "details": {
-                            "description": task.description
-                        },
-                        "icon": "heart"
-                    })
-
-        # Sort all deadlines by date
-        deadlines.sort(key=lambda x: x['date'])
-
-        # Limit to reasonable number
-        deadlines = deadlines[:15]
+        result = get_deadlines(db, organization_id, days)
 
         return {
             "organization_id": organization_id,
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": result["generated_at"],
             "period_days": days,
-            "total_count": len(deadlines),
-            "deadlines": deadlines,
-            "summary": {
-                "campaigns_ending": len([d for d in deadlines if d['type'] == 'campaign_end']),
-                "tasks_due": len([d for d in deadlines if d['type'] == 'task']),
-                "anniversaries": len([d for d in deadlines if d['type'] == 'anniversary']),
-                "stewardship": len([d for d in deadlines if d['type'] == 'stewardship'])
-            }
+            "total_count": len(result["deadlines"]),
+            "deadlines": result["deadlines"],
+            "summary": result["summary"]
         }
 
     except Exception as e:
@@ -847,7 +633,7 @@ async def get_donors_for_thank_you(
         organization_id: str,
         days: int = 7,
         limit: int = 50,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -10,7 +10,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 # Import from your existing codebase
-from database import get_db
+from database import get_read_db
 from models import Donations as Donation, Donors as Donor, Campaigns as Campaign, Organizations as Organization
 from user_management.auth_dependencies import get_current_user
 
@@ -20,7 +20,7 @@ router = APIRouter(prefix="/api/v1/analytics", tags=["Enhanced Analytics"])
 @router.get("/strategic-summary/{organization_id}")
 async def get_ceo_strategic_summary(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -0,0 +1,1059 @@
+"""
+Thank-You Dispatch
+Wise Investor Platform
+
+Background pipeline behind POST /communications/thank-you. A request becomes a
+ThankYouJob and returns straight away; the job then runs in three stages:
+
+1. prepare  - donors are read in chunks, with each donor's latest gift from a
+              single DISTINCT ON (donor_id) query per chunk. Content is
+              rendered from templates compiled once per job and the
+              Communications rows are bulk inserted as "pending".
+2. send     - chunks of email messages go through a bounded asyncio queue to a
+              small pool of send workers. Each worker hands whole batches to
+              the mail transport and retries transient failures with
+              exponential backoff and jitter.
+3. record   - delivered and failed rows are flipped to "sent" / "failed" in one
+              UPDATE per batch.
+
+Letters are only recorded (status "pending") for the print run.
+
+Jobs are stored in thank_you_jobs and every Communications row they record
+carries thank_you_job_id, so status is read from the database by any worker
+and delivery progress is counted from the rows themselves. The worker running
+a job renews a lease on it; when a worker dies, another one takes the job over
+once the lease expires, sends its still-pending emails and continues the
+preparation where it stopped.
+
+Transports are pluggable (register_transport). Two ship here:
+    smtp  - any SMTP relay; point SMTP_HOST/SMTP_PORT at a local debugging
+            server (e.g. `python -m aiosmtpd -n -l localhost:1025`) for testing
+    file  - writes every message as an .eml file under THANK_YOU_OUTBOX_DIR
+
+Configuration (environment):
+    THANK_YOU_TRANSPORT      smtp | file (default: file)
+    THANK_YOU_FROM_EMAIL     sender address
+    THANK_YOU_OUTBOX_DIR     file sink directory (default: ./outbox)
+    THANK_YOU_BATCH_SIZE     donors per chunk / messages per send batch (default: 200)
+    THANK_YOU_SEND_WORKERS   concurrent send workers (default: 4)
+    THANK_YOU_MAX_ATTEMPTS   send attempts per message (default: 4)
+    THANK_YOU_LEASE_SECONDS  job lease; an orphaned job resumes after it (default: 120)
+    SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_USE_TLS
+
+Dry run against the file sink:
+    python -m ai_analytics.thank_you_dispatch --org <organization_id> --days 365
+"""
+
+from dataclasses import dataclass, field
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from string import Formatter
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+import asyncio
+import json
+import logging
+import os
+import random
+import smtplib
+import socket
+
+from sqlalchemy import bindparam, insert, text
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import (
+    Donations as Donation,
+    Donors as Donor,
+    Communications,
+    ThankYouJobs,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("THANK_YOU_BATCH_SIZE", "200"))
+SEND_WORKERS = int(os.getenv("THANK_YOU_SEND_WORKERS", "4"))
+MAX_ATTEMPTS = int(os.getenv("THANK_YOU_MAX_ATTEMPTS", "4"))
+FROM_EMAIL = os.getenv("THANK_YOU_FROM_EMAIL", "noreply@wiseinvestor.org")
+LEASE_SECONDS = float(os.getenv("THANK_YOU_LEASE_SECONDS", "120"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+SEND_METHOD_CHANNELS = {
+    "email": ("email",),
+    "letter": ("letter",),
+    "both": ("email", "letter"),
+}
+
+# Jobs returned by the list endpoint, errors kept per job, orphaned jobs taken over per lease tick
+MAX_LISTED_JOBS = 50
+MAX_JOB_ERRORS = 50
+MAX_RESUMED_JOBS = 4
+
+
+# =====================================================================
+# TEMPLATES
+# =====================================================================
+
+THANK_YOU_TEMPLATES = {
+    "major_gift": (
+        "Your Extraordinary Generosity - Thank You, {first_name}!",
+        """Dear {donor_name},
+
+On behalf of everyone at {org_name}, I want to express our deepest gratitude for your extraordinary gift of {amount} received on {date}.
+
+Your remarkable generosity places you among our most valued supporters and will have a transformative impact on our mission. Gifts of this magnitude allow us to expand our programs and reach more people in need.
+
+{custom_message}
+
+We would love to schedule a personal meeting to share more about how your gift is making a difference. Please let us know a convenient time.
+
+With heartfelt appreciation,
+
+{org_name} Leadership Team""",
+    ),
+    "first_time": (
+        "Welcome to the {org_name} Family!",
+        """Dear {donor_name},
+
+Welcome! Your first gift of {amount} means the world to us at {org_name}.
+
+As a new member of our donor family, you've taken the first step in creating lasting change. We're thrilled to have you join our community of supporters who share our vision for a better tomorrow.
+
+{custom_message}
+
+We look forward to keeping you updated on the impact of your generosity.
+
+With warm regards,
+
+{org_name} Team""",
+    ),
+    "recurring": (
+        "Thank You for Your Continued Support!",
+        """Dear {donor_name},
+
+Thank you for your continued commitment to {org_name} through your recurring gift of {amount}.
+
+Monthly donors like you provide the reliable foundation that allows us to plan ahead and maximize our impact. Your ongoing support is truly invaluable.
+
+{custom_message}
+
+Gratefully yours,
+
+{org_name} Team""",
+    ),
+    "standard": (
+        "Thank You for Your Gift to {org_name}",
+        """Dear {donor_name},
+
+Thank you for your generous gift of {amount} to {org_name}.
+
+Your support makes a real difference in our ability to fulfill our mission and serve our community. We are deeply grateful for your trust in our work.
+
+{custom_message}
+
+With sincere appreciation,
+
+{org_name} Team""",
+    ),
+}
+
+
+class CompiledTemplate:
+    """
+    A template parsed once into literal text and field names.
+
+    bind() substitutes the fields that are the same for every donor of a job
+    (organization name, custom message); render() then only joins strings.
+    """
+
+    def __init__(self, parts: List[Tuple[str, Optional[str]]]):
+        self.parts = parts
+
+    @classmethod
+    def compile(cls, source: str) -> "CompiledTemplate":
+        return cls([(literal, name) for literal, name, _, _ in Formatter().parse(source)])
+
+    def bind(self, **fields) -> "CompiledTemplate":
+        parts = []
+        for literal, name in self.parts:
+            if name in fields:
+                literal, name = literal + str(fields[name]), None
+            if parts and parts[-1][1] is None:
+                literal = parts.pop()[0] + literal
+            parts.append((literal, name))
+        return CompiledTemplate(parts)
+
+    def render(self, fields: Dict[str, str]) -> str:
+        return "".join(
+            literal + (fields[name] if name is not None else "")
+            for literal, name in self.parts
+        )
+
+
+COMPILED_TEMPLATES = {
+    template_type: (CompiledTemplate.compile(subject), CompiledTemplate.compile(body))
+    for template_type, (subject, body) in THANK_YOU_TEMPLATES.items()
+}
+
+
+def bind_thank_you_template(template_type: str, org_name: Optional[str],
+                            custom_message: Optional[str] = None) -> Tuple[CompiledTemplate, CompiledTemplate]:
+    """Subject and body templates for one job; unknown types fall back to standard"""
+    subject, body = COMPILED_TEMPLATES.get(template_type, COMPILED_TEMPLATES["standard"])
+    constants = {
+        "org_name": org_name or "Our Organization",
+        "custom_message": custom_message or "",
+    }
+    return subject.bind(**constants), body.bind(**constants)
+
+
+def render_thank_you(template: Tuple[CompiledTemplate, CompiledTemplate], donor,
+                     amount=None, donation_date=None) -> Tuple[str, str]:
+    """Render (subject, content) for a donor and their latest gift, if any"""
+    if amount is not None:
+        amount_str = f"${float(amount):,.2f}"
+        date_str = donation_date.strftime('%B %d, %Y') if donation_date else "recently"
+    else:
+        amount_str = "your generous gift"
+        date_str = "recently"
+
+    fields = {
+        "first_name": donor.first_name or "",
+        "donor_name": f"{donor.first_name} {donor.last_name}",
+        "amount": amount_str,
+        "date": date_str,
+    }
+    subject, body = template
+    return subject.render(fields), body.render(fields)
+
+
+# =====================================================================
+# TRANSPORTS
+# =====================================================================
+
+@dataclass
+class ThankYouMessage:
+    communication_id: UUID
+    to_email: str
+    to_name: str
+    subject: str
+    content: str
+    attempts: int = 0
+
+    def to_email_message(self, from_email: str) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = from_email
+        message["To"] = f"{self.to_name} <{self.to_email}>"
+        message["Subject"] = self.subject
+        message["Message-ID"] = f"<{self.communication_id}@wiseinvestor>"
+        message.set_content(self.content)
+        return message
+
+
+@dataclass
+class BatchResult:
+    sent: List[UUID] = field(default_factory=list)
+    failed: Dict[UUID, str] = field(default_factory=dict)  # permanent failures
+    retry: List[ThankYouMessage] = field(default_factory=list)  # transient failures
+
+
+class MailTransport:
+    """Delivers batches of messages; subclasses implement _send_batch synchronously"""
+
+    name = "base"
+
+    def __init__(self, from_email: str = FROM_EMAIL):
+        self.from_email = from_email
+
+    async def send_batch(self, messages: List[ThankYouMessage]) -> BatchResult:
+        return await asyncio.to_thread(self._send_batch, messages)
+
+    def _send_batch(self, messages: List[ThankYouMessage]) -> BatchResult:
+        raise NotImplementedError
+
+
+class SMTPTransport(MailTransport):
+    """One SMTP connection per batch"""
+
+    name = "smtp"
+
+    def __init__(self, host: str = None, port: int = None, username: str = None,
+                 password: str = None, use_tls: bool = None, timeout: float = 30.0, **kwargs):
+        super().__init__(**kwargs)
+        self.host = host or os.getenv("SMTP_HOST", "localhost")
+        self.port = port or int(os.getenv("SMTP_PORT", "25"))
+        self.username = username or os.getenv("SMTP_USERNAME")
+        self.password = password or os.getenv("SMTP_PASSWORD")
+        self.use_tls = use_tls if use_tls is not None else os.getenv("SMTP_USE_TLS", "false").lower() == "true"
+        self.timeout = timeout
+
+    def _send_batch(self, messages: List[ThankYouMessage]) -> BatchResult:
+        result = BatchResult()
+        try:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        except OSError as e:
+            logger.warning(f"SMTP connect to {self.host}:{self.port} failed: {e}")
+            result.retry.extend(messages)
+            return result
+
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+
+            for index, message in enumerate(messages):
+                try:
+                    smtp.send_message(message.to_email_message(self.from_email))
+                    result.sent.append(message.communication_id)
+                except smtplib.SMTPRecipientsRefused as e:
+                    result.failed[message.communication_id] = f"recipient refused: {e.recipients}"
+                except smtplib.SMTPResponseException as e:
+                    if e.smtp_code >= 500:
+                        result.failed[message.communication_id] = f"{e.smtp_code} {e.smtp_error!r}"
+                    else:
+                        result.retry.append(message)
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    result.retry.extend(messages[index:])
+                    break
+        except (smtplib.SMTPException, OSError) as e:
+            logger.warning(f"SMTP session failed: {e}")
+            done = set(result.sent) | set(result.failed)
+            result.retry = [m for m in messages if m.communication_id not in done]
+        finally:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+        return result
+
+
+class FileSinkTransport(MailTransport):
+    """Writes each message to <outbox>/<YYYYMMDD>/<communication_id>.eml"""
+
+    name = "file"
+
+    def __init__(self, directory: str = None, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory or os.getenv("THANK_YOU_OUTBOX_DIR", "outbox")
+
+    def _send_batch(self, messages: List[ThankYouMessage]) -> BatchResult:
+        result = BatchResult()
+        folder = os.path.join(self.directory, datetime.now().strftime("%Y%m%d"))
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except OSError:
+            result.retry.extend(messages)
+            return result
+
+        for message in messages:
+            path = os.path.join(folder, f"{message.communication_id}.eml")
+            try:
+                with open(path, "wb") as fh:
+                    fh.write(message.to_email_message(self.from_email).as_bytes())
+                result.sent.append(message.communication_id)
+            except OSError:
+                result.retry.append(message)
+        return result
+
+
+TRANSPORTS: Dict[str, Callable[[], MailTransport]] = {
+    SMTPTransport.name: SMTPTransport,
+    FileSinkTransport.name: FileSinkTransport,
+}
+
+
+def register_transport(name: str, factory: Callable[[], MailTransport]) -> None:
+    """Make a transport (SendGrid, SES, ...) selectable through THANK_YOU_TRANSPORT"""
+    TRANSPORTS[name] = factory
+
+
+def get_transport(name: Optional[str] = None) -> MailTransport:
+    name = name or os.getenv("THANK_YOU_TRANSPORT", FileSinkTransport.name)
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown mail transport '{name}'. Available: {', '.join(sorted(TRANSPORTS))}")
+    return TRANSPORTS[name]()
+
+
+# =====================================================================
+# RETRY POLICY
+# =====================================================================
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = MAX_ATTEMPTS
+    base_delay: float = 2.0
+    max_delay: float = 60.0
+    jitter: float = 0.25
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before attempt number `attempt + 1` (attempt counts from 1)"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+# =====================================================================
+# JOBS
+# =====================================================================
+
+FINISHED_STATUSES = ("completed", "completed_with_errors", "failed")
+
+# Only the first errors of a job are kept
+ADD_ERRORS_SQL = text("""
+    UPDATE thank_you_jobs
+    SET errors = errors || (
+        SELECT COALESCE(jsonb_agg(e.value ORDER BY e.ordinality), '[]'::jsonb)
+        FROM jsonb_array_elements(CAST(:errors AS jsonb)) WITH ORDINALITY e
+        WHERE e.ordinality <= :max_errors - jsonb_array_length(thank_you_jobs.errors)
+    )
+    WHERE id = :job_id
+""")
+
+# A job is done once every donor was prepared and no email row is still pending
+FINISH_SQL = text("""
+    UPDATE thank_you_jobs j
+    SET status = CASE
+            WHEN j.skipped > 0 AND NOT EXISTS (
+                SELECT 1 FROM communications c WHERE c.thank_you_job_id = j.id AND c.status = 'sent'
+            ) THEN 'failed'
+            WHEN j.skipped > 0 OR EXISTS (
+                SELECT 1 FROM communications c WHERE c.thank_you_job_id = j.id AND c.status = 'failed'
+            ) THEN 'completed_with_errors'
+            ELSE 'completed'
+        END,
+        finished_at = now(),
+        leased_until = NULL
+    WHERE j.id = :job_id
+      AND j.status = 'running'
+      AND j.prepared_offset >= jsonb_array_length(j.donor_ids)
+      AND NOT EXISTS (
+          SELECT 1 FROM communications c
+          WHERE c.thank_you_job_id = j.id AND c.channel = 'email' AND c.status = 'pending'
+      )
+    RETURNING j.status
+""")
+
+RENEW_SQL = text("""
+    UPDATE thank_you_jobs
+    SET leased_until = now() + make_interval(secs => :seconds)
+    WHERE id = :job_id AND worker = :worker AND status = 'running'
+""")
+
+# Running jobs whose worker died or hung without renewing its lease
+CLAIM_SQL = text("""
+    UPDATE thank_you_jobs
+    SET worker = :worker,
+        leased_until = now() + make_interval(secs => :seconds)
+    WHERE id IN (
+        SELECT id FROM thank_you_jobs
+        WHERE status = 'running' AND leased_until < now()
+        ORDER BY created_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id
+""")
+
+# Per-job row counts by channel and status, the source of delivery progress
+COMMUNICATION_COUNTS_SQL = text("""
+    SELECT thank_you_job_id, channel, status, COUNT(*) AS n
+    FROM communications
+    WHERE thank_you_job_id IN :job_ids
+    GROUP BY thank_you_job_id, channel, status
+""").bindparams(bindparam("job_ids", expanding=True))
+
+
+@dataclass
+class ThankYouJob:
+    """A job as run by this worker; its state is stored in thank_you_jobs"""
+    organization_id: str
+    donor_ids: List[str]
+    template_type: str
+    channels: Tuple[str, ...]
+    org_name: Optional[str] = None
+    subject: Optional[str] = None
+    custom_message: Optional[str] = None
+    sent_by: Optional[UUID] = None
+    id: str = field(default_factory=lambda: str(uuid4()))
+    prepared_offset: int = 0
+
+    @classmethod
+    def from_row(cls, row: ThankYouJobs) -> "ThankYouJob":
+        return cls(
+            organization_id=str(row.organization_id),
+            donor_ids=list(row.donor_ids),
+            template_type=row.template_type,
+            channels=tuple(row.channels),
+            org_name=row.org_name,
+            subject=row.subject,
+            custom_message=row.custom_message,
+            sent_by=row.sent_by,
+            id=str(row.id),
+            prepared_offset=row.prepared_offset,
+        )
+
+
+def job_dict(row: ThankYouJobs, counts: Dict[Tuple[str, str], int]) -> Dict:
+    """Status payload of a job from its row and its Communications counts by (channel, status)"""
+    total = len(row.donor_ids)
+    done = row.status in FINISHED_STATUSES
+    emails = sum(n for (channel, _), n in counts.items() if channel == "email")
+
+    if done:
+        status = row.status
+    elif row.prepared_offset < total:
+        status = "preparing" if row.prepared_offset else "queued"
+    else:
+        status = "sending"
+    return {
+        "job_id": str(row.id),
+        "organization_id": str(row.organization_id),
+        "status": status,
+        "template_type": row.template_type,
+        "channels": list(row.channels),
+        "total_donors": total,
+        "prepared": row.prepared,
+        "missing_donors": row.missing,
+        "emails_queued": emails,
+        "sent_count": counts.get(("email", "sent"), 0),
+        "failed_count": counts.get(("email", "failed"), 0) + row.skipped,
+        "retried_count": row.retried,
+        "letters_recorded": sum(n for (channel, _), n in counts.items() if channel == "letter"),
+        "progress": round(row.prepared_offset / total * 100, 1) if total and not done else 100.0,
+        "errors": row.errors or [],
+        "worker": row.worker,
+        "created_at": row.created_at.isoformat(),
+        "finished_at": row.finished_at.isoformat() if row.finished_at else None,
+    }
+
+
+def communication_counts(db: Session, job_ids: List) -> Dict:
+    """job_id -> {(channel, status): rows}"""
+    counts: Dict = defaultdict(dict)
+    if job_ids:
+        for row in db.execute(COMMUNICATION_COUNTS_SQL, {"job_ids": list(job_ids)}):
+            counts[row.thank_you_job_id][(row.channel, row.status)] = row.n
+    return counts
+
+
+def get_job_status(db: Session, organization_id: str, job_id: str) -> Optional[Dict]:
+    """Progress of one job, answered by any worker"""
+    try:
+        job_uuid = UUID(str(job_id))
+    except ValueError:
+        return None
+    row = db.query(ThankYouJobs).filter(
+        ThankYouJobs.id == job_uuid,
+        ThankYouJobs.organization_id == organization_id
+    ).first()
+    if row is None:
+        return None
+    return job_dict(row, communication_counts(db, [row.id])[row.id])
+
+
+def list_job_statuses(db: Session, organization_id: str, limit: int = MAX_LISTED_JOBS) -> List[Dict]:
+    rows = db.query(ThankYouJobs).filter(
+        ThankYouJobs.organization_id == organization_id
+    ).order_by(ThankYouJobs.created_at.desc()).limit(limit).all()
+    counts = communication_counts(db, [row.id for row in rows])
+    return [job_dict(row, counts[row.id]) for row in rows]
+
+
+def create_job(job: ThankYouJob, lease_seconds: float) -> None:
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        db.add(ThankYouJobs(
+            id=UUID(job.id),
+            organization_id=job.organization_id,
+            template_type=job.template_type,
+            channels=list(job.channels),
+            donor_ids=[str(donor_id) for donor_id in job.donor_ids],
+            org_name=job.org_name,
+            subject=job.subject,
+            custom_message=job.custom_message,
+            sent_by=job.sent_by,
+            status="running",
+            errors=[],
+            worker=WORKER_ID,
+            leased_until=now + timedelta(seconds=lease_seconds),
+            created_at=now,
+        ))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def add_errors(db: Session, job_id: str, errors: List[Dict]) -> None:
+    if errors:
+        db.execute(ADD_ERRORS_SQL, {"job_id": job_id, "errors": json.dumps(errors),
+                                    "max_errors": MAX_JOB_ERRORS})
+
+
+def record_job_errors(job_id: str, errors: List[Dict]) -> None:
+    db = SessionLocal()
+    try:
+        add_errors(db, job_id, errors)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def finish_if_drained(job_id: str) -> Optional[str]:
+    """Mark the job finished when nothing is left to prepare or send; returns its final status"""
+    db = SessionLocal()
+    try:
+        status = db.execute(FINISH_SQL, {"job_id": job_id}).scalar()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if status:
+        logger.info(f"Thank-you job {job_id} finished: {status}")
+    return status
+
+
+def latest_gifts(db: Session, organization_id, donor_ids: List) -> Dict:
+    """donor_id -> (amount, donation_date) of each donor's most recent gift"""
+    rows = db.query(
+        Donation.donor_id,
+        Donation.amount,
+        Donation.donation_date,
+    ).filter(
+        Donation.organization_id == organization_id,
+        Donation.donor_id.in_(donor_ids)
+    ).distinct(Donation.donor_id).order_by(
+        Donation.donor_id,
+        Donation.donation_date.desc().nulls_last()
+    ).all()
+    return {row.donor_id: (row.amount, row.donation_date) for row in rows}
+
+
+def prepare_chunk(job: ThankYouJob, template, start: int, donor_ids: List[str]) -> Optional[List[ThankYouMessage]]:
+    """
+    Render and record one chunk of donors and advance the job's
+    prepared_offset in the same transaction; returns the emails to send, or
+    None when another worker took the job over
+    """
+    db = SessionLocal()
+    try:
+        donors = db.query(
+            Donor.id, Donor.first_name, Donor.last_name, Donor.email
+        ).filter(
+            Donor.organization_id == job.organization_id,
+            Donor.id.in_(donor_ids)
+        ).all()
+        gifts = latest_gifts(db, job.organization_id, [d.id for d in donors])
+
+        now = datetime.utcnow()
+        rows, messages, errors = [], [], []
+        for donor in donors:
+            amount, donation_date = gifts.get(donor.id, (None, None))
+            subject, content = render_thank_you(template, donor, amount, donation_date)
+            if job.subject:
+                subject = job.subject
+
+            for channel in job.channels:
+                communication_id = uuid4()
+                status = "pending"
+                if channel == "email":
+                    if donor.email:
+                        messages.append(ThankYouMessage(
+                            communication_id=communication_id,
+                            to_email=donor.email,
+                            to_name=f"{donor.first_name} {donor.last_name}",
+                            subject=subject,
+                            content=content,
+                        ))
+                    else:
+                        status = "failed"
+                        errors.append({"donor_id": str(donor.id), "error": "No email address on file"})
+                rows.append({
+                    "id": communication_id,
+                    "organization_id": job.organization_id,
+                    "donor_id": donor.id,
+                    "communication_type": "thank_you",
+                    "channel": channel,
+                    "subject": subject,
+                    "content": content,
+                    "status": status,
+                    "sent_by": job.sent_by,
+                    "thank_you_job_id": job.id,
+                    "created_at": now,
+                    "updated_at": now,
+                })
+
+        advanced = db.query(ThankYouJobs).filter(
+            ThankYouJobs.id == job.id,
+            ThankYouJobs.worker == WORKER_ID,
+            ThankYouJobs.prepared_offset == start
+        ).update({
+            ThankYouJobs.prepared_offset: start + len(donor_ids),
+            ThankYouJobs.prepared: ThankYouJobs.prepared + len(donors),
+            ThankYouJobs.missing: ThankYouJobs.missing + len(donor_ids) - len(donors),
+        }, synchronize_session=False)
+        if not advanced:
+            db.rollback()
+            return None
+        if rows:
+            db.execute(insert(Communications), rows)
+        add_errors(db, job.id, errors)
+        db.commit()
+
+        job.prepared_offset = start + len(donor_ids)
+        return messages
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def skip_unprepared(job: ThankYouJob, error: str) -> None:
+    """Give up on the donors a failed preparation did not reach"""
+    db = SessionLocal()
+    try:
+        total = len(job.donor_ids)
+        db.query(ThankYouJobs).filter(ThankYouJobs.id == job.id).update({
+            ThankYouJobs.prepared_offset: total,
+            ThankYouJobs.skipped: ThankYouJobs.skipped + total - job.prepared_offset,
+        }, synchronize_session=False)
+        add_errors(db, job.id, [{"donor_id": None, "error": error}])
+        db.commit()
+        job.prepared_offset = total
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def pending_messages(job_id: str, after: Optional[UUID], limit: int) -> List[ThankYouMessage]:
+    """Recorded emails of a job that were never marked sent or failed, in id order"""
+    db = SessionLocal()
+    try:
+        query = db.query(
+            Communications.id, Communications.subject, Communications.content,
+            Donor.email, Donor.first_name, Donor.last_name
+        ).join(Donor, Donor.id == Communications.donor_id).filter(
+            Communications.thank_you_job_id == job_id,
+            Communications.channel == "email",
+            Communications.status == "pending"
+        )
+        if after is not None:
+            query = query.filter(Communications.id > after)
+        return [
+            ThankYouMessage(
+                communication_id=row.id,
+                to_email=row.email,
+                to_name=f"{row.first_name} {row.last_name}",
+                subject=row.subject,
+                content=row.content,
+            )
+            for row in query.order_by(Communications.id).limit(limit).all()
+        ]
+    finally:
+        db.close()
+
+
+def record_results(job_id: str, sent: List[UUID], failed: List[UUID], retried: int = 0) -> None:
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        if sent:
+            db.query(Communications).filter(Communications.id.in_(sent)).update(
+                {"status": "sent", "sent_at": now, "updated_at": now}, synchronize_session=False
+            )
+        if failed:
+            db.query(Communications).filter(Communications.id.in_(failed)).update(
+                {"status": "failed", "updated_at": now}, synchronize_session=False
+            )
+        if retried:
+            db.query(ThankYouJobs).filter(ThankYouJobs.id == job_id).update(
+                {ThankYouJobs.retried: ThankYouJobs.retried + retried}, synchronize_session=False
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def claim_orphaned_jobs(limit: int, lease_seconds: float) -> List[ThankYouJob]:
+    """Take over running jobs whose lease expired"""
+    db = SessionLocal()
+    try:
+        ids = [row.id for row in db.execute(CLAIM_SQL, {
+            "worker": WORKER_ID, "seconds": lease_seconds, "limit": limit,
+        })]
+        db.commit()
+        if not ids:
+            return []
+        rows = db.query(ThankYouJobs).filter(ThankYouJobs.id.in_(ids)).all()
+        return [ThankYouJob.from_row(row) for row in rows]
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def renew_leases(job_ids: List[str], lease_seconds: float) -> List[str]:
+    """Extend this worker's leases; returns the jobs whose lease was lost"""
+    db = SessionLocal()
+    try:
+        lost = [
+            job_id for job_id in job_ids
+            if not db.execute(RENEW_SQL, {"job_id": job_id, "worker": WORKER_ID,
+                                          "seconds": lease_seconds}).rowcount
+        ]
+        db.commit()
+        return lost
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# =====================================================================
+# DISPATCHER
+# =====================================================================
+
+class ThankYouDispatcher:
+    """
+    Per-process job runner. Jobs prepare their chunks concurrently; email
+    batches share one bounded queue drained by `workers` send workers, so a
+    20k-donor year-end run cannot starve smaller requests of transport slots
+    for longer than one batch.
+
+    Job state lives in thank_you_jobs and the Communications rows, so the
+    status endpoints work on any worker. A lease loop renews the leases of the
+    jobs this process runs and resumes jobs whose worker stopped renewing
+    theirs: pending emails are sent again and preparation continues from
+    prepared_offset. A message delivered just before its worker died is sent
+    again (at-least-once delivery).
+    """
+
+    def __init__(self, transport_factory: Callable[[], MailTransport] = get_transport,
+                 batch_size: int = BATCH_SIZE, workers: int = SEND_WORKERS,
+                 retry_policy: RetryPolicy = None, lease_seconds: float = LEASE_SECONDS):
+        self.transport_factory = transport_factory
+        self.batch_size = batch_size
+        self.workers = workers
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.lease_seconds = lease_seconds
+        self.jobs: Dict[str, ThankYouJob] = {}  # jobs this process runs
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._lease_task: Optional[asyncio.Task] = None
+        self._running: List[asyncio.Task] = []
+        self._transport: Optional[MailTransport] = None
+
+    def start(self) -> None:
+        """Start the send workers and the lease loop; must be called from the event loop"""
+        if self._queue is None or any(t.done() for t in self._workers):
+            for task in self._workers:
+                task.cancel()
+            self._transport = self.transport_factory()
+            self._queue = asyncio.Queue(maxsize=self.workers * 2)
+            self._workers = [asyncio.create_task(self._send_worker(n)) for n in range(self.workers)]
+        if self._lease_task is None or self._lease_task.done():
+            self._lease_task = asyncio.create_task(self._lease_loop())
+
+    async def stop(self) -> None:
+        """Stop without finishing; the leases run out and another worker resumes the jobs"""
+        tasks = self._workers + self._running + ([self._lease_task] if self._lease_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue, self._workers, self._running, self._lease_task = None, [], [], None
+        self.jobs.clear()
+
+    async def submit(self, job: ThankYouJob) -> ThankYouJob:
+        """Store and start a job"""
+        self.start()
+        await asyncio.to_thread(create_job, job, self.lease_seconds)
+        self._run(job)
+        return job
+
+    def _run(self, job: ThankYouJob, resume: bool = False) -> None:
+        self.jobs[job.id] = job
+        self._running = [t for t in self._running if not t.done()]
+        self._running.append(asyncio.create_task(self._process(job, resume)))
+
+    async def _lease_loop(self) -> None:
+        while True:
+            try:
+                lost = await asyncio.to_thread(renew_leases, list(self.jobs), self.lease_seconds)
+                for job_id in lost:
+                    logger.warning(f"Thank-you job {job_id} lost its lease")
+                    self.jobs.pop(job_id, None)
+                for job in await asyncio.to_thread(claim_orphaned_jobs, MAX_RESUMED_JOBS, self.lease_seconds):
+                    logger.info(f"Resuming thank-you job {job.id} at donor {job.prepared_offset}")
+                    self._run(job, resume=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Thank-you job lease loop failed")
+            await asyncio.sleep(self.lease_seconds / 3)
+
+    async def _process(self, job: ThankYouJob, resume: bool) -> None:
+        try:
+            if resume:
+                await self._requeue_pending(job)
+            await self._prepare(job)
+            await self._finish(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Thank-you job {job.id} stopped; it resumes once its lease expires")
+
+    async def _requeue_pending(self, job: ThankYouJob) -> None:
+        after = None
+        while True:
+            messages = await asyncio.to_thread(pending_messages, job.id, after, self.batch_size)
+            if not messages:
+                return
+            after = messages[-1].communication_id
+            await self._queue.put((job, messages))
+
+    async def _prepare(self, job: ThankYouJob) -> None:
+        template = bind_thank_you_template(job.template_type, job.org_name, job.custom_message)
+        try:
+            for start in range(job.prepared_offset, len(job.donor_ids), self.batch_size):
+                chunk = job.donor_ids[start:start + self.batch_size]
+                messages = await asyncio.to_thread(prepare_chunk, job, template, start, chunk)
+                if messages is None:
+                    logger.warning(f"Thank-you job {job.id} was taken over by another worker")
+                    self.jobs.pop(job.id, None)
+                    return
+                if messages:
+                    await self._queue.put((job, messages))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Thank-you job {job.id} failed while preparing")
+            await asyncio.to_thread(skip_unprepared, job, f"Preparation stopped: {e}")
+
+    async def _finish(self, job: ThankYouJob) -> None:
+        if job.id in self.jobs and await asyncio.to_thread(finish_if_drained, job.id):
+            self.jobs.pop(job.id, None)
+
+    async def _send_worker(self, number: int) -> None:
+        while True:
+            job, messages = await self._queue.get()
+            try:
+                await self._deliver(job, messages)
+            except Exception as e:
+                logger.exception(f"Thank-you send worker {number} failed a batch of job {job.id}")
+                try:
+                    await asyncio.to_thread(record_results, job.id, [], [m.communication_id for m in messages])
+                    await asyncio.to_thread(record_job_errors, job.id, [{"donor_id": None, "error": f"Batch failed: {e}"}])
+                except Exception:
+                    logger.exception(f"Could not record the failed batch of thank-you job {job.id}")
+            finally:
+                try:
+                    await self._finish(job)
+                except Exception:
+                    logger.exception(f"Could not finish thank-you job {job.id}")
+                self._queue.task_done()
+
+    async def _deliver(self, job: ThankYouJob, messages: List[ThankYouMessage]) -> None:
+        sent: List[UUID] = []
+        failed: Dict[UUID, str] = {}
+        retried = 0
+        pending = messages
+
+        while pending:
+            for message in pending:
+                message.attempts += 1
+            result = await self._transport.send_batch(pending)
+            sent.extend(result.sent)
+            failed.update(result.failed)
+
+            exhausted = [m for m in result.retry if m.attempts >= self.retry_policy.max_attempts]
+            for message in exhausted:
+                failed[message.communication_id] = f"gave up after {message.attempts} attempts"
+            pending = [m for m in result.retry if m.attempts < self.retry_policy.max_attempts]
+
+            if pending:
+                retried += len(pending)
+                await asyncio.sleep(self.retry_policy.delay(pending[0].attempts))
+
+        await asyncio.to_thread(record_results, job.id, sent, list(failed), retried)
+        await asyncio.to_thread(record_job_errors, job.id, [
+            {"donor_id": None, "error": f"{communication_id}: {error}"}
+            for communication_id, error in list(failed.items())[:MAX_JOB_ERRORS]
+        ])
+
+    async def drain(self) -> None:
+        """Wait until every job this process runs has finished"""
+        while self.jobs:
+            await asyncio.sleep(0.2)
+
+
+thank_you_dispatcher = ThankYouDispatcher()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from models import Organizations
+
+    parser = argparse.ArgumentParser(description="Send thank-you messages to recent donors")
+    parser.add_argument("--org", required=True, help="Organization ID")
+    parser.add_argument("--days", type=int, default=30, help="Donors who gave in the last N days")
+    parser.add_argument("--template", default="standard", choices=sorted(THANK_YOU_TEMPLATES))
+    parser.add_argument("--method", default="email", choices=sorted(SEND_METHOD_CHANNELS))
+    parser.add_argument("--transport", default="file", choices=sorted(TRANSPORTS))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        org = session.query(Organizations).filter(Organizations.id == args.org).first()
+        donor_ids = [
+            str(row[0]) for row in session.query(Donation.donor_id).filter(
+                Donation.organization_id == args.org,
+                Donation.donation_date >= datetime.now() - timedelta(days=args.days),
+                Donation.donor_id.isnot(None)
+            ).distinct().all()
+        ]
+    finally:
+        session.close()
+
+    async def run():
+        dispatcher = ThankYouDispatcher(transport_factory=lambda: get_transport(args.transport))
+        job = await dispatcher.submit(ThankYouJob(
+            organization_id=args.org,
+            donor_ids=donor_ids,
+            template_type=args.template,
+            channels=SEND_METHOD_CHANNELS[args.method],
+            org_name=org.name if org else None,
+        ))
+        await dispatcher.drain()
+        await dispatcher.stop()
+        return job
+
+    started = time.perf_counter()
+    result = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    session = SessionLocal()
+    try:
+        print(get_job_status(session, args.org, result.id))
+    finally:
+        session.close()
+    print(f"{len(donor_ids)} donors in {elapsed:.1f}s ({len(donor_ids) / max(elapsed, 1e-9):.0f} donors/s)")
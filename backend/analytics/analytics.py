@@ -3,7 +3,7 @@ Analytics Router - Real Database Implementation with Production Auth
 Replaces mock data with actual queries from your database
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, extract, and_, or_, case, desc
 #from typing import Optional
@@ -17,8 +17,10 @@ import hashlib
 from datetime import datetime, timedelta
 from typing import List, Optional
 import statistics
-from database import get_db
+from database import get_db, get_read_db, get_heavy_db, get_heavy_read_db, get_batch_db
 from models import Organizations as Organization, Users as User,  Donations as Donation, Donors as Donor,  Programs as Program
+from analytics import cohort_cube
+from utils import in_range, quarter_range, year_range
 #from new_models import Donor
 
 router = APIRouter(prefix="/api/v1/analytics", tags=["Analytics"])
@@ -103,7 +105,7 @@ def verify_organization_access(user: User, organization_id: UUID) -> None:
 @router.get("/executive-dashboard/{organization_id}")
 async def get_executive_dashboard(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -329,7 +331,7 @@ async def get_donor_lifecycle(
 @router.get("/donor-lifecycle/{organization_id}")
 async def get_donor_lifecycle(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -468,7 +470,7 @@ async def get_donor_lifecycle(
 @router.get("/fundraising-vitals/{organization_id}")
 async def get_fundraising_vitals(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -568,7 +570,7 @@ async def get_fundraising_vitals(
 @router.get("/revenue-rollup/{organization_id}")
 async def get_revenue_rollup(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -655,7 +657,7 @@ async def get_revenue_rollup(
 @router.get("/audience-growth/{organization_id}")
 async def get_audience_growth(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -725,7 +727,7 @@ async def get_audience_growth(
 @router.get("/donor-segments/{organization_id}")
 async def get_donor_segments(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -794,7 +796,7 @@ async def get_donor_segments(
 @router.get("/executive-report/{organization_id}")
 async def get_executive_report(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -965,8 +967,7 @@ async def get_executive_report(
     # Quarterly Highlights
     current_quarter_revenue = db.query(func.sum(Donation.amount)).filter(
         Donation.organization_id == organization_id,
-        extract('year', Donation.donation_date) == current_year,
-        extract('quarter', Donation.donation_date) == current_quarter
+        in_range(Donation.donation_date, quarter_range(current_year, current_quarter))
     ).scalar() or 0
 
     quarterly_highlights = [
@@ -1005,7 +1006,7 @@ async def get_executive_report(
 @router.get("/program-impact/{organization_id}")
 async def get_program_impact(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -1123,7 +1124,7 @@ async def get_program_impact(
 @router.get("/digital-performance/{organization_id}")
 async def get_digital_performance(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -1255,7 +1256,6 @@ from sqlalchemy import func, and_, or_, extract, case, distinct
 from datetime import datetime, timedelta
 from typing import List, Optional
 from uuid import UUID
-import statistics
 
 #router = APIRouter()
 
@@ -1267,7 +1267,7 @@ import statistics
 @router.get("/mission-vision/{organization_id}")
 async def get_mission_vision(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Organization mission, vision, and brand promise"""
@@ -1290,7 +1290,7 @@ async def get_mission_vision(
 @router.get("/swot/{organization_id}")
 async def get_swot_analysis(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """SWOT Analysis"""
@@ -1347,7 +1347,7 @@ async def get_swot_analysis(
 @router.get("/donor-segments/{organization_id}")
 async def get_donor_segments(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Donor segmentation analysis"""
@@ -1386,7 +1386,7 @@ async def get_donor_segments(
 @router.get("/donor-movement/{organization_id}")
 async def get_donor_movement(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Donor upgrades, downgrades, and status changes"""
@@ -1442,7 +1442,7 @@ async def get_donor_movement(
 @router.get("/donor-journey/{organization_id}")
 async def get_donor_journey(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Donor acquisition journey"""
@@ -1476,7 +1476,7 @@ async def get_donor_journey(
 async def get_donor_ltv(
         organization_id: UUID,
         limit: int = 20,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Top donors by lifetime value"""
@@ -1508,7 +1508,7 @@ async def get_donor_ltv(
 @router.get("/legacy-pipeline/{organization_id}")
 async def get_legacy_pipeline(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Legacy giving pipeline"""
@@ -1542,7 +1542,7 @@ async def get_legacy_pipeline(
 async def get_upgrade_readiness(
         organization_id: UUID,
         min_score: float = 0.6,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Donors ready for upgrade asks"""
@@ -1584,7 +1584,7 @@ async def get_advanced_lifecycle(
         organization_id: UUID,
         include_at_risk: bool = True,
         risk_threshold: str = 'medium',
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Advanced lifecycle with at-risk identification"""
@@ -1627,7 +1627,7 @@ async def get_advanced_lifecycle(
 async def get_impact_correlation(
         organization_id: UUID,
         lag_months: int = 3,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Program impact vs donor retention correlation"""
@@ -1694,7 +1694,7 @@ async def get_impact_correlation(
 async def get_okrs(
         organization_id: UUID,
         period: str = "2025",
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """OKRs with progress tracking"""
@@ -1761,7 +1761,7 @@ async def get_okrs(
 async def get_revenue_trends(
         organization_id: UUID,
         months: int = 12,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Revenue trends over time"""
@@ -1798,7 +1798,7 @@ async def get_revenue_trends(
 @router.get("/timeline/year-over-year/{organization_id}")
 async def get_year_over_year(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Year-over-year comparison"""
@@ -1851,7 +1851,7 @@ async def get_year_over_year(
 async def get_seasonal_patterns(
         organization_id: UUID,
         years: int = 2,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Seasonal giving patterns"""
@@ -1889,71 +1889,63 @@ async def get_seasonal_patterns(
 @router.get("/timeline/forecast/{organization_id}")
 async def get_forecast(
         organization_id: UUID,
-        months_ahead: int = 6,
-        db: Session = Depends(get_db),
+        months_ahead: int = Query(6, ge=1, le=24),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
-    """Revenue forecast"""
-    verify_organization_access(current_user, organization_id)
-
-    # Get last 12 months
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=365)
+    """Revenue forecast from the stored seasonal-trend fit (analytics/forecast_engine.py)"""
+    from analytics.forecast_engine import load_forecast
 
-    historical = db.query(
-        func.sum(Donation.amount).label('revenue')
-    ).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date
-    ).first()
+    verify_organization_access(current_user, organization_id)
 
-    monthly_avg = float(historical.revenue or 0) / 12
-    growth_rate = 1.05  # Assume 5% growth
+    forecast = load_forecast(db, organization_id, "revenue")
 
     forecasts = []
-    for i in range(1, months_ahead + 1):
-        forecast_date = end_date + timedelta(days=30 * i)
+    for point in forecast.future(months_ahead):
+        confidence = 1 - point.half_width / point.predicted if point.predicted > 0 else 0
         forecasts.append({
-            "period": forecast_date.strftime("%Y-%m"),
-            "forecasted_revenue": monthly_avg * (growth_rate ** i),
-            "confidence_level": max(50, 95 - (i * 5))  # Decreasing confidence
+            "period": point.period.strftime("%Y-%m"),
+            "forecasted_revenue": point.predicted,
+            "lower_bound": point.lower_bound,
+            "upper_bound": point.upper_bound,
+            "confidence_level": round(max(0, min(100, confidence * 100)), 1)
         })
 
     return {
         "months_ahead": months_ahead,
-        "baseline_monthly_avg": monthly_avg,
-        "assumed_growth_rate": (growth_rate - 1) * 100,
-        "forecasts": forecasts
+        "baseline_monthly_avg": forecast.mean_monthly(),
+        "assumed_growth_rate": round(forecast.monthly_growth() * 100, 2),
+        "forecasts": forecasts,
+        "model": forecast.model_info()
     }
 
 
 @router.get("/timeline/retention-cohorts/{organization_id}")
 async def get_retention_cohorts(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        grain: str = Query("year", regex="^(month|quarter|year)$"),
+        db: Session = Depends(get_heavy_db),
         current_user: User = Depends(get_current_user)
 ):
-    """Donor retention cohort analysis"""
+    """
+    Donor retention cohort analysis from the cohort retention cube.
+    still_active counts cohort donors who gave in the current or previous period.
+    """
     verify_organization_access(current_user, organization_id)
 
-    # Simplified cohort analysis
-    cohorts = db.query(
-        extract('year', Donor.first_donation_date).label('cohort_year'),
-        func.count(Donor.id).label('initial_donors'),
-        func.sum(case((Donor.donor_status == 'active', 1), else_=0)).label('still_active')
-    ).filter(
-        Donor.organization_id == organization_id,
-        Donor.first_donation_date.isnot(None)
-    ).group_by('cohort_year').order_by('cohort_year').all()
+    cohorts = cohort_cube.cohort_matrix(db, organization_id, grain)
 
     return {
+        "grain": grain,
         "cohorts": [
             {
-                "cohort_year": int(cohort.cohort_year),
-                "initial_donors": cohort.initial_donors,
-                "still_active": cohort.still_active,
-                "retention_rate": (cohort.still_active / cohort.initial_donors * 100) if cohort.initial_donors > 0 else 0
+                "cohort_year": cohort["cohort_period"].year,
+                "cohort_period": cohort["cohort_period"].isoformat(),
+                "initial_donors": cohort["initial_donors"],
+                "still_active": cohort["still_active"],
+                "retention_rate": cohort["retention_rate"],
+                "lifetime_revenue": cohort["lifetime_revenue"],
+                "activity": cohort["activity"]
             }
             for cohort in cohorts
         ]
@@ -1967,7 +1959,7 @@ async def get_retention_cohorts(
 @router.get("/avg-donation/{organization_id}")
 async def get_avg_donation(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Average donation amount"""
@@ -1991,7 +1983,7 @@ async def get_avg_donation(
 @router.get("/cpdr/{organization_id}")
 async def get_cpdr(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Cost Per Dollar Raised"""
@@ -2018,7 +2010,7 @@ async def get_cpdr(
 @router.get("/acquisition-cost/{organization_id}")
 async def get_acquisition_cost(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Donor acquisition cost"""
@@ -2026,7 +2018,7 @@ async def get_acquisition_cost(
 
     new_donors = db.query(func.count(Donor.id)).filter(
         Donor.organization_id == organization_id,
-        extract('year', Donor.first_donation_date) == datetime.now().year
+        in_range(Donor.first_donation_date, year_range(datetime.now().year))
     ).scalar() or 0
 
     # Estimate acquisition costs
@@ -2050,28 +2042,19 @@ async def get_retention_rate(
         prev_end: datetime = Query(...),
         curr_start: datetime = Query(...),
         curr_end: datetime = Query(...),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Donor retention rate"""
     verify_organization_access(current_user, organization_id)
 
-    # Donors who gave in previous period
-    prev_donors = db.query(func.distinct(Donation.donor_id)).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= prev_start,
-        Donation.donation_date <= prev_end
-    ).subquery()
-
-    # How many of those gave in current period
-    retained = db.query(func.count(func.distinct(Donation.donor_id))).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= curr_start,
-        Donation.donation_date <= curr_end,
-        Donation.donor_id.in_(prev_donors)
-    ).scalar() or 0
+    # Loaded on first use to keep numpy out of worker startup
+    from analytics.donation_snapshot import donation_timeline
+    timeline = donation_timeline(db, organization_id)
 
-    prev_count = db.query(func.count()).select_from(prev_donors).scalar() or 1
+    # Donors who gave in previous period, and how many of those gave in current period
+    retained = timeline.retained_donors(curr_start, curr_end, prev_start, prev_end)
+    prev_count = timeline.totals(prev_start, prev_end).donors or 1
 
     return {
         "retention_rate": (retained / prev_count * 100),
@@ -2085,7 +2068,7 @@ async def get_retention_rate(
 @router.get("/lapsed-rate/{organization_id}")
 async def get_lapsed_rate(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Lapsed donor rate"""
@@ -2108,44 +2091,97 @@ async def get_lapsed_rate(
     }
 
 
+# Affinity bands reported by /affinity (score 0-100)
+AFFINITY_BANDS = {
+    "high_affinity_donors": (70, None),
+    "medium_affinity_donors": (40, 70),
+    "low_affinity_donors": (None, 40),
+}
+
+# Query names of the scores persisted in donor_scores
+SCORE_NAMES = {
+    "affinity": "affinity_score",
+    "churn_risk": "churn_risk_score",
+    "capacity": "capacity_score",
+    "engagement": "engagement_score",
+    "rfm": "rfm_score",
+}
+
+
 @router.get("/affinity/{organization_id}")
 async def get_affinity(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Donor affinity score"""
     verify_organization_access(current_user, organization_id)
 
-    # Calculate based on engagement metrics
-    donors = db.query(Donor).filter(
-        Donor.organization_id == organization_id
-    ).all()
+    # Loaded on first use to keep numpy out of worker startup
+    from analytics.donor_scoring import score_summary
 
-    affinity_scores = []
-    for donor in donors:
-        # Simple affinity: frequency + recency + monetary
-        freq_score = min(30, donor.donation_count * 3)
-        recency_score = 40 if donor.last_donation_date and (datetime.now() - donor.last_donation_date).days < 90 else 20
-        monetary_score = min(30, (donor.total_donated or 0) / 1000)
+    # Frequency + recency + monetary affinity, persisted per donor in donor_scores
+    summary = score_summary(db, organization_id, "affinity_score", AFFINITY_BANDS)
+
+    return {
+        "average_affinity": round(summary["average"], 1),
+        **summary["bands"]
+    }
+
+
+@router.get("/scores/{organization_id}/top")
+async def get_top_scored_donors(
+        organization_id: UUID,
+        score: str = Query("affinity", description="affinity, churn_risk, capacity, engagement or rfm"),
+        limit: int = Query(50, ge=1, le=500),
+        min_score: Optional[float] = Query(None),
+        max_score: Optional[float] = Query(None),
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(get_current_user)
+):
+    """Donors with the highest persisted score, read from the donor_scores index"""
+    verify_organization_access(current_user, organization_id)
 
-        total_score = freq_score + recency_score + monetary_score
-        affinity_scores.append(total_score)
+    if score not in SCORE_NAMES:
+        raise HTTPException(status_code=400, detail=f"score must be one of {', '.join(SCORE_NAMES)}")
 
-    avg_affinity = statistics.mean(affinity_scores) if affinity_scores else 0
+    from analytics.donor_scoring import top_scores
 
+    rows = top_scores(db, organization_id, SCORE_NAMES[score], limit, min_score, max_score)
     return {
-        "average_affinity": round(avg_affinity, 1),
-        "high_affinity_donors": sum(1 for s in affinity_scores if s >= 70),
-        "medium_affinity_donors": sum(1 for s in affinity_scores if 40 <= s < 70),
-        "low_affinity_donors": sum(1 for s in affinity_scores if s < 40)
+        "score": score,
+        "donors": [
+            {
+                "donor_id": str(row.donor_id),
+                "donor_name": f"{row.first_name or ''} {row.last_name or ''}".strip(),
+                "email": row.email,
+                "score": round(row.score, 2),
+                "segment": row.donor_segment,
+                "calculated_at": row.calculated_at.isoformat() if row.calculated_at else None
+            }
+            for row in rows
+        ]
     }
 
 
+@router.post("/scores/{organization_id}/refresh")
+async def refresh_scores(
+        organization_id: UUID,
+        db: Session = Depends(get_batch_db),
+        current_user: User = Depends(get_current_user)
+):
+    """Rescore the organization's donors and write the changed rows to donor_scores"""
+    verify_organization_access(current_user, organization_id)
+
+    from analytics.donor_scoring import refresh_donor_scores
+
+    return refresh_donor_scores(db, organization_id)
+
+
 @router.get("/capacity/{organization_id}")
 async def get_capacity(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Donor capacity analysis"""
@@ -2171,7 +2207,7 @@ async def get_capacity(
 @router.get("/ltv-formula/{organization_id}")
 async def get_ltv_formula(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """LTV calculation breakdown"""
@@ -2207,7 +2243,7 @@ async def get_ltv_formula(
 @router.get("/digital/cpc/{organization_id}")
 async def get_cpc(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Cost per click for digital campaigns"""
@@ -2227,7 +2263,7 @@ async def get_cpc(
 @router.get("/digital/bounce-rate/{organization_id}")
 async def get_bounce_rate(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Website bounce rate"""
@@ -2245,7 +2281,7 @@ async def get_bounce_rate(
 @router.get("/digital/conversion-rate/{organization_id}")
 async def get_conversion_rate(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Website conversion rate"""
@@ -2263,7 +2299,7 @@ async def get_conversion_rate(
 @router.get("/digital/email-ctr/{organization_id}")
 async def get_email_ctr(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Email click-through rate"""
@@ -2282,7 +2318,7 @@ async def get_email_ctr(
 @router.get("/digital/email-open-rate/{organization_id}")
 async def get_email_open_rate(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Email open rate"""
@@ -2300,7 +2336,7 @@ async def get_email_open_rate(
 @router.get("/digital/sessions/{organization_id}")
 async def get_sessions(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Website sessions summary"""
@@ -2318,7 +2354,7 @@ async def get_sessions(
 @router.get("/digital/traffic-sources/{organization_id}")
 async def get_traffic_sources(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Website traffic source breakdown"""
@@ -2338,7 +2374,7 @@ async def get_traffic_sources(
 @router.get("/digital/social-engagement/{organization_id}")
 async def get_social_engagement(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Social media engagement metrics"""
@@ -2384,7 +2420,7 @@ async def get_social_engagement(
 async def get_executive_scorecard(
         organization_id: UUID,
         period: str = "YTD",
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Executive scorecard with all key metrics"""
@@ -2439,7 +2475,7 @@ async def get_executive_scorecard(
 @router.get("/engagement/investment-continuum/{organization_id}")
 async def get_donor_engagement_investment_continuum(
         organization_id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_heavy_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -12,7 +12,7 @@ from typing import List, Optional, Literal
 from decimal import Decimal
 import jwt
 from jwt import PyJWTError, ExpiredSignatureError
-from database import get_db
+from database import get_db, get_read_db
 from models import Organizations as Organization, Users as User, Donations as Donation, Donors as Donor, Programs as Program
 
 router = APIRouter(prefix="/api/v1/analytics", tags=["Analytics with Time Filtering"])
@@ -156,7 +156,7 @@ async def get_executive_dashboard_filtered(
         year: Optional[int] = Query(None, description="Specific year (defaults to current)"),
         month: Optional[int] = Query(None, description="Specific month (1-12)"),
         week: Optional[int] = Query(None, description="Specific week number (1-52)"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -183,71 +183,30 @@ async def get_executive_dashboard_filtered(
     # Calculate date range
     start_date, end_date, period_label = calculate_date_range(period_type, year, month, week)
 
-    # Total Revenue for period
-    total_revenue = db.query(func.sum(Donation.amount)).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date
-    ).scalar() or 0
+    # Loaded on first use to keep numpy out of worker startup
+    from analytics.donation_snapshot import donation_timeline
+    timeline = donation_timeline(db, organization_id)
 
-    # Total Donors
-    total_donors = db.query(func.count(Donor.id)).filter(
-        Donor.organization_id == organization_id
-    ).scalar() or 0
-
-    # Active Donors (donated in period)
-    active_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date
-    ).scalar() or 0
-
-    # Average Gift Size
-    avg_gift = db.query(func.avg(Donation.amount)).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date
-    ).scalar() or 0
-
-    # Number of donations in period
-    donation_count = db.query(func.count(Donation.id)).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date
-    ).scalar() or 0
+    period = timeline.totals(start_date, end_date)
+    total_revenue = period.revenue
+    total_donors = timeline.donor_count
+    active_donors = period.donors
+    avg_gift = period.average_gift
+    donation_count = period.donation_count
 
     # Donor Retention Rate (compare with previous period)
     period_days = (end_date - start_date).days
     prev_start = start_date - timedelta(days=period_days)
     prev_end = start_date - timedelta(seconds=1)
 
-    prev_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= prev_start,
-        Donation.donation_date <= prev_end
-    ).scalar() or 1
-
-    retained_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date,
-        Donation.donor_id.in_(
-            db.query(Donation.donor_id).filter(
-                Donation.organization_id == organization_id,
-                Donation.donation_date >= prev_start,
-                Donation.donation_date <= prev_end
-            )
-        )
-    ).scalar() or 0
+    previous = timeline.totals(prev_start, prev_end)
+    prev_donors = previous.donors or 1
+    retained_donors = timeline.retained_donors(start_date, end_date, prev_start, prev_end)
 
     retention_rate = (retained_donors / prev_donors * 100) if prev_donors > 0 else 0
 
     # Compare with previous period
-    prev_revenue = db.query(func.sum(Donation.amount)).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= prev_start,
-        Donation.donation_date <= prev_end
-    ).scalar() or 0
+    prev_revenue = previous.revenue
 
     revenue_growth = ((total_revenue - prev_revenue) / prev_revenue * 100) if prev_revenue > 0 else 0
 
@@ -291,7 +250,7 @@ async def get_revenue_trends(
         organization_id: UUID,
         period_type: str = Query("month", description="Breakdown by: month, week, day, quarter"),
         year: Optional[int] = Query(None, description="Specific year (defaults to current)"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -438,7 +397,7 @@ async def get_donor_lifecycle_filtered(
         year: Optional[int] = Query(None),
         month: Optional[int] = Query(None),
         week: Optional[int] = Query(None),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get donor lifecycle metrics for a specific time period"""
@@ -454,32 +413,15 @@ async def get_donor_lifecycle_filtered(
         Donor.organization_id == organization_id
     ).group_by(Donor.donor_status).all()
 
-    # Get new donors in period (first donation in this period)
-    new_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date,
-        Donation.donor_id.notin_(
-            db.query(Donation.donor_id).filter(
-                Donation.organization_id == organization_id,
-                Donation.donation_date < start_date
-            )
-        )
-    ).scalar() or 0
-
-    # Get recurring donors in period (2+ donations)
-    recurring_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date,
-        Donation.donor_id.in_(
-            db.query(Donation.donor_id).filter(
-                Donation.organization_id == organization_id,
-                Donation.donation_date >= start_date,
-                Donation.donation_date <= end_date
-            ).group_by(Donation.donor_id).having(func.count(Donation.id) > 1)
-        )
-    ).scalar() or 0
+    # Loaded on first use to keep numpy out of worker startup
+    from analytics.donation_snapshot import donation_timeline
+    timeline = donation_timeline(db, organization_id)
+
+    # New donors in period (first donation in this period)
+    new_donors = timeline.new_donors(start_date, end_date)
+
+    # Recurring donors in period (2+ donations)
+    recurring_donors = timeline.recurring_donors(start_date, end_date)
 
     lifecycle_data = {
         status: count for status, count in donors_by_status
@@ -513,7 +455,7 @@ async def get_fundraising_vitals_filtered(
         year: Optional[int] = Query(None),
         month: Optional[int] = Query(None),
         week: Optional[int] = Query(None),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get fundraising vitals for a specific time period"""
@@ -521,52 +463,25 @@ async def get_fundraising_vitals_filtered(
 
     start_date, end_date, period_label = calculate_date_range(period_type, year, month, week)
 
-    # Total raised in period
-    total_raised = db.query(func.sum(Donation.amount)).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date
-    ).scalar() or 0
-
-    # Average gift
-    avg_gift = db.query(func.avg(Donation.amount)).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date
-    ).scalar() or 0
-
-    # Donation count
-    donation_count = db.query(func.count(Donation.id)).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date
-    ).scalar() or 0
-
-    # Unique donors
-    unique_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date
-    ).scalar() or 0
-
-    # Online vs Offline (assuming payment_method field)
-    online_donations = db.query(func.sum(Donation.amount)).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= start_date,
-        Donation.donation_date <= end_date,
-        Donation.payment_method.in_(['credit_card', 'paypal', 'online'])
-    ).scalar() or 0
+    # Loaded on first use to keep numpy out of worker startup
+    from analytics.donation_snapshot import donation_timeline
+    timeline = donation_timeline(db, organization_id)
+
+    period = timeline.totals(start_date, end_date)
+    total_raised = period.revenue
+    avg_gift = period.average_gift
+    donation_count = period.donation_count
+    unique_donors = period.donors
+
+    # Online vs Offline (by payment_method)
+    online_donations = period.online_amount
 
     # Compare with previous period
     period_days = (end_date - start_date).days
     prev_start = start_date - timedelta(days=period_days)
     prev_end = start_date - timedelta(seconds=1)
 
-    prev_raised = db.query(func.sum(Donation.amount)).filter(
-        Donation.organization_id == organization_id,
-        Donation.donation_date >= prev_start,
-        Donation.donation_date <= prev_end
-    ).scalar() or 0
+    prev_raised = timeline.totals(prev_start, prev_end).revenue
 
     growth_rate = ((total_raised - prev_raised) / prev_raised * 100) if prev_raised > 0 else 0
 
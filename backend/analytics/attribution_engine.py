@@ -0,0 +1,400 @@
+"""
+Multi-Touch Attribution Engine
+Wise Investor Platform
+
+Builds donor touch paths from campaign_attributions once and scores every
+attribution model in a single vectorized pass:
+
+- first_touch / last_touch: all credit to the first / last touch in the path
+- linear: credit split evenly across the path
+- time_decay: credit halves every TIME_DECAY_HALF_LIFE_DAYS before the conversion
+- position_based: 40% first, 40% last, 20% shared by the middle touches
+
+A conversion is a donation with at least one attribution row; its path is the
+donor's touches in the LOOKBACK_DAYS window ending at the conversion. A donation
+without a donor is a path of its own touches only. Results are written to the
+attribution_cube table per org, month, channel and model so the attribution
+endpoint becomes a lookup.
+
+A build holds a per-organization advisory lock for its transaction, so a read
+that builds a missing cube waits for a concurrent build and then finds the cube
+instead of inserting the same cells again.
+"""
+
+from datetime import date, datetime
+from multiprocessing import Pool
+from typing import Dict, List, Optional
+from uuid import UUID
+import logging
+import time
+
+import numpy as np
+from sqlalchemy import text, insert
+from sqlalchemy.orm import Session
+
+from models import AttributionCube, CampaignAttribution
+
+logger = logging.getLogger(__name__)
+
+ATTRIBUTION_MODELS = ("first_touch", "last_touch", "linear", "time_decay", "position_based")
+
+LOOKBACK_DAYS = 90
+TIME_DECAY_HALF_LIFE_DAYS = 7
+MAX_PATH_LENGTH = 50
+
+# position_based split
+FIRST_TOUCH_SHARE = 0.4
+LAST_TOUCH_SHARE = 0.4
+
+SECONDS_PER_DAY = 86400
+
+# First key of pg_advisory_xact_lock(key, hashtext(org)) held by a build
+CUBE_LOCK_KEY = 2828
+
+# Donations without a donor are keyed by the donation, so anonymous gifts do not
+# share one touch path
+TOUCHES_SQL = text("""
+    SELECT
+        dense_rank() OVER (
+            ORDER BY d.donor_id, CASE WHEN d.donor_id IS NULL THEN d.id END
+        ) - 1                                            AS donor_idx,
+        dense_rank() OVER (ORDER BY ca.donation_id) - 1  AS conversion_idx,
+        dense_rank() OVER (ORDER BY ca.channel) - 1      AS channel_idx,
+        EXTRACT(EPOCH FROM ca.attributed_at)::bigint     AS ts,
+        d.amount::float8                                 AS amount,
+        COALESCE(ca.channel_cost, 0)::float8             AS cost,
+        COALESCE(ca.click_count, 0)                      AS clicks
+    FROM campaign_attributions ca
+    JOIN donations d ON d.id = ca.donation_id
+    WHERE ca.organization_id = :org_id
+""")
+
+CHANNELS_SQL = text("""
+    SELECT DISTINCT channel
+    FROM campaign_attributions
+    WHERE organization_id = :org_id
+    ORDER BY channel
+""")
+
+
+# =====================================================================
+# VECTORIZED SCORING
+# =====================================================================
+
+def _segment_sums(values: np.ndarray, segment_ids: np.ndarray, n_segments: int) -> np.ndarray:
+    return np.bincount(segment_ids, weights=values, minlength=n_segments)
+
+
+def score_touch_paths(
+        donor_idx: np.ndarray,
+        conversion_idx: np.ndarray,
+        channel_idx: np.ndarray,
+        ts: np.ndarray,
+        amount: np.ndarray,
+        cost: np.ndarray,
+        clicks: np.ndarray,
+        n_channels: int,
+        lookback_days: int = LOOKBACK_DAYS,
+        half_life_days: float = TIME_DECAY_HALF_LIFE_DAYS,
+        max_path_length: int = MAX_PATH_LENGTH
+) -> Dict:
+    """
+    Score all attribution models over one organization's touches.
+
+    Every argument is a 1-D array with one entry per attribution row.
+    Returns month keys plus per-model (n_months, n_channels) revenue and
+    conversion matrices and model-independent touch/click/cost matrices.
+    """
+    n_touches = len(ts)
+    if n_touches == 0:
+        return {"months": np.array([], dtype="datetime64[M]"), "models": {}}
+
+    donor_idx = donor_idx.astype(np.int64)
+    conversion_idx = conversion_idx.astype(np.int64)
+    channel_idx = channel_idx.astype(np.int64)
+    ts = ts.astype(np.int64)
+
+    # ---- Conversions: a donation's latest touch defines its time; donor and
+    # amount are the same on every row of a donation
+    n_conversions = int(conversion_idx.max()) + 1
+    conv_ts = np.full(n_conversions, np.iinfo(np.int64).min, dtype=np.int64)
+    np.maximum.at(conv_ts, conversion_idx, ts)
+    conv_donor = np.empty(n_conversions, dtype=np.int64)
+    conv_donor[conversion_idx] = donor_idx
+    conv_value = np.empty(n_conversions, dtype=np.float64)
+    conv_value[conversion_idx] = amount
+
+    # ---- Touch paths: touches sorted by (donor, time) and windows via searchsorted
+    t0 = ts.min()
+    stride = np.int64(1) << np.int64(40)  # ts offsets stay far below 2**40 seconds
+    key = donor_idx * stride + (ts - t0)
+    if np.all(key[1:] >= key[:-1]):
+        by_path = np.arange(n_touches)
+    else:
+        by_path = np.argsort(key, kind="stable")
+    touch_key = key[by_path]
+
+    # Conversion order is irrelevant to the result; sorting the probes keeps
+    # searchsorted cache-friendly (an unsorted probe is several times slower)
+    conv_key = conv_donor * stride + (conv_ts - t0)
+    conv_order = np.argsort(conv_key, kind="stable")
+    conv_key, conv_ts, conv_value = conv_key[conv_order], conv_ts[conv_order], conv_value[conv_order]
+
+    hi = np.searchsorted(touch_key, conv_key, side="right")
+    lo = np.searchsorted(touch_key, conv_key - lookback_days * SECONDS_PER_DAY, side="left")
+    lo = np.maximum(lo, hi - max_path_length)
+    path_len = hi - lo
+
+    # ---- Expand to (conversion, touch) pairs
+    n_pairs = int(path_len.sum())
+    pair_conv = np.repeat(np.arange(n_conversions), path_len)
+    pair_start = np.repeat(np.cumsum(path_len) - path_len, path_len)
+    pair_pos = np.arange(n_pairs) - pair_start
+    pair_touch = by_path[np.repeat(lo, path_len) + pair_pos]
+    pair_len = path_len[pair_conv]
+
+    is_first = pair_pos == 0
+    is_last = pair_pos == pair_len - 1
+
+    weights = {
+        "first_touch": is_first.astype(np.float64),
+        "last_touch": is_last.astype(np.float64),
+        "linear": 1.0 / pair_len,
+    }
+
+    middle_share = (1.0 - FIRST_TOUCH_SHARE - LAST_TOUCH_SHARE) / np.maximum(pair_len - 2, 1)
+    position = np.where(is_first, FIRST_TOUCH_SHARE, np.where(is_last, LAST_TOUCH_SHARE, middle_share))
+    position = np.where(pair_len == 1, 1.0, np.where(pair_len == 2, 0.5, position))
+    weights["position_based"] = position
+
+    age_days = (conv_ts[pair_conv] - ts[pair_touch]) / SECONDS_PER_DAY
+    decay = np.power(0.5, age_days / half_life_days)
+    weights["time_decay"] = decay / _segment_sums(decay, pair_conv, n_conversions)[pair_conv]
+
+    # ---- Aggregate into (month, channel) cells
+    conv_month = conv_ts.astype("datetime64[s]").astype("datetime64[M]")
+    touch_month = ts.astype("datetime64[s]").astype("datetime64[M]")
+    months = np.unique(np.concatenate([conv_month, touch_month]))
+    conv_month_idx = np.searchsorted(months, conv_month)
+    touch_month_idx = np.searchsorted(months, touch_month)
+
+    n_cells = len(months) * n_channels
+    pair_cell = conv_month_idx[pair_conv] * n_channels + channel_idx[pair_touch]
+    pair_value = conv_value[pair_conv]
+    shape = (len(months), n_channels)
+
+    models = {}
+    for model in ATTRIBUTION_MODELS:
+        w = weights[model]
+        models[model] = {
+            "revenue": np.bincount(pair_cell, weights=w * pair_value, minlength=n_cells).reshape(shape),
+            "conversions": np.bincount(pair_cell, weights=w, minlength=n_cells).reshape(shape),
+        }
+
+    touch_cell = touch_month_idx * n_channels + channel_idx
+    return {
+        "months": months,
+        "models": models,
+        "touches": np.bincount(touch_cell, minlength=n_cells).reshape(shape),
+        "clicks": np.bincount(touch_cell, weights=clicks, minlength=n_cells).reshape(shape),
+        "cost": np.bincount(touch_cell, weights=cost, minlength=n_cells).reshape(shape),
+        "n_conversions": n_conversions,
+        "n_pairs": n_pairs,
+    }
+
+
+# =====================================================================
+# CUBE BUILD / READ
+# =====================================================================
+
+def load_touches(db: Session, organization_id: UUID):
+    """Fetch one org's touches as contiguous arrays plus channel names"""
+    rows = db.execute(TOUCHES_SQL, {"org_id": organization_id}).fetchall()
+    channels = [r[0] for r in db.execute(CHANNELS_SQL, {"org_id": organization_id}).fetchall()]
+
+    if not rows:
+        return None, channels
+
+    columns = list(zip(*rows))
+    arrays = {
+        "donor_idx": np.fromiter(columns[0], dtype=np.int64, count=len(rows)),
+        "conversion_idx": np.fromiter(columns[1], dtype=np.int64, count=len(rows)),
+        "channel_idx": np.fromiter(columns[2], dtype=np.int64, count=len(rows)),
+        "ts": np.fromiter(columns[3], dtype=np.int64, count=len(rows)),
+        "amount": np.fromiter(columns[4], dtype=np.float64, count=len(rows)),
+        "cost": np.fromiter(columns[5], dtype=np.float64, count=len(rows)),
+        "clicks": np.fromiter(columns[6], dtype=np.float64, count=len(rows)),
+    }
+    return arrays, channels
+
+
+def lock_organization(db: Session, organization_id: UUID) -> None:
+    """Serialize cube builds of one organization until the transaction ends"""
+    db.execute(text("SELECT pg_advisory_xact_lock(:key, hashtext(:org))"),
+               {"key": CUBE_LOCK_KEY, "org": str(organization_id)})
+
+
+def build_attribution_cube(db: Session, organization_id: UUID, only_if_missing: bool = False) -> Dict:
+    """
+    Recompute and replace the attribution cube for one organization. With
+    only_if_missing the build is skipped when another build created the cube
+    while this one waited for the lock.
+    """
+    lock_organization(db, organization_id)
+    if only_if_missing and cube_exists(db, organization_id):
+        db.commit()
+        return {"organization_id": str(organization_id), "skipped": "exists"}
+
+    start = time.perf_counter()
+    arrays, channels = load_touches(db, organization_id)
+    load_seconds = time.perf_counter() - start
+
+    db.query(AttributionCube).filter(
+        AttributionCube.organization_id == organization_id
+    ).delete(synchronize_session=False)
+
+    if arrays is None:
+        db.commit()
+        return {"organization_id": str(organization_id), "touches": 0, "cells": 0}
+
+    start = time.perf_counter()
+    scored = score_touch_paths(n_channels=len(channels), **arrays)
+    score_seconds = time.perf_counter() - start
+
+    computed_at = datetime.utcnow()
+    month_starts = [m.astype(date) for m in scored["months"]]
+    rows = []
+    for model, result in scored["models"].items():
+        month_idx, channel_idx = np.nonzero(
+            (result["conversions"] > 0) | (scored["touches"] > 0)
+        )
+        for m, c in zip(month_idx.tolist(), channel_idx.tolist()):
+            rows.append({
+                "organization_id": organization_id,
+                "period_start": month_starts[m],
+                "channel": channels[c],
+                "attribution_model": model,
+                "credited_revenue": round(float(result["revenue"][m, c]), 2),
+                "credited_conversions": round(float(result["conversions"][m, c]), 4),
+                "touch_count": int(scored["touches"][m, c]),
+                "click_count": int(scored["clicks"][m, c]),
+                "channel_cost": round(float(scored["cost"][m, c]), 2),
+                "computed_at": computed_at,
+            })
+
+    if rows:
+        db.execute(insert(AttributionCube), rows)
+    db.commit()
+
+    stats = {
+        "organization_id": str(organization_id),
+        "touches": len(arrays["ts"]),
+        "conversions": scored["n_conversions"],
+        "path_pairs": scored["n_pairs"],
+        "cells": len(rows),
+        "load_seconds": round(load_seconds, 3),
+        "score_seconds": round(score_seconds, 3),
+    }
+    logger.info(f"Attribution cube rebuilt: {stats}")
+    return stats
+
+
+def _build_in_worker(organization_id: str) -> Dict:
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return build_attribution_cube(db, UUID(organization_id))
+    finally:
+        db.close()
+
+
+def _reset_engine_in_worker():
+    # Connections inherited from the parent process must not be reused after fork
+    from database import engine
+    engine.dispose(close=False)
+
+
+def build_all_attribution_cubes(
+        organization_ids: Optional[List[UUID]] = None,
+        workers: int = 1
+) -> List[Dict]:
+    """Rebuild cubes for many orgs, optionally in parallel worker processes"""
+    from database import SessionLocal
+
+    if organization_ids is None:
+        db = SessionLocal()
+        try:
+            organization_ids = [
+                row[0] for row in db.query(CampaignAttribution.organization_id).distinct().all()
+            ]
+        finally:
+            db.close()
+
+    org_ids = [str(org_id) for org_id in organization_ids]
+    if workers <= 1:
+        return [_build_in_worker(org_id) for org_id in org_ids]
+
+    with Pool(processes=workers, initializer=_reset_engine_in_worker) as pool:
+        return pool.map(_build_in_worker, org_ids)
+
+
+def read_attribution_cube(
+        db: Session,
+        organization_id: UUID,
+        attribution_model: str,
+        start_date: date,
+        end_date: date
+) -> List[Dict]:
+    """Per-channel totals from the cube for the months overlapping [start_date, end_date]"""
+    first_month = date(start_date.year, start_date.month, 1)
+    rows = db.query(AttributionCube).filter(
+        AttributionCube.organization_id == organization_id,
+        AttributionCube.attribution_model == attribution_model,
+        AttributionCube.period_start >= first_month,
+        AttributionCube.period_start <= end_date
+    ).all()
+
+    by_channel: Dict[str, Dict] = {}
+    for row in rows:
+        totals = by_channel.setdefault(row.channel, {
+            "channel": row.channel, "revenue": 0.0, "conversions": 0.0,
+            "touches": 0, "clicks": 0, "cost": 0.0, "computed_at": row.computed_at,
+        })
+        totals["revenue"] += float(row.credited_revenue or 0)
+        totals["conversions"] += float(row.credited_conversions or 0)
+        totals["touches"] += row.touch_count or 0
+        totals["clicks"] += row.click_count or 0
+        totals["cost"] += float(row.channel_cost or 0)
+        totals["computed_at"] = min(totals["computed_at"], row.computed_at)
+
+    return list(by_channel.values())
+
+
+def cube_exists(db: Session, organization_id: UUID) -> bool:
+    return db.query(AttributionCube.id).filter(
+        AttributionCube.organization_id == organization_id
+    ).first() is not None
+
+
+def ensure_attribution_cube(db: Session, organization_id: UUID) -> None:
+    """Build a missing cube; concurrent callers wait on the lock and re-check"""
+    if not cube_exists(db, organization_id):
+        build_attribution_cube(db, organization_id, only_if_missing=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild attribution cubes")
+    parser.add_argument("--org", action="append", help="Organization ID (repeatable); default all")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    results = build_all_attribution_cubes(
+        [UUID(o) for o in args.org] if args.org else None,
+        workers=args.workers
+    )
+    for r in results:
+        print(r)
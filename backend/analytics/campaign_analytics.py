@@ -11,7 +11,7 @@ from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from decimal import Decimal
 from enum import Enum
-from database import get_db
+from database import get_read_db
 from models import Donors as Donor, Donations as Donation, Campaigns as Campaign , Organizations as Organization
 # Assuming you have these imports from your existing setup
 # from database import get_db
@@ -205,7 +205,7 @@ def calculate_confidence_level(donor_count: int, days_remaining: int, current_pr
 async def get_active_campaigns(
         organization_id: str,
         status: Optional[CampaignStatus] = CampaignStatus.ACTIVE,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get all active campaigns with real-time metrics
@@ -337,7 +337,7 @@ async def get_active_campaigns(
 async def get_campaign_performance(
         campaign_id: str,
         organization_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get detailed performance metrics for a specific campaign
@@ -549,7 +549,7 @@ async def get_roi_analysis(
         organization_id: str,
         years_back: int = 2,
         min_raised: float = 1000,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Analyze ROI across all campaigns
@@ -8,6 +8,7 @@ NO MOCK DATA - All data comes from actual database queries.
 Endpoints:
 - GET /analytics/benchmarks/{org_id} - Industry benchmark comparisons
 - GET /analytics/attribution/{org_id} - Multi-channel attribution analysis
+- POST /analytics/attribution/{org_id}/rebuild - Rebuild the attribution cube
 - GET /analytics/ab-tests/{org_id} - A/B test results
 - GET /analytics/matching-gifts/{org_id} - Matching gift statistics
 - GET /analytics/channel-performance/{org_id} - Channel-level performance
@@ -20,14 +21,14 @@ Endpoints:
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, case, extract, desc, asc
+from sqlalchemy import func, and_, or_, case, desc, asc
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
-from uuid import UUID
 from datetime import datetime, timedelta, timezone
+from uuid import UUID
 from decimal import Decimal
 
-from database import get_db
+from database import get_db, get_read_db, get_heavy_db, get_batch_db
+from utils import in_range, year_range
 from models import Users as User
 from models import Organizations as Organization
 from models import Campaigns as Campaign
@@ -88,6 +89,8 @@ class AttributionResponse(BaseModel):
     channels: List[ChannelPerformance]
     top_performing_channel: Optional[str]
     recommendations: List[str]
+    attribution_model: str = "last_touch"
+    computed_at: Optional[datetime] = None
 
 
 class ABTestResult(BaseModel):
@@ -225,7 +228,7 @@ async def get_roi_analysis(
         organization_id: str,
         years_back: int = 2,
         min_raised: float = 1000,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Analyze ROI across all campaigns
@@ -406,7 +409,7 @@ async def get_active_campaigns(
         status: Optional[str] = Query(None, pattern="^(active|upcoming|ending_soon)$"),
         sort_by: str = Query('start_date', pattern="^(start_date|end_date|raised_amount|progress)$"),
         sort_order: str = Query('desc', pattern="^(asc|desc)$"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -588,7 +591,7 @@ def calculate_retention_rate(db: Session, org_id: UUID) -> float:
     # Donors who gave last year
     last_year_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
         Donation.organization_id == org_id,
-        extract('year', Donation.donation_date) == last_year
+        in_range(Donation.donation_date, year_range(last_year))
     ).scalar() or 0
 
     if last_year_donors == 0:
@@ -600,68 +603,15 @@ def calculate_retention_rate(db: Session, org_id: UUID) -> float:
         Donation.donor_id.in_(
             db.query(Donation.donor_id).filter(
                 Donation.organization_id == org_id,
-                extract('year', Donation.donation_date) == last_year
+                in_range(Donation.donation_date, year_range(last_year))
             )
         ),
-        extract('year', Donation.donation_date) == current_year
+        in_range(Donation.donation_date, year_range(current_year))
     ).scalar() or 0
 
     return float(retained_donors) / float(last_year_donors)
 
 
-def calculate_simple_forecast(
-        historical_values: List[float],
-        periods: int = 6
-) -> List[Dict[str, float]]:
-    """
-    Simple linear regression forecast
-    Returns list of {predicted, lower_bound, upper_bound}
-    """
-    if len(historical_values) < 2:
-        return [{'predicted': 0.0, 'lower_bound': 0.0, 'upper_bound': 0.0}
-                for _ in range(periods)]
-
-    n = len(historical_values)
-    x = list(range(n))
-    y = historical_values
-
-    # Calculate linear regression
-    x_mean = sum(x) / n
-    y_mean = sum(y) / n
-
-    numerator = sum((x[i] - x_mean) * (y[i] - y_mean) for i in range(n))
-    denominator = sum((x[i] - x_mean) ** 2 for i in range(n))
-
-    if denominator == 0:
-        slope = 0
-    else:
-        slope = numerator / denominator
-
-    intercept = y_mean - slope * x_mean
-
-    # Calculate standard error
-    predictions = [slope * xi + intercept for xi in x]
-    residuals = [y[i] - predictions[i] for i in range(n)]
-    std_error = (sum(r ** 2 for r in residuals) / n) ** 0.5
-
-    # Generate forecasts
-    forecasts = []
-    for i in range(periods):
-        x_forecast = n + i
-        predicted = slope * x_forecast + intercept
-
-        # Confidence interval (roughly 95%)
-        margin = 1.96 * std_error
-
-        forecasts.append({
-            'predicted': max(0.0, predicted),
-            'lower_bound': max(0.0, predicted - margin),
-            'upper_bound': predicted + margin
-        })
-
-    return forecasts
-
-
 # ============================================================================
 # ENDPOINTS
 # ============================================================================
@@ -669,7 +619,7 @@ def calculate_simple_forecast(
 @router.get("/benchmarks/{org_id}", response_model=BenchmarkResponse)
 async def get_industry_benchmarks(
         org_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -808,12 +758,19 @@ async def get_multi_channel_attribution(
         org_id: UUID,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        db: Session = Depends(get_db),
+        model: str = Query(
+            "last_touch",
+            pattern="^(first_touch|last_touch|linear|time_decay|position_based)$",
+            description="Attribution model"
+        ),
+        db: Session = Depends(get_heavy_db),
         current_user: User = Depends(get_current_user)
 ):
     """
     Multi-channel attribution analysis
-    NO MOCK DATA - Uses campaign_attributions table
+    NO MOCK DATA - Reads the precomputed attribution cube built from the
+    campaign_attributions table (built on first use if missing).
+    The cube is monthly, so the range covers every month it overlaps.
     """
     # Default date range: last 90 days
     if not end_date:
@@ -821,42 +778,35 @@ async def get_multi_channel_attribution(
     if not start_date:
         start_date = end_date - timedelta(days=90)
 
-    # Query attributions with aggregations
-    attribution_data = db.query(
-        CampaignAttribution.channel,
-        func.count(CampaignAttribution.id).label('donation_count'),
-        func.sum(Donation.amount).label('total_revenue'),
-        func.avg(Donation.amount).label('avg_donation'),
-        func.sum(CampaignAttribution.channel_cost).label('total_cost'),
-        func.sum(CampaignAttribution.click_count).label('total_clicks')
-    ).join(
-        Donation, CampaignAttribution.donation_id == Donation.id
-    ).filter(
-        CampaignAttribution.organization_id == org_id,
-        CampaignAttribution.attributed_at >= start_date,
-        CampaignAttribution.attributed_at <= end_date
-    ).group_by(
-        CampaignAttribution.channel
-    ).all()
+    # attribution_engine pulls in numpy; load it on first use, not at startup
+    from analytics import attribution_engine
+
+    attribution_engine.ensure_attribution_cube(db, org_id)
+
+    attribution_data = attribution_engine.read_attribution_cube(
+        db, org_id, model, start_date.date(), end_date.date()
+    )
 
     channels = []
     total_revenue = 0.0
+    computed_at = None
 
     for row in attribution_data:
-        revenue = float(row.total_revenue or 0)
-        cost = float(row.total_cost or 0)
-        clicks = int(row.total_clicks or 0)
-        donation_count = int(row.donation_count or 0)
+        revenue = row["revenue"]
+        cost = row["cost"]
+        clicks = row["clicks"]
+        conversions = row["conversions"]
+        donation_count = int(round(conversions))
 
         roi = ((revenue - cost) / cost) if cost > 0 else 0.0
-        conversion_rate = (donation_count / clicks) if clicks > 0 else 0.0
-        cost_per_acquisition = (cost / donation_count) if donation_count > 0 else 0.0
+        conversion_rate = (conversions / clicks) if clicks > 0 else 0.0
+        cost_per_acquisition = (cost / conversions) if conversions > 0 else 0.0
 
         channels.append(ChannelPerformance(
-            channel=row.channel,
+            channel=row["channel"],
             donation_count=donation_count,
             total_revenue=revenue,
-            avg_donation=float(row.avg_donation or 0),
+            avg_donation=(revenue / conversions) if conversions > 0 else 0.0,
             cost=cost,
             roi=roi,
             conversion_rate=conversion_rate,
@@ -864,6 +814,8 @@ async def get_multi_channel_attribution(
         ))
 
         total_revenue += revenue
+        if computed_at is None or row["computed_at"] < computed_at:
+            computed_at = row["computed_at"]
 
     # Find top performing channel by ROI
     top_channel = None
@@ -900,15 +852,37 @@ async def get_multi_channel_attribution(
         total_revenue=total_revenue,
         channels=channels,
         top_performing_channel=top_channel,
-        recommendations=recommendations
+        recommendations=recommendations,
+        attribution_model=model,
+        computed_at=computed_at
     )
 
 
+@router.post("/attribution/{org_id}/rebuild")
+async def rebuild_attribution_cube(
+        org_id: UUID,
+        db: Session = Depends(get_batch_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Rebuild the attribution cube for an organization
+    Re-scores every attribution model from campaign_attributions
+    """
+    from analytics import attribution_engine
+
+    stats = attribution_engine.build_attribution_cube(db, org_id)
+    return {
+        "status": "success",
+        "message": "Attribution cube rebuilt",
+        **stats
+    }
+
+
 @router.get("/ab-tests/{org_id}", response_model=ABTestsResponse)
 async def get_ab_tests(
         org_id: UUID,
         status: Optional[str] = Query(None, pattern="^(running|completed|all)$"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -967,7 +941,7 @@ async def get_ab_tests(
 @router.get("/matching-gifts/{org_id}", response_model=MatchingGiftStats)
 async def get_matching_gift_stats(
         org_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -1045,7 +1019,7 @@ async def get_campaign_roi(
         org_id: UUID,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -1120,105 +1094,56 @@ async def get_campaign_roi(
 async def get_revenue_forecast(
         org_id: UUID,
         periods: int = Query(6, ge=1, le=12),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
     Revenue forecasting with confidence intervals
-    NO MOCK DATA - Uses actual donation history
+    NO MOCK DATA - Reads the seasonal-trend forecast fitted from the donation
+    history by analytics/forecast_engine.py
     """
-    # Get monthly revenue for the past 12 months
-    twelve_months_ago = datetime.now(timezone.utc) - timedelta(days=365)
-
-    monthly_revenue = db.query(
-        extract('year', Donation.donation_date).label('year'),
-        extract('month', Donation.donation_date).label('month'),
-        func.sum(Donation.amount).label('revenue')
-    ).filter(
-        Donation.organization_id == org_id,
-        Donation.donation_date >= twelve_months_ago
-    ).group_by(
-        'year', 'month'
-    ).order_by(
-        'year', 'month'
-    ).all()
-
-    # Format historical data
-    historical_data = []
-    historical_values = []
-
-    for row in monthly_revenue:
-        period_str = f"{int(row.year)}-{int(row.month):02d}"
-        revenue = float(row.revenue or 0)
-
-        historical_data.append(ForecastDataPoint(
-            period=period_str,
-            actual=revenue,
-            predicted=revenue,  # Actual = predicted for historical
-            lower_bound=revenue,
-            upper_bound=revenue
-        ))
-        historical_values.append(revenue)
-
-    # Generate forecast
-    forecast_results = calculate_simple_forecast(historical_values, periods)
-
-    # Format forecast data
-    forecast_data = []
-    current_date = datetime.now(timezone.utc)
-
-    for i, forecast in enumerate(forecast_results):
-        future_date = current_date + timedelta(days=30 * (i + 1))
-        period_str = f"{future_date.year}-{future_date.month:02d}"
+    from analytics.forecast_engine import load_forecast
+
+    forecast = load_forecast(db, org_id, "revenue")
+
+    # Past 12 complete months
+    historical_data = [
+        ForecastDataPoint(
+            period=point.period.strftime("%Y-%m"),
+            actual=point.actual,
+            predicted=point.actual,  # Actual = predicted for historical
+            lower_bound=point.actual,
+            upper_bound=point.actual
+        )
+        for point in forecast.history(12)
+    ]
 
-        forecast_data.append(ForecastDataPoint(
-            period=period_str,
+    # Current month onwards
+    forecast_data = [
+        ForecastDataPoint(
+            period=point.period.strftime("%Y-%m"),
             actual=None,
-            predicted=forecast['predicted'],
-            lower_bound=forecast['lower_bound'],
-            upper_bound=forecast['upper_bound']
-        ))
-
-    # Determine trend
-    if len(historical_values) >= 2:
-        recent_avg = sum(historical_values[-3:]) / 3
-        older_avg = sum(historical_values[:3]) / 3
-
-        if recent_avg > older_avg * 1.1:
-            trend = 'increasing'
-        elif recent_avg < older_avg * 0.9:
-            trend = 'decreasing'
-        else:
-            trend = 'stable'
-    else:
-        trend = 'stable'
-
-    # Calculate confidence (based on consistency of historical data)
-    if len(historical_values) >= 3:
-        mean = sum(historical_values) / len(historical_values)
-        variance = sum((x - mean) ** 2 for x in historical_values) / len(historical_values)
-        std_dev = variance ** 0.5
-        coefficient_of_variation = (std_dev / mean) if mean > 0 else 1.0
-
-        # Lower CoV = higher confidence
-        confidence = max(0.5, min(0.95, 1.0 - coefficient_of_variation))
-    else:
-        confidence = 0.5
+            predicted=point.predicted,
+            lower_bound=point.lower_bound,
+            upper_bound=point.upper_bound
+        )
+        for point in forecast.future(periods)
+    ]
 
     return ForecastResponse(
         organization_id=str(org_id),
         forecast_periods=periods,
         historical_data=historical_data,
         forecast_data=forecast_data,
-        trend=trend,
-        confidence=confidence
+        trend=forecast.trend_direction(),
+        confidence=max(0.5, min(0.95, forecast.confidence())) if forecast.history_months >= 3 else 0.5
     )
 
 
 @router.get("/participation-rates/{org_id}", response_model=ParticipationMetrics)
 async def get_participation_rates(
         org_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -1235,7 +1160,7 @@ async def get_participation_rates(
     # Active donors (gave this year)
     active_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
         Donation.organization_id == org_id,
-        extract('year', Donation.donation_date) == current_year
+        in_range(Donation.donation_date, year_range(current_year))
     ).scalar() or 0
 
     participation_rate = (active_donors / total_donors) if total_donors > 0 else 0.0
@@ -1243,14 +1168,14 @@ async def get_participation_rates(
     # First time donors (only one donation ever, this year)
     first_time_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
         Donation.organization_id == org_id,
-        extract('year', Donation.donation_date) == current_year,
+        in_range(Donation.donation_date, year_range(current_year)),
         Donation.is_first_time == True
     ).scalar() or 0
 
     # Repeat donors (more than one donation)
     repeat_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
         Donation.organization_id == org_id,
-        extract('year', Donation.donation_date) == current_year,
+        in_range(Donation.donation_date, year_range(current_year)),
         Donation.is_repeat == True
     ).scalar() or 0
 
@@ -1398,7 +1323,7 @@ class CampaignCostAnalysis(BaseModel):
 async def get_campaign_cost_analysis(
         org_id: UUID,
         range: str = Query('90d', pattern="^(30d|90d|180d|365d|all)$"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -1530,7 +1455,7 @@ class RevenueBySource(BaseModel):
 async def get_revenue_by_source(
         org_id: UUID,
         range: str = Query('90d', pattern="^(30d|90d|180d|365d|all)$"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -1649,7 +1574,7 @@ async def get_channel_performance(
         org_id: UUID,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -20,7 +20,7 @@ from pydantic import BaseModel, Field
 from decimal import Decimal
 
 # Assuming imports
-from database import get_db
+from database import get_read_db
 from models import (
     Organizations, Campaigns, Donations, Donors, Appeals,
     DonationCampaigns, EmailCampaigns, ABTest, MatchingGift, RecurringGifts
@@ -241,7 +241,7 @@ def project_final_amount(
 async def get_campaign_performance(
         organization_id: str,
         campaign_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get comprehensive performance metrics for a single campaign
@@ -371,7 +371,7 @@ async def get_campaign_performance(
 @router.get("/summary/{organization_id}", response_model=CampaignSummary)
 async def get_campaign_summary(
         organization_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get organization-wide campaign summary
@@ -445,7 +445,7 @@ async def get_campaign_trends(
         organization_id: str,
         period: str = "monthly",  # daily, weekly, monthly, quarterly
         months_back: int = 12,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get campaign performance trends over time
@@ -523,7 +523,7 @@ async def get_campaign_trends(
 async def compare_campaigns(
         organization_id: str,
         campaign_ids: List[str] = Query(...),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Compare performance of multiple campaigns side-by-side
@@ -592,7 +592,7 @@ async def get_channel_performance(
         organization_id: str,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Analyze performance by campaign channel/type
@@ -685,7 +685,7 @@ async def get_channel_performance(
 async def get_donor_acquisition_metrics(
         organization_id: str,
         campaign_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Detailed donor acquisition metrics for a campaign
@@ -761,7 +761,7 @@ async def get_donor_acquisition_metrics(
 async def track_campaign_goal(
         organization_id: str,
         campaign_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Detailed goal tracking with projections
@@ -830,7 +830,7 @@ async def track_campaign_goal(
 async def get_ab_test_results(
         organization_id: str,
         test_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get A/B test campaign results with statistical analysis
@@ -881,7 +881,7 @@ async def get_ab_test_results(
 async def get_matching_gifts_performance(
         organization_id: str,
         campaign_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Analyze matching gift performance for a campaign
@@ -19,12 +19,14 @@ from decimal import Decimal
 from uuid import UUID
 
 from analytics.analytics import get_current_user, verify_organization_access
-from database import get_db
+from database import get_db, get_read_db, get_heavy_db
 from models import Organizations, Donors, Donations
 from models import (
 
     CashflowReport, DonorChurnMetrics
 )
+from analytics import cohort_cube
+from utils import in_range, year_range
 
 router = APIRouter(prefix="/api/v1/analytics/reports", tags=["Cashflow & Churn"])
 
@@ -37,7 +39,7 @@ router = APIRouter(prefix="/api/v1/analytics/reports", tags=["Cashflow & Churn"]
 async def get_total_income_cashflow(
     organization_id: UUID,
     years: int = Query(3, description="Number of years to compare (3, 5, or 10)", ge=1, le=10),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """
@@ -69,8 +71,7 @@ async def get_total_income_cashflow(
         func.count(func.distinct(Donations.donor_id)).label('donor_count')
     ).filter(
         Donations.organization_id == organization_id,
-        extract('year', Donations.donation_date) >= start_year,
-        extract('year', Donations.donation_date) <= current_year
+        in_range(Donations.donation_date, year_range(start_year, current_year))
     ).group_by(
         extract('year', Donations.donation_date),
         extract('month', Donations.donation_date)
@@ -189,6 +190,21 @@ async def update_cashflow_cache(
         CashflowReport.organization_id == organization_id
     ).delete()
     
+    # All months in one grouped scan over a sargable date range
+    month_expr = func.date_trunc('month', Donations.donation_date)
+    monthly_rows = db.query(
+        month_expr.label('month_start'),
+        func.sum(Donations.amount).label('revenue'),
+        func.count(Donations.id).label('gift_count'),
+        func.count(func.distinct(Donations.donor_id)).label('donor_count')
+    ).filter(
+        Donations.organization_id == organization_id,
+        in_range(Donations.donation_date, year_range(start_year, current_year))
+    ).group_by(month_expr).all()
+    
+    monthly_data = {(r.month_start.year, r.month_start.month): r for r in monthly_rows}
+    revenue_by_month = {}
+    
     # Calculate and cache each month
     for year in range(start_year, current_year + 1):
         ytd_revenue = 0
@@ -196,34 +212,22 @@ async def update_cashflow_cache(
         ytd_donors = 0
         
         for month in range(1, 13):
-            # Get monthly data
-            month_data = db.query(
-                func.sum(Donations.amount).label('revenue'),
-                func.count(Donations.id).label('gift_count'),
-                func.count(func.distinct(Donations.donor_id)).label('donor_count')
-            ).filter(
-                Donations.organization_id == organization_id,
-                extract('year', Donations.donation_date) == year,
-                extract('month', Donations.donation_date) == month
-            ).first()
+            month_data = monthly_data.get((year, month))
             
             monthly_revenue = float(month_data.revenue) if month_data and month_data.revenue else 0
             monthly_gifts = month_data.gift_count if month_data else 0
             monthly_donors = month_data.donor_count if month_data else 0
+            revenue_by_month[(year, month)] = monthly_revenue
             
             ytd_revenue += monthly_revenue
             ytd_gifts += monthly_gifts
             
             # Determine color
-            prev_year_report = db.query(CashflowReport).filter(
-                CashflowReport.organization_id == organization_id,
-                CashflowReport.year == year - 1,
-                CashflowReport.month == month
-            ).first()
+            prev_year_revenue = revenue_by_month.get((year - 1, month), 0)
             
-            if prev_year_report and prev_year_report.revenue > 0:
-                change_pct = ((monthly_revenue - float(prev_year_report.revenue)) / 
-                             float(prev_year_report.revenue)) * 100
+            if prev_year_revenue > 0:
+                change_pct = ((monthly_revenue - prev_year_revenue) / 
+                             prev_year_revenue) * 100
                 if change_pct > 10:
                     color = 'green'
                 elif change_pct < -10:
@@ -408,45 +412,52 @@ async def get_donor_churn_ratio(
 async def get_donor_churn_trend(
     organization_id: UUID,
     months: int = Query(12, description="Number of months to analyze", ge=6, le=36),
-    db: Session = Depends(get_db),
+    grain: str = Query("quarter", description="Trend granularity", regex="^(month|quarter|year)$"),
+    db: Session = Depends(get_heavy_db),
     current_user = Depends(get_current_user)
 ):
     """
     Get donor churn trend over time
     
-    Returns monthly churn ratios to visualize trends
+    Returns one churn ratio per period, read from the cohort retention cube:
+    - In: new donors + reactivated donors in the period
+    - Out: donors who gave in the previous period but not in this one
     """
     verify_organization_access(current_user, organization_id)
     
-    trends = []
-    current_date = datetime.now().date()
+    periods = max(2, -(-months // cohort_cube.MONTHS_PER_GRAIN[grain]))
+    summaries = cohort_cube.period_summaries(db, organization_id, grain, periods)
     
-    for i in range(months):
-        end_date = current_date - timedelta(days=i * 30)
-        start_date = end_date - timedelta(days=365)
+    trends = []
+    for summary in summaries:
+        total_in = summary["new_donors"] + summary["reactivated_donors"]
+        lapsed = summary["lapsed_donors"]
+        churn_ratio = total_in / lapsed if lapsed > 0 else 0
         
-        # Get saved metric if exists
-        metric = db.query(DonorChurnMetrics).filter(
-            DonorChurnMetrics.organization_id == organization_id,
-            DonorChurnMetrics.period_end == end_date
-        ).first()
+        if churn_ratio > 1.1:
+            status = "growing"
+        elif churn_ratio < 0.9:
+            status = "declining"
+        else:
+            status = "equilibrium"
         
-        if metric:
-            trends.append({
-                "date": end_date.isoformat(),
-                "churn_ratio": float(metric.churn_ratio),
-                "status": metric.equilibrium_status,
-                "new_donors": metric.new_donors,
-                "reactivated_donors": metric.reactivated_donors,
-                "lapsed_donors": metric.lapsed_donors
-            })
+        trends.append({
+            "date": summary["period"].isoformat(),
+            "churn_ratio": round(churn_ratio, 2),
+            "status": status,
+            "new_donors": summary["new_donors"],
+            "reactivated_donors": summary["reactivated_donors"],
+            "retained_donors": summary["retained_donors"],
+            "lapsed_donors": lapsed
+        })
     
     return {
-        "trend_data": sorted(trends, key=lambda x: x['date']),
+        "grain": grain,
+        "trend_data": trends,
         "summary": {
-            "current_ratio": trends[0]["churn_ratio"] if trends else 0,
+            "current_ratio": trends[-1]["churn_ratio"] if trends else 0,
             "average_ratio": sum(t["churn_ratio"] for t in trends) / len(trends) if trends else 0,
-            "trend_direction": "improving" if len(trends) > 1 and trends[0]["churn_ratio"] > trends[-1]["churn_ratio"] else "declining"
+            "trend_direction": "improving" if len(trends) > 1 and trends[-1]["churn_ratio"] > trends[0]["churn_ratio"] else "declining"
         }
     }
 
@@ -0,0 +1,483 @@
+"""
+Cohort Retention Cube
+Wise Investor Platform
+
+Maintains the cohort_retention_cube table: for every organization and grain
+(month, quarter, year) one row per first-gift period x activity period with
+the number of cohort donors who gave, how many of them also gave in the
+previous period, their gift count and revenue.
+
+Every retention and churn endpoint reads these cells instead of scanning
+donations, so they share one set of definitions:
+
+- cohort: period of the donor's first counted gift
+- active: gave at least once in the period
+- retained: active in the period and in the period before it
+- new: active in the period that is also their cohort period
+- reactivated: active, not new, not retained
+- lapsed: active in the previous period but not in this one
+
+Counted gifts are donations with a donor whose payment_status is 'completed'
+or unset. The cube is rebuilt per org with one grouped query and kept current
+by recomputing the contribution of a single donor whenever one of their
+donations is written, so a backdated gift that moves a donor's cohort is
+handled the same way as a new one.
+
+Concurrent writes: an incremental update holds a per-organization advisory
+lock in shared mode and locks the donor row (FOR NO KEY UPDATE, which does
+not conflict with the KEY SHARE lock the donation's foreign key check takes)
+before the donation is flushed and the donor's gifts are read, so two gifts of one donor are applied one after the other and
+each sees the other's; a rebuild takes the same advisory lock exclusively, so
+it never overlaps an update it would overwrite or miss. The scheduler
+(scheduler/job_scheduler.py, job "cohort_cube") rebuilds every cube nightly,
+which also corrects writes that bypassed record_donation.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+import logging
+import time
+
+from sqlalchemy import text, insert, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models import CohortRetentionCube, Donations as Donation
+
+logger = logging.getLogger(__name__)
+
+GRAINS = ("month", "quarter", "year")
+
+MONTHS_PER_GRAIN = {"month": 1, "quarter": 3, "year": 12}
+
+# First key of pg_advisory_xact_lock[_shared](key, hashtext(org)): shared by incremental updates, exclusive for rebuilds
+CUBE_LOCK_KEY = 2929
+
+REBUILD_SQL = text("""
+    WITH gifts AS (
+        SELECT donor_id, donation_date AT TIME ZONE 'UTC' AS ts, amount
+        FROM donations
+        WHERE organization_id = :org_id
+          AND donor_id IS NOT NULL
+          AND donation_date IS NOT NULL
+          AND (payment_status IS NULL OR payment_status = 'completed')
+    ),
+    firsts AS (
+        SELECT donor_id, MIN(ts) AS first_ts
+        FROM gifts
+        GROUP BY donor_id
+    ),
+    grains (grain, step) AS (
+        VALUES ('month', INTERVAL '1 month'),
+               ('quarter', INTERVAL '3 months'),
+               ('year', INTERVAL '1 year')
+    ),
+    donor_periods AS (
+        SELECT
+            gr.grain,
+            gr.step,
+            g.donor_id,
+            date_trunc(gr.grain, f.first_ts)::date AS cohort_period,
+            date_trunc(gr.grain, g.ts)::date       AS activity_period,
+            SUM(g.amount)                          AS revenue,
+            COUNT(*)                               AS gift_count
+        FROM gifts g
+        JOIN firsts f ON f.donor_id = g.donor_id
+        CROSS JOIN grains gr
+        GROUP BY gr.grain, gr.step, g.donor_id, cohort_period, activity_period
+    ),
+    flagged AS (
+        SELECT
+            dp.*,
+            LAG(activity_period) OVER (
+                PARTITION BY grain, donor_id ORDER BY activity_period
+            ) = (activity_period - step)::date AS retained
+        FROM donor_periods dp
+    )
+    SELECT
+        grain,
+        cohort_period,
+        activity_period,
+        COUNT(*)                              AS donor_count,
+        COUNT(*) FILTER (WHERE retained)      AS retained_count,
+        SUM(gift_count)                       AS gift_count,
+        SUM(revenue)                          AS revenue
+    FROM flagged
+    GROUP BY grain, cohort_period, activity_period
+""")
+
+
+# =====================================================================
+# PERIOD HELPERS
+# =====================================================================
+
+def _as_utc(value):
+    # Naive timestamps are stored as UTC (datetime.utcnow defaults)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+
+
+def period_start(value, grain: str) -> date:
+    """First day of the month, quarter or year containing value"""
+    if isinstance(value, datetime):
+        value = _as_utc(value).date()
+    if grain == "month":
+        return date(value.year, value.month, 1)
+    if grain == "quarter":
+        return date(value.year, 3 * ((value.month - 1) // 3) + 1, 1)
+    if grain == "year":
+        return date(value.year, 1, 1)
+    raise ValueError(f"Unknown grain '{grain}', expected one of {', '.join(GRAINS)}")
+
+
+def shift_period(start: date, grain: str, periods: int) -> date:
+    """Start of the period `periods` steps away from the period starting at start"""
+    months = start.year * 12 + start.month - 1 + periods * MONTHS_PER_GRAIN[grain]
+    return date(months // 12, months % 12 + 1, 1)
+
+
+# =====================================================================
+# FULL REBUILD
+# =====================================================================
+
+def lock_cube(db: Session, organization_id: UUID, shared: bool = False) -> None:
+    """Per-organization cube lock until the end of the transaction"""
+    function = "pg_advisory_xact_lock_shared" if shared else "pg_advisory_xact_lock"
+    db.execute(text(f"SELECT {function}(:key, hashtext(:org))"),
+               {"key": CUBE_LOCK_KEY, "org": str(organization_id)})
+
+
+def build_cohort_cube(db: Session, organization_id: UUID) -> Dict:
+    """Recompute and replace every grain of the cube for one organization"""
+    start = time.perf_counter()
+    lock_cube(db, organization_id)
+    result = db.execute(REBUILD_SQL, {"org_id": organization_id}).all()
+
+    db.query(CohortRetentionCube).filter(
+        CohortRetentionCube.organization_id == organization_id
+    ).delete(synchronize_session=False)
+
+    updated_at = datetime.utcnow()
+    rows = [
+        {
+            "organization_id": organization_id,
+            "grain": r.grain,
+            "cohort_period": r.cohort_period,
+            "activity_period": r.activity_period,
+            "donor_count": r.donor_count,
+            "retained_count": r.retained_count,
+            "gift_count": r.gift_count,
+            "revenue": r.revenue or 0,
+            "updated_at": updated_at,
+        }
+        for r in result
+    ]
+    if rows:
+        db.execute(insert(CohortRetentionCube), rows)
+    db.commit()
+
+    stats = {
+        "organization_id": str(organization_id),
+        "cells": len(rows),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    logger.info(f"Cohort cube rebuilt: {stats}")
+    return stats
+
+
+def cube_exists(db: Session, organization_id: UUID) -> bool:
+    return db.query(CohortRetentionCube.id).filter(
+        CohortRetentionCube.organization_id == organization_id
+    ).first() is not None
+
+
+def ensure_cohort_cube(db: Session, organization_id: UUID) -> None:
+    if not cube_exists(db, organization_id):
+        build_cohort_cube(db, organization_id)
+
+
+# =====================================================================
+# INCREMENTAL UPDATES
+# =====================================================================
+
+Gift = Tuple[UUID, datetime, Decimal]
+
+
+def lock_donor(db: Session, organization_id: UUID, donor_id: UUID) -> None:
+    """
+    Serialize cube updates of one donor; take before the donation write is
+    flushed and before reading the donor's gifts
+    """
+    with db.no_autoflush:
+        lock_cube(db, organization_id, shared=True)
+        db.execute(text("SELECT 1 FROM donors WHERE id = :donor_id FOR NO KEY UPDATE"), {"donor_id": donor_id})
+
+
+def donor_gifts(db: Session, donor_id: Optional[UUID]) -> List[Gift]:
+    """Counted gifts of one donor as (donation_id, donation_date, amount)"""
+    if donor_id is None:
+        return []
+    return [
+        (row.id, row.donation_date, row.amount)
+        for row in db.query(Donation.id, Donation.donation_date, Donation.amount).filter(
+            Donation.donor_id == donor_id,
+            Donation.donation_date.isnot(None),
+            or_(Donation.payment_status.is_(None), Donation.payment_status == "completed")
+        ).all()
+    ]
+
+
+def _donor_cells(gifts: Iterable[Gift]) -> Dict[Tuple, List]:
+    """Cube cells contributed by one donor: key -> [donors, retained, gifts, revenue]"""
+    gifts = list(gifts)
+    if not gifts:
+        return {}
+
+    first_gift = min(_as_utc(g[1]) for g in gifts)
+    cells = {}
+    for grain in GRAINS:
+        cohort = period_start(first_gift, grain)
+        by_period = defaultdict(lambda: [0, Decimal(0)])
+        for _, donation_date, amount in gifts:
+            totals = by_period[period_start(donation_date, grain)]
+            totals[0] += 1
+            totals[1] += Decimal(amount or 0)
+
+        for period, (gift_count, revenue) in by_period.items():
+            retained = 1 if shift_period(period, grain, -1) in by_period else 0
+            cells[(grain, cohort, period)] = [1, retained, gift_count, revenue]
+    return cells
+
+
+def apply_donor_change(
+        db: Session,
+        organization_id: UUID,
+        before: Iterable[Gift],
+        after: Iterable[Gift]
+) -> int:
+    """
+    Apply the difference between a donor's gifts before and after a write.
+    Runs inside the caller's transaction; returns the number of cells touched.
+    """
+    old_cells = _donor_cells(before)
+    new_cells = _donor_cells(after)
+
+    updated_at = datetime.utcnow()
+    rows = []
+    for key in old_cells.keys() | new_cells.keys():
+        old = old_cells.get(key, [0, 0, 0, Decimal(0)])
+        new = new_cells.get(key, [0, 0, 0, Decimal(0)])
+        delta = [n - o for n, o in zip(new, old)]
+        if not any(delta):
+            continue
+        grain, cohort, period = key
+        rows.append({
+            "organization_id": organization_id,
+            "grain": grain,
+            "cohort_period": cohort,
+            "activity_period": period,
+            "donor_count": delta[0],
+            "retained_count": delta[1],
+            "gift_count": delta[2],
+            "revenue": delta[3],
+            "updated_at": updated_at,
+        })
+
+    if not rows:
+        return 0
+
+    stmt = pg_insert(CohortRetentionCube).values(rows)
+    table = CohortRetentionCube.__table__
+    db.execute(stmt.on_conflict_do_update(
+        constraint="unique_cohort_retention_cell",
+        set_={
+            "donor_count": table.c.donor_count + stmt.excluded.donor_count,
+            "retained_count": table.c.retained_count + stmt.excluded.retained_count,
+            "gift_count": table.c.gift_count + stmt.excluded.gift_count,
+            "revenue": table.c.revenue + stmt.excluded.revenue,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    ))
+    return len(rows)
+
+
+def record_donor_change(
+        db: Session,
+        organization_id: UUID,
+        donor_id: Optional[UUID],
+        before: List[Gift]
+) -> None:
+    """
+    Update the cube after a donor's donations changed.
+
+    `before` is donor_gifts() captured ahead of the write, after lock_donor().
+    Call after the write is flushed and before commit so the cube moves with
+    the donation. Orgs whose cube has not been built yet are skipped; the
+    first read builds it.
+    """
+    if donor_id is None:
+        return
+    lock_donor(db, organization_id, donor_id)
+    if not cube_exists(db, organization_id):
+        return
+    db.flush()
+    apply_donor_change(db, organization_id, before, donor_gifts(db, donor_id))
+
+
+def record_donation(db: Session, donation: Donation) -> None:
+    """Update the cube for a newly added donation, under the donor's lock"""
+    if donation.donor_id is None:
+        return
+    lock_donor(db, donation.organization_id, donation.donor_id)
+    if not cube_exists(db, donation.organization_id):
+        return
+    db.flush()
+    after = donor_gifts(db, donation.donor_id)
+    before = [g for g in after if g[0] != donation.id]
+    apply_donor_change(db, donation.organization_id, before, after)
+
+
+# =====================================================================
+# READS
+# =====================================================================
+
+def read_cells(
+        db: Session,
+        organization_id: UUID,
+        grain: str,
+        since: Optional[date] = None
+) -> List[CohortRetentionCube]:
+    """Cube cells for one org and grain, optionally from activity period `since` on"""
+    if grain not in GRAINS:
+        raise ValueError(f"Unknown grain '{grain}', expected one of {', '.join(GRAINS)}")
+    ensure_cohort_cube(db, organization_id)
+
+    query = db.query(CohortRetentionCube).filter(
+        CohortRetentionCube.organization_id == organization_id,
+        CohortRetentionCube.grain == grain
+    )
+    if since is not None:
+        query = query.filter(CohortRetentionCube.activity_period >= since)
+    return query.all()
+
+
+def cohort_matrix(db: Session, organization_id: UUID, grain: str = "year") -> List[Dict]:
+    """
+    One entry per cohort with its size and activity in every later period.
+    still_active counts cohort donors who gave in the current or previous period.
+    """
+    cells = read_cells(db, organization_id, grain)
+    current = period_start(date.today(), grain)
+    previous = shift_period(current, grain, -1)
+
+    by_cohort: Dict[date, Dict[date, CohortRetentionCube]] = defaultdict(dict)
+    for cell in cells:
+        by_cohort[cell.cohort_period][cell.activity_period] = cell
+
+    cohorts = []
+    for cohort_period in sorted(by_cohort):
+        periods = by_cohort[cohort_period]
+        initial = periods[cohort_period].donor_count if cohort_period in periods else 0
+
+        current_cell = periods.get(current)
+        previous_cell = periods.get(previous)
+        still_active = (
+            (current_cell.donor_count if current_cell else 0)
+            + (previous_cell.donor_count if previous_cell else 0)
+            - (current_cell.retained_count if current_cell else 0)
+        )
+
+        activity = []
+        for activity_period in sorted(periods):
+            cell = periods[activity_period]
+            months = ((activity_period.year - cohort_period.year) * 12
+                      + activity_period.month - cohort_period.month)
+            activity.append({
+                "period": activity_period.isoformat(),
+                "period_offset": months // MONTHS_PER_GRAIN[grain],
+                "donors": cell.donor_count,
+                "retained_from_previous": cell.retained_count,
+                "gifts": cell.gift_count,
+                "revenue": float(cell.revenue or 0),
+                "retention_rate": round(cell.donor_count / initial * 100, 2) if initial else 0,
+            })
+
+        cohorts.append({
+            "cohort_period": cohort_period,
+            "initial_donors": initial,
+            "still_active": still_active,
+            "retention_rate": round(still_active / initial * 100, 2) if initial else 0,
+            "lifetime_revenue": sum(a["revenue"] for a in activity),
+            "activity": activity,
+        })
+    return cohorts
+
+
+def period_summaries(
+        db: Session,
+        organization_id: UUID,
+        grain: str,
+        periods: int
+) -> List[Dict]:
+    """
+    Active/new/retained/reactivated/lapsed donors for the last `periods`
+    activity periods (oldest first), ending with the current period.
+    """
+    current = period_start(date.today(), grain)
+    first = shift_period(current, grain, -(periods - 1))
+    cells = read_cells(db, organization_id, grain, since=shift_period(first, grain, -1))
+
+    totals = defaultdict(lambda: {"active": 0, "new": 0, "retained": 0, "gifts": 0, "revenue": 0.0})
+    for cell in cells:
+        t = totals[cell.activity_period]
+        t["active"] += cell.donor_count
+        t["retained"] += cell.retained_count
+        t["gifts"] += cell.gift_count
+        t["revenue"] += float(cell.revenue or 0)
+        if cell.cohort_period == cell.activity_period:
+            t["new"] += cell.donor_count
+
+    summaries = []
+    for i in range(periods):
+        period = shift_period(first, grain, i)
+        t = totals.get(period, {"active": 0, "new": 0, "retained": 0, "gifts": 0, "revenue": 0.0})
+        previous_active = totals.get(shift_period(period, grain, -1), {}).get("active", 0)
+        summaries.append({
+            "period": period,
+            "grain": grain,
+            "active_donors": t["active"],
+            "new_donors": t["new"],
+            "retained_donors": t["retained"],
+            "reactivated_donors": t["active"] - t["new"] - t["retained"],
+            "previous_donors": previous_active,
+            "lapsed_donors": previous_active - t["retained"],
+            "gift_count": t["gifts"],
+            "revenue": round(t["revenue"], 2),
+        })
+    return summaries
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild cohort retention cubes")
+    parser.add_argument("--org", action="append", help="Organization ID (repeatable); default all")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        org_ids = [UUID(o) for o in args.org] if args.org else [
+            row[0] for row in session.query(Donation.organization_id).distinct().all()
+        ]
+        for org_id in org_ids:
+            print(build_cohort_cube(session, org_id))
+    finally:
+        session.close()
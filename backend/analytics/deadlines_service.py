@@ -0,0 +1,349 @@
+"""
+Deadlines Service
+Wise Investor Platform
+
+Upcoming deadlines for the dashboard, shared by
+GET /api/v1/deadlines/{org} (quick actions) and
+GET /api/v1/dashboard/deadlines/{org}.
+
+Each source returns its deadlines already ordered by date:
+- campaign end dates, with progress from one grouped donations query
+- open tasks
+- event start dates
+- pledge installments coming due
+- major gift anniversaries (gifts >= $10K around this date last year)
+- stewardship touchpoints
+
+The sources are combined with a k-way merge (heapq.merge) and cut at the
+limit, so no source is ever sorted twice. Results are cached per organization
+and window for DEADLINES_CACHE_SECONDS; creating a task invalidates its org.
+"""
+
+from datetime import date, datetime, timedelta
+from heapq import merge
+from typing import Dict, List, Optional, Tuple
+import os
+import threading
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import (
+    Campaigns as Campaign,
+    Donations as Donation,
+    Donors as Donor,
+    Events as Event,
+    PledgeInstallments as PledgeInstallment,
+    Pledges as Pledge,
+    Tasks as Task,
+)
+
+CACHE_SECONDS = float(os.getenv("DEADLINES_CACHE_SECONDS", "60"))
+
+DEFAULT_LIMIT = 15
+MAX_TASKS = 10
+MAJOR_GIFT_THRESHOLD = 10000
+OPEN_TASK_STATUSES = ['pending', 'in_progress']
+CLOSED_EVENT_STATUSES = ['cancelled', 'canceled', 'completed']
+PAID_INSTALLMENT_STATUSES = ['paid', 'cancelled', 'written_off']
+
+SUMMARY_TYPES = {
+    "campaigns_ending": "campaign_end",
+    "tasks_due": "task",
+    "events": "event",
+    "pledge_payments": "pledge_payment",
+    "anniversaries": "anniversary",
+    "stewardship": "stewardship",
+}
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _deadline(id, type, title, on: date, today: date, priority, details, icon) -> Dict:
+    return {
+        "id": id,
+        "type": type,
+        "title": title,
+        "date": on.isoformat(),
+        "days_until": (on - today).days,
+        "priority": priority,
+        "details": details,
+        "icon": icon,
+    }
+
+
+# =====================================================================
+# SOURCES (each ordered by date)
+# =====================================================================
+
+def campaign_deadlines(db: Session, organization_id, today: date, end: date) -> List[Dict]:
+    raised = db.query(
+        Donation.campaign_id,
+        func.sum(Donation.amount).label("raised")
+    ).filter(
+        Donation.organization_id == organization_id,
+        Donation.campaign_id.isnot(None)
+    ).group_by(Donation.campaign_id).subquery()
+
+    rows = db.query(
+        Campaign.id,
+        Campaign.name,
+        Campaign.end_date,
+        Campaign.goal_amount,
+        func.coalesce(raised.c.raised, 0).label("raised")
+    ).outerjoin(
+        raised, raised.c.campaign_id == Campaign.id
+    ).filter(
+        Campaign.organization_id == organization_id,
+        Campaign.status == 'active',
+        Campaign.end_date >= today,
+        Campaign.end_date < end + timedelta(days=1)
+    ).order_by(Campaign.end_date).all()
+
+    deadlines = []
+    for row in rows:
+        end_date = _as_date(row.end_date)
+        goal = float(row.goal_amount) if row.goal_amount else 0
+        progress = float(row.raised) / goal * 100 if goal else 0
+        days_until = (end_date - today).days
+        deadlines.append(_deadline(
+            str(row.id), "campaign_end", f"{row.name} ends", end_date, today,
+            "high" if days_until <= 7 else "medium",
+            {"progress": round(progress, 1), "raised": float(row.raised), "goal": goal},
+            "target",
+        ))
+    return deadlines
+
+
+def task_deadlines(db: Session, organization_id, today: date, end: date) -> List[Dict]:
+    tasks = db.query(
+        Task.id, Task.title, Task.due_date, Task.priority, Task.status
+    ).filter(
+        Task.organization_id == organization_id,
+        Task.status.in_(OPEN_TASK_STATUSES),
+        Task.due_date >= today,
+        Task.due_date <= end
+    ).order_by(Task.due_date).limit(MAX_TASKS).all()
+
+    return [
+        _deadline(
+            str(task.id), "task", task.title, task.due_date, today, task.priority,
+            {"task_type": "general", "status": task.status},
+            "check-circle",
+        )
+        for task in tasks
+    ]
+
+
+def stewardship_deadlines(db: Session, organization_id, today: date, end: date) -> List[Dict]:
+    # Tasks only carry a type once the column exists on the model
+    if not hasattr(Task, 'task_type'):
+        return []
+
+    tasks = db.query(Task).filter(
+        Task.organization_id == organization_id,
+        Task.task_type == 'stewardship',
+        Task.status.in_(OPEN_TASK_STATUSES),
+        Task.due_date >= today,
+        Task.due_date <= end
+    ).order_by(Task.due_date).all()
+
+    return [
+        _deadline(
+            str(task.id), "stewardship", task.title, task.due_date, today, task.priority,
+            {"description": task.description},
+            "heart",
+        )
+        for task in tasks
+    ]
+
+
+def event_deadlines(db: Session, organization_id, today: date, end: date) -> List[Dict]:
+    events = db.query(
+        Event.id, Event.name, Event.start_date, Event.location,
+        Event.capacity, Event.registered_count
+    ).filter(
+        Event.organization_id == organization_id,
+        func.coalesce(Event.status, '').notin_(CLOSED_EVENT_STATUSES),
+        Event.start_date >= today,
+        Event.start_date < end + timedelta(days=1)
+    ).order_by(Event.start_date).all()
+
+    deadlines = []
+    for event in events:
+        start = _as_date(event.start_date)
+        days_until = (start - today).days
+        deadlines.append(_deadline(
+            str(event.id), "event", event.name, start, today,
+            "high" if days_until <= 3 else "medium",
+            {
+                "location": event.location,
+                "capacity": event.capacity,
+                "registered": event.registered_count or 0,
+            },
+            "calendar",
+        ))
+    return deadlines
+
+
+def pledge_deadlines(db: Session, organization_id, today: date, end: date) -> List[Dict]:
+    rows = db.query(
+        PledgeInstallment.id,
+        PledgeInstallment.due_date,
+        PledgeInstallment.due_amount,
+        Pledge.donor_id,
+        Donor.first_name,
+        Donor.last_name,
+    ).join(
+        Pledge, Pledge.id == PledgeInstallment.pledge_id
+    ).outerjoin(
+        Donor, Donor.id == Pledge.donor_id
+    ).filter(
+        PledgeInstallment.organization_id == organization_id,
+        PledgeInstallment.paid_payment_id.is_(None),
+        func.coalesce(PledgeInstallment.status, '').notin_(PAID_INSTALLMENT_STATUSES),
+        PledgeInstallment.due_date >= today,
+        PledgeInstallment.due_date <= end
+    ).order_by(PledgeInstallment.due_date).all()
+
+    return [
+        _deadline(
+            str(row.id), "pledge_payment",
+            f"{row.first_name} {row.last_name} - Pledge Payment Due",
+            row.due_date, today, "medium",
+            {
+                "donor_id": str(row.donor_id),
+                "donor_name": f"{row.first_name} {row.last_name}",
+                "amount": float(row.due_amount or 0),
+            },
+            "dollar-sign",
+        )
+        for row in rows
+    ]
+
+
+def next_anniversary(gift_date: date, today: date) -> date:
+    """First anniversary of gift_date on or after today; Feb 29 gifts fall on Feb 28 in other years"""
+    def in_year(year: int) -> date:
+        try:
+            return gift_date.replace(year=year)
+        except ValueError:  # Feb 29
+            return date(year, 2, 28)
+
+    anniversary = in_year(today.year)
+    return anniversary if anniversary >= today else in_year(today.year + 1)
+
+
+def anniversary_deadlines(db: Session, organization_id, today: date, days: int) -> List[Dict]:
+    try:
+        one_year_ago = today.replace(year=today.year - 1)
+    except ValueError:  # Feb 29
+        one_year_ago = today - timedelta(days=365)
+
+    rows = db.query(
+        Donation.id,
+        Donation.amount,
+        Donation.donation_date,
+        Donor.id.label("donor_id"),
+        Donor.first_name,
+        Donor.last_name,
+    ).join(
+        Donor, Donor.id == Donation.donor_id
+    ).filter(
+        Donation.organization_id == organization_id,
+        Donation.amount >= MAJOR_GIFT_THRESHOLD,
+        Donation.donation_date >= one_year_ago - timedelta(days=7),
+        Donation.donation_date < one_year_ago + timedelta(days=days + 1)
+    ).order_by(Donation.donation_date).all()
+
+    end = today + timedelta(days=days)
+    deadlines = []
+    for row in rows:
+        anniversary = next_anniversary(_as_date(row.donation_date), today)
+        if anniversary > end:
+            continue
+        donor_name = f"{row.first_name} {row.last_name}"
+        deadlines.append(_deadline(
+            f"anniversary-{row.id}", "anniversary", f"{donor_name} - Gift Anniversary",
+            anniversary, today, "medium",
+            {"donor_name": donor_name, "last_gift": float(row.amount), "donor_id": str(row.donor_id)},
+            "gift",
+        ))
+    return deadlines
+
+
+# =====================================================================
+# AGGREGATION
+# =====================================================================
+
+_cache: Dict[Tuple[str, int, int, date], Tuple[float, Dict]] = {}
+_cache_lock = threading.Lock()
+
+
+def invalidate_deadlines(organization_id) -> None:
+    """Drop cached deadlines of an organization, e.g. after a task is created"""
+    org = str(organization_id)
+    with _cache_lock:
+        for key in [k for k in _cache if k[0] == org]:
+            del _cache[key]
+
+
+def collect_deadlines(db: Session, organization_id, days: int, limit: int = DEFAULT_LIMIT,
+                      today: Optional[date] = None) -> Dict:
+    today = today or date.today()
+    end = today + timedelta(days=days)
+
+    sources = [
+        campaign_deadlines(db, organization_id, today, end),
+        task_deadlines(db, organization_id, today, end),
+        event_deadlines(db, organization_id, today, end),
+        pledge_deadlines(db, organization_id, today, end),
+        anniversary_deadlines(db, organization_id, today, days),
+        stewardship_deadlines(db, organization_id, today, end),
+    ]
+
+    seen = set()
+    deadlines = []
+    for deadline in merge(*sources, key=lambda d: d["date"]):
+        # Stewardship tasks also match the open-tasks source
+        if deadline["id"] in seen:
+            continue
+        seen.add(deadline["id"])
+        deadlines.append(deadline)
+        if len(deadlines) == limit:
+            break
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "deadlines": deadlines,
+        "summary": {
+            key: sum(1 for d in deadlines if d["type"] == deadline_type)
+            for key, deadline_type in SUMMARY_TYPES.items()
+        },
+    }
+
+
+def get_deadlines(db: Session, organization_id, days: int, limit: int = DEFAULT_LIMIT) -> Dict:
+    """collect_deadlines behind a short per-organization cache"""
+    today = date.today()
+    key = (str(organization_id), days, limit, today)
+    now = time.monotonic()
+
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    result = collect_deadlines(db, organization_id, days, limit, today)
+    with _cache_lock:
+        for stale in [k for k, (expires, _) in _cache.items() if expires <= now]:
+            del _cache[stale]
+        _cache[key] = (now + CACHE_SECONDS, result)
+    return result
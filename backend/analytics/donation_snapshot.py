@@ -0,0 +1,455 @@
+"""
+Donation Snapshot
+Wise Investor Platform
+
+Columnar in-memory copy of an organization's donations for the period
+selector of the *-filtered endpoints (analytics/analytics_timeline.py).
+Changing the period re-evaluates the same metrics over a different date
+range; with a snapshot that is a pair of binary searches and a few array
+reductions instead of a round of queries.
+
+One snapshot per organization holds, ordered by donation date:
+
+    ts        int64    donation date in microseconds, wall clock of the
+                       database session time zone (the frame in which
+                       Postgres compares the naive datetimes the endpoints
+                       pass)
+    amount    float64
+    donor     int32    index into donor_ids, -1 without donor
+    campaign  int32    index into campaign_ids, -1 without campaign
+    method    int16    index into methods (payment_method), -1 when empty
+    channel   int16    index into channels, -1 when empty
+
+plus the first gift date of every donor and the org's donor count. Aware
+datetimes are converted to the session time zone before comparing.
+
+Snapshots are loaded on first use, kept in an LRU of at most
+DONATION_SNAPSHOT_CACHE_SIZE organizations and DONATION_SNAPSHOT_CACHE_MB of
+arrays per worker (the most recent snapshot is kept even when it alone is
+larger) and rebuilt when the org's donation version changes
+(row count and last created/updated times of its donations, and its donor
+count). Counting scans the org's donations, so the version is checked at
+most once per DONATION_VERSION_TTL_SECONDS per organization and worker; a
+new gift shows up in the period filters within that time, or at once after
+invalidate_donation_snapshot. Organizations above
+DONATION_SNAPSHOT_MAX_ROWS donations, or every organization with
+DONATION_SNAPSHOT_ENABLED=0, are answered by LiveTimeline, which computes the
+same metrics with aggregate queries. When a memory-mapped snapshot of the
+current version exists (analytics/snapshot_files.py) it is used instead of
+reading the donations, whatever the org's size.
+
+    DONATION_SNAPSHOT_ENABLED=1
+    DONATION_SNAPSHOT_CACHE_SIZE=32       # organizations kept per worker
+    DONATION_SNAPSHOT_CACHE_MB=512        # array bytes kept per worker
+    DONATION_SNAPSHOT_MAX_ROWS=2000000    # ~50 MB of arrays
+    DONATION_VERSION_TTL_SECONDS=15       # 0 checks the version on every request
+
+Load and time the period filters of an organization:
+    python -m analytics.donation_snapshot --org <organization_id>
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import logging
+import os
+import threading
+import time
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("DONATION_SNAPSHOT_ENABLED", "1") != "0"
+CACHE_SIZE = int(os.getenv("DONATION_SNAPSHOT_CACHE_SIZE", "32"))
+CACHE_BYTES = int(float(os.getenv("DONATION_SNAPSHOT_CACHE_MB", "512")) * 1024 * 1024)
+MAX_ROWS = int(os.getenv("DONATION_SNAPSHOT_MAX_ROWS", "2000000"))
+VERSION_TTL_SECONDS = float(os.getenv("DONATION_VERSION_TTL_SECONDS", "15"))
+CHUNK_ROWS = 250000
+
+ONLINE_METHODS = ('credit_card', 'paypal', 'online')
+
+VERSION_SQL = text("""
+    SELECT
+        COUNT(*),
+        MAX(updated_at),
+        MAX(created_at),
+        (SELECT COUNT(*) FROM donors WHERE organization_id = :org_id),
+        current_setting('TimeZone')
+    FROM donations
+    WHERE organization_id = :org_id
+""")
+
+SNAPSHOT_SQL = text("""
+    SELECT
+        (EXTRACT(EPOCH FROM donation_date AT TIME ZONE current_setting('TimeZone')) * 1000000)::bigint AS ts,
+        amount::float8 AS amount,
+        donor_id,
+        campaign_id,
+        payment_method,
+        channel
+    FROM donations
+    WHERE organization_id = :org_id
+      AND donation_date IS NOT NULL
+    ORDER BY donation_date
+""")
+
+# Live equivalents of the snapshot metrics
+TOTALS_SQL = text("""
+    SELECT
+        COALESCE(SUM(amount), 0),
+        COUNT(*),
+        COUNT(DISTINCT donor_id),
+        COALESCE(SUM(amount) FILTER (WHERE payment_method IN :online), 0)
+    FROM donations
+    WHERE organization_id = :org_id
+      AND donation_date >= :start
+      AND donation_date <= :end
+""").bindparams(bindparam("online", expanding=True))
+
+RETAINED_SQL = text("""
+    SELECT COUNT(*) FROM (
+        SELECT donor_id FROM donations
+        WHERE organization_id = :org_id AND donation_date >= :start AND donation_date <= :end
+        INTERSECT
+        SELECT donor_id FROM donations
+        WHERE organization_id = :org_id AND donation_date >= :prev_start AND donation_date <= :prev_end
+    ) retained
+    WHERE donor_id IS NOT NULL
+""")
+
+NEW_DONORS_SQL = text("""
+    SELECT COUNT(DISTINCT d.donor_id)
+    FROM donations d
+    WHERE d.organization_id = :org_id
+      AND d.donation_date >= :start
+      AND d.donation_date <= :end
+      AND NOT EXISTS (
+          SELECT 1 FROM donations p
+          WHERE p.organization_id = :org_id
+            AND p.donor_id = d.donor_id
+            AND p.donation_date < :start
+      )
+""")
+
+RECURRING_DONORS_SQL = text("""
+    SELECT COUNT(*) FROM (
+        SELECT donor_id FROM donations
+        WHERE organization_id = :org_id
+          AND donation_date >= :start
+          AND donation_date <= :end
+          AND donor_id IS NOT NULL
+        GROUP BY donor_id
+        HAVING COUNT(*) > 1
+    ) recurring
+""")
+
+DONOR_COUNT_SQL = text("SELECT COUNT(*) FROM donors WHERE organization_id = :org_id")
+
+
+@dataclass
+class PeriodTotals:
+    revenue: float = 0.0
+    donation_count: int = 0
+    donors: int = 0
+    online_amount: float = 0.0
+
+    @property
+    def average_gift(self) -> float:
+        return self.revenue / self.donation_count if self.donation_count else 0.0
+
+
+# =====================================================================
+# SNAPSHOT
+# =====================================================================
+
+def _micros(when: datetime, zone: str) -> int:
+    """Wall-clock microseconds of `when` in the session time zone"""
+    if when.tzinfo is not None:
+        when = when.astimezone(ZoneInfo(zone))
+    return int(np.datetime64(when.replace(tzinfo=None), "us").astype(np.int64))
+
+
+def _codes(values: List, labels: Dict) -> np.ndarray:
+    """Index of every value in labels (extended as new values appear), -1 for empty values"""
+    return np.fromiter(
+        (-1 if not value else labels.setdefault(value, len(labels)) for value in values),
+        dtype=np.int64, count=len(values)
+    )
+
+
+@dataclass
+class DonationSnapshot:
+    organization_id: str
+    version: Tuple
+    ts: np.ndarray
+    amount: np.ndarray
+    donor: np.ndarray
+    campaign: np.ndarray
+    method: np.ndarray
+    channel: np.ndarray
+    donor_ids: List[UUID]
+    campaign_ids: List[UUID]
+    methods: List[str]
+    channels: List[str]
+    first_gift: np.ndarray
+    donor_count: int
+    zone: str
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+    seconds: float = 0.0
+
+    source = "snapshot"
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (
+            self.ts, self.amount, self.donor, self.campaign, self.method, self.channel, self.first_gift
+        ))
+
+    def _range(self, start: datetime, end: datetime) -> slice:
+        """Rows with start <= donation date <= end"""
+        lo = np.searchsorted(self.ts, _micros(start, self.zone), side="left")
+        hi = np.searchsorted(self.ts, _micros(end, self.zone), side="right")
+        return slice(lo, hi)
+
+    def _donor_counts(self, start: datetime, end: datetime) -> np.ndarray:
+        donors = self.donor[self._range(start, end)]
+        return np.bincount(donors[donors >= 0], minlength=len(self.donor_ids))
+
+    def totals(self, start: datetime, end: datetime) -> PeriodTotals:
+        rows = self._range(start, end)
+        amount = self.amount[rows]
+        online = np.isin(self.method[rows], self._method_codes(ONLINE_METHODS))
+        return PeriodTotals(
+            revenue=float(amount.sum()),
+            donation_count=len(amount),
+            donors=int(np.count_nonzero(self._donor_counts(start, end))),
+            online_amount=float(amount[online].sum()),
+        )
+
+    def retained_donors(self, start: datetime, end: datetime,
+                        prev_start: datetime, prev_end: datetime) -> int:
+        """Donors who gave in both periods"""
+        return int(np.count_nonzero(
+            (self._donor_counts(start, end) > 0) & (self._donor_counts(prev_start, prev_end) > 0)
+        ))
+
+    def new_donors(self, start: datetime, end: datetime) -> int:
+        """Donors who gave in the period and never before it"""
+        return int(np.count_nonzero(
+            (self._donor_counts(start, end) > 0) & (self.first_gift >= _micros(start, self.zone))
+        ))
+
+    def recurring_donors(self, start: datetime, end: datetime) -> int:
+        """Donors with two or more gifts in the period"""
+        return int(np.count_nonzero(self._donor_counts(start, end) > 1))
+
+    def _method_codes(self, methods) -> List[int]:
+        return [i for i, method in enumerate(self.methods) if method in methods]
+
+
+def donation_version(db: Session, organization_id: UUID) -> Tuple:
+    """Donation count, last created/updated times, donor count and session time zone of the org"""
+    return tuple(db.execute(VERSION_SQL, {"org_id": organization_id}).one())
+
+
+def load_donation_snapshot(db: Session, organization_id: UUID, version: Tuple) -> DonationSnapshot:
+    """Read the org's donations into columnar arrays, streamed in chunks"""
+    start = time.perf_counter()
+    donors, campaigns, methods, channels = {}, {}, {}, {}
+    columns = {name: [] for name in ("ts", "amount", "donor", "campaign", "method", "channel")}
+
+    result = db.execute(SNAPSHOT_SQL.execution_options(stream_results=True), {"org_id": organization_id})
+    for partition in result.partitions(CHUNK_ROWS):
+        ts, amount, donor_id, campaign_id, method, channel = zip(*partition)
+        columns["ts"].append(np.array(ts, dtype=np.int64))
+        columns["amount"].append(np.array([a or 0.0 for a in amount], dtype=np.float64))
+        columns["donor"].append(_codes(donor_id, donors))
+        columns["campaign"].append(_codes(campaign_id, campaigns))
+        columns["method"].append(_codes(method, methods))
+        columns["channel"].append(_codes(channel, channels))
+
+    dtypes = {"ts": np.int64, "amount": np.float64, "donor": np.int32,
+              "campaign": np.int32, "method": np.int16, "channel": np.int16}
+    arrays = {
+        name: np.concatenate(parts).astype(dtypes[name], copy=False) if parts else np.zeros(0, dtype=dtypes[name])
+        for name, parts in columns.items()
+    }
+
+    # Rows are in date order, so a donor's first row is their first gift
+    first_gift = np.full(len(donors), np.iinfo(np.int64).max, dtype=np.int64)
+    given = arrays["donor"] >= 0
+    seen, first_row = np.unique(arrays["donor"][given], return_index=True)
+    first_gift[seen] = arrays["ts"][given][first_row]
+
+    snapshot = DonationSnapshot(
+        organization_id=str(organization_id),
+        version=version,
+        **arrays,
+        donor_ids=list(donors),
+        campaign_ids=list(campaigns),
+        methods=list(methods),
+        channels=list(channels),
+        first_gift=first_gift,
+        donor_count=version[3],
+        zone=version[4],
+    )
+    snapshot.seconds = round(time.perf_counter() - start, 3)
+    logger.info(f"Donation snapshot loaded for {organization_id}: {len(snapshot)} donations, "
+                f"{snapshot.nbytes / 1e6:.1f} MB in {snapshot.seconds}s")
+    return snapshot
+
+
+# =====================================================================
+# LIVE FALLBACK
+# =====================================================================
+
+class LiveTimeline:
+    """The snapshot metrics computed with aggregate queries"""
+
+    source = "live"
+
+    def __init__(self, db: Session, organization_id: UUID):
+        self.db = db
+        self.organization_id = organization_id
+
+    def _scalar(self, statement, **params) -> int:
+        return self.db.execute(statement, {"org_id": self.organization_id, **params}).scalar() or 0
+
+    @property
+    def donor_count(self) -> int:
+        return self._scalar(DONOR_COUNT_SQL)
+
+    def totals(self, start: datetime, end: datetime) -> PeriodTotals:
+        revenue, count, donors, online = self.db.execute(TOTALS_SQL, {
+            "org_id": self.organization_id, "start": start, "end": end, "online": list(ONLINE_METHODS)
+        }).one()
+        return PeriodTotals(revenue=float(revenue), donation_count=count, donors=donors,
+                            online_amount=float(online))
+
+    def retained_donors(self, start: datetime, end: datetime,
+                        prev_start: datetime, prev_end: datetime) -> int:
+        return self._scalar(RETAINED_SQL, start=start, end=end, prev_start=prev_start, prev_end=prev_end)
+
+    def new_donors(self, start: datetime, end: datetime) -> int:
+        return self._scalar(NEW_DONORS_SQL, start=start, end=end)
+
+    def recurring_donors(self, start: datetime, end: datetime) -> int:
+        return self._scalar(RECURRING_DONORS_SQL, start=start, end=end)
+
+
+# =====================================================================
+# CACHE
+# =====================================================================
+
+_snapshots: "OrderedDict[str, DonationSnapshot]" = OrderedDict()
+_versions: "OrderedDict[str, Tuple[float, Tuple]]" = OrderedDict()
+_snapshot_bytes = 0
+_lock = threading.Lock()
+
+
+def recent_donation_version(db: Session, organization_id: UUID) -> Tuple:
+    """donation_version, reused for VERSION_TTL_SECONDS after it was read"""
+    key = str(organization_id)
+    now = time.monotonic()
+    with _lock:
+        checked = _versions.get(key)
+    if checked and now - checked[0] < VERSION_TTL_SECONDS:
+        return checked[1]
+
+    version = donation_version(db, organization_id)
+    with _lock:
+        _versions[key] = (now, version)
+        _versions.move_to_end(key)
+        while len(_versions) > CACHE_SIZE * 8:
+            _versions.popitem(last=False)
+    return version
+
+
+def donation_timeline(db: Session, organization_id: UUID):
+    """The org's cached snapshot, reloaded when its donations changed; LiveTimeline when not snapshotted"""
+    if not ENABLED:
+        return LiveTimeline(db, organization_id)
+
+    key = str(organization_id)
+    version = recent_donation_version(db, organization_id)
+
+    with _lock:
+        cached = _snapshots.get(key)
+        if cached and cached.version == version:
+            _snapshots.move_to_end(key)
+            return cached
+
+    # Loaded here: snapshot_files imports this module
+    from analytics.snapshot_files import mapped_donations
+    snapshot = mapped_donations(organization_id, version)
+    if snapshot is None:
+        if version[0] > MAX_ROWS:
+            return LiveTimeline(db, organization_id)
+        snapshot = load_donation_snapshot(db, organization_id, version)
+
+    global _snapshot_bytes
+    with _lock:
+        replaced = _snapshots.pop(key, None)
+        if replaced is not None:
+            _snapshot_bytes -= replaced.nbytes
+        _snapshots[key] = snapshot
+        _snapshot_bytes += snapshot.nbytes
+        while len(_snapshots) > 1 and (len(_snapshots) > CACHE_SIZE or _snapshot_bytes > CACHE_BYTES):
+            _snapshot_bytes -= _snapshots.popitem(last=False)[1].nbytes
+    return snapshot
+
+
+def invalidate_donation_snapshot(organization_id: Optional[UUID] = None) -> None:
+    """Drop one organization's snapshot and checked version, or all of them"""
+    global _snapshot_bytes
+    with _lock:
+        if organization_id is None:
+            _snapshots.clear()
+            _versions.clear()
+            _snapshot_bytes = 0
+        else:
+            dropped = _snapshots.pop(str(organization_id), None)
+            if dropped is not None:
+                _snapshot_bytes -= dropped.nbytes
+            _versions.pop(str(organization_id), None)
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+    from analytics.analytics_timeline import calculate_date_range
+
+    parser = argparse.ArgumentParser(description="Load donation snapshots and time the period filters")
+    parser.add_argument("--org", action="append", required=True, help="Organization ID (repeatable)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        for org in args.org:
+            org_id = UUID(org)
+            snapshot = load_donation_snapshot(session, org_id, donation_version(session, org_id))
+            live = LiveTimeline(session, org_id)
+            print(f"✅ {org}: {len(snapshot)} donations, {len(snapshot.donor_ids)} donors, "
+                  f"{snapshot.nbytes / 1e6:.1f} MB loaded in {snapshot.seconds}s")
+            for period in ("ytd", "year", "quarter", "month", "week", "last30days", "last90days"):
+                start_date, end_date, label = calculate_date_range(period)
+                timings = []
+                for timeline in (snapshot, live):
+                    started = time.perf_counter()
+                    totals = timeline.totals(start_date, end_date)
+                    new = timeline.new_donors(start_date, end_date)
+                    timings.append((time.perf_counter() - started) * 1000)
+                print(f"   {label:<16} ${totals.revenue:>14,.2f} {totals.donation_count:>8} gifts "
+                      f"{new:>6} new   snapshot {timings[0]:.2f} ms / live {timings[1]:.1f} ms")
+    finally:
+        session.close()
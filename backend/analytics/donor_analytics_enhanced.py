@@ -13,7 +13,7 @@ Date: November 14, 2025
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_, or_, case, desc, distinct
+from sqlalchemy import func, and_, or_, case, desc, distinct
 from uuid import UUID
 from datetime import datetime, timedelta, date
 from typing import Optional, Dict, List
@@ -21,7 +21,8 @@ from decimal import Decimal
 import statistics
 
 from analytics.analytics import get_current_user, verify_organization_access
-from database import get_db
+from database import get_db, get_read_db
+from utils import in_range, year_range
 from models import Donations as Donation, Donors as Donor, Organizations as Organization
 from models import SecondGiftTracking
 
@@ -206,7 +207,7 @@ async def get_second_gift_conversion(
 async def get_revenue_diversification(
     organization_id: str,
     year: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """
@@ -241,7 +242,7 @@ async def get_revenue_diversification(
         func.sum(Donation.amount).label('total')
     ).filter(
         Donation.organization_id == UUID(organization_id),
-        extract('year', Donation.donation_date) == year
+        in_range(Donation.donation_date, year_range(year))
     ).group_by(Donation.dedication_type).all()
     
     # If dedication_type doesn't exist, use a default breakdown
@@ -250,7 +251,7 @@ async def get_revenue_diversification(
         # Fallback: all revenue as "individual"
         total_donations = db.query(func.sum(Donation.amount)).filter(
             Donation.organization_id == UUID(organization_id),
-            extract('year', Donation.donation_date) == year
+            in_range(Donation.donation_date, year_range(year))
         ).scalar() or 0
         
         revenue_by_type = [("individual", total_donations)]
@@ -385,7 +386,7 @@ async def get_donor_acquisition_cost(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     by_channel: bool = Query(False, description="Break down by acquisition channel"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """
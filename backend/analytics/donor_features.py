@@ -0,0 +1,649 @@
+"""
+Donor Feature Store
+Wise Investor Platform
+
+One row of behavioural features per donor in donor_features, shared by the
+scoring endpoints instead of each of them scanning donations on its own:
+
+- giving: gift count, total, largest gift, first / last / previous gift
+  date, mean and sample stdev of the days between gifts, average of the
+  first two and last two gifts, 90 day / 12 month / prior 12 month windows
+- interactions (completed): count, last interaction, last 30 days vs the
+  30 days before, share with an outcome, mean sentiment, most used channel
+- events: registrations and check-ins (registrations matched on email)
+- meetings: completed, completed in the last 12 months, last meeting date
+
+load_features() returns the organization's features as a DonorFeatureFrame
+of aligned NumPy columns, and the scorers below are transforms over it:
+
+    churn_risk          GET /api/v1/donor-intelligence/churn-risk/{org}
+    health_scores       GET /api/v1/donor-intelligence/health-score/{org}
+    risk_segments       GET /api/v1/analytics/predictive/churn-risk/{org}
+    engagement_risk     POST /api/v1/engagement-analytics/predictions/generate/{org}
+    lapsed_donors       GET /analytics/{org}/churn-prediction
+    affinity_engagement GET /api/v1/analytics/affinity/{org}
+    giving_capacity     GET /api/v1/analytics/capacity/{org}
+
+Windowed features are relative to the row's as_of date, so the store is
+rebuilt in full once a day; later refreshes the same day only recompute
+donors whose donors, donations, interactions, meetings or event
+registrations rows were created or updated since the last run. Deleted
+source rows are picked up by the next daily rebuild. When an organization's
+store is not current, load_features() computes the same features with one
+read-only query, so replica routes never write.
+
+Run nightly, and as often as needed during the day:
+    python -m analytics.donor_features
+    python -m analytics.donor_features --org <organization_id> [--full]
+"""
+
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import logging
+import time
+
+import numpy as np
+from sqlalchemy import bindparam, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from models import Donors as Donor, DonorFeature, InteractionStatus
+
+logger = logging.getLogger(__name__)
+
+# Column name -> kind, in the order of FEATURES_SQL
+FEATURE_KINDS = {
+    "donor_id": "id",
+    "party_id": "id",
+    "gift_count": "int",
+    "total_amount": "money",
+    "largest_gift": "money",
+    "first_gift_date": "date",
+    "last_gift_date": "date",
+    "previous_gift_date": "date",
+    "interval_mean_days": "float",
+    "interval_std_days": "float",
+    "first_two_avg": "money",
+    "last_two_avg": "money",
+    "gifts_90d": "int",
+    "gifts_12m": "int",
+    "amount_12m": "money",
+    "gifts_prev_12m": "int",
+    "amount_prev_12m": "money",
+    "interaction_count": "int",
+    "last_interaction_at": "datetime",
+    "interactions_30d": "int",
+    "interactions_prev_30d": "int",
+    "interactions_with_outcome": "int",
+    "sentiment_mean": "float",
+    "top_channel": "str",
+    "events_registered": "int",
+    "events_attended": "int",
+    "meetings_completed": "int",
+    "meetings_12m": "int",
+    "last_meeting_date": "date",
+}
+
+# Features of the org's donors (all of them, or the given ids) as of :as_of / :now
+FEATURES_SQL = text("""
+    WITH scope AS (
+        SELECT d.id, d.party_id, d.email
+        FROM donors d
+        WHERE d.organization_id = :org_id
+          AND (:all_donors OR d.id IN :donor_ids)
+    ),
+    gifts AS (
+        SELECT
+            dn.donor_id,
+            dn.amount,
+            dn.donation_date::date AS gift_date,
+            dn.donation_date::date - LAG(dn.donation_date::date) OVER w AS gap_days,
+            ROW_NUMBER() OVER w AS seq,
+            ROW_NUMBER() OVER (PARTITION BY dn.donor_id ORDER BY dn.donation_date DESC, dn.id DESC) AS seq_desc
+        FROM donations dn
+        JOIN scope s ON s.id = dn.donor_id
+        WHERE dn.organization_id = :org_id
+          AND dn.donation_date IS NOT NULL
+        WINDOW w AS (PARTITION BY dn.donor_id ORDER BY dn.donation_date, dn.id)
+    ),
+    giving AS (
+        SELECT
+            donor_id,
+            COUNT(*)                                            AS gift_count,
+            SUM(amount)                                         AS total_amount,
+            MAX(amount)                                         AS largest_gift,
+            MIN(gift_date)                                      AS first_gift_date,
+            MAX(gift_date)                                      AS last_gift_date,
+            MAX(gift_date) FILTER (WHERE seq_desc = 2)          AS previous_gift_date,
+            AVG(gap_days)                                       AS interval_mean_days,
+            STDDEV_SAMP(gap_days)                               AS interval_std_days,
+            AVG(amount) FILTER (WHERE seq <= 2)                 AS first_two_avg,
+            AVG(amount) FILTER (WHERE seq_desc <= 2)            AS last_two_avg,
+            COUNT(*) FILTER (WHERE gift_date >= CAST(:as_of AS date) - 90)  AS gifts_90d,
+            COUNT(*) FILTER (WHERE gift_date >= CAST(:as_of AS date) - 365) AS gifts_12m,
+            COALESCE(SUM(amount) FILTER (WHERE gift_date >= CAST(:as_of AS date) - 365), 0) AS amount_12m,
+            COUNT(*) FILTER (WHERE gift_date >= CAST(:as_of AS date) - 730
+                               AND gift_date < CAST(:as_of AS date) - 365) AS gifts_prev_12m,
+            COALESCE(SUM(amount) FILTER (WHERE gift_date >= CAST(:as_of AS date) - 730
+                                           AND gift_date < CAST(:as_of AS date) - 365), 0) AS amount_prev_12m
+        FROM gifts
+        GROUP BY donor_id
+    ),
+    interactions AS (
+        SELECT
+            i.donor_id,
+            COUNT(*)                    AS interaction_count,
+            MAX(i.interaction_date)     AS last_interaction_at,
+            COUNT(*) FILTER (WHERE i.interaction_date >= CAST(:now AS timestamp) - INTERVAL '30 days') AS interactions_30d,
+            COUNT(*) FILTER (WHERE i.interaction_date >= CAST(:now AS timestamp) - INTERVAL '60 days'
+                               AND i.interaction_date < CAST(:now AS timestamp) - INTERVAL '30 days') AS interactions_prev_30d,
+            COUNT(i.outcome)            AS interactions_with_outcome,
+            AVG(CASE i.sentiment::text
+                    WHEN 'VERY_POSITIVE' THEN 1.0
+                    WHEN 'POSITIVE' THEN 0.5
+                    WHEN 'NEUTRAL' THEN 0.0
+                    WHEN 'NEGATIVE' THEN -0.5
+                    WHEN 'VERY_NEGATIVE' THEN -1.0
+                END)                    AS sentiment_mean,
+            MODE() WITHIN GROUP (ORDER BY i.channel::text) AS top_channel
+        FROM donor_interactions i
+        JOIN scope s ON s.id = i.donor_id
+        WHERE i.organization_id = :org_id
+          AND i.interaction_status::text = :completed
+        GROUP BY i.donor_id
+    ),
+    events AS (
+        SELECT
+            s.id AS donor_id,
+            COUNT(*)                                AS events_registered,
+            COUNT(*) FILTER (WHERE r.checked_in)    AS events_attended
+        FROM scope s
+        JOIN event_registrations r ON r.participant_email = s.email
+        JOIN events e ON e.id = r.event_id
+        WHERE e.organization_id = :org_id
+        GROUP BY s.id
+    ),
+    meetings AS (
+        SELECT
+            m.donor_id,
+            COUNT(*) FILTER (WHERE m.is_completed) AS meetings_completed,
+            COUNT(*) FILTER (WHERE m.is_completed
+                               AND COALESCE(m.actual_date, m.scheduled_date) >= CAST(:as_of AS date) - 365) AS meetings_12m,
+            MAX(COALESCE(m.actual_date, m.scheduled_date)) FILTER (WHERE m.is_completed) AS last_meeting_date
+        FROM donor_meetings m
+        JOIN scope s ON s.id = m.donor_id
+        WHERE m.organization_id = :org_id
+        GROUP BY m.donor_id
+    )
+    SELECT
+        s.id                                        AS donor_id,
+        s.party_id,
+        COALESCE(g.gift_count, 0)                   AS gift_count,
+        COALESCE(g.total_amount, 0)                 AS total_amount,
+        g.largest_gift,
+        g.first_gift_date,
+        g.last_gift_date,
+        g.previous_gift_date,
+        g.interval_mean_days,
+        g.interval_std_days,
+        g.first_two_avg,
+        g.last_two_avg,
+        COALESCE(g.gifts_90d, 0)                    AS gifts_90d,
+        COALESCE(g.gifts_12m, 0)                    AS gifts_12m,
+        COALESCE(g.amount_12m, 0)                   AS amount_12m,
+        COALESCE(g.gifts_prev_12m, 0)               AS gifts_prev_12m,
+        COALESCE(g.amount_prev_12m, 0)              AS amount_prev_12m,
+        COALESCE(i.interaction_count, 0)            AS interaction_count,
+        i.last_interaction_at,
+        COALESCE(i.interactions_30d, 0)             AS interactions_30d,
+        COALESCE(i.interactions_prev_30d, 0)        AS interactions_prev_30d,
+        COALESCE(i.interactions_with_outcome, 0)    AS interactions_with_outcome,
+        i.sentiment_mean,
+        i.top_channel,
+        COALESCE(e.events_registered, 0)            AS events_registered,
+        COALESCE(e.events_attended, 0)              AS events_attended,
+        COALESCE(m.meetings_completed, 0)           AS meetings_completed,
+        COALESCE(m.meetings_12m, 0)                 AS meetings_12m,
+        m.last_meeting_date
+    FROM scope s
+    LEFT JOIN giving g ON g.donor_id = s.id
+    LEFT JOIN interactions i ON i.donor_id = s.id
+    LEFT JOIN events e ON e.donor_id = s.id
+    LEFT JOIN meetings m ON m.donor_id = s.id
+""").bindparams(bindparam("donor_ids", expanding=True))
+
+# Donors with source rows created or updated after :since
+CHANGED_DONORS_SQL = text("""
+    SELECT id AS donor_id FROM donors
+    WHERE organization_id = :org_id AND (created_at > :since OR updated_at > :since)
+    UNION
+    SELECT donor_id FROM donations
+    WHERE organization_id = :org_id AND donor_id IS NOT NULL
+      AND (created_at > :since OR updated_at > :since)
+    UNION
+    SELECT donor_id FROM donor_interactions
+    WHERE organization_id = :org_id AND updated_at > :since
+    UNION
+    SELECT donor_id FROM donor_meetings
+    WHERE organization_id = :org_id AND updated_at > :since
+    UNION
+    SELECT d.id FROM donors d
+    JOIN event_registrations r ON r.participant_email = d.email
+    JOIN events e ON e.id = r.event_id AND e.organization_id = :org_id
+    WHERE d.organization_id = :org_id
+      AND (r.created_at > :since OR r.checked_in_at > :since)
+""")
+
+
+# =====================================================================
+# FEATURE FRAME
+# =====================================================================
+
+@dataclass
+class DonorFeatureFrame:
+    """
+    Features of one organization's donors as aligned columns: row i of every
+    array is the same donor. Money is float64, counts int64, dates
+    datetime64[D] and timestamps datetime64[s] (NaT when missing), ids and
+    labels object arrays.
+    """
+    organization_id: UUID
+    as_of: date
+    source: str  # "store", "snapshot" or "live"
+    donor_id: np.ndarray
+    party_id: np.ndarray
+    gift_count: np.ndarray
+    total_amount: np.ndarray
+    largest_gift: np.ndarray
+    first_gift_date: np.ndarray
+    last_gift_date: np.ndarray
+    previous_gift_date: np.ndarray
+    interval_mean_days: np.ndarray
+    interval_std_days: np.ndarray
+    first_two_avg: np.ndarray
+    last_two_avg: np.ndarray
+    gifts_90d: np.ndarray
+    gifts_12m: np.ndarray
+    amount_12m: np.ndarray
+    gifts_prev_12m: np.ndarray
+    amount_prev_12m: np.ndarray
+    interaction_count: np.ndarray
+    last_interaction_at: np.ndarray
+    interactions_30d: np.ndarray
+    interactions_prev_30d: np.ndarray
+    interactions_with_outcome: np.ndarray
+    sentiment_mean: np.ndarray
+    top_channel: np.ndarray
+    events_registered: np.ndarray
+    events_attended: np.ndarray
+    meetings_completed: np.ndarray
+    meetings_12m: np.ndarray
+    last_meeting_date: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.donor_id)
+
+    def take(self, index) -> "DonorFeatureFrame":
+        """Rows selected by a boolean mask or positions"""
+        return replace(self, **{name: getattr(self, name)[index] for name in FEATURE_KINDS})
+
+    def days_since(self, column: str, when) -> np.ndarray:
+        """Whole days from a date/timestamp column to `when`; NaN where missing"""
+        values = getattr(self, column)
+        unit = "s" if FEATURE_KINDS[column] == "datetime" else "D"
+        if isinstance(when, datetime) and when.tzinfo is not None:
+            when = when.astimezone(timezone.utc).replace(tzinfo=None)
+        return np.floor((np.datetime64(when, unit) - values) / np.timedelta64(1, "D"))
+
+
+def _column(values: List, kind: str) -> np.ndarray:
+    if kind == "int":
+        return np.array([v or 0 for v in values], dtype=np.int64)
+    if kind in ("money", "float"):
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    if kind == "date":
+        return np.array(values, dtype="datetime64[D]")
+    if kind == "datetime":
+        return np.array([v.replace(tzinfo=None) if v else None for v in values], dtype="datetime64[s]")
+    return np.array(values, dtype=object)
+
+
+def build_frame(rows, organization_id: UUID, as_of: date, source: str) -> DonorFeatureFrame:
+    """DonorFeatureFrame from rows carrying the FEATURE_KINDS columns"""
+    columns = {name: [getattr(row, name) for row in rows] for name in FEATURE_KINDS}
+    return DonorFeatureFrame(
+        organization_id=organization_id,
+        as_of=as_of,
+        source=source,
+        **{name: _column(values, FEATURE_KINDS[name]) for name, values in columns.items()}
+    )
+
+
+def compute_features(db: Session, organization_id: UUID, as_of: date, now: datetime,
+                     donor_ids: Optional[List[UUID]] = None):
+    """Feature rows straight from the source tables (read-only)"""
+    return db.execute(FEATURES_SQL, {
+        "org_id": organization_id,
+        "as_of": as_of,
+        "now": now.astimezone(timezone.utc).replace(tzinfo=None),
+        "all_donors": donor_ids is None,
+        "donor_ids": list(donor_ids or []),
+        "completed": InteractionStatus.COMPLETED.name,
+    }).all()
+
+
+def store_as_of(db: Session, organization_id: UUID) -> Optional[date]:
+    """Oldest as_of of the org's stored rows, None when nothing is stored"""
+    return db.query(func.min(DonorFeature.as_of)).filter(
+        DonorFeature.organization_id == organization_id
+    ).scalar()
+
+
+def store_version(db: Session, organization_id: UUID) -> Tuple:
+    """Oldest as_of, last computed_at and row count of the org's stored rows"""
+    return tuple(db.query(
+        func.min(DonorFeature.as_of), func.max(DonorFeature.computed_at), func.count(DonorFeature.id)
+    ).filter(DonorFeature.organization_id == organization_id).one())
+
+
+def load_features(db: Session, organization_id: UUID, today: Optional[date] = None) -> DonorFeatureFrame:
+    """
+    The organization's donor features. Served from donor_features when the
+    store was rebuilt today (from its memory-mapped snapshot when one of the
+    same version exists), otherwise computed live without writing.
+    """
+    today = today or date.today()
+    version = store_version(db, organization_id)
+    if version[0] == today:
+        # Loaded here: snapshot_files imports this module
+        from analytics.snapshot_files import mapped_features
+        frame = mapped_features(organization_id, version)
+        if frame is not None:
+            return frame
+
+        rows = db.execute(
+            select(*[getattr(DonorFeature, name) for name in FEATURE_KINDS]).where(
+                DonorFeature.organization_id == organization_id
+            )
+        ).all()
+        return build_frame(rows, organization_id, today, "store")
+
+    rows = compute_features(db, organization_id, today, datetime.now(timezone.utc))
+    return build_frame(rows, organization_id, today, "live")
+
+
+def donor_contacts(db: Session, donor_ids) -> Dict:
+    """Name, email and level of the given donors, keyed by donor id"""
+    ids = list(donor_ids)
+    if not ids:
+        return {}
+    rows = db.query(
+        Donor.id, Donor.first_name, Donor.last_name, Donor.email, Donor.donor_level
+    ).filter(Donor.id.in_(ids)).all()
+    return {row.id: row for row in rows}
+
+
+def top_positions(values: np.ndarray, mask: np.ndarray, limit: int, decimals: int = 1) -> np.ndarray:
+    """Positions where mask holds, highest value (as rounded for the response) first"""
+    positions = np.flatnonzero(mask)
+    order = np.argsort(-np.round(values[positions], decimals), kind="stable")
+    return positions[order][:limit]
+
+
+def money(value: float) -> Decimal:
+    return Decimal(str(round(float(value), 2)))
+
+
+# =====================================================================
+# REFRESH
+# =====================================================================
+
+def refresh_donor_features(db: Session, organization_id: UUID, full: bool = False,
+                           today: Optional[date] = None) -> Dict:
+    """
+    Rebuild the org's features: in full when forced or when the store is not
+    from today, else only for donors whose source rows changed since the
+    last run.
+    """
+    start = time.perf_counter()
+    today = today or date.today()
+    now = datetime.now(timezone.utc)
+
+    donor_ids = None
+    if not full and store_as_of(db, organization_id) == today:
+        since = db.query(func.max(DonorFeature.computed_at)).filter(
+            DonorFeature.organization_id == organization_id
+        ).scalar()
+        donor_ids = [row.donor_id for row in db.execute(
+            CHANGED_DONORS_SQL, {"org_id": organization_id, "since": since}
+        )]
+
+    mode = "full" if donor_ids is None else "incremental"
+    rows = []
+    if donor_ids is None or donor_ids:
+        rows = [
+            {**row._asdict(), "organization_id": organization_id, "as_of": today, "computed_at": now}
+            for row in compute_features(db, organization_id, today, now, donor_ids)
+        ]
+
+        stale = db.query(DonorFeature).filter(DonorFeature.organization_id == organization_id)
+        if donor_ids is not None:
+            stale = stale.filter(DonorFeature.donor_id.in_(donor_ids))
+        stale.delete(synchronize_session=False)
+        if rows:
+            db.execute(insert(DonorFeature), rows)
+        db.commit()
+
+    stats = {
+        "organization_id": str(organization_id),
+        "mode": mode,
+        "donors": len(rows),
+        "as_of": today.isoformat(),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    logger.info(f"Donor features refreshed: {stats}")
+    return stats
+
+
+# =====================================================================
+# SCORERS
+# =====================================================================
+
+def churn_risk(frame: DonorFeatureFrame, today: date, days_threshold: int) -> Dict[str, np.ndarray]:
+    """
+    Lapse probability (0-100) of donors with 2+ gifts, the last two within
+    2 x days_threshold: lapse threshold or overdue against the donor's own
+    interval, declining amounts (first two vs last two of 4+ gifts) and
+    recency.
+    """
+    lookback = np.datetime64(today - timedelta(days=days_threshold * 2), "D")
+    eligible = (frame.gift_count >= 2) & (frame.previous_gift_date >= lookback)
+
+    days_since = frame.days_since("last_gift_date", today)
+    expected = frame.interval_mean_days
+    lapsed = days_since > days_threshold
+    overdue = days_since > expected * 1.5
+    declining = (frame.gift_count >= 4) & (frame.last_two_avg < frame.first_two_avg * 0.8)
+
+    probability = (
+        np.where(lapsed, 40.0, np.where(overdue, 25.0, 0.0))
+        + np.where(declining, 20.0, 0.0)
+        + np.minimum(days_since / days_threshold * 30, 30)
+    )
+    probability = np.minimum(probability, 100)
+    level = np.select([probability < 40, probability < 70], ["Low", "Medium"], "High")
+
+    return {
+        "eligible": eligible,
+        "probability": probability,
+        "risk_level": level,
+        "days_since_last_gift": days_since,
+        "expected_frequency_days": expected,
+        "lapsed": lapsed,
+        "overdue": overdue,
+        "declining": declining,
+    }
+
+
+def health_scores(frame: DonorFeatureFrame) -> Dict[str, np.ndarray]:
+    """
+    Health (0-100) of donors with gifts: recency (30%, 0 at two years),
+    consistency of intervals (40%, 100 - CV x 50, 50 with one gift) and
+    year-over-year trend (30%, -50%..+50% mapped to 0..100).
+    """
+    eligible = frame.gift_count > 0
+    days_since = frame.days_since("last_gift_date", frame.as_of)
+    recency = np.maximum(0, 100 - days_since / 730.0 * 100)
+
+    mean = np.nan_to_num(frame.interval_mean_days)
+    std = np.nan_to_num(frame.interval_std_days)
+    cv = np.where(mean > 0, std / np.where(mean > 0, mean, 1), 0)
+    consistency = np.where(frame.gift_count >= 2, np.maximum(0, 100 - cv * 50), 50.0)
+
+    previous = frame.amount_prev_12m
+    has_previous = previous > 0
+    yoy = np.where(has_previous, (frame.amount_12m - previous) / np.where(has_previous, previous, 1) * 100, 0.0)
+    trend = np.where(has_previous, 50 + np.clip(yoy, -50, 50), 50.0)
+
+    health = recency * 0.30 + consistency * 0.40 + trend * 0.30
+    status = np.select(
+        [health >= 80, health >= 60, health >= 40, health >= 20],
+        ["Excellent", "Good", "Fair", "Poor"],
+        "Critical"
+    )
+
+    return {
+        "eligible": eligible,
+        "health_score": health,
+        "status": status,
+        "recency": recency,
+        "consistency": consistency,
+        "trend": trend,
+        "yoy_change": yoy,
+        "days_since_last_gift": days_since,
+    }
+
+
+def risk_segments(frame: DonorFeatureFrame) -> Dict[str, float]:
+    """
+    Organization churn segments by last gift: active (12 months), high risk
+    (last gift 90-180 days ago), medium (60-90), low (within 30), plus the
+    donors of 3-12 months ago and how many of them gave in the last 90 days.
+    """
+    days = frame.days_since("last_gift_date", frame.as_of)
+    high = (days >= 90) & (days <= 180)
+    gave_3_to_12m = (frame.gifts_12m - frame.gifts_90d) > 0
+
+    return {
+        "active_donors": int(np.count_nonzero(days <= 365)),
+        "high_risk": int(np.count_nonzero(high)),
+        "medium_risk": int(np.count_nonzero((days >= 60) & (days <= 90))),
+        "low_risk": int(np.count_nonzero(days <= 30)),
+        "donors_3m_ago": int(np.count_nonzero(gave_3_to_12m)),
+        "retained": int(np.count_nonzero(gave_3_to_12m & (frame.gifts_90d > 0))),
+        "at_risk_value": float(frame.amount_12m[high].sum()),
+    }
+
+
+def engagement_risk(frame: DonorFeatureFrame, now: datetime) -> Dict[str, np.ndarray]:
+    """
+    Disengagement risk (0-100) of donors with completed interactions:
+    days since last interaction (0-40), 30 day trend (0-30), response rate
+    (0-20) and sentiment (0-10). Levels: critical 70+, high 50+, medium 30+.
+    """
+    eligible = frame.interaction_count > 0
+    days_since = frame.days_since("last_interaction_at", now)
+
+    recent, previous = frame.interactions_30d, frame.interactions_prev_30d
+    ratio = recent / np.maximum(previous, 1)
+    trend = np.where(
+        previous > 0,
+        np.select([ratio > 1.2, ratio < 0.8], ["increasing", "declining"], "stable"),
+        "stable"
+    )
+
+    response_rate = frame.interactions_with_outcome / np.maximum(frame.interaction_count, 1) * 100
+    sentiment = np.nan_to_num(frame.sentiment_mean)
+
+    score = (
+        np.select([days_since > 180, days_since > 90, days_since > 60, days_since > 30], [40, 30, 20, 10], 0)
+        + np.select([trend == "declining", trend == "stable"], [30, 15], 0)
+        + np.select([response_rate < 20, response_rate < 40, response_rate < 60], [20, 15, 10], 0)
+        + np.select([sentiment < -0.3, sentiment < 0], [10, 5], 0)
+    ).astype(float)
+    level = np.select([score >= 70, score >= 50, score >= 30], ["critical", "high", "medium"], "low")
+
+    return {
+        "eligible": eligible,
+        "churn_risk_score": np.minimum(100.0, score),
+        "risk_level": level,
+        "days_since_last_interaction": days_since,
+        "interaction_trend": trend,
+        "response_rate": response_rate,
+        "sentiment_score": sentiment,
+    }
+
+
+def lapsed_donors(frame: DonorFeatureFrame, days: int = 365) -> np.ndarray:
+    """Positions of donors whose last gift is more than `days` old"""
+    return np.flatnonzero(frame.days_since("last_gift_date", frame.as_of) > days)
+
+
+def affinity_engagement(frame: DonorFeatureFrame) -> Dict[str, np.ndarray]:
+    """
+    Engagement (0..1): average of event check-ins, completed meetings and
+    completed interactions, each scaled by the org maximum. Organizations
+    with none of those fall back to giving recency (60%) and frequency (40%).
+    """
+    signals = [
+        values for values in (frame.events_attended, frame.meetings_completed, frame.interaction_count)
+        if values.max(initial=0) > 0
+    ]
+    if signals:
+        engagement = sum(values / values.max() for values in signals) / len(signals)
+        return {"engagement": engagement, "basis": "activity"}
+
+    days = frame.days_since("last_gift_date", frame.as_of)
+    recency = np.select([days <= 30, days <= 90, days <= 180, days <= 365], [1.0, 0.75, 0.5, 0.25], 0.0)
+    count = frame.gift_count
+    frequency = np.select([count >= 6, count >= 4, count >= 2], [1.0, 0.8, 0.6], 0.4)
+    return {"engagement": recency * 0.6 + frequency * 0.4, "basis": "giving"}
+
+
+def giving_capacity(frame: DonorFeatureFrame) -> np.ndarray:
+    """
+    Capacity proxy (0..1) from giving when no wealth data exists: largest
+    gift (50%), lifetime total (30%) and last 12 months (20%), min-max scaled.
+    """
+    def scaled(values: np.ndarray) -> np.ndarray:
+        values = np.nan_to_num(values)
+        low, high = values.min(initial=0), values.max(initial=0)
+        if high <= low:
+            return np.zeros(len(values))
+        return (values - low) / (high - low)
+
+    return 0.5 * scaled(frame.largest_gift) + 0.3 * scaled(frame.total_amount) + 0.2 * scaled(frame.amount_12m)
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Refresh the donor feature store")
+    parser.add_argument("--org", action="append", help="Organization ID (repeatable); default all")
+    parser.add_argument("--full", action="store_true", help="Rebuild every donor, not only changed ones")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        org_ids = [UUID(o) for o in args.org] if args.org else [
+            row[0] for row in session.query(Donor.organization_id).distinct().all() if row[0]
+        ]
+        for org_id in org_ids:
+            stats = refresh_donor_features(session, org_id, full=args.full)
+            print(f"✅ {stats['organization_id']}: {stats['donors']} donors ({stats['mode']}) in {stats['seconds']}s")
+    finally:
+        session.close()
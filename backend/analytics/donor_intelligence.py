@@ -34,7 +34,7 @@ from uuid import UUID
 from decimal import Decimal
 import statistics
 
-from database import get_db
+from database import get_read_db, get_batch_db
 from models import (
     Users as User,
     Donations as Donation,
@@ -203,7 +203,7 @@ async def get_rfm_analysis(
         segment_filter: Optional[str] = Query(None, description="Filter by segment"),
         min_score: Optional[int] = Query(None, ge=1, le=5),
         limit: int = Query(100, le=1000),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     RFM (Recency, Frequency, Monetary) Analysis
@@ -358,17 +358,48 @@ async def get_rfm_analysis(
     return rfm_data[:limit]
 
 
+# ============================================================================
+# DONOR FEATURE STORE
+# ============================================================================
+
+@router.post("/features/{organization_id}/refresh")
+async def refresh_donor_features(
+        organization_id: UUID,
+        full: bool = Query(False, description="Rebuild every donor, not only changed ones"),
+        db: Session = Depends(get_batch_db)
+):
+    """Refresh the donor features behind the health, churn and engagement scores"""
+    from analytics.donor_features import refresh_donor_features as refresh
+
+    try:
+        return refresh(db, organization_id, full=full)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error refreshing donor features: {str(e)}"
+        )
+
+
 # ============================================================================
 # DONOR HEALTH SCORE
 # ============================================================================
 
+HEALTH_ACTIONS = {
+    "Excellent": ["Continue stewardship", "Consider upgrade", "Seek testimonial"],
+    "Good": ["Maintain engagement", "Share impact stories", "Invite to events"],
+    "Fair": ["Increase touchpoints", "Survey satisfaction", "Re-engage"],
+    "Poor": ["Personal outreach", "Identify barriers", "Special campaign"],
+    "Critical": ["Urgent intervention", "Personal call", "Last-chance offer"],
+}
+
+
 @router.get("/health-score/{organization_id}", response_model=List[DonorHealthResponse])
 async def get_donor_health_scores(
         organization_id: UUID,
         min_health_score: Optional[int] = Query(None, ge=0, le=100),
         health_status: Optional[str] = Query(None),
         limit: int = Query(100, le=1000),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Comprehensive Donor Health Score (0-100)
@@ -386,84 +417,30 @@ async def get_donor_health_scores(
     - Critical (0-19): Likely to lapse
     """
 
-    today = date.today()  # Use date to avoid timezone issues
-    one_year_ago = today - timedelta(days=365)
-    two_years_ago = today - timedelta(days=730)
-
-    # Get donors with giving history
-    donors = db.query(Donor).filter(
-        Donor.organization_id == organization_id
-    ).all()
-
-    health_scores = []
-
-    for donor in donors:
-        # Get donation history
-        donations = db.query(Donation).filter(
-            Donation.donor_id == donor.id,
-            Donation.organization_id == organization_id
-        ).order_by(Donation.donation_date).all()
-
-        if not donations:
-            continue
+    # Loaded on first use to keep numpy out of worker startup
+    from analytics.donor_features import (
+        donor_contacts, health_scores, load_features, money, top_positions
+    )
 
-        # Convert donation dates to date objects
-        donation_dates = [
-            d.donation_date.date() if hasattr(d.donation_date, 'date') else d.donation_date
-            for d in donations
-        ]
+    # One feature row per donor; the score is a transform over its columns
+    frame = load_features(db, organization_id)
+    scores = health_scores(frame)
 
-        # Calculate recency score (0-100)
-        last_gift_date = donation_dates[-1]
-        days_since_last = (today - last_gift_date).days
-        recency_score = max(0, 100 - (days_since_last / 730.0 * 100))  # 0 at 2 years
-
-        # Calculate consistency score (0-100)
-        if len(donation_dates) >= 2:
-            time_diffs = [
-                (donation_dates[i+1] - donation_dates[i]).days
-                for i in range(len(donation_dates) - 1)
-            ]
-            avg_diff = statistics.mean(time_diffs)
-            std_diff = statistics.stdev(time_diffs) if len(time_diffs) > 1 else 0
-            cv = std_diff / avg_diff if avg_diff > 0 else 0
-            consistency_score = max(0, 100 - (cv * 50))  # Lower CV = more consistent
-        else:
-            consistency_score = 50  # Neutral for new donors
+    keep = scores["eligible"].copy()
+    if min_health_score:
+        keep &= scores["health_score"] >= min_health_score
+    if health_status:
+        keep &= scores["status"] == health_status
 
-        # Calculate trend score (0-100)
-        this_year_donations = [
-            donations[i] for i, d in enumerate(donation_dates) if d >= one_year_ago
-        ]
-        last_year_donations = [
-            donations[i] for i, d in enumerate(donation_dates)
-            if two_years_ago <= d < one_year_ago
-        ]
+    positions = top_positions(scores["health_score"], keep, limit)
+    contacts = donor_contacts(db, frame.donor_id[positions])
 
-        this_year_total = sum(d.amount for d in this_year_donations) if this_year_donations else Decimal('0')
-        last_year_total = sum(d.amount for d in last_year_donations) if last_year_donations else Decimal('0')
-
-        if last_year_total > 0:
-            yoy_change = ((this_year_total - last_year_total) / last_year_total) * 100
-            trend_score = 50 + min(max(float(yoy_change), -50), 50)  # -50% to +50% mapped to 0-100
-        else:
-            yoy_change = 0
-            trend_score = 50
-
-        # Weighted health score
-        health_score = (recency_score * 0.30) + (consistency_score * 0.40) + (trend_score * 0.30)
-
-        # Classify health status
-        if health_score >= 80:
-            status = "Excellent"
-        elif health_score >= 60:
-            status = "Good"
-        elif health_score >= 40:
-            status = "Fair"
-        elif health_score >= 20:
-            status = "Poor"
-        else:
-            status = "Critical"
+    health_list = []
+    for i in positions:
+        health_score = scores["health_score"][i]
+        status = str(scores["status"][i])
+        days_since_last = int(scores["days_since_last_gift"][i])
+        yoy_change = float(scores["yoy_change"][i])
 
         # Identify risk indicators
         risks = []
@@ -476,58 +453,46 @@ async def get_donor_health_scores(
         if not risks:
             risks.append("No significant risks detected")
 
-        # Recommended actions
-        if status == "Excellent":
-            actions = ["Continue stewardship", "Consider upgrade", "Seek testimonial"]
-        elif status == "Good":
-            actions = ["Maintain engagement", "Share impact stories", "Invite to events"]
-        elif status == "Fair":
-            actions = ["Increase touchpoints", "Survey satisfaction", "Re-engage"]
-        elif status == "Poor":
-            actions = ["Personal outreach", "Identify barriers", "Special campaign"]
-        else:
-            actions = ["Urgent intervention", "Personal call", "Last-chance offer"]
-
-        # Apply filters
-        if min_health_score and health_score < min_health_score:
-            continue
-        if health_status and status != health_status:
-            continue
-
-        health_scores.append(DonorHealthResponse(
-            donor_id=donor.id,
-            donor_name=f"{donor.first_name} {donor.last_name}",
-            email=donor.email,
-            health_score=round(health_score, 1),
+        donor = contacts.get(frame.donor_id[i])
+        health_list.append(DonorHealthResponse(
+            donor_id=frame.donor_id[i],
+            donor_name=f"{donor.first_name} {donor.last_name}" if donor else "",
+            email=donor.email if donor else None,
+            health_score=round(float(health_score), 1),
             health_status=status,
-            recency_component=round(recency_score, 1),
-            consistency_component=round(consistency_score, 1),
-            trend_component=round(trend_score, 1),
-            total_gifts=len(donations),
-            lifetime_value=sum(d.amount for d in donations),
+            recency_component=round(float(scores["recency"][i]), 1),
+            consistency_component=round(float(scores["consistency"][i]), 1),
+            trend_component=round(float(scores["trend"][i]), 1),
+            total_gifts=int(frame.gift_count[i]),
+            lifetime_value=money(frame.total_amount[i]),
             days_since_last_gift=days_since_last,
-            year_over_year_change_percent=round(float(yoy_change), 1),
+            year_over_year_change_percent=round(yoy_change, 1),
             risk_indicators=risks,
-            recommended_actions=actions
+            recommended_actions=HEALTH_ACTIONS[status]
         ))
 
-    # Sort by health score descending
-    health_scores.sort(key=lambda x: x.health_score, reverse=True)
-
-    return health_scores[:limit]
+    return health_list
 
 
 # ============================================================================
 # CHURN RISK PREDICTION
 # ============================================================================
 
+# Intervention window and actions per churn risk level
+CHURN_INTERVENTIONS = {
+    "Low": ("Monitor (3 months)", ["Standard nurture", "Monitor engagement"]),
+    "Medium": ("Act soon (1 month)", ["Personal email", "Share success story", "Event invitation"]),
+    "High": ("Immediate (1 week)", ["Personal call", "We-miss-you message", "Exclusive opportunity"]),
+}
+
+
 @router.get("/churn-risk/{organization_id}", response_model=List[ChurnRiskResponse])
 async def predict_churn_risk(
         organization_id: UUID,
         risk_level: Optional[str] = Query(None, description="High, Medium, Low"),
         days_threshold: int = Query(365, description="Lapse threshold in days"),
         limit: int = Query(100, le=1000),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Predictive Churn Risk Analysis
@@ -543,125 +508,58 @@ async def predict_churn_risk(
     - Low (0-39%): Healthy
     """
 
-    today = date.today()  # Use date to avoid timezone issues
-    lookback_date = today - timedelta(days=days_threshold * 2)
+    # Loaded on first use to keep numpy out of worker startup
+    from analytics.donor_features import (
+        churn_risk, donor_contacts, load_features, money, top_positions
+    )
 
-    # Get donors with at least 2 gifts
-    donor_histories = db.query(
-        Donor.id,
-        Donor.first_name,
-        Donor.last_name,
-        Donor.email,
-        func.count(Donation.id).label('gift_count'),
-        func.max(Donation.donation_date).label('last_gift_date'),
-        func.sum(Donation.amount).label('total_amount')
-    ).join(
-        Donation, Donation.donor_id == Donor.id
-    ).filter(
-        Donor.organization_id == organization_id,
-        Donation.donation_date >= lookback_date
-    ).group_by(
-        Donor.id, Donor.first_name, Donor.last_name, Donor.email
-    ).having(
-        func.count(Donation.id) >= 2
-    ).all()
+    today = date.today()  # Use date to avoid timezone issues
 
-    predictions = []
+    # Donors with at least 2 gifts in the lookback window, scored from their feature row
+    frame = load_features(db, organization_id, today)
+    scores = churn_risk(frame, today, days_threshold)
 
-    for donor_history in donor_histories:
-        # Get detailed history
-        donations = db.query(Donation).filter(
-            Donation.donor_id == donor_history.id,
-            Donation.organization_id == organization_id
-        ).order_by(Donation.donation_date).all()
+    keep = scores["eligible"].copy()
+    if risk_level:
+        keep &= scores["risk_level"] == risk_level
 
-        if len(donations) < 2:
-            continue
+    positions = top_positions(scores["probability"], keep, limit)
+    contacts = donor_contacts(db, frame.donor_id[positions])
 
-        # Convert to date objects
-        donation_dates = [
-            d.donation_date.date() if hasattr(d.donation_date, 'date') else d.donation_date
-            for d in donations
-        ]
-
-        # Calculate expected frequency
-        time_diffs = [
-            (donation_dates[i+1] - donation_dates[i]).days
-            for i in range(len(donation_dates) - 1)
-        ]
-        expected_frequency = statistics.mean(time_diffs)
-
-        # Convert last_gift_date to date object
-        last_gift_date = donor_history.last_gift_date.date() if hasattr(donor_history.last_gift_date, 'date') else donor_history.last_gift_date
-        days_since_last = (today - last_gift_date).days
-        is_overdue = days_since_last > (expected_frequency * 1.5)
+    predictions = []
+    for i in positions:
+        risk_level_str = str(scores["risk_level"][i])
 
-        # Calculate churn probability
         risk_factors = []
-        churn_probability = 0
-
-        if days_since_last > days_threshold:
+        if scores["lapsed"][i]:
             risk_factors.append("Exceeded lapse threshold")
-            churn_probability += 40
-        elif is_overdue:
+        elif scores["overdue"][i]:
             risk_factors.append("Overdue based on giving pattern")
-            churn_probability += 25
-
-        # Check for declining amounts
-        if len(donations) >= 4:
-            recent_avg = statistics.mean([float(d.amount) for d in donations[-2:]])
-            older_avg = statistics.mean([float(d.amount) for d in donations[:2]])
-            if recent_avg < (older_avg * 0.8):
-                risk_factors.append("Declining gift amounts")
-                churn_probability += 20
-
-        # Recency risk
-        recency_risk = min((days_since_last / days_threshold) * 30, 30)
-        churn_probability += recency_risk
-
-        churn_probability = min(churn_probability, 100)
-
-        if churn_probability < 40:
-            risk_level_str = "Low"
-            urgency = "Monitor (3 months)"
-            actions = ["Standard nurture", "Monitor engagement"]
-        elif churn_probability < 70:
-            risk_level_str = "Medium"
-            urgency = "Act soon (1 month)"
-            actions = ["Personal email", "Share success story", "Event invitation"]
-        else:
-            risk_level_str = "High"
-            urgency = "Immediate (1 week)"
-            actions = ["Personal call", "We-miss-you message", "Exclusive opportunity"]
-
+        if scores["declining"][i]:
+            risk_factors.append("Declining gift amounts")
         if not risk_factors:
             risk_factors.append("No significant risks detected")
 
-        # Apply filter
-        if risk_level and risk_level_str != risk_level:
-            continue
-
+        urgency, actions = CHURN_INTERVENTIONS[risk_level_str]
+        donor = contacts.get(frame.donor_id[i])
         predictions.append(ChurnRiskResponse(
-            donor_id=donor_history.id,
-            donor_name=f"{donor_history.first_name} {donor_history.last_name}",
-            email=donor_history.email,
-            churn_probability_percent=round(churn_probability, 1),
+            donor_id=frame.donor_id[i],
+            donor_name=f"{donor.first_name} {donor.last_name}" if donor else "",
+            email=donor.email if donor else None,
+            churn_probability_percent=round(float(scores["probability"][i]), 1),
             risk_level=risk_level_str,
             risk_factors=risk_factors,
-            days_since_last_gift=days_since_last,
-            expected_frequency_days=round(expected_frequency),
-            is_overdue=is_overdue,
-            lifetime_value=Decimal(str(donor_history.total_amount)),
-            total_gifts=donor_history.gift_count,
-            last_gift_date=last_gift_date,
+            days_since_last_gift=int(scores["days_since_last_gift"][i]),
+            expected_frequency_days=round(float(scores["expected_frequency_days"][i])),
+            is_overdue=bool(scores["overdue"][i]),
+            lifetime_value=money(frame.total_amount[i]),
+            total_gifts=int(frame.gift_count[i]),
+            last_gift_date=frame.last_gift_date[i].item(),
             intervention_urgency=urgency,
             recommended_actions=actions
         ))
 
-    # Sort by churn probability descending
-    predictions.sort(key=lambda x: x.churn_probability_percent, reverse=True)
-
-    return predictions[:limit]
+    return predictions
 
 
 # ============================================================================
@@ -674,7 +572,7 @@ async def predict_lifetime_value(
         min_predicted_ltv: Optional[float] = None,
         value_segment: Optional[str] = None,
         limit: int = Query(100, le=1000),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Predicted Lifetime Value (pLTV)
@@ -836,7 +734,7 @@ async def predict_next_gift(
         include_overdue: bool = Query(True),
         min_confidence: Optional[int] = Query(None, ge=0, le=100),
         limit: int = Query(100, le=1000),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Next Gift Prediction & Optimal Ask Timing
@@ -977,7 +875,7 @@ async def analyze_upgrade_potential(
         potential_level: Optional[str] = Query(None),
         min_capacity: Optional[float] = None,
         limit: int = Query(100, le=1000),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Donor Upgrade Potential & Capacity Analysis
@@ -1146,7 +1044,7 @@ async def analyze_giving_patterns(
         organization_id: UUID,
         pattern_type: Optional[str] = Query(None),
         limit: int = Query(100, le=1000),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Giving Pattern Analysis
@@ -1165,111 +1063,11 @@ async def analyze_giving_patterns(
     - Seasonal patterns
     """
 
-    # Get donors with at least 3 gifts for pattern detection
-    donor_histories = db.query(
-        Donor.id,
-        Donor.first_name,
-        Donor.last_name,
-        Donor.email,
-        func.count(Donation.id).label('gift_count'),
-        func.sum(Donation.amount).label('lifetime_value')
-    ).join(
-        Donation, Donation.donor_id == Donor.id
-    ).filter(
-        Donor.organization_id == organization_id
-    ).group_by(
-        Donor.id, Donor.first_name, Donor.last_name, Donor.email
-    ).having(
-        func.count(Donation.id) >= 3
-    ).all()
-
-    patterns = []
-
-    for donor_history in donor_histories:
-        # Get detailed history
-        donations = db.query(Donation).filter(
-            Donation.donor_id == donor_history.id,
-            Donation.organization_id == organization_id
-        ).order_by(Donation.donation_date).all()
-
-        # Convert to date objects
-        donation_dates = [
-            d.donation_date.date() if hasattr(d.donation_date, 'date') else d.donation_date
-            for d in donations
-        ]
-
-        # Calculate frequency
-        time_diffs = [
-            (donation_dates[i+1] - donation_dates[i]).days
-            for i in range(len(donation_dates) - 1)
-        ]
-        avg_frequency = statistics.mean(time_diffs)
-        std_frequency = statistics.stdev(time_diffs) if len(time_diffs) > 1 else 0
-
-        # Determine pattern type
-        if 25 <= avg_frequency <= 35:
-            pattern = "Monthly"
-        elif 80 <= avg_frequency <= 100:
-            pattern = "Quarterly"
-        elif 170 <= avg_frequency <= 190:
-            pattern = "Semi-Annual"
-        elif 350 <= avg_frequency <= 380:
-            pattern = "Annual"
-        else:
-            pattern = "Irregular"
-
-        # Calculate consistency
-        cv = std_frequency / avg_frequency if avg_frequency > 0 else 1
-        consistency = max(0, (1 - cv) * 100)
-
-        # Find preferred months (extract month from date objects)
-        months = [d.month for d in donation_dates]
-        month_counts = {}
-        for m in months:
-            month_counts[m] = month_counts.get(m, 0) + 1
-
-        top_months = sorted(month_counts.items(), key=lambda x: x[1], reverse=True)[:3]
-        month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-        preferred_months = [month_names[m-1] for m, _ in top_months]
-
-        # Find preferred amounts
-        amounts = [d.amount for d in donations]
-        preferred_amounts = sorted(set(amounts), reverse=True)[:3]
-
-        # Trend
-        if len(donations) >= 4:
-            midpoint = len(donations) // 2
-            recent_avg = sum(d.amount for d in donations[midpoint:]) / len(donations[midpoint:])
-            older_avg = sum(d.amount for d in donations[:midpoint]) / midpoint
-            if recent_avg > older_avg * Decimal('1.1'):
-                trend = "Increasing"
-            elif recent_avg < older_avg * Decimal('0.9'):
-                trend = "Decreasing"
-            else:
-                trend = "Stable"
-        else:
-            trend = "Insufficient data"
-
-        # Apply filter
-        if pattern_type and pattern != pattern_type:
-            continue
-
-        patterns.append(GivingPatternResponse(
-            donor_id=donor_history.id,
-            donor_name=f"{donor_history.first_name} {donor_history.last_name}",
-            email=donor_history.email,
-            pattern_type=pattern,
-            average_frequency_days=round(avg_frequency),
-            consistency_score=round(consistency, 1),
-            preferred_giving_months=preferred_months,
-            preferred_giving_amounts=preferred_amounts,
-            total_gifts=donor_history.gift_count,
-            lifetime_value=Decimal(str(donor_history.lifetime_value)),
-            trend=trend,
-            seasonal_pattern_detected=len(set(months)) <= 3  # Concentrated in few months
-        ))
+    # Loaded on first use to keep numpy out of worker startup
+    from analytics.giving_patterns import detect_giving_patterns
 
-    # Sort by consistency score descending
-    patterns.sort(key=lambda x: x.consistency_score, reverse=True)
+    # Donors with at least 3 gifts, streamed in chunks and analyzed as NumPy segments;
+    # returns the `limit` most consistent donors, most consistent first
+    patterns = detect_giving_patterns(db, organization_id, pattern_type, limit)
 
-    return patterns[:limit]
\ No newline at end of file
+    return [GivingPatternResponse(**pattern) for pattern in patterns]
\ No newline at end of file
@@ -0,0 +1,332 @@
+"""
+Donor Scoring Service
+Wise Investor Platform
+
+Persists one row of scores per donor in donor_scores, stamped with
+score_version and calculated_at, so dashboards read scores instead of
+recomputing them over every donor on each request.
+
+Scores are transforms over the donor feature store (analytics/donor_features.py):
+
+    churn_risk_score  0-100  lapse probability (churn-risk model, 365 day threshold)
+    affinity_score    0-100  frequency (3 per gift, max 30) + recency (40 within
+                             90 days, else 20) + monetary (1 per $1,000, max 30)
+    capacity_score    0-1    giving capacity proxy (largest gift, totals)
+    engagement_score  0-100  events, meetings and interactions
+    rfm_score         3-15   recency + frequency + monetary quintile scores (1-5
+                             each, donors with gifts); donor_segment is the RFM segment
+
+Refresh: the feature store is brought up to date incrementally, every
+donor's scores are recomputed in memory from the feature frame (quintiles and
+capacity scaling are relative to the whole organization), and only rows
+whose score_version or any score changed are upserted. loyalty_score,
+influence_score and lifecycle_stage are left as they are.
+
+Reads are index range scans on (organization_id, <score>):
+    top_scores(db, org, "affinity_score", limit)   leaderboard, ORDER BY ... LIMIT
+    score_summary(db, org, "affinity_score", bands) average and counts per range
+
+Existing databases need the new columns and indexes once:
+    python -m schemacreate.donor_scores_columns --apply
+Run after the feature store refresh:
+    python -m analytics.donor_scoring
+    python -m analytics.donor_scoring --org <organization_id>
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import logging
+import time
+
+import numpy as np
+from sqlalchemy import and_, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from analytics.donor_features import (
+    DonorFeatureFrame,
+    affinity_engagement,
+    churn_risk,
+    giving_capacity,
+    load_features,
+    refresh_donor_features,
+)
+from models import DonorScores, Donors as Donor
+
+logger = logging.getLogger(__name__)
+
+# Bump when a formula changes so every stored row is rewritten on the next refresh
+SCORE_VERSION = 1
+
+SCORE_COLUMNS = ("churn_risk_score", "affinity_score", "capacity_score", "engagement_score", "rfm_score")
+
+RFM_QUINTILES = (0.2, 0.4, 0.6, 0.8)
+
+
+# =====================================================================
+# SCORES
+# =====================================================================
+
+def affinity_scores(frame: DonorFeatureFrame) -> np.ndarray:
+    """Frequency + recency + monetary affinity (0-100); donors without gifts score 20"""
+    days = frame.days_since("last_gift_date", frame.as_of)
+    frequency = np.minimum(30, frame.gift_count * 3)
+    recency = np.where(days < 90, 40, 20)
+    monetary = np.minimum(30, frame.total_amount / 1000)
+    return frequency + recency + monetary
+
+
+def _quintile_scores(values: np.ndarray) -> np.ndarray:
+    """1-5 by the org's quintile thresholds; a value at or below the 20% threshold scores 1"""
+    ordered = np.sort(values)
+    if not len(ordered):
+        return np.zeros(0, dtype=np.int64)
+    thresholds = ordered[[max(0, int(len(ordered) * q) - 1) for q in RFM_QUINTILES]]
+    return np.searchsorted(thresholds, values, side="left") + 1
+
+
+def rfm_scores(frame: DonorFeatureFrame) -> Dict[str, np.ndarray]:
+    """Recency, frequency and monetary quintile scores and segment; 0 and "" for donors without gifts"""
+    givers = frame.gift_count > 0
+    days = frame.days_since("last_gift_date", frame.as_of)
+
+    r = np.zeros(len(frame), dtype=np.int64)
+    f = np.zeros(len(frame), dtype=np.int64)
+    m = np.zeros(len(frame), dtype=np.int64)
+    r[givers] = 6 - _quintile_scores(days[givers])  # Fewer days since the last gift = better
+    f[givers] = _quintile_scores(frame.gift_count[givers])
+    m[givers] = _quintile_scores(frame.total_amount[givers])
+
+    segment = np.select(
+        [
+            ~givers,
+            (r >= 4) & (f >= 4) & (m >= 4),
+            (r >= 3) & (f >= 4),
+            (r >= 4) & (f >= 2) & (f <= 3),
+            (r >= 4) & (f == 1),
+            (r >= 3) & (m >= 4),
+            r == 3,
+            r == 2,
+            (r == 1) & (f >= 2),
+        ],
+        ["", "Champion", "Loyal", "Potential Loyalist", "New Donor", "Promising",
+         "Needs Attention", "At Risk", "Hibernating"],
+        "Lost"
+    )
+    return {"recency": r, "frequency": f, "monetary": m, "segment": segment}
+
+
+def score_frame(frame: DonorFeatureFrame) -> Dict[str, np.ndarray]:
+    """Every persisted score for every donor of the frame, rounded as stored"""
+    givers = frame.gift_count > 0
+    rfm = rfm_scores(frame)
+
+    return {
+        "churn_risk_score": np.where(
+            givers, np.round(churn_risk(frame, frame.as_of, 365)["probability"], 2), np.nan),
+        "affinity_score": np.round(affinity_scores(frame), 2),
+        "capacity_score": np.round(giving_capacity(frame), 4),
+        "engagement_score": np.round(affinity_engagement(frame)["engagement"] * 100, 2),
+        "rfm_score": np.where(givers, rfm["recency"] + rfm["frequency"] + rfm["monetary"], np.nan),
+        "rfm_recency": rfm["recency"],
+        "rfm_frequency": rfm["frequency"],
+        "rfm_monetary": rfm["monetary"],
+        "donor_segment": rfm["segment"],
+    }
+
+
+def _stored(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+# =====================================================================
+# REFRESH
+# =====================================================================
+
+def _changed(frame: DonorFeatureFrame, scores: Dict[str, np.ndarray], existing: Dict) -> np.ndarray:
+    """Donors without a current-version row or with any score that differs from the stored one"""
+    changed = np.ones(len(frame), dtype=bool)
+    stored = [existing.get(donor_id) for donor_id in frame.donor_id]
+    present = np.array([row is not None and row.score_version == SCORE_VERSION for row in stored], dtype=bool)
+    if not present.any():
+        return changed
+
+    same = present.copy()
+    for column in SCORE_COLUMNS:
+        previous = np.array(
+            [np.nan if row is None or getattr(row, column) is None else getattr(row, column) for row in stored],
+            dtype=float
+        )
+        same &= np.isclose(previous, scores[column], equal_nan=True)
+    segments = np.array([(row.donor_segment or "") if row is not None else None for row in stored], dtype=object)
+    same &= segments == scores["donor_segment"]
+    return ~same
+
+
+def refresh_donor_scores(db: Session, organization_id: UUID, today: Optional[date] = None) -> Dict:
+    """Score every donor of the organization and upsert the rows that changed"""
+    start = time.perf_counter()
+    today = today or date.today()
+
+    features = refresh_donor_features(db, organization_id, today=today)
+    frame = load_features(db, organization_id, today)
+    scores = score_frame(frame)
+
+    existing = {
+        row.donor_id: row for row in db.query(
+            DonorScores.donor_id, DonorScores.score_version, DonorScores.donor_segment,
+            *[getattr(DonorScores, column) for column in SCORE_COLUMNS]
+        ).filter(DonorScores.organization_id == organization_id)
+    }
+    changed = np.flatnonzero(_changed(frame, scores, existing))
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "organization_id": organization_id,
+            "donor_id": frame.donor_id[i],
+            **{column: _stored(scores[column][i]) for column in SCORE_COLUMNS},
+            "donor_segment": str(scores["donor_segment"][i]) or None,
+            "score_components": {
+                "rfm": {
+                    "recency": int(scores["rfm_recency"][i]),
+                    "frequency": int(scores["rfm_frequency"][i]),
+                    "monetary": int(scores["rfm_monetary"][i]),
+                },
+                "features_as_of": frame.as_of.isoformat(),
+            },
+            "score_version": SCORE_VERSION,
+            "calculated_at": now,
+        }
+        for i in changed
+    ]
+
+    if rows:
+        statement = insert(DonorScores)
+        statement = statement.on_conflict_do_update(
+            constraint="unique_donor_score",
+            set_={
+                column: statement.excluded[column]
+                for column in (*SCORE_COLUMNS, "donor_segment", "score_components", "score_version", "calculated_at")
+            }
+        )
+        db.execute(statement, rows)
+    db.commit()
+
+    stats = {
+        "organization_id": str(organization_id),
+        "features": features["mode"],
+        "donors": len(frame),
+        "written": len(rows),
+        "unchanged": len(frame) - len(rows),
+        "score_version": SCORE_VERSION,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    logger.info(f"Donor scores refreshed: {stats}")
+    return stats
+
+
+# =====================================================================
+# READS
+# =====================================================================
+
+def _score_column(column: str):
+    if column not in SCORE_COLUMNS:
+        raise ValueError(f"Unknown score '{column}'; expected one of {', '.join(SCORE_COLUMNS)}")
+    return getattr(DonorScores, column)
+
+
+def scores_exist(db: Session, organization_id: UUID) -> bool:
+    return db.query(DonorScores.id).filter(DonorScores.organization_id == organization_id).first() is not None
+
+
+def top_scores(db: Session, organization_id: UUID, column: str, limit: int = 50,
+               min_score: Optional[float] = None, max_score: Optional[float] = None,
+               lowest: bool = False) -> List:
+    """Donors ranked by one stored score, highest first (lowest first with lowest=True)"""
+    score = _score_column(column)
+    query = db.query(
+        DonorScores.donor_id,
+        score.label("score"),
+        DonorScores.donor_segment,
+        DonorScores.calculated_at,
+        Donor.first_name,
+        Donor.last_name,
+        Donor.email
+    ).join(
+        Donor, Donor.id == DonorScores.donor_id
+    ).filter(
+        DonorScores.organization_id == organization_id,
+        score.isnot(None)
+    )
+    if min_score is not None:
+        query = query.filter(score >= min_score)
+    if max_score is not None:
+        query = query.filter(score <= max_score)
+    return query.order_by(score.asc() if lowest else score.desc()).limit(limit).all()
+
+
+def _band(values, low: Optional[float], high: Optional[float]) -> List:
+    """Conditions of a [low, high) range on a column or an array; None leaves that side open"""
+    conditions = []
+    if low is not None:
+        conditions.append(values >= low)
+    if high is not None:
+        conditions.append(values < high)
+    return conditions
+
+
+def score_summary(db: Session, organization_id: UUID, column: str,
+                  bands: Dict[str, Tuple[Optional[float], Optional[float]]]) -> Dict:
+    """
+    Count, average and per-band counts of one score from donor_scores.
+    Organizations that were never scored get the same summary computed from
+    their features, without writing.
+    """
+    score = _score_column(column)
+
+    if scores_exist(db, organization_id):
+        row = db.query(
+            func.count(score),
+            func.avg(score),
+            *[func.count(score).filter(and_(True, *_band(score, low, high))) for low, high in bands.values()]
+        ).filter(DonorScores.organization_id == organization_id).one()
+        count, average, counts, source = row[0], row[1], row[2:], "donor_scores"
+    else:
+        values = score_frame(load_features(db, organization_id))[column]
+        values = values[~np.isnan(values)]
+        counts = [
+            np.count_nonzero(np.logical_and.reduce([np.ones(len(values), dtype=bool), *_band(values, low, high)]))
+            for low, high in bands.values()
+        ]
+        count, average, source = len(values), values.mean() if len(values) else None, "live"
+
+    return {
+        "count": int(count),
+        "average": float(average) if average is not None else 0.0,
+        "bands": {name: int(n) for name, n in zip(bands, counts)},
+        "source": source,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Refresh persisted donor scores")
+    parser.add_argument("--org", action="append", help="Organization ID (repeatable); default all")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        org_ids = [UUID(o) for o in args.org] if args.org else [
+            row[0] for row in session.query(Donor.organization_id).distinct().all() if row[0]
+        ]
+        for org_id in org_ids:
+            stats = refresh_donor_scores(session, org_id)
+            print(f"✅ {stats['organization_id']}: {stats['written']} of {stats['donors']} donors "
+                  f"rescored in {stats['seconds']}s")
+    finally:
+        session.close()
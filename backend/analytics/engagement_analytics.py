@@ -10,18 +10,18 @@ Features inspired by:
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_, or_
-from datetime import datetime, timedelta
+from sqlalchemy import func, desc, and_, or_, case, distinct, select, tuple_, Float, cast
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 import json
 
 # Assuming imports
-from database import get_db
+from database import get_db, get_read_db
 from models import Donors as Donor
 from models import (
      DonorInteraction, EngagementPreference, EngagementPrediction,
-    InteractionStatus, InteractionOutcome, SentimentType, EngagementLevel,
+    InteractionType, InteractionStatus, InteractionOutcome, SentimentType, EngagementLevel,
      CommunicationChannel
 )
 
@@ -174,66 +174,6 @@ def determine_engagement_level(score: float) -> str:
         return "cold"
 
 
-def calculate_churn_risk(donor_data: Dict[str, Any]) -> tuple[float, str]:
-    """
-    Calculate churn risk score (0-100) and level
-    Higher score = higher risk of disengagement
-
-    Factors:
-    - Days since last interaction
-    - Interaction trend (declining/stable/increasing)
-    - Response rate
-    - Sentiment trend
-    """
-    risk_score = 0.0
-
-    # Days since last interaction (0-40 points)
-    days_since_last = donor_data.get('days_since_last_interaction', 999)
-    if days_since_last > 180:
-        risk_score += 40
-    elif days_since_last > 90:
-        risk_score += 30
-    elif days_since_last > 60:
-        risk_score += 20
-    elif days_since_last > 30:
-        risk_score += 10
-
-    # Interaction trend (0-30 points)
-    interaction_trend = donor_data.get('interaction_trend', 'stable')
-    if interaction_trend == 'declining':
-        risk_score += 30
-    elif interaction_trend == 'stable':
-        risk_score += 15
-
-    # Response rate (0-20 points)
-    response_rate = donor_data.get('response_rate', 50.0)
-    if response_rate < 20:
-        risk_score += 20
-    elif response_rate < 40:
-        risk_score += 15
-    elif response_rate < 60:
-        risk_score += 10
-
-    # Sentiment trend (0-10 points)
-    sentiment_score = donor_data.get('sentiment_score', 0)
-    if sentiment_score < -0.3:
-        risk_score += 10
-    elif sentiment_score < 0:
-        risk_score += 5
-
-    # Determine risk level
-    if risk_score >= 70:
-        risk_level = "critical"
-    elif risk_score >= 50:
-        risk_level = "high"
-    elif risk_score >= 30:
-        risk_level = "medium"
-    else:
-        risk_level = "low"
-
-    return min(100.0, risk_score), risk_level
-
-
 def generate_engagement_recommendations(prediction_data: Dict[str, Any]) -> List[str]:
     """Generate actionable recommendations based on engagement predictions"""
     recommendations = []
@@ -274,7 +214,7 @@ def generate_engagement_recommendations(prediction_data: Dict[str, Any]) -> List
 async def get_donor_engagement_metrics(
         organization_id: str,
         donor_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get comprehensive engagement metrics for a single donor
@@ -399,7 +339,7 @@ async def get_organization_engagement_metrics(
         max_score: float = 100,
         skip: int = 0,
         limit: int = 100,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get engagement metrics for all donors in organization
@@ -439,7 +379,7 @@ async def get_organization_engagement_metrics(
 @router.get("/summary/{organization_id}", response_model=EngagementSummary)
 async def get_engagement_summary(
         organization_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get organization-wide engagement summary
@@ -522,7 +462,7 @@ async def get_engagement_trends(
         organization_id: str,
         period: str = "monthly",  # daily, weekly, monthly, quarterly
         months_back: int = 12,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get engagement trends over time
@@ -535,74 +475,136 @@ async def get_engagement_trends(
 
     **Use Case:** Dashboard trend charts
     """
-    trends = []
     now = datetime.utcnow()
 
-    # Define period grouping
+    # Define period grouping: equal windows ending now, oldest first
     if period == "monthly":
-        periods = [(now - timedelta(days=30 * i), now - timedelta(days=30 * (i-1)))
-                   for i in range(months_back, 0, -1)]
-        period_format = "%b %Y"
+        days, count, period_format = 30, months_back, "%b %Y"
     elif period == "quarterly":
-        periods = [(now - timedelta(days=90 * i), now - timedelta(days=90 * (i-1)))
-                   for i in range(months_back // 3, 0, -1)]
-        period_format = "Q%q %Y"
+        days, count, period_format = 90, months_back // 3, None
+    elif period == "daily":
+        days, count, period_format = 1, months_back * 30, "%d %b"
     else:
-        periods = [(now - timedelta(days=7 * i), now - timedelta(days=7 * (i-1)))
-                   for i in range(months_back * 4, 0, -1)]
-        period_format = "%d %b"
-
-    for start_date, end_date in periods:
-        interactions = db.query(DonorInteraction).filter(
-            DonorInteraction.organization_id == organization_id,
-            DonorInteraction.interaction_date >= start_date,
-            DonorInteraction.interaction_date < end_date,
-            DonorInteraction.interaction_status == "completed"
-        ).all()
-
-        if not interactions:
-            continue
-
-        # Calculate metrics
-        unique_donors = len(set(i.donor_id for i in interactions))
-        avg_score = sum(i.engagement_score for i in interactions) / len(interactions) if interactions else 0
+        days, count, period_format = 7, months_back * 4, "%d %b"
 
-        # Engagement distribution
-        engagement_dist = {"on_fire": 0, "hot": 0, "warm": 0, "lukewarm": 0, "cold": 0}
+    if count < 1:
+        return []
 
-        for interaction in interactions:
-            level = determine_engagement_level(interaction.engagement_score)
-            engagement_dist[level] += 1
+    width = timedelta(days=days)
+    window_start = now - width * count
+    buckets = trend_buckets(db, organization_id, window_start, now, count)
 
-        # Top interaction types
-        type_counts = {}
-        for interaction in interactions:
-            type_name = interaction.interaction_type
-            type_counts[type_name] = type_counts.get(type_name, 0) + 1
+    trends = []
+    for bucket in sorted(buckets):
+        metrics = buckets[bucket]
+        start_date = window_start + width * (bucket - 1)
+        if period_format:
+            label = start_date.strftime(period_format)
+        else:
+            label = f"Q{(start_date.month - 1) // 3 + 1} {start_date.year}"
 
         top_types = [{"type": k, "count": v}
-                     for k, v in sorted(type_counts.items(), key=lambda x: x[1], reverse=True)[:5]]
-
-        # Sentiment distribution
-        sentiment_dist = {}
-        for interaction in interactions:
-            if interaction.sentiment:
-                sent_name = interaction.sentiment
-                sentiment_dist[sent_name] = sentiment_dist.get(sent_name, 0) + 1
+                     for k, v in sorted(metrics["types"].items(), key=lambda x: x[1], reverse=True)[:5]]
 
         trends.append(EngagementTrendResponse(
-            period=start_date.strftime(period_format),
-            total_interactions=len(interactions),
-            unique_donors_engaged=unique_donors,
-            average_engagement_score=avg_score,
-            engagement_distribution=engagement_dist,
+            period=label,
+            total_interactions=metrics["total"],
+            unique_donors_engaged=metrics["donors"],
+            average_engagement_score=metrics["average_score"],
+            engagement_distribution=metrics["levels"],
             top_interaction_types=top_types,
-            sentiment_distribution=sentiment_dist
+            sentiment_distribution=metrics["sentiments"]
         ))
 
     return trends
 
 
+def trend_buckets(
+        db: Session,
+        organization_id: str,
+        window_start: datetime,
+        window_end: datetime,
+        count: int
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Completed interactions in [window_start, window_end) split into `count`
+    equal buckets with width_bucket, in one grouped query. GROUPING SETS return
+    per bucket the totals (interactions, distinct donors, average score) plus
+    counts by interaction type, sentiment and engagement level.
+    """
+    score = func.coalesce(DonorInteraction.engagement_score, 0.0)
+    epoch = cast(func.extract("epoch", DonorInteraction.interaction_date), Float)
+
+    interactions = select(
+        func.width_bucket(
+            epoch,
+            window_start.replace(tzinfo=timezone.utc).timestamp(),
+            window_end.replace(tzinfo=timezone.utc).timestamp(),
+            count
+        ).label("bucket"),
+        DonorInteraction.donor_id,
+        DonorInteraction.interaction_type,
+        DonorInteraction.sentiment,
+        score.label("score"),
+        case(
+            (score >= 81, "on_fire"),
+            (score >= 61, "hot"),
+            (score >= 41, "warm"),
+            (score >= 21, "lukewarm"),
+            else_="cold"
+        ).label("level")
+    ).where(
+        DonorInteraction.organization_id == organization_id,
+        # Every type is listed so the scan runs on idx_org_type_date (org, type, date)
+        DonorInteraction.interaction_type.in_(list(InteractionType)),
+        DonorInteraction.interaction_date >= window_start,
+        DonorInteraction.interaction_date < window_end,
+        DonorInteraction.interaction_status == InteractionStatus.COMPLETED
+    ).subquery()
+
+    c = interactions.c
+    rows = db.execute(
+        select(
+            c.bucket,
+            c.interaction_type,
+            c.sentiment,
+            c.level,
+            func.grouping(c.interaction_type).label("all_types"),
+            func.grouping(c.sentiment).label("all_sentiments"),
+            func.grouping(c.level).label("all_levels"),
+            func.count().label("interactions"),
+            func.count(distinct(c.donor_id)).label("donors"),
+            func.avg(c.score).label("average_score")
+        ).group_by(
+            func.grouping_sets(
+                tuple_(c.bucket),
+                tuple_(c.bucket, c.interaction_type),
+                tuple_(c.bucket, c.sentiment),
+                tuple_(c.bucket, c.level)
+            )
+        )
+    ).all()
+
+    buckets: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        metrics = buckets.setdefault(row.bucket, {
+            "total": 0, "donors": 0, "average_score": 0.0, "types": {}, "sentiments": {},
+            "levels": {"on_fire": 0, "hot": 0, "warm": 0, "lukewarm": 0, "cold": 0}
+        })
+        if row.all_types and row.all_sentiments and row.all_levels:
+            metrics["total"] = row.interactions
+            metrics["donors"] = row.donors
+            metrics["average_score"] = float(row.average_score or 0)
+        elif not row.all_types:
+            metrics["types"][getattr(row.interaction_type, "value", row.interaction_type)] = row.interactions
+        elif not row.all_sentiments:
+            if row.sentiment is not None:
+                metrics["sentiments"][getattr(row.sentiment, "value", row.sentiment)] = row.interactions
+        else:
+            metrics["levels"][row.level] = row.interactions
+    return buckets
+
+
 # ============================================================================
 # API ENDPOINTS - PREDICTIVE ANALYTICS
 # ============================================================================
@@ -625,75 +627,41 @@ async def generate_engagement_predictions(
 
     **Note:** Typically run as scheduled background job
     """
-    donors = db.query(Donor).filter(
-        Donor.organization_id == organization_id
-    ).all()
+    # Loaded on first use to keep numpy out of worker startup
+    from analytics.donor_features import engagement_risk, load_features
 
-    predictions_created = 0
+    now = datetime.utcnow()
 
-    for donor in donors:
-        # Check if recent prediction exists
-        existing_prediction = db.query(EngagementPrediction).filter(
-            EngagementPrediction.donor_id == donor.id,
-            EngagementPrediction.prediction_date >= datetime.utcnow() - timedelta(days=7)
-        ).first()
+    # Interaction features of every donor from the feature store; churn risk is a transform over them
+    frame = load_features(db, organization_id)
+    scores = engagement_risk(frame, now)
 
-        if existing_prediction and not force_refresh:
-            continue
+    # Predictions made in the last week, fetched once for the whole organization
+    recent_predictions = {
+        prediction.donor_id: prediction
+        for prediction in db.query(EngagementPrediction).filter(
+            EngagementPrediction.organization_id == organization_id,
+            EngagementPrediction.prediction_date >= now - timedelta(days=7)
+        )
+    }
 
-        # Get donor interactions
-        interactions = db.query(DonorInteraction).filter(
-            DonorInteraction.donor_id == donor.id,
-            DonorInteraction.interaction_status == "completed"
-        ).all()
+    predictions_created = 0
 
-        if not interactions:
+    for i, has_interactions in enumerate(scores["eligible"]):
+        if not has_interactions:
             continue
 
-        # Calculate metrics for prediction
-        now = datetime.utcnow()
-        last_interaction = max(interactions, key=lambda x: x.interaction_date)
-        days_since_last = (now - last_interaction.interaction_date).days
-
-        # Calculate interaction trend
-        recent_30d = len([i for i in interactions if i.interaction_date >= now - timedelta(days=30)])
-        previous_30d = len([i for i in interactions
-                            if now - timedelta(days=60) <= i.interaction_date < now - timedelta(days=30)])
-
-        if previous_30d > 0:
-            trend_ratio = recent_30d / previous_30d
-            if trend_ratio > 1.2:
-                interaction_trend = "increasing"
-            elif trend_ratio < 0.8:
-                interaction_trend = "declining"
-            else:
-                interaction_trend = "stable"
-        else:
-            interaction_trend = "stable"
-
-        # Calculate response rate
-        interactions_with_response = [i for i in interactions if i.outcome is not None]
-        response_rate = (len(interactions_with_response) / len(interactions) * 100) if interactions else 0
-
-        # Calculate sentiment score
-        recent_sentiments = [i.sentiment for i in interactions[:20] if i.sentiment]
-        sentiment_score = 0
-        if recent_sentiments:
-            sentiment_values = {
-                "very_positive": 1.0, "positive": 0.5, "neutral": 0.0,
-                "negative": -0.5, "very_negative": -1.0
-            }
-            sentiment_score = sum(sentiment_values.get(s, 0) for s in recent_sentiments) / len(recent_sentiments)
-
-        # Calculate predictions
-        donor_data = {
-            'days_since_last_interaction': days_since_last,
-            'interaction_trend': interaction_trend,
-            'response_rate': response_rate,
-            'sentiment_score': sentiment_score
-        }
+        donor_id = frame.donor_id[i]
+        existing_prediction = recent_predictions.get(donor_id)
+        if existing_prediction and not force_refresh:
+            continue
+
+        days_since_last = int(scores["days_since_last_interaction"][i])
+        interaction_trend = str(scores["interaction_trend"][i])
+        response_rate = float(scores["response_rate"][i])
 
-        churn_risk_score, risk_level = calculate_churn_risk(donor_data)
+        churn_risk_score = float(scores["churn_risk_score"][i])
+        risk_level = str(scores["risk_level"][i])
         engagement_propensity = 100 - churn_risk_score  # Inverse of churn
         response_likelihood = response_rate
 
@@ -702,11 +670,7 @@ async def generate_engagement_predictions(
         predicted_next = now + timedelta(days=avg_days_between)
 
         # Most used channel
-        channel_counts = {}
-        for i in interactions:
-            if i.channel:
-                channel_counts[i.channel] = channel_counts.get(i.channel, 0) + 1
-        predicted_channel = max(channel_counts, key=channel_counts.get) if channel_counts else None
+        predicted_channel = CommunicationChannel[frame.top_channel[i]] if frame.top_channel[i] else None
 
         # Predicted engagement level
         predicted_score = (engagement_propensity + response_likelihood) / 2
@@ -741,7 +705,7 @@ async def generate_engagement_predictions(
         else:
             prediction = EngagementPrediction(
                 organization_id=organization_id,
-                donor_id=donor.id
+                donor_id=donor_id
             )
             db.add(prediction)
 
@@ -769,7 +733,7 @@ async def generate_engagement_predictions(
 
     return {
         "message": f"Generated predictions for {predictions_created} donors",
-        "total_donors": len(donors),
+        "total_donors": len(frame),
         "predictions_created": predictions_created
     }
 
@@ -778,7 +742,7 @@ async def generate_engagement_predictions(
 async def get_engagement_prediction(
         organization_id: str,
         donor_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get engagement prediction for a specific donor
@@ -836,7 +800,7 @@ async def get_organization_predictions(
         max_churn_risk: float = 100,
         skip: int = 0,
         limit: int = 100,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get engagement predictions for all donors with filtering
@@ -896,7 +860,7 @@ async def get_next_best_actions(
         organization_id: str,
         priority: str = "high",  # high, medium, all
         limit: int = 50,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get recommended next best actions for donor engagement
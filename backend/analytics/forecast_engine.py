@@ -0,0 +1,575 @@
+"""
+Forecast Engine
+Wise Investor Platform
+
+Seasonal-trend forecasts of each organization's monthly revenue (donations)
+and expenses, shared by every forecasting endpoint:
+
+- GET /api/v1/analytics/predictive/revenue-forecast/{org}
+- GET /api/v1/analytics/predictive/goal-attainment/{org}
+- GET /api/v1/analytics/timeline/forecast/{org}
+- GET /api/v1/financial-analytics/{org}/financial-forecast
+- GET /api/v1/analytics/campaigns/revenue-forecast/{org}
+
+The monthly series of all requested organizations comes from one grouped
+query (date_trunc by month, gaps filled with zeros). Each series is fitted by
+least squares with NumPy, using as much structure as its history supports:
+
+    history >= 24 months   seasonal_trend   y = slope * t + season[month]
+    history >= 3 months    trend            y = intercept + slope * t
+    history >= 1 month     mean             y = intercept
+    no history             none             y = 0
+
+Organizations whose histories have the same length and start month share a
+design matrix, so they are fitted together in one lstsq call.
+
+Forecast intervals are 95% prediction intervals from the residuals:
+sigma^2 = SSR / (n - p) and half-width 1.96 * sigma * sqrt(1 + x' (X'X)^-1 x),
+so they widen with the distance from the fitted history. Sums over several
+months (a quarter, the rest of the year) combine the monthly half-widths in
+quadrature.
+
+The current month is never fitted (it is incomplete); its month-to-date actual
+is stored next to its forecast.
+
+Fits and points are stored in monthly_forecast_fits / monthly_forecast_points
+by the nightly job, so the endpoints are lookups. The fit is only redone
+nightly, but the actuals of the current and previous calendar year are
+re-read when a stored forecast is served (one grouped query), so month-to-date,
+quarter-to-date and year-to-date totals include gifts recorded since the run.
+When an organization has no fit for the current month yet, load_forecast fits
+it in memory without writing, which keeps the endpoints on read replicas.
+
+Run nightly:
+    python -m analytics.forecast_engine
+    python -m analytics.forecast_engine --org <organization_id>
+"""
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+import logging
+import math
+import os
+import time
+
+import numpy as np
+from sqlalchemy import bindparam, insert, text
+from sqlalchemy.orm import Session
+
+from models import MonthlyForecastFit, MonthlyForecastPoint
+
+logger = logging.getLogger(__name__)
+
+SERIES = ("revenue", "expenses")
+
+MAX_HISTORY_MONTHS = 60
+HORIZON_MONTHS = int(os.getenv("FORECAST_HORIZON_MONTHS", "24"))
+
+MIN_TREND_MONTHS = 3
+MIN_SEASONAL_MONTHS = 24
+
+Z_95 = 1.96
+
+# Monthly spread assumed when a fit has no residual degrees of freedom
+FALLBACK_CV = 0.25
+
+MONTHLY_SQL = {
+    "revenue": """
+        SELECT organization_id,
+               date_trunc('month', donation_date AT TIME ZONE 'UTC')::date AS period,
+               SUM(amount) AS total
+        FROM donations
+        WHERE organization_id IS NOT NULL
+          AND donation_date >= :since
+          AND donation_date < :until
+          {org_filter}
+        GROUP BY 1, 2
+    """,
+    "expenses": """
+        SELECT organization_id,
+               date_trunc('month', expense_date)::date AS period,
+               SUM(amount) AS total
+        FROM expenses
+        WHERE organization_id IS NOT NULL
+          AND expense_date >= :since
+          AND expense_date < :until
+          {org_filter}
+        GROUP BY 1, 2
+    """,
+}
+
+
+def month_index(d: date) -> int:
+    return d.year * 12 + d.month - 1
+
+
+def month_start(index: int) -> date:
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# =====================================================================
+# FORECAST OBJECT
+# =====================================================================
+
+@dataclass
+class ForecastPoint:
+    period: date
+    is_forecast: bool
+    actual: Optional[float]
+    predicted: float
+    lower_bound: float
+    upper_bound: float
+
+    @property
+    def half_width(self) -> float:
+        return max(0.0, self.upper_bound - self.predicted)
+
+
+@dataclass
+class SeriesForecast:
+    organization_id: UUID
+    series: str
+    method: str
+    as_of: date
+    history_months: int
+    level: float
+    slope: float
+    residual_std: float
+    r_squared: Optional[float]
+    seasonal_indices: Optional[Dict[str, float]]
+    fitted_at: datetime
+    stored: bool
+    points: List[ForecastPoint] = field(default_factory=list)
+
+    def history(self, months: Optional[int] = None) -> List[ForecastPoint]:
+        points = [p for p in self.points if not p.is_forecast]
+        return points[-months:] if months else points
+
+    def future(self, months: int) -> List[ForecastPoint]:
+        """Forecast months starting with the current (as_of) month"""
+        return [p for p in self.points if p.is_forecast][:months]
+
+    @property
+    def current(self) -> Optional[ForecastPoint]:
+        return next((p for p in self.points if p.period == self.as_of), None)
+
+    def actual_between(self, start: date, end: date) -> float:
+        """Actual total of months in [start, end), including the month to date"""
+        return sum(p.actual or 0 for p in self.points if start <= p.period < end)
+
+    def window(self, start: date, end: date) -> Dict[str, float]:
+        """
+        Actual plus projected total of the months in [start, end): history months
+        count their actual, the current month the larger of its month-to-date
+        actual and its forecast, later months their forecast.
+        """
+        actual = projected = variance = 0.0
+        for p in self.points:
+            if not start <= p.period < end:
+                continue
+            actual += p.actual or 0
+            if not p.is_forecast:
+                projected += p.actual or 0
+            else:
+                projected += max(p.actual or 0, p.predicted)
+                variance += p.half_width ** 2
+        margin = math.sqrt(variance)
+        return {
+            "actual": actual,
+            "projected": projected,
+            "lower_bound": max(actual, projected - margin),
+            "upper_bound": projected + margin,
+            "margin": margin,
+        }
+
+    def mean_monthly(self, months: int = 12) -> float:
+        history = self.history(months)
+        return sum(p.actual or 0 for p in history) / len(history) if history else 0.0
+
+    def monthly_growth(self) -> float:
+        """Fitted trend per month relative to the current level"""
+        return self.slope / self.level if self.level > 0 else 0.0
+
+    def trend_direction(self, threshold: float = 0.1) -> str:
+        """increasing / decreasing when the fitted trend moves a year by more than threshold"""
+        base = self.mean_monthly()
+        if base <= 0 or self.method in ("mean", "none"):
+            return "stable"
+        change = self.slope * 12 / base
+        if change > threshold:
+            return "increasing"
+        if change < -threshold:
+            return "decreasing"
+        return "stable"
+
+    def confidence(self) -> float:
+        """0-1, one minus the residual spread relative to the mean month"""
+        base = self.mean_monthly(self.history_months or 1)
+        if self.method == "none" or base <= 0:
+            return 0.0
+        return max(0.0, min(1.0, 1 - self.residual_std / base))
+
+    def model_info(self) -> Dict:
+        return {
+            "method": self.method,
+            "history_months": self.history_months,
+            "as_of": self.as_of.isoformat(),
+            "fitted_at": self.fitted_at.isoformat(),
+            "monthly_trend": round(self.slope, 2),
+            "residual_std": round(self.residual_std, 2),
+            "r_squared": round(self.r_squared, 3) if self.r_squared is not None else None,
+        }
+
+
+def _forecast_from_rows(fit: Dict, points: Iterable[Dict], stored: bool) -> SeriesForecast:
+    return SeriesForecast(
+        organization_id=fit["organization_id"],
+        series=fit["series"],
+        method=fit["method"],
+        as_of=fit["as_of"],
+        history_months=fit["history_months"],
+        level=float(fit["level"] or 0),
+        slope=float(fit["slope"] or 0),
+        residual_std=float(fit["residual_std"] or 0),
+        r_squared=fit["r_squared"],
+        seasonal_indices=fit["seasonal_indices"],
+        fitted_at=fit["fitted_at"],
+        stored=stored,
+        points=[
+            ForecastPoint(
+                period=p["period"],
+                is_forecast=p["is_forecast"],
+                actual=float(p["actual"]) if p["actual"] is not None else None,
+                predicted=float(p["predicted"]),
+                lower_bound=float(p["lower_bound"]),
+                upper_bound=float(p["upper_bound"]),
+            )
+            for p in sorted(points, key=lambda p: p["period"])
+        ],
+    )
+
+
+# =====================================================================
+# FITTING
+# =====================================================================
+
+def fit_method(history_months: int) -> str:
+    if history_months >= MIN_SEASONAL_MONTHS:
+        return "seasonal_trend"
+    if history_months >= MIN_TREND_MONTHS:
+        return "trend"
+    if history_months >= 1:
+        return "mean"
+    return "none"
+
+
+def design_matrix(method: str, first_index: int, offsets: np.ndarray) -> np.ndarray:
+    """Rows for months first_index + offsets; offsets count from the first history month"""
+    t = offsets.astype(float)
+    if method == "mean":
+        return np.ones((len(t), 1))
+    if method == "trend":
+        return np.column_stack([np.ones(len(t)), t])
+    # seasonal_trend: slope plus one level per calendar month
+    seasons = np.zeros((len(t), 12))
+    seasons[np.arange(len(t)), (first_index + offsets) % 12] = 1.0
+    return np.column_stack([t, seasons])
+
+
+def fit_group(method: str, first_index: int, Y: np.ndarray, horizon: int) -> Dict[str, np.ndarray]:
+    """
+    Least-squares fit of every column of Y (n months x k organizations) against
+    the same design. Returns fitted values, forecasts and their half-widths.
+    """
+    n, k = Y.shape
+    X = design_matrix(method, first_index, np.arange(n))
+    Xf = design_matrix(method, first_index, np.arange(n, n + horizon))
+    p = X.shape[1]
+
+    beta, _, _, _ = np.linalg.lstsq(X, Y, rcond=None)
+    fitted = X @ beta
+    ssr = ((Y - fitted) ** 2).sum(axis=0)
+    sst = ((Y - Y.mean(axis=0)) ** 2).sum(axis=0)
+
+    if n > p:
+        sigma = np.sqrt(ssr / (n - p))
+    else:
+        sigma = FALLBACK_CV * np.abs(Y.mean(axis=0))
+
+    xtx_inv = np.linalg.pinv(X.T @ X)
+    leverage = np.einsum("ij,jk,ik->i", Xf, xtx_inv, Xf)
+    half_future = Z_95 * sigma[None, :] * np.sqrt(1 + leverage)[:, None]
+
+    if method == "seasonal_trend":
+        slope = beta[0]
+        seasons = beta[1:]
+        intercept = seasons.mean(axis=0)
+        seasonal = seasons - intercept
+    else:
+        intercept = beta[0]
+        slope = beta[1] if method == "trend" else np.zeros(k)
+        seasonal = None
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_squared = np.where(sst > 0, 1 - ssr / sst, np.nan)
+
+    return {
+        "fitted": fitted,
+        "forecast": Xf @ beta,
+        "half_history": Z_95 * sigma,
+        "half_future": half_future,
+        "sigma": sigma,
+        "level": intercept + slope * (n - 1),
+        "slope": slope,
+        "seasonal": seasonal,
+        "r_squared": r_squared,
+    }
+
+
+def fit_series(histories: Dict[UUID, Tuple[int, np.ndarray, float]], series: str, as_of: date,
+               horizon: int = HORIZON_MONTHS, fitted_at: Optional[datetime] = None
+               ) -> Dict[UUID, Tuple[Dict, List[Dict]]]:
+    """
+    Fit every organization's history.
+    histories: org -> (index of the first history month, monthly totals up to as_of, month-to-date actual)
+    Returns org -> (fit row, point rows) ready for insert.
+    """
+    fitted_at = fitted_at or datetime.now(timezone.utc)
+    as_of_index = month_index(as_of)
+
+    groups = defaultdict(list)
+    for org_id, (first_index, values, _) in histories.items():
+        groups[(fit_method(len(values)), len(values), first_index)].append(org_id)
+
+    results = {}
+    for (method, n, first_index), org_ids in groups.items():
+        if method == "none":
+            fit = None
+        else:
+            Y = np.column_stack([histories[org_id][1] for org_id in org_ids])
+            fit = fit_group(method, first_index, Y, horizon)
+
+        for col, org_id in enumerate(org_ids):
+            values, month_to_date = histories[org_id][1], histories[org_id][2]
+            points = []
+            for i in range(n):
+                predicted = float(fit["fitted"][i, col])
+                half = float(fit["half_history"][col])
+                points.append({
+                    "period": month_start(first_index + i),
+                    "is_forecast": False,
+                    "actual": round(float(values[i]), 2),
+                    "predicted": round(max(0.0, predicted), 2),
+                    "lower_bound": round(max(0.0, predicted - half), 2),
+                    "upper_bound": round(max(0.0, predicted + half), 2),
+                })
+            for h in range(horizon):
+                predicted = float(fit["forecast"][h, col]) if fit else 0.0
+                half = float(fit["half_future"][h, col]) if fit else 0.0
+                points.append({
+                    "period": month_start(as_of_index + h),
+                    "is_forecast": True,
+                    "actual": round(month_to_date, 2) if h == 0 else None,
+                    "predicted": round(max(0.0, predicted), 2),
+                    "lower_bound": round(max(0.0, predicted - half), 2),
+                    "upper_bound": round(max(0.0, predicted + half), 2),
+                })
+
+            r_squared = float(fit["r_squared"][col]) if fit else None
+            fit_row = {
+                "organization_id": org_id,
+                "series": series,
+                "method": method,
+                "history_start": month_start(first_index) if n else None,
+                "history_months": n,
+                "as_of": as_of,
+                "level": float(fit["level"][col]) if fit else 0.0,
+                "slope": float(fit["slope"][col]) if fit else 0.0,
+                "seasonal_indices": {
+                    str(m + 1): round(float(fit["seasonal"][m, col]), 2) for m in range(12)
+                } if fit and fit["seasonal"] is not None else None,
+                "residual_std": float(fit["sigma"][col]) if fit else 0.0,
+                "r_squared": None if r_squared is None or math.isnan(r_squared) else r_squared,
+                "fitted_at": fitted_at,
+            }
+            results[org_id] = (fit_row, points)
+    return results
+
+
+# =====================================================================
+# MONTHLY SERIES
+# =====================================================================
+
+def monthly_histories(db: Session, series: str, as_of: date,
+                      organization_ids: Optional[List[UUID]] = None
+                      ) -> Dict[UUID, Tuple[int, np.ndarray, float]]:
+    """
+    One grouped query for the monthly totals of every requested organization.
+    History runs from the first month with activity (at most MAX_HISTORY_MONTHS
+    back) to the month before as_of, with empty months as zeros.
+    """
+    as_of_index = month_index(as_of)
+    sql = MONTHLY_SQL[series].format(
+        org_filter="AND organization_id IN :org_ids" if organization_ids is not None else ""
+    )
+    query = text(sql)
+    params = {
+        "since": month_start(as_of_index - MAX_HISTORY_MONTHS),
+        "until": month_start(as_of_index + 1),
+    }
+    if organization_ids is not None:
+        query = query.bindparams(bindparam("org_ids", expanding=True))
+        params["org_ids"] = list(organization_ids)
+
+    totals = defaultdict(dict)
+    for row in db.execute(query, params):
+        totals[row.organization_id][month_index(row.period)] = float(row.total or 0)
+
+    histories = {}
+    for org_id in (organization_ids if organization_ids is not None else totals):
+        months = totals.get(org_id, {})
+        month_to_date = months.pop(as_of_index, 0.0)
+        if months:
+            first_index = min(months)
+            values = np.zeros(as_of_index - first_index)
+            for index, total in months.items():
+                values[index - first_index] = total
+        else:
+            first_index, values = as_of_index, np.zeros(0)
+        histories[org_id] = (first_index, values, month_to_date)
+    return histories
+
+
+def current_month(today: Optional[date] = None) -> date:
+    today = today or date.today()
+    return today.replace(day=1)
+
+
+# =====================================================================
+# REFRESH
+# =====================================================================
+
+def refresh_forecasts(db: Session, organization_ids: Optional[List[UUID]] = None,
+                      today: Optional[date] = None) -> Dict:
+    """
+    Fit and store the forecasts of the given organizations (default: every
+    organization with donations or expenses) for every series.
+    """
+    start = time.perf_counter()
+    as_of = current_month(today)
+    fitted_at = datetime.now(timezone.utc)
+
+    stats = {"organizations": 0, "points": 0, "methods": {}}
+    for series in SERIES:
+        fits = fit_series(monthly_histories(db, series, as_of, organization_ids), series, as_of,
+                          fitted_at=fitted_at)
+
+        for model in (MonthlyForecastPoint, MonthlyForecastFit):
+            query = db.query(model).filter(model.series == series)
+            if organization_ids is not None:
+                query = query.filter(model.organization_id.in_(organization_ids))
+            query.delete(synchronize_session=False)
+
+        fit_rows = [fit_row for fit_row, _ in fits.values()]
+        point_rows = [
+            {"organization_id": org_id, "series": series, **point}
+            for org_id, (_, points) in fits.items()
+            for point in points
+        ]
+        if fit_rows:
+            db.execute(insert(MonthlyForecastFit), fit_rows)
+        if point_rows:
+            db.execute(insert(MonthlyForecastPoint), point_rows)
+
+        stats["organizations"] = max(stats["organizations"], len(fit_rows))
+        stats["points"] += len(point_rows)
+        stats["methods"][series] = dict(Counter(row["method"] for row in fit_rows))
+    db.commit()
+
+    stats["as_of"] = as_of.isoformat()
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    logger.info(f"Forecasts refreshed: {stats}")
+    return stats
+
+
+# =====================================================================
+# LOOKUP
+# =====================================================================
+
+def stored_forecast(db: Session, organization_id: UUID, series: str, as_of: date) -> Optional[SeriesForecast]:
+    fit = db.query(MonthlyForecastFit).filter(
+        MonthlyForecastFit.organization_id == organization_id,
+        MonthlyForecastFit.series == series,
+        MonthlyForecastFit.as_of == as_of
+    ).first()
+    if fit is None:
+        return None
+
+    points = db.query(MonthlyForecastPoint).filter(
+        MonthlyForecastPoint.organization_id == organization_id,
+        MonthlyForecastPoint.series == series
+    ).order_by(MonthlyForecastPoint.period).all()
+
+    return _forecast_from_rows(
+        {c: getattr(fit, c) for c in (
+            "organization_id", "series", "method", "as_of", "history_months", "level", "slope",
+            "residual_std", "r_squared", "seasonal_indices", "fitted_at")},
+        [{c: getattr(p, c) for c in (
+            "period", "is_forecast", "actual", "predicted", "lower_bound", "upper_bound")} for p in points],
+        stored=True,
+    )
+
+
+def refresh_actuals(db: Session, forecast: SeriesForecast, since: date) -> None:
+    """Replace the stored actuals of the months from since through as_of with live totals"""
+    sql = MONTHLY_SQL[forecast.series].format(org_filter="AND organization_id = :org_id")
+    totals = {
+        row.period: float(row.total or 0)
+        for row in db.execute(text(sql), {
+            "since": since,
+            "until": month_start(month_index(forecast.as_of) + 1),
+            "org_id": forecast.organization_id,
+        })
+    }
+    for point in forecast.points:
+        if since <= point.period <= forecast.as_of:
+            point.actual = totals.get(point.period, 0.0)
+
+
+def load_forecast(db: Session, organization_id: UUID, series: str = "revenue",
+                  today: Optional[date] = None) -> SeriesForecast:
+    """
+    The stored forecast of the current month with live actuals for this and
+    last calendar year, or an in-memory fit when the nightly job has not
+    covered this organization and month yet.
+    """
+    as_of = current_month(today)
+    forecast = stored_forecast(db, organization_id, series, as_of)
+    if forecast is not None:
+        refresh_actuals(db, forecast, date(as_of.year - 1, 1, 1))
+        return forecast
+
+    logger.info(f"No stored {series} forecast for {organization_id} as of {as_of}; fitting in memory")
+    histories = monthly_histories(db, series, as_of, [organization_id])
+    fit_row, points = fit_series(histories, series, as_of)[organization_id]
+    return _forecast_from_rows(fit_row, points, stored=False)
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Fit and store revenue and expense forecasts")
+    parser.add_argument("--org", action="append", help="Organization ID (repeatable); default all")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        org_ids = [UUID(o) for o in args.org] if args.org else None
+        print(refresh_forecasts(session, org_ids))
+    finally:
+        session.close()
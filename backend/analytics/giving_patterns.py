@@ -0,0 +1,328 @@
+"""
+Giving Pattern Detector
+Wise Investor Platform
+
+Vectorized engine behind GET /api/v1/donor-intelligence/giving-patterns/{org}.
+
+The gift history of every candidate donor (3+ gifts) comes from one query
+ordered by donor and date, streamed from a server-side cursor in chunks of
+GIVING_PATTERN_CHUNK_ROWS rows. Each chunk becomes contiguous NumPy arrays
+(gift day, month, amount) with donor offsets, and every metric is computed
+per donor segment without a Python loop over donors:
+
+- intervals: np.diff within segments -> mean and sample stdev per donor
+- periodicity: Monthly / Quarterly / Semi-Annual / Annual / Irregular from
+  the mean interval, consistency = (1 - coefficient of variation) * 100
+- preferred months: 12-bin month histogram per donor, top 3 by count
+  (ties keep the month given in first)
+- preferred amounts: top 3 distinct amounts per donor
+- trend: mean of the later half of the gifts vs the earlier half (+/-10%)
+- seasonal: gifts fall in at most 3 distinct months
+
+Only the best `limit` donors by consistency are kept between chunks, so
+memory stays bounded for large organizations; names and totals are fetched
+for those donors at the end.
+
+Benchmark on synthetic data (no database needed):
+    python -m analytics.giving_patterns --benchmark --gifts 1000000
+Against an organization:
+    python -m analytics.giving_patterns --org <organization_id>
+"""
+
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+import logging
+import os
+import time
+
+import numpy as np
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = int(os.getenv("GIVING_PATTERN_CHUNK_ROWS", "250000"))
+
+MIN_GIFTS = 3
+
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# Mean interval ranges in days, checked in order
+PATTERN_RANGES = [
+    ("Monthly", 25, 35),
+    ("Quarterly", 80, 100),
+    ("Semi-Annual", 170, 190),
+    ("Annual", 350, 380),
+]
+
+# Gifts of candidate donors in this org, ordered so each donor is one contiguous segment
+GIFT_HISTORY_SQL = text("""
+    WITH candidates AS (
+        SELECT d.id
+        FROM donors d
+        JOIN donations dn ON dn.donor_id = d.id
+        WHERE d.organization_id = :org_id
+        GROUP BY d.id
+        HAVING COUNT(dn.id) >= :min_gifts
+    )
+    SELECT
+        dn.donor_id,
+        dn.donation_date::date - DATE '1970-01-01'    AS gift_day,
+        EXTRACT(MONTH FROM dn.donation_date)::int     AS gift_month,
+        dn.amount
+    FROM candidates c
+    JOIN donations dn ON dn.donor_id = c.id
+    WHERE dn.organization_id = :org_id
+      AND dn.donation_date IS NOT NULL
+    ORDER BY dn.donor_id, dn.donation_date
+""")
+
+DONOR_DETAILS_SQL = text("""
+    SELECT
+        d.id, d.first_name, d.last_name, d.email,
+        COUNT(dn.id)    AS gift_count,
+        SUM(dn.amount)  AS lifetime_value
+    FROM donors d
+    JOIN donations dn ON dn.donor_id = d.id
+    WHERE d.id IN :donor_ids
+    GROUP BY d.id, d.first_name, d.last_name, d.email
+""").bindparams(bindparam("donor_ids", expanding=True))
+
+
+# =====================================================================
+# SEGMENTED ANALYSIS
+# =====================================================================
+
+def analyze_segments(offsets: np.ndarray, days: np.ndarray, months: np.ndarray,
+                     amounts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Pattern metrics for donors stored back to back: donor i owns gifts
+    offsets[i]:offsets[i + 1], ordered by date. Donors need 2+ gifts.
+    """
+    counts = np.diff(offsets)
+    n_donors = len(counts)
+    seg = np.repeat(np.arange(n_donors), counts)
+
+    # Intervals between consecutive gifts of the same donor
+    same_donor = seg[1:] == seg[:-1]
+    intervals = np.diff(days).astype(float)[same_donor]
+    interval_seg = seg[1:][same_donor]
+    n_intervals = counts - 1
+
+    mean = np.bincount(interval_seg, weights=intervals, minlength=n_donors) / np.maximum(n_intervals, 1)
+    deviations = intervals - mean[interval_seg]
+    squares = np.bincount(interval_seg, weights=deviations ** 2, minlength=n_donors)
+    std = np.where(n_intervals > 1, np.sqrt(squares / np.maximum(n_intervals - 1, 1)), 0.0)
+
+    pattern = np.select(
+        [(mean >= low) & (mean <= high) for _, low, high in PATTERN_RANGES],
+        [name for name, _, _ in PATTERN_RANGES],
+        "Irregular"
+    )
+    cv = np.where(mean > 0, std / np.where(mean > 0, mean, 1), 1.0)
+    consistency = np.round(np.maximum(0.0, (1 - cv) * 100), 1)
+
+    # Month histogram; ties go to the month the donor gave in first
+    month_key = seg * 12 + (months - 1)
+    histogram = np.bincount(month_key, minlength=n_donors * 12).reshape(n_donors, 12)
+    position = np.arange(len(seg)) - offsets[seg]
+    first_seen = np.full(n_donors * 12, np.iinfo(np.int64).max)
+    keys, first_index = np.unique(month_key, return_index=True)
+    first_seen[keys] = position[first_index]
+    month_order = np.lexsort((first_seen.reshape(n_donors, 12), -histogram), axis=1)[:, :3]
+    month_given = np.take_along_axis(histogram, month_order, axis=1) > 0
+
+    # Distinct amounts, largest first, ranked within each donor
+    by_amount = np.lexsort((-amounts, seg))
+    sorted_seg, sorted_amounts = seg[by_amount], amounts[by_amount]
+    distinct = np.ones(len(seg), dtype=bool)
+    distinct[1:] = (sorted_seg[1:] != sorted_seg[:-1]) | (sorted_amounts[1:] != sorted_amounts[:-1])
+    distinct_seg, distinct_amounts = sorted_seg[distinct], sorted_amounts[distinct]
+    rank = np.arange(len(distinct_seg)) - np.searchsorted(distinct_seg, distinct_seg, side="left")
+    top_amounts = np.full((n_donors, 3), np.nan)
+    keep = rank < 3
+    top_amounts[distinct_seg[keep], rank[keep]] = distinct_amounts[keep]
+
+    # Later half vs earlier half of the gifts, in whole cents so the +/-10% bounds are exact
+    cumulative = np.concatenate(([0], np.cumsum(np.rint(amounts * 100).astype(np.int64))))
+    half = counts // 2
+    start, middle, end = offsets[:-1], offsets[:-1] + half, offsets[1:]
+    older = (cumulative[middle] - cumulative[start]) * (counts - half)
+    recent = (cumulative[end] - cumulative[middle]) * half
+    trend = np.select(
+        [counts < 4, 10 * recent > 11 * older, 10 * recent < 9 * older],
+        ["Insufficient data", "Increasing", "Decreasing"],
+        "Stable"
+    )
+
+    return {
+        "gift_count": counts,
+        "average_frequency_days": np.rint(mean).astype(int),
+        "consistency_score": consistency,
+        "pattern_type": pattern,
+        "month_order": month_order,
+        "month_given": month_given,
+        "top_amounts": top_amounts,
+        "trend": trend,
+        "seasonal": (histogram > 0).sum(axis=1) <= 3,
+    }
+
+
+# =====================================================================
+# STREAMING
+# =====================================================================
+
+def _to_arrays(rows) -> Tuple[List, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    donor_col, day_col, month_col, amount_col = zip(*rows)
+    donors = np.array(donor_col, dtype=object)
+    starts = np.flatnonzero(np.concatenate(([True], donors[1:] != donors[:-1])))
+    offsets = np.append(starts, len(donors))
+    return (
+        list(donors[starts]),
+        offsets,
+        np.array(day_col, dtype=np.int64),
+        np.array(month_col, dtype=np.int64),
+        np.array([float(a or 0) for a in amount_col]),
+    )
+
+
+def iter_history_chunks(db: Session, organization_id: UUID, chunk_rows: int = CHUNK_ROWS) -> Iterator[Tuple]:
+    """(donor ids, offsets, days, months, amounts) per chunk; a donor never spans two chunks"""
+    result = db.execute(
+        GIFT_HISTORY_SQL.execution_options(stream_results=True),
+        {"org_id": organization_id, "min_gifts": MIN_GIFTS}
+    )
+    carry = []
+    for partition in result.partitions(chunk_rows):
+        rows = carry + list(partition)
+        last_donor = rows[-1][0]
+        split = len(rows)
+        while split > 0 and rows[split - 1][0] == last_donor:
+            split -= 1
+        if split == 0:
+            # One donor fills the whole chunk; wait for the rest of their gifts
+            carry = rows
+            continue
+        carry = rows[split:]
+        yield _to_arrays(rows[:split])
+    if carry:
+        yield _to_arrays(carry)
+
+
+def _select(metrics: Dict[str, np.ndarray], pattern_type: Optional[str], limit: int) -> np.ndarray:
+    """Indexes of the best `limit` donors by consistency, with 2+ gifts and the requested pattern"""
+    eligible = metrics["gift_count"] >= 2
+    if pattern_type:
+        eligible &= metrics["pattern_type"] == pattern_type
+    candidates = np.flatnonzero(eligible)
+    order = np.argsort(-metrics["consistency_score"][candidates], kind="stable")
+    return candidates[order[:limit]]
+
+
+def detect_giving_patterns(
+        db: Session,
+        organization_id: UUID,
+        pattern_type: Optional[str] = None,
+        limit: int = 100,
+        chunk_rows: int = CHUNK_ROWS
+) -> List[Dict]:
+    """Giving patterns of the `limit` most consistent donors, most consistent first"""
+    started = time.perf_counter()
+    best: List[Dict] = []
+    gifts = 0
+
+    for donor_ids, offsets, days, months, amounts in iter_history_chunks(db, organization_id, chunk_rows):
+        gifts += len(days)
+        metrics = analyze_segments(offsets, days, months, amounts)
+        for i in _select(metrics, pattern_type, limit):
+            best.append({
+                "donor_id": donor_ids[i],
+                "pattern_type": str(metrics["pattern_type"][i]),
+                "average_frequency_days": int(metrics["average_frequency_days"][i]),
+                "consistency_score": float(metrics["consistency_score"][i]),
+                "preferred_giving_months": [
+                    MONTH_NAMES[m] for m, given in zip(metrics["month_order"][i], metrics["month_given"][i]) if given
+                ],
+                "preferred_giving_amounts": [
+                    Decimal(f"{a:.2f}") for a in metrics["top_amounts"][i] if not np.isnan(a)
+                ],
+                "trend": str(metrics["trend"][i]),
+                "seasonal_pattern_detected": bool(metrics["seasonal"][i]),
+            })
+        best.sort(key=lambda p: p["consistency_score"], reverse=True)
+        del best[limit:]
+
+    if best:
+        details = {
+            row.id: row for row in db.execute(
+                DONOR_DETAILS_SQL, {"donor_ids": [p["donor_id"] for p in best]}
+            ).all()
+        }
+        for pattern in best:
+            row = details.get(pattern["donor_id"])
+            pattern["donor_name"] = f"{row.first_name} {row.last_name}" if row else "Unknown Donor"
+            pattern["email"] = row.email if row else None
+            pattern["total_gifts"] = row.gift_count if row else 0
+            pattern["lifetime_value"] = Decimal(str(row.lifetime_value)) if row else Decimal("0")
+
+    logger.info(f"Giving patterns for {organization_id}: {gifts} gifts in "
+                f"{time.perf_counter() - started:.2f}s")
+    return best
+
+
+# =====================================================================
+# BENCHMARK
+# =====================================================================
+
+def synthetic_history(n_gifts: int, gifts_per_donor: int = 10, seed: int = 7) -> Tuple:
+    """Random gift histories shaped like production: (offsets, days, months, amounts)"""
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(MIN_GIFTS, 2 * gifts_per_donor, size=n_gifts // MIN_GIFTS)
+    counts = counts[np.cumsum(counts) <= n_gifts]
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    seg = np.repeat(np.arange(len(counts)), counts)
+
+    cadence = rng.choice([30, 90, 180, 365, 120], size=len(counts))[seg]
+    steps = np.maximum(1, rng.normal(cadence, cadence * 0.2)).astype(np.int64)
+    steps[offsets[:-1]] = rng.integers(16000, 19000, size=len(counts))
+    days = np.cumsum(steps) - np.repeat(np.cumsum(steps)[offsets[:-1]] - steps[offsets[:-1]], counts)
+    months = (days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) % 12) + 1
+    amounts = np.round(rng.lognormal(4, 1, size=len(days)), 2)
+    return offsets, days, months, amounts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Detect giving patterns")
+    parser.add_argument("--org", help="Organization ID to analyze")
+    parser.add_argument("--pattern", help="Only this pattern type")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--benchmark", action="store_true", help="Time the analysis on synthetic gifts")
+    parser.add_argument("--gifts", type=int, default=1_000_000, help="Synthetic gifts for --benchmark")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.benchmark:
+        offsets, days, months, amounts = synthetic_history(args.gifts)
+        start = time.perf_counter()
+        metrics = analyze_segments(offsets, days, months, amounts)
+        elapsed = time.perf_counter() - start
+        patterns, counts = np.unique(metrics["pattern_type"], return_counts=True)
+        print(f"\n⚡ {len(days):,} gifts / {len(offsets) - 1:,} donors analyzed in {elapsed:.2f}s "
+              f"({len(days) / elapsed:,.0f} gifts/s)")
+        for name, count in zip(patterns, counts):
+            print(f"  {name:<12} {count:>8,}")
+    elif args.org:
+        from database import SessionLocal
+
+        session = SessionLocal()
+        try:
+            for p in detect_giving_patterns(session, UUID(args.org), args.pattern, args.limit):
+                print(f"  {p['donor_name']:<30} {p['pattern_type']:<12} {p['consistency_score']:>5.1f} "
+                      f"{','.join(p['preferred_giving_months'])} {p['trend']}")
+        finally:
+            session.close()
+    else:
+        parser.error("pass --org or --benchmark")
@@ -12,18 +12,19 @@ Add to your analytics.py or create a new extra analytics router.
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import func
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta, date
 from decimal import Decimal
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from analytics.analytics import get_current_user, verify_organization_access
-from database import get_db
+from database import get_db, get_read_db
+from utils import in_range, year_range
 from models import Organizations, Donations
 from models import (
-    GoldenTriangle, WhatIfScenarios, StaffingAnalysis
+    GoldenTriangle, WhatIfScenarios, WhatIfSimulation, StaffingAnalysis
 )
 
 router = APIRouter(prefix="/api/v1/analytics", tags=["Scenarios & Digital"])
@@ -45,6 +46,9 @@ class WhatIfScenarioCreate(BaseModel):
     scenario_name: str
     scenario_type: str  # "donor_acquisition", "major_gifts", "digital", etc.
     investments: WhatIfInvestment
+    paths: int = 10000  # Monte Carlo paths
+    # Set to reproduce a simulation; the database column is a BIGINT
+    seed: Optional[int] = Field(None, ge=0, lt=2**63)
 
 
 # ============================================================================
@@ -190,12 +194,15 @@ async def create_whatif_scenario(
     - events: Event-based fundraising
     - monthly_giving: Monthly donor program
     
-    Returns 5-year projections with:
+    Returns 5-year projections (median path) with:
     - Year-by-year ROI
     - Net revenue
     - Donor count
     - Average LTV
     - Breakeven point
+
+    Plus the Monte Carlo percentile bands and breakeven distribution, which
+    are stored with the scenario.
     
     Args:
         organization_id: Organization UUID
@@ -206,18 +213,15 @@ async def create_whatif_scenario(
     # Get current organizational metrics
     current_year = datetime.now().year
     
-    current_revenue = db.query(func.sum(Donations.amount)).filter(
-        Donations.organization_id == organization_id,
-        extract('year', Donations.donation_date) == current_year
-    ).scalar() or 0
-    
     current_donors = db.query(func.count(func.distinct(Donations.donor_id))).filter(
         Donations.organization_id == organization_id,
-        extract('year', Donations.donation_date) == current_year
+        in_range(Donations.donation_date, year_range(current_year))
     ).scalar() or 0
     
     # Calculate projections
     projections = calculate_scenario_projections(
+        db,
+        organization_id,
         scenario.scenario_type,
         {
             "year_1": scenario.investments.year_1,
@@ -226,8 +230,9 @@ async def create_whatif_scenario(
             "year_4": scenario.investments.year_4,
             "year_5": scenario.investments.year_5
         },
-        float(current_revenue),
-        current_donors
+        current_donors,
+        scenario.paths,
+        scenario.seed
     )
     
     # Save scenario
@@ -250,6 +255,18 @@ async def create_whatif_scenario(
     )
     
     db.add(whatif_scenario)
+    db.flush()
+
+    db.add(WhatIfSimulation(
+        scenario_id=whatif_scenario.id,
+        organization_id=organization_id,
+        paths=projections["simulation"]["paths"],
+        seed=projections["simulation"]["seed"],
+        calibration=projections["assumptions"],
+        yearly_bands=projections["bands"],
+        monthly_net_revenue=projections["monthly_net_revenue"],
+        breakeven=projections["breakeven"]
+    ))
     db.commit()
     db.refresh(whatif_scenario)
     
@@ -277,13 +294,15 @@ async def create_whatif_scenario(
 @router.get("/whatif/scenarios/{organization_id}")
 async def get_whatif_scenarios(
     organization_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
-    """Get all what-if scenarios for an organization"""
+    """Get all what-if scenarios for an organization with their stored simulation results"""
     verify_organization_access(current_user, organization_id)
     
-    scenarios = db.query(WhatIfScenarios).filter(
+    rows = db.query(WhatIfScenarios, WhatIfSimulation).outerjoin(
+        WhatIfSimulation, WhatIfSimulation.scenario_id == WhatIfScenarios.id
+    ).filter(
         WhatIfScenarios.organization_id == organization_id
     ).order_by(WhatIfScenarios.created_at.desc()).all()
     
@@ -301,9 +320,23 @@ async def get_whatif_scenarios(
                     float(s.year_5_investment or 0)
                 ]),
                 "breakeven_month": s.breakeven_month,
+                "projections": {
+                    "roi": s.projected_roi,
+                    "net_revenue": s.projected_net_revenue,
+                    "donor_count": s.projected_donor_count,
+                    "avg_ltv": s.projected_avg_ltv
+                },
+                "simulation": {
+                    "paths": sim.paths,
+                    "seed": sim.seed,
+                    "bands": sim.yearly_bands,
+                    "monthly_net_revenue": sim.monthly_net_revenue,
+                    "breakeven": sim.breakeven,
+                    "simulated_at": sim.simulated_at.isoformat()
+                } if sim else None,
                 "created_at": s.created_at.isoformat()
             }
-            for s in scenarios
+            for s, sim in rows
         ]
     }
 
@@ -338,12 +371,12 @@ async def get_staffing_recommendations(
     
     total_revenue = db.query(func.sum(Donations.amount)).filter(
         Donations.organization_id == organization_id,
-        extract('year', Donations.donation_date) == current_year
+        in_range(Donations.donation_date, year_range(current_year))
     ).scalar() or 0
     
     total_donors = db.query(func.count(func.distinct(Donations.donor_id))).filter(
         Donations.organization_id == organization_id,
-        extract('year', Donations.donation_date) == current_year
+        in_range(Donations.donation_date, year_range(current_year))
     ).scalar() or 0
     
     # Industry benchmarks
@@ -450,85 +483,24 @@ async def get_staffing_recommendations(
 # ============================================================================
 
 def calculate_scenario_projections(
+    db: Session,
+    organization_id: UUID,
     scenario_type: str,
     investments: Dict[str, float],
-    current_revenue: float,
-    current_donors: int
+    current_donors: int,
+    paths: int,
+    seed: Optional[int] = None
 ) -> Dict[str, Any]:
-    """Calculate detailed projections for what-if scenarios"""
-    
-    projections = {
-        "roi": {},
-        "net_revenue": {},
-        "donor_count": {},
-        "avg_ltv": {},
-        "breakeven_month": None,
-        "assumptions": {}
-    }
-    
-    cumulative_investment = 0
-    cumulative_return = 0
-    
-    for year in range(1, 6):
-        investment = investments.get(f"year_{year}", 0)
-        cumulative_investment += investment
-        
-        if scenario_type == "donor_acquisition":
-            # Acquisition cost decreases with scale
-            cost_per_donor = max(50 - (year * 5), 25)
-            new_donors = investment / cost_per_donor if cost_per_donor > 0 else 0
-            avg_gift = 75 * (1 + year * 0.1)  # Gift size increases
-            year_return = new_donors * avg_gift * 2  # 2 gifts per year average
-            
-            projections["assumptions"] = {
-                "cost_per_donor": cost_per_donor,
-                "retention_rate": 0.6,
-                "gifts_per_year": 2
-            }
-            
-        elif scenario_type == "major_gifts":
-            # MGO can manage 150 donors, raise $1M+
-            mgos_hired = investment / 100000  # $100k per MGO
-            year_return = mgos_hired * 1000000  # $1M per MGO
-            new_donors = mgos_hired * 150
-            
-            projections["assumptions"] = {
-                "mgo_salary": 100000,
-                "revenue_per_mgo": 1000000,
-                "donors_per_mgo": 150
-            }
-            
-        else:  # default/digital
-            # Digital campaigns
-            roi_multiplier = 3 + (year * 0.5)  # ROI improves over time
-            year_return = investment * roi_multiplier
-            new_donors = investment / 50  # $50 acquisition cost
-            
-            projections["assumptions"] = {
-                "roi_multiplier": roi_multiplier,
-                "acquisition_cost": 50
-            }
-        
-        cumulative_return += year_return
-        net_revenue = cumulative_return - cumulative_investment
-        
-        # Calculate metrics
-        projections["roi"][f"year_{year}"] = round(
-            (year_return / investment - 1) * 100 if investment > 0 else 0,
-            2
-        )
-        projections["net_revenue"][f"year_{year}"] = round(net_revenue, 2)
-        projections["donor_count"][f"year_{year}"] = round(current_donors + new_donors * year)
-        projections["avg_ltv"][f"year_{year}"] = round(
-            cumulative_return / (new_donors * year) if new_donors > 0 else 0,
-            2
-        )
-        
-        # Check for breakeven
-        if net_revenue >= 0 and projections["breakeven_month"] is None:
-            projections["breakeven_month"] = year * 12
-    
-    return projections
+    """
+    Monte Carlo projections for what-if scenarios, with assumptions calibrated
+    from the organization's history (analytics/whatif_simulator.py)
+    """
+    from analytics import whatif_simulator
+
+    calibration = whatif_simulator.calibrate(db, organization_id)
+    return whatif_simulator.run_simulation(
+        scenario_type, investments, current_donors, calibration, paths, seed
+    )
 
 
 def format_scenario_for_charts(projections: Dict[str, Any]) -> Dict[str, Any]:
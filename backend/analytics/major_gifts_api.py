@@ -5,15 +5,17 @@ Endpoints for major donor pipeline tracking, moves management, and prospect prio
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_, or_, case
-from datetime import datetime, timedelta
+from sqlalchemy import desc, and_, case
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from decimal import Decimal
 
 # Assuming you have these imports from your existing setup
-from database import get_db
-from models import Donors as Donor, Donations as Donation,  Organizations as Organization
+from database import get_heavy_db, get_batch_db
+from models import Organizations as Organization
+from models import MajorGiftsPipelineSnapshot
+from analytics import major_gifts_snapshot
 
 router = APIRouter(prefix="/api/v1/analytics/major-gifts", tags=["major-gifts"])
 
@@ -116,61 +118,56 @@ class NextActionsResponse(BaseModel):
 # HELPER FUNCTIONS
 # ============================================================================
 
-def calculate_capacity_score(donor_data: Dict) -> float:
-    """Calculate estimated giving capacity based on donor history"""
-    lifetime_value = donor_data.get('lifetime_value', 0)
-    largest_gift = donor_data.get('largest_gift', 0)
-    avg_gift = donor_data.get('avg_gift', 0)
-
-    # Capacity = max(3x largest gift, 5x average gift, 2x lifetime value)
-    capacity_estimates = [
-        largest_gift * 3,
-        avg_gift * 5,
-        lifetime_value * 2
-    ]
-
-    return max(capacity_estimates)
-
-
-def determine_pipeline_stage(donor_data: Dict) -> str:
-    """Determine appropriate pipeline stage based on donor behavior"""
-    total_gifts = donor_data.get('total_gifts', 0)
-    lifetime_value = donor_data.get('lifetime_value', 0)
-    days_since_last_gift = donor_data.get('days_since_last_gift', 999)
-    largest_gift = donor_data.get('largest_gift', 0)
-
-    # Stage determination logic
-    if largest_gift >= 25000:
-        if days_since_last_gift <= 90:
-            return "Stewardship"
-        else:
-            return "Re-engagement"
-    elif largest_gift >= 10000:
-        if total_gifts >= 3:
-            return "Solicitation"
-        else:
-            return "Cultivation"
-    elif largest_gift >= 5000:
-        return "Qualification"
-    else:
-        return "Identification"
-
-
-def calculate_probability(stage: str, engagement_level: int) -> float:
-    """Calculate probability of gift based on stage and engagement"""
-    stage_probabilities = {
-        "Identification": 0.10,
-        "Qualification": 0.25,
-        "Cultivation": 0.40,
-        "Solicitation": 0.70,
-        "Stewardship": 0.90,
-        "Re-engagement": 0.30
-    }
+# Map pipeline stages onto the four moves management move types
+STAGE_MOVE_TYPES = {
+    "Identification": "qualification",
+    "Qualification": "qualification",
+    "Cultivation": "cultivation",
+    "Re-engagement": "cultivation",
+    "Solicitation": "solicitation",
+    "Stewardship": "stewardship"
+}
+
+
+def days_since(value: Optional[datetime], now: datetime, default: int) -> int:
+    return (now - value).days if value else default
+
+
+def prospect_from_snapshot(row: MajorGiftsPipelineSnapshot, now: datetime) -> ProspectInPipeline:
+    return ProspectInPipeline(
+        donor_id=str(row.donor_id),
+        donor_name=row.donor_name or "",
+        stage=row.stage,
+        priority_score=row.priority_score or 0,
+        estimated_capacity=float(row.estimated_capacity or 0),
+        current_giving=float(row.lifetime_value or 0),
+        last_gift_amount=float(row.last_gift_amount or 0),
+        last_gift_date=row.last_gift_date,
+        lifetime_value=float(row.lifetime_value or 0),
+        engagement_level=row.engagement_level or 1,
+        next_action=row.next_action or "Follow up",
+        next_action_date=row.next_action_date,
+        assigned_officer=row.assigned_officer,
+        days_in_stage=days_since(row.stage_entered_at, now, 0),
+        probability=row.probability or 0,
+        projected_ask_amount=float(row.projected_ask_amount or 0),
+        projected_close_date=row.projected_close_date
+    )
 
-    base_prob = stage_probabilities.get(stage, 0.25)
-    engagement_multiplier = 0.5 + (engagement_level * 0.1)  # 0.6 to 1.0
 
-    return min(base_prob * engagement_multiplier, 0.95)
+def action_from_snapshot(row: MajorGiftsPipelineSnapshot, now: datetime) -> NextAction:
+    return NextAction(
+        donor_id=str(row.donor_id),
+        donor_name=row.donor_name or "",
+        priority=row.action_priority or "low",
+        action_type=row.action_type or "follow_up",
+        action_description=row.next_action or "Follow up with prospect",
+        due_date=row.next_action_date or now,
+        estimated_capacity=float(row.estimated_capacity or 0),
+        current_stage=row.stage,
+        days_since_last_contact=days_since(row.last_gift_date, now, 365),
+        urgency_score=row.urgency_score or 0
+    )
 
 
 # ============================================================================
@@ -181,11 +178,14 @@ def calculate_probability(stage: str, engagement_level: int) -> float:
 async def get_major_gifts_pipeline(
         organization_id: str,
         min_capacity: float = 10000.0,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_heavy_db)
 ):
     """
     Get major gifts pipeline with prospects, stages, and velocity metrics
 
+    Reads the pipeline snapshot; days in stage, stage conversion rates and
+    velocity come from the recorded stage history.
+
     Args:
         organization_id: Organization UUID
         min_capacity: Minimum estimated capacity to include (default $10K)
@@ -193,102 +193,22 @@ async def get_major_gifts_pipeline(
     Returns:
         Complete pipeline analysis with prospects and stage metrics
     """
+    major_gifts_snapshot.ensure_pipeline_snapshot(db, organization_id)
+    now = datetime.now(timezone.utc)
 
-    # Query major donors (>= $5K lifetime or single gift >= $2.5K)
-    major_donors = db.query(
-        Donor.id.label('donor_id'),
-        Donor.first_name,
-        Donor.last_name,
-        func.count(Donation.id).label('total_gifts'),
-        func.sum(Donation.amount).label('lifetime_value'),
-        func.max(Donation.amount).label('largest_gift'),
-        func.avg(Donation.amount).label('avg_gift'),
-        func.max(Donation.donation_date).label('last_gift_date'),
-        func.max(Donation.amount).filter(
-            Donation.donation_date == func.max(Donation.donation_date)
-        ).label('last_gift_amount')
-    ).join(
-        Donation, Donor.id == Donation.donor_id
-    ).filter(
-        Donor.organization_id == organization_id
-    ).group_by(
-        Donor.id, Donor.first_name, Donor.last_name
-    ).having(
-        or_(
-            func.sum(Donation.amount) >= 5000,
-            func.max(Donation.amount) >= 2500
-        )
+    rows = db.query(MajorGiftsPipelineSnapshot).filter(
+        MajorGiftsPipelineSnapshot.organization_id == organization_id,
+        MajorGiftsPipelineSnapshot.estimated_capacity >= min_capacity
+    ).order_by(
+        desc(MajorGiftsPipelineSnapshot.priority_score)
     ).all()
 
-    prospects = []
-    pipeline_stages_count = {}
-
-    for donor in major_donors:
-        # Calculate metrics
-        donor_dict = {
-            'lifetime_value': float(donor.lifetime_value or 0),
-            'largest_gift': float(donor.largest_gift or 0),
-            'avg_gift': float(donor.avg_gift or 0),
-            'total_gifts': donor.total_gifts,
-            'days_since_last_gift': (datetime.now() - donor.last_gift_date).days if donor.last_gift_date else 999
-        }
-
-        estimated_capacity = calculate_capacity_score(donor_dict)
-
-        # Filter by minimum capacity
-        if estimated_capacity < min_capacity:
-            continue
-
-        stage = determine_pipeline_stage(donor_dict)
-
-        # Get engagement level (mock - should come from investment continuum API)
-        engagement_level = min(5, max(1, int(donor.total_gifts / 2) + 2))
-
-        probability = calculate_probability(stage, engagement_level)
-
-        # Calculate days in stage (mock - should track stage changes)
-        days_in_stage = min(donor_dict['days_since_last_gift'], 180)
-
-        # Determine next action
-        next_actions_map = {
-            "Identification": "Research prospect capacity and interests",
-            "Qualification": "Schedule discovery meeting",
-            "Cultivation": "Present giving opportunity aligned with interests",
-            "Solicitation": "Prepare and deliver proposal",
-            "Stewardship": "Send impact report and schedule gratitude call",
-            "Re-engagement": "Personalized outreach to re-establish relationship"
-        }
-
-        prospect = ProspectInPipeline(
-            donor_id=donor.donor_id,
-            donor_name=f"{donor.first_name} {donor.last_name}",
-            stage=stage,
-            priority_score=round(estimated_capacity * probability / 10000, 2),
-            estimated_capacity=estimated_capacity,
-            current_giving=float(donor.lifetime_value),
-            last_gift_amount=float(donor.last_gift_amount or 0),
-            last_gift_date=donor.last_gift_date,
-            lifetime_value=float(donor.lifetime_value),
-            engagement_level=engagement_level,
-            next_action=next_actions_map.get(stage, "Follow up"),
-            next_action_date=datetime.now() + timedelta(days=7),
-            assigned_officer="Gift Officer",  # Mock - should come from assignments table
-            days_in_stage=days_in_stage,
-            probability=probability,
-            projected_ask_amount=estimated_capacity * 0.5,  # Ask for 50% of capacity
-            projected_close_date=datetime.now() + timedelta(days=90) if stage in ["Solicitation", "Cultivation"] else None
-        )
-
-        prospects.append(prospect)
-
-        # Count by stage
-        pipeline_stages_count[stage] = pipeline_stages_count.get(stage, 0) + 1
+    prospects = [prospect_from_snapshot(row, now) for row in rows]
+    history = major_gifts_snapshot.stage_history_stats(db, organization_id)
 
     # Calculate pipeline stage metrics
     pipeline_stages = []
-    stage_order = ["Identification", "Qualification", "Cultivation", "Solicitation", "Stewardship", "Re-engagement"]
-
-    for stage in stage_order:
+    for stage in major_gifts_snapshot.STAGE_ORDER:
         stage_prospects = [p for p in prospects if p.stage == stage]
 
         if stage_prospects:
@@ -297,15 +217,8 @@ async def get_major_gifts_pipeline(
             avg_probability = sum(p.probability for p in stage_prospects) / len(stage_prospects)
             weighted_value = total_capacity * avg_probability
 
-            # Mock conversion rate - should be calculated from historical data
-            conversion_rates = {
-                "Identification": 0.40,
-                "Qualification": 0.60,
-                "Cultivation": 0.75,
-                "Solicitation": 0.85,
-                "Stewardship": 0.95,
-                "Re-engagement": 0.50
-            }
+            conversion_rate = history[stage]["conversion_rate"] if stage in history else \
+                major_gifts_snapshot.DEFAULT_CONVERSION_RATES.get(stage, 0.5)
 
             pipeline_stages.append(PipelineStage(
                 stage=stage,
@@ -313,7 +226,7 @@ async def get_major_gifts_pipeline(
                 total_capacity=total_capacity,
                 avg_capacity=avg_capacity,
                 weighted_value=weighted_value,
-                conversion_rate=conversion_rates.get(stage, 0.5)
+                conversion_rate=conversion_rate
             ))
 
     # Calculate velocity metrics
@@ -321,8 +234,15 @@ async def get_major_gifts_pipeline(
     total_weighted = sum(p.estimated_capacity * p.probability for p in prospects)
     avg_days_in_stage = sum(p.days_in_stage for p in prospects) / len(prospects) if prospects else 0
 
-    # Pipeline velocity = weighted value / avg days in stage
-    velocity = (total_weighted / avg_days_in_stage * 30) if avg_days_in_stage > 0 else 0
+    # Average completed stay per stage, from transitions
+    completed_exits = sum(h["exits"] for h in history.values())
+    avg_stage_duration = (
+        sum(h["avg_days_in_stage"] * h["exits"] for h in history.values()) / completed_exits
+        if completed_exits else avg_days_in_stage
+    )
+
+    # Pipeline velocity = weighted value / avg days per stage
+    velocity = (total_weighted / avg_stage_duration * 30) if avg_stage_duration > 0 else 0
 
     summary = {
         "total_prospects": len(prospects),
@@ -330,40 +250,54 @@ async def get_major_gifts_pipeline(
         "weighted_pipeline_value": total_weighted,
         "average_capacity": total_capacity / len(prospects) if prospects else 0,
         "pipeline_coverage_ratio": total_weighted / 1000000,  # Assuming $1M annual goal
-        "top_25_value": sum(p.estimated_capacity for p in sorted(prospects, key=lambda x: x.estimated_capacity, reverse=True)[:25])
+        "top_25_value": sum(p.estimated_capacity for p in sorted(prospects, key=lambda x: x.estimated_capacity, reverse=True)[:25]),
+        "snapshot_computed_at": rows[0].computed_at.isoformat() if rows else None
     }
 
     velocity_metrics = {
         "avg_days_in_stage": avg_days_in_stage,
+        "avg_completed_stage_days": avg_stage_duration,
         "pipeline_velocity_monthly": velocity,
         "expected_close_rate": sum(p.probability for p in prospects) / len(prospects) if prospects else 0,
         "projected_revenue_90_days": sum(
             p.projected_ask_amount * p.probability
             for p in prospects
-            if p.projected_close_date and (p.projected_close_date - datetime.now()).days <= 90
+            if p.projected_close_date and (p.projected_close_date - now).days <= 90
         )
     }
 
     return MajorGiftsPipelineResponse(
         summary=summary,
         pipeline_stages=pipeline_stages,
-        prospects=sorted(prospects, key=lambda x: x.priority_score, reverse=True),
+        prospects=prospects,
         velocity_metrics=velocity_metrics,
         organization_id=organization_id,
-        generated_at=datetime.now()
+        generated_at=now
     )
 
 
+@router.post("/pipeline/{organization_id}/refresh")
+async def refresh_major_gifts_pipeline(
+        organization_id: str,
+        db: Session = Depends(get_batch_db)
+):
+    """Rescore prospects now instead of waiting for the nightly snapshot job"""
+    return major_gifts_snapshot.refresh_pipeline_snapshot(db, organization_id)
+
+
 @router.get("/moves-management/{organization_id}", response_model=MovesManagementResponse)
 async def get_moves_management(
         organization_id: str,
         days_back: int = 90,
         days_forward: int = 30,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_heavy_db)
 ):
     """
     Get moves management dashboard with planned and completed moves
 
+    Completed moves are stage transitions recorded by the pipeline snapshot;
+    planned moves are the snapshot's next actions.
+
     Args:
         organization_id: Organization UUID
         days_back: Days to look back for completed moves
@@ -372,85 +306,64 @@ async def get_moves_management(
     Returns:
         Moves organized by stage, officer, and timeline
     """
+    major_gifts_snapshot.ensure_pipeline_snapshot(db, organization_id)
+    now = datetime.now(timezone.utc)
+
+    prospects = {
+        row.donor_id: row
+        for row in db.query(MajorGiftsPipelineSnapshot).filter(
+            MajorGiftsPipelineSnapshot.organization_id == organization_id
+        ).all()
+    }
 
-    # In a real implementation, you'd query a DonorInteraction or Moves table
-    # For now, generating sample data based on donor activity
-
-    start_date = datetime.now() - timedelta(days=days_back)
-    end_date = datetime.now() + timedelta(days=days_forward)
-
-    # Query recent interactions/donations as proxy for moves
-    interactions = db.query(
-        Donor.id,
-        Donor.first_name,
-        Donor.last_name,
-        Donation.donation_date,
-        Donation.amount,
-        Donation.campaign
-    ).join(
-        Donation, Donor.id == Donation.donor_id
-    ).filter(
-        Donor.organization_id == organization_id,
-        Donation.amount >= 2500,  # Major gift threshold
-        Donation.donation_date >= start_date
-    ).order_by(
-        desc(Donation.donation_date)
-    ).limit(100).all()
-
-    # Generate moves from interactions
+    transitions = major_gifts_snapshot.recent_transitions(db, organization_id, now - timedelta(days=days_back))
     moves_list = []
-    move_types = ["qualification", "cultivation", "solicitation", "stewardship"]
-    statuses = ["completed", "in_progress", "planned"]
-    priorities = ["high", "medium", "low"]
-
-    for idx, interaction in enumerate(interactions):
-        # Determine move type based on amount and recency
-        if interaction.amount >= 25000:
-            move_type = "stewardship"
-            priority = "high"
-        elif interaction.amount >= 10000:
-            move_type = "solicitation"
-            priority = "high"
-        elif interaction.amount >= 5000:
-            move_type = "cultivation"
-            priority = "medium"
-        else:
-            move_type = "qualification"
-            priority = "low"
-
-        # Determine status based on date
-        days_ago = (datetime.now() - interaction.donation_date).days
-        if days_ago < 7:
-            status = "completed"
-            completed_date = interaction.donation_date
-            due_date = interaction.donation_date - timedelta(days=3)
-        elif days_ago < 30:
-            status = "in_progress"
-            completed_date = None
-            due_date = datetime.now() + timedelta(days=7)
-        else:
-            status = "planned"
-            completed_date = None
-            due_date = datetime.now() + timedelta(days=14)
-
-        move = Move(
-            move_id=f"MOVE-{idx+1:04d}",
-            donor_id=interaction.id,
-            donor_name=f"{interaction.first_name} {interaction.last_name}",
-            move_type=move_type,
-            status=status,
-            priority=priority,
-            description=f"{move_type.title()} activity for ${interaction.amount:,.0f} {move_type}",
-            assigned_to="Major Gifts Officer",
-            due_date=due_date,
-            completed_date=completed_date,
-            stage_from="cultivation" if move_type == "solicitation" else None,
-            stage_to=move_type if move_type != "qualification" else "cultivation",
-            outcome="Successful" if status == "completed" else None,
-            notes=f"Campaign: {interaction.campaign}" if interaction.campaign else None
-        )
 
-        moves_list.append(move)
+    # Completed moves: stage changes in the look-back window
+    for transition in transitions:
+        if transition.from_stage is None or transition.to_stage is None:
+            continue
+        prospect = prospects.get(transition.donor_id)
+        move_type = STAGE_MOVE_TYPES.get(transition.to_stage, "cultivation")
+        moves_list.append(Move(
+            move_id=f"MOVE-{transition.id.hex[:8].upper()}",
+            donor_id=str(transition.donor_id),
+            donor_name=prospect.donor_name if prospect else "",
+            move_type=move_type,
+            status="completed",
+            priority=prospect.action_priority if prospect else "medium",
+            description=f"Moved from {transition.from_stage} to {transition.to_stage}",
+            assigned_to=(prospect.assigned_officer if prospect else None) or "Unassigned",
+            due_date=None,
+            completed_date=transition.transitioned_at,
+            stage_from=transition.from_stage,
+            stage_to=transition.to_stage,
+            outcome="Advanced" if major_gifts_snapshot.STAGE_RANK.get(transition.to_stage, 0) >
+                                  major_gifts_snapshot.STAGE_RANK.get(transition.from_stage, 0) else "Regressed",
+            notes=f"{transition.days_in_previous_stage} days in {transition.from_stage}"
+            if transition.days_in_previous_stage is not None else None
+        ))
+
+    # Open moves: next actions due within the look-ahead window, overdue included
+    for prospect in prospects.values():
+        if prospect.next_action_date is None or prospect.next_action_date > now + timedelta(days=days_forward):
+            continue
+        moves_list.append(Move(
+            move_id=f"ACT-{prospect.donor_id.hex[:8].upper()}",
+            donor_id=str(prospect.donor_id),
+            donor_name=prospect.donor_name or "",
+            move_type=STAGE_MOVE_TYPES.get(prospect.stage, "cultivation"),
+            status="planned",
+            priority=prospect.action_priority or "low",
+            description=prospect.next_action or "Follow up with prospect",
+            assigned_to=prospect.assigned_officer or "Unassigned",
+            due_date=prospect.next_action_date,
+            completed_date=None,
+            stage_from=prospect.stage,
+            stage_to=None,
+            outcome=None,
+            notes=None
+        ))
 
     # Organize moves
     moves_by_stage = {
@@ -465,19 +378,20 @@ async def get_moves_management(
         officer = move.assigned_to
         moves_by_officer[officer] = moves_by_officer.get(officer, 0) + 1
 
-    overdue_moves = [m for m in moves_list if m.status != "completed" and m.due_date < datetime.now()]
-    upcoming_moves = [m for m in moves_list if m.status == "planned" and m.due_date <= datetime.now() + timedelta(days=7)]
+    overdue_moves = [m for m in moves_list if m.status != "completed" and m.due_date < now]
+    upcoming_moves = [m for m in moves_list if m.status == "planned" and now <= m.due_date <= now + timedelta(days=7)]
 
     # Calculate completion metrics
-    completed = len([m for m in moves_list if m.status == "completed"])
+    completed_moves = [m for m in moves_list if m.status == "completed"]
     total = len(moves_list)
-    completion_rate = (completed / total * 100) if total > 0 else 0
+    completion_rate = (len(completed_moves) / total * 100) if total > 0 else 0
 
-    completed_moves = [m for m in moves_list if m.status == "completed" and m.completed_date and m.due_date]
-    if completed_moves:
-        avg_days = sum((m.completed_date - m.due_date).days for m in completed_moves) / len(completed_moves)
-    else:
-        avg_days = 0
+    stage_days = [
+        t.days_in_previous_stage
+        for t in transitions
+        if t.days_in_previous_stage is not None and t.to_stage is not None
+    ]
+    avg_days = sum(stage_days) / len(stage_days) if stage_days else 0
 
     return MovesManagementResponse(
         moves_by_stage=moves_by_stage,
@@ -487,7 +401,7 @@ async def get_moves_management(
         completion_rate=completion_rate,
         avg_days_to_complete=avg_days,
         organization_id=organization_id,
-        generated_at=datetime.now()
+        generated_at=now
     )
 
 
@@ -495,7 +409,7 @@ async def get_moves_management(
 async def get_next_actions(
         organization_id: str,
         limit: int = 50,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_heavy_db)
 ):
     """
     Get prioritized next actions for major gift prospects
@@ -507,106 +421,24 @@ async def get_next_actions(
     Returns:
         Prioritized action items organized by urgency
     """
+    major_gifts_snapshot.ensure_pipeline_snapshot(db, organization_id)
+    now = datetime.now(timezone.utc)
 
-    # Query major donors with recent activity
-    donors_data = db.query(
-        Donor.id,
-        Donor.first_name,
-        Donor.last_name,
-        func.max(Donation.donation_date).label('last_gift_date'),
-        func.max(Donation.amount).label('last_gift_amount'),
-        func.sum(Donation.amount).label('lifetime_value'),
-        func.count(Donation.id).label('gift_count')
-    ).join(
-        Donation, Donor.id == Donation.donor_id
-    ).filter(
-        Donor.organization_id == organization_id
-    ).group_by(
-        Donor.id, Donor.first_name, Donor.last_name
-    ).having(
-        or_(
-            func.sum(Donation.amount) >= 5000,
-            func.max(Donation.amount) >= 2500
-        )
+    rows = db.query(MajorGiftsPipelineSnapshot).filter(
+        MajorGiftsPipelineSnapshot.organization_id == organization_id
+    ).order_by(
+        desc(MajorGiftsPipelineSnapshot.urgency_score),
+        MajorGiftsPipelineSnapshot.next_action_date
     ).limit(limit).all()
 
-    actions = []
-
-    for donor in donors_data:
-        days_since_contact = (datetime.now() - donor.last_gift_date).days if donor.last_gift_date else 365
-
-        donor_dict = {
-            'lifetime_value': float(donor.lifetime_value or 0),
-            'largest_gift': float(donor.last_gift_amount or 0),
-            'avg_gift': float(donor.lifetime_value / donor.gift_count) if donor.gift_count > 0 else 0,
-            'total_gifts': donor.gift_count,
-            'days_since_last_gift': days_since_contact
-        }
-
-        estimated_capacity = calculate_capacity_score(donor_dict)
-        stage = determine_pipeline_stage(donor_dict)
-
-        # Determine priority based on capacity, recency, and stage
-        if estimated_capacity >= 50000 and days_since_contact <= 60:
-            priority = "high"
-            urgency_score = 0.9
-        elif estimated_capacity >= 25000 and days_since_contact <= 90:
-            priority = "high"
-            urgency_score = 0.8
-        elif estimated_capacity >= 10000 and days_since_contact <= 120:
-            priority = "medium"
-            urgency_score = 0.6
-        elif days_since_contact > 180:
-            priority = "high"  # Re-engagement is urgent
-            urgency_score = 0.75
-        else:
-            priority = "low"
-            urgency_score = 0.4
-
-        # Determine action type and description
-        action_map = {
-            "Identification": ("research", f"Complete capacity research and wealth screening"),
-            "Qualification": ("meeting", f"Schedule qualification meeting to assess interest"),
-            "Cultivation": ("proposal", f"Develop customized giving proposal"),
-            "Solicitation": ("ask", f"Schedule solicitation meeting for ${estimated_capacity * 0.5:,.0f}"),
-            "Stewardship": ("gratitude", f"Send impact report and schedule thank you call"),
-            "Re-engagement": ("outreach", f"Personalized re-engagement outreach after {days_since_contact} days")
-        }
-
-        action_type, action_desc = action_map.get(stage, ("follow_up", "Follow up with prospect"))
-
-        # Calculate due date based on urgency
-        if urgency_score >= 0.8:
-            due_days = 3
-        elif urgency_score >= 0.6:
-            due_days = 7
-        else:
-            due_days = 14
-
-        action = NextAction(
-            donor_id=donor.id,
-            donor_name=f"{donor.first_name} {donor.last_name}",
-            priority=priority,
-            action_type=action_type,
-            action_description=action_desc,
-            due_date=datetime.now() + timedelta(days=due_days),
-            estimated_capacity=estimated_capacity,
-            current_stage=stage,
-            days_since_last_contact=days_since_contact,
-            urgency_score=urgency_score
-        )
-
-        actions.append(action)
-
-    # Sort by urgency score
-    actions.sort(key=lambda x: x.urgency_score, reverse=True)
+    actions = [action_from_snapshot(row, now) for row in rows]
 
     # Categorize actions
     high_priority = [a for a in actions if a.priority == "high"]
     medium_priority = [a for a in actions if a.priority == "medium"]
     low_priority = [a for a in actions if a.priority == "low"]
-    overdue = [a for a in actions if a.due_date < datetime.now()]
-    this_week = [a for a in actions if a.due_date <= datetime.now() + timedelta(days=7)]
+    overdue = [a for a in actions if a.due_date < now]
+    this_week = [a for a in actions if a.due_date <= now + timedelta(days=7)]
 
     summary = {
         "total_actions": len(actions),
@@ -625,5 +457,5 @@ async def get_next_actions(
         this_week=this_week,
         summary=summary,
         organization_id=organization_id,
-        generated_at=datetime.now()
-    )
\ No newline at end of file
+        generated_at=now
+    )
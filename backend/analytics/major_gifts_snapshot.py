@@ -0,0 +1,423 @@
+"""
+Major Gifts Pipeline Snapshot
+Wise Investor Platform
+
+Scores every major gift prospect of an organization once and stores the result
+in major_gifts_pipeline_snapshot, so the pipeline, moves management and
+next-actions endpoints become indexed reads.
+
+Each refresh compares the new stage of every prospect with the stored one and
+appends a row to major_gifts_stage_transitions when it changes. Days in stage,
+stage velocity and stage conversion rates are measured from that history.
+Next-action due dates are kept across refreshes while the stage and action stay
+the same, so overdue actions stay overdue.
+
+A refresh holds a per-organization advisory lock for its transaction, so a
+read that builds a missing snapshot waits for a concurrent build and then
+finds the snapshot instead of inserting a second one.
+
+Run nightly:
+    python -m analytics.major_gifts_snapshot
+    python -m analytics.major_gifts_snapshot --org <organization_id>
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from uuid import UUID
+import logging
+import time
+
+from sqlalchemy import text, insert, func
+from sqlalchemy.orm import Session
+
+from models import MajorGiftsPipelineSnapshot, MajorGiftsStageTransition
+
+logger = logging.getLogger(__name__)
+
+# Prospects: >= $5K lifetime or a single gift >= $2.5K
+MIN_LIFETIME_VALUE = 5000
+MIN_SINGLE_GIFT = 2500
+
+# First key of pg_advisory_xact_lock(key, hashtext(org)) held by a refresh
+SNAPSHOT_LOCK_KEY = 3030
+
+STAGE_ORDER = ["Identification", "Qualification", "Cultivation", "Solicitation", "Stewardship", "Re-engagement"]
+
+# Position in the pipeline used to tell forward moves from setbacks
+STAGE_RANK = {
+    "Identification": 0,
+    "Qualification": 1,
+    "Re-engagement": 1,
+    "Cultivation": 2,
+    "Solicitation": 3,
+    "Stewardship": 4,
+}
+
+STAGE_PROBABILITIES = {
+    "Identification": 0.10,
+    "Qualification": 0.25,
+    "Cultivation": 0.40,
+    "Solicitation": 0.70,
+    "Stewardship": 0.90,
+    "Re-engagement": 0.30
+}
+
+# Used until an org has stage history of its own
+DEFAULT_CONVERSION_RATES = {
+    "Identification": 0.40,
+    "Qualification": 0.60,
+    "Cultivation": 0.75,
+    "Solicitation": 0.85,
+    "Stewardship": 0.95,
+    "Re-engagement": 0.50
+}
+
+HISTORY_WINDOW_DAYS = 365
+
+PIPELINE_SQL = text("""
+    SELECT
+        d.id                                                    AS donor_id,
+        d.first_name,
+        d.last_name,
+        COUNT(dn.id)                                            AS total_gifts,
+        SUM(dn.amount)                                          AS lifetime_value,
+        MAX(dn.amount)                                          AS largest_gift,
+        AVG(dn.amount)                                          AS avg_gift,
+        MAX(dn.donation_date)                                   AS last_gift_date,
+        (ARRAY_AGG(dn.amount ORDER BY dn.donation_date DESC NULLS LAST))[1] AS last_gift_amount
+    FROM donors d
+    JOIN donations dn ON dn.donor_id = d.id
+    WHERE d.organization_id = :org_id
+    GROUP BY d.id, d.first_name, d.last_name
+    HAVING SUM(dn.amount) >= :min_lifetime OR MAX(dn.amount) >= :min_single
+""")
+
+ASSIGNED_OFFICERS_SQL = text("""
+    SELECT DISTINCT ON (a.donor_id)
+        a.donor_id,
+        o.id AS officer_id,
+        o.first_name || ' ' || o.last_name AS officer_name
+    FROM donor_portfolio_assignments a
+    JOIN major_gift_officers o ON o.id = a.officer_id
+    WHERE a.organization_id = :org_id
+      AND a.is_active
+    ORDER BY a.donor_id, a.is_primary DESC, a.assignment_date DESC
+""")
+
+
+# =====================================================================
+# SCORING
+# =====================================================================
+
+def calculate_capacity_score(donor_data: Dict) -> float:
+    """Calculate estimated giving capacity based on donor history"""
+    lifetime_value = donor_data.get('lifetime_value', 0)
+    largest_gift = donor_data.get('largest_gift', 0)
+    avg_gift = donor_data.get('avg_gift', 0)
+
+    # Capacity = max(3x largest gift, 5x average gift, 2x lifetime value)
+    capacity_estimates = [
+        largest_gift * 3,
+        avg_gift * 5,
+        lifetime_value * 2
+    ]
+
+    return max(capacity_estimates)
+
+
+def determine_pipeline_stage(donor_data: Dict) -> str:
+    """Determine appropriate pipeline stage based on donor behavior"""
+    total_gifts = donor_data.get('total_gifts', 0)
+    days_since_last_gift = donor_data.get('days_since_last_gift', 999)
+    largest_gift = donor_data.get('largest_gift', 0)
+
+    if largest_gift >= 25000:
+        if days_since_last_gift <= 90:
+            return "Stewardship"
+        else:
+            return "Re-engagement"
+    elif largest_gift >= 10000:
+        if total_gifts >= 3:
+            return "Solicitation"
+        else:
+            return "Cultivation"
+    elif largest_gift >= 5000:
+        return "Qualification"
+    else:
+        return "Identification"
+
+
+def calculate_probability(stage: str, engagement_level: int) -> float:
+    """Calculate probability of gift based on stage and engagement"""
+    base_prob = STAGE_PROBABILITIES.get(stage, 0.25)
+    engagement_multiplier = 0.5 + (engagement_level * 0.1)  # 0.6 to 1.0
+
+    return min(base_prob * engagement_multiplier, 0.95)
+
+
+def determine_next_action(stage: str, estimated_capacity: float, days_since_contact: int) -> Dict:
+    """Priority, urgency and the concrete next step for a prospect"""
+    if estimated_capacity >= 50000 and days_since_contact <= 60:
+        priority, urgency_score = "high", 0.9
+    elif estimated_capacity >= 25000 and days_since_contact <= 90:
+        priority, urgency_score = "high", 0.8
+    elif estimated_capacity >= 10000 and days_since_contact <= 120:
+        priority, urgency_score = "medium", 0.6
+    elif days_since_contact > 180:
+        priority, urgency_score = "high", 0.75  # Re-engagement is urgent
+    else:
+        priority, urgency_score = "low", 0.4
+
+    action_map = {
+        "Identification": ("research", "Complete capacity research and wealth screening"),
+        "Qualification": ("meeting", "Schedule qualification meeting to assess interest"),
+        "Cultivation": ("proposal", "Develop customized giving proposal"),
+        "Solicitation": ("ask", f"Schedule solicitation meeting for ${estimated_capacity * 0.5:,.0f}"),
+        "Stewardship": ("gratitude", "Send impact report and schedule thank you call"),
+        "Re-engagement": ("outreach", f"Personalized re-engagement outreach after {days_since_contact} days")
+    }
+    action_type, description = action_map.get(stage, ("follow_up", "Follow up with prospect"))
+
+    if urgency_score >= 0.8:
+        due_days = 3
+    elif urgency_score >= 0.6:
+        due_days = 7
+    else:
+        due_days = 14
+
+    return {
+        "action_priority": priority,
+        "urgency_score": urgency_score,
+        "action_type": action_type,
+        "next_action": description,
+        "due_days": due_days,
+    }
+
+
+def score_prospect(donor, now: datetime) -> Dict:
+    """Snapshot fields for one row of PIPELINE_SQL"""
+    last_gift_date = donor.last_gift_date
+    if last_gift_date is not None and last_gift_date.tzinfo is None:
+        last_gift_date = last_gift_date.replace(tzinfo=timezone.utc)
+    days_since_last_gift = (now - last_gift_date).days if last_gift_date else 999
+
+    donor_dict = {
+        'lifetime_value': float(donor.lifetime_value or 0),
+        'largest_gift': float(donor.largest_gift or 0),
+        'avg_gift': float(donor.avg_gift or 0),
+        'total_gifts': donor.total_gifts,
+        'days_since_last_gift': days_since_last_gift
+    }
+
+    estimated_capacity = calculate_capacity_score(donor_dict)
+    stage = determine_pipeline_stage(donor_dict)
+    engagement_level = min(5, max(1, int(donor.total_gifts / 2) + 2))
+    probability = calculate_probability(stage, engagement_level)
+
+    return {
+        "donor_name": f"{donor.first_name or ''} {donor.last_name or ''}".strip(),
+        "total_gifts": donor.total_gifts,
+        "lifetime_value": donor_dict['lifetime_value'],
+        "largest_gift": donor_dict['largest_gift'],
+        "avg_gift": round(donor_dict['avg_gift'], 2),
+        "last_gift_amount": float(donor.last_gift_amount or 0),
+        "last_gift_date": last_gift_date,
+        "stage": stage,
+        "estimated_capacity": estimated_capacity,
+        "engagement_level": engagement_level,
+        "probability": probability,
+        "priority_score": round(estimated_capacity * probability / 10000, 2),
+        "projected_ask_amount": estimated_capacity * 0.5,  # Ask for 50% of capacity
+        "projected_close_date": now + timedelta(days=90) if stage in ["Solicitation", "Cultivation"] else None,
+        **determine_next_action(stage, estimated_capacity, days_since_last_gift),
+    }
+
+
+# =====================================================================
+# SNAPSHOT REFRESH
+# =====================================================================
+
+def lock_organization(db: Session, organization_id: UUID) -> None:
+    """Serialize snapshot refreshes of one organization until the transaction ends"""
+    db.execute(text("SELECT pg_advisory_xact_lock(:key, hashtext(:org))"),
+               {"key": SNAPSHOT_LOCK_KEY, "org": str(organization_id)})
+
+
+def refresh_pipeline_snapshot(db: Session, organization_id: UUID, now: Optional[datetime] = None,
+                              only_if_missing: bool = False) -> Dict:
+    """
+    Rescore an org's prospects, record stage changes and replace its snapshot.
+    With only_if_missing the run is skipped when another refresh built the
+    snapshot while this one waited for the lock.
+    """
+    start = time.perf_counter()
+    now = now or datetime.now(timezone.utc)
+
+    lock_organization(db, organization_id)
+    if only_if_missing and snapshot_exists(db, organization_id):
+        db.commit()
+        return {"organization_id": str(organization_id), "skipped": "exists"}
+
+    donors = db.execute(PIPELINE_SQL, {
+        "org_id": organization_id,
+        "min_lifetime": MIN_LIFETIME_VALUE,
+        "min_single": MIN_SINGLE_GIFT,
+    }).all()
+    officers = {
+        row.donor_id: row
+        for row in db.execute(ASSIGNED_OFFICERS_SQL, {"org_id": organization_id}).all()
+    }
+    previous = {
+        row.donor_id: row
+        for row in db.query(MajorGiftsPipelineSnapshot).filter(
+            MajorGiftsPipelineSnapshot.organization_id == organization_id
+        ).all()
+    }
+
+    def transition(donor_id, from_stage, to_stage, entered_at):
+        transitions.append({
+            "organization_id": organization_id,
+            "donor_id": donor_id,
+            "from_stage": from_stage,
+            "to_stage": to_stage,
+            "days_in_previous_stage": (now - entered_at).days if entered_at else None,
+            "transitioned_at": now,
+        })
+
+    rows, transitions = [], []
+    for donor in donors:
+        fields = score_prospect(donor, now)
+        due_days = fields.pop("due_days")
+        prev = previous.pop(donor.donor_id, None)
+
+        if prev is None:
+            transition(donor.donor_id, None, fields["stage"], None)
+            stage_entered_at = now
+        elif prev.stage != fields["stage"]:
+            transition(donor.donor_id, prev.stage, fields["stage"], prev.stage_entered_at)
+            stage_entered_at = now
+        else:
+            stage_entered_at = prev.stage_entered_at
+
+        # Keep the due date of an unchanged action so it can become overdue
+        if (prev is not None and prev.next_action_date is not None
+                and prev.stage == fields["stage"] and prev.action_type == fields["action_type"]):
+            next_action_date = prev.next_action_date
+        else:
+            next_action_date = now + timedelta(days=due_days)
+
+        officer = officers.get(donor.donor_id)
+        rows.append({
+            "organization_id": organization_id,
+            "donor_id": donor.donor_id,
+            "stage_entered_at": stage_entered_at,
+            "next_action_date": next_action_date,
+            "assigned_officer_id": officer.officer_id if officer else None,
+            "assigned_officer": officer.officer_name if officer else None,
+            "computed_at": now,
+            **fields,
+        })
+
+    # Prospects that no longer qualify leave the pipeline
+    for donor_id, prev in previous.items():
+        transition(donor_id, prev.stage, None, prev.stage_entered_at)
+
+    db.query(MajorGiftsPipelineSnapshot).filter(
+        MajorGiftsPipelineSnapshot.organization_id == organization_id
+    ).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(MajorGiftsPipelineSnapshot), rows)
+    if transitions:
+        db.execute(insert(MajorGiftsStageTransition), transitions)
+    db.commit()
+
+    stats = {
+        "organization_id": str(organization_id),
+        "prospects": len(rows),
+        "transitions": len(transitions),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    logger.info(f"Major gifts pipeline snapshot refreshed: {stats}")
+    return stats
+
+
+def snapshot_exists(db: Session, organization_id: UUID) -> bool:
+    return db.query(MajorGiftsPipelineSnapshot.id).filter(
+        MajorGiftsPipelineSnapshot.organization_id == organization_id
+    ).first() is not None
+
+
+def ensure_pipeline_snapshot(db: Session, organization_id: UUID) -> None:
+    """Build a missing snapshot; concurrent callers wait on the lock and re-check"""
+    if not snapshot_exists(db, organization_id):
+        refresh_pipeline_snapshot(db, organization_id, only_if_missing=True)
+
+
+# =====================================================================
+# STAGE HISTORY
+# =====================================================================
+
+def stage_history_stats(db: Session, organization_id: UUID, days: int = HISTORY_WINDOW_DAYS) -> Dict[str, Dict]:
+    """
+    Per-stage averages from transitions in the last `days`:
+    avg_days_in_stage and conversion_rate (share of exits that moved forward)
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    rows = db.query(
+        MajorGiftsStageTransition.from_stage,
+        MajorGiftsStageTransition.to_stage,
+        func.count(MajorGiftsStageTransition.id).label('moves'),
+        func.avg(MajorGiftsStageTransition.days_in_previous_stage).label('avg_days')
+    ).filter(
+        MajorGiftsStageTransition.organization_id == organization_id,
+        MajorGiftsStageTransition.transitioned_at >= since,
+        MajorGiftsStageTransition.from_stage.isnot(None)
+    ).group_by(
+        MajorGiftsStageTransition.from_stage, MajorGiftsStageTransition.to_stage
+    ).all()
+
+    totals = defaultdict(lambda: {"exits": 0, "forward": 0, "days_total": 0.0})
+    for row in rows:
+        t = totals[row.from_stage]
+        t["exits"] += row.moves
+        t["days_total"] += float(row.avg_days or 0) * row.moves
+        if row.to_stage is not None and STAGE_RANK.get(row.to_stage, 0) > STAGE_RANK.get(row.from_stage, 0):
+            t["forward"] += row.moves
+
+    return {
+        stage: {
+            "exits": t["exits"],
+            "avg_days_in_stage": t["days_total"] / t["exits"],
+            "conversion_rate": t["forward"] / t["exits"],
+        }
+        for stage, t in totals.items() if t["exits"]
+    }
+
+
+def recent_transitions(db: Session, organization_id: UUID, since: datetime) -> List[MajorGiftsStageTransition]:
+    return db.query(MajorGiftsStageTransition).filter(
+        MajorGiftsStageTransition.organization_id == organization_id,
+        MajorGiftsStageTransition.transitioned_at >= since
+    ).order_by(MajorGiftsStageTransition.transitioned_at.desc()).all()
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+    from models import Donations
+
+    parser = argparse.ArgumentParser(description="Refresh major gifts pipeline snapshots")
+    parser.add_argument("--org", action="append", help="Organization ID (repeatable); default all")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        org_ids = [UUID(o) for o in args.org] if args.org else [
+            row[0] for row in session.query(Donations.organization_id).distinct().all()
+        ]
+        for org_id in org_ids:
+            print(refresh_pipeline_snapshot(session, org_id))
+    finally:
+        session.close()
@@ -8,10 +8,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, extract, case, and_, or_, desc
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta, date
-from database import get_db
+from database import get_read_db
 #from services.major_gift_potential import compute_major_gift_potential
 import models
-from models import Donations as Donation
 from pydantic import BaseModel, Field
 from decimal import Decimal
 from enum import Enum
@@ -119,6 +118,14 @@ class FormulaLtvResponse(BaseModel):
 def _safe_model(name: str):
     return getattr(models, name, None)
 
+def _donor_names(db: Session, organization_id: str) -> Dict[Any, Optional[str]]:
+    return {
+        donor_id: " ".join(part for part in (first, last) if part) or None
+        for donor_id, first, last in db.query(
+            models.Donors.id, models.Donors.first_name, models.Donors.last_name
+        ).filter(models.Donors.organization_id == organization_id)
+    }
+
 def _daterange_defaults(start: Optional[datetime], end: Optional[datetime]):
     if not end:
         end = datetime.now()
@@ -145,7 +152,7 @@ def get_average_donation_amount(
     organization_id: str,
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Average Donation Amount = Total Donations / Number of Gifts
@@ -184,7 +191,7 @@ def get_cpdr(
     organization_id: str,
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     CPDR = Fundraising Expenses / Total Funds Raised
@@ -226,7 +233,7 @@ def get_donor_acquisition_cost(
     organization_id: str,
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Donor Acquisition Cost = Total cost to acquire / # of new donors in period
@@ -277,7 +284,7 @@ def get_retention_rate(
     organization_id: str,
     prev_start: datetime, prev_end: datetime,
     curr_start: datetime, curr_end: datetime,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Retention Rate = (# donors who gave in BOTH periods) / (# donors in previous period) * 100
@@ -317,7 +324,7 @@ def get_lapsed_rate(
     organization_id: str,
     prev_start: datetime, prev_end: datetime,
     curr_start: datetime, curr_end: datetime,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Lapsed Donor Rate = (# donors who STOPPED giving) / (total donors in previous period) * 100
@@ -357,41 +364,33 @@ def get_affinity_to_give(
     weight_cause_alignment: float = Query(0.6, ge=0.0, le=1.0),
     weight_engagement: float = Query(0.4, ge=0.0, le=1.0),
     min_gifts_to_include: int = Query(1, ge=0),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Affinity blends:
       - Cause alignment: overlap between donor interests & your program/cause tags (0..1)
-      - Engagement: events attended, volunteer hours, advocacy actions normalized (0..1)
+      - Engagement: events attended, meetings and interactions normalized (0..1),
+        from the donor feature store (analytics/donor_features.py)
     Expected optional models:
-      DonorInterestTag(party_id, tag), ProgramTag(program_id, tag), EventAttendance(party_id, ...),
-      VolunteerShift(party_id, hours), AdvocacyAction(party_id, ...)
+      DonorInterestTag(party_id, tag), ProgramTag(program_id, tag)
 
     Fallback:
       - Cause alignment = 0 if interest/tag tables absent
-      - Engagement = scaled from donation recency & count if event/volunteer tables absent
+      - Engagement = scaled from donation recency & count if the org has no events, meetings or interactions
     """
-    now = datetime.now()
-    print("Donation columns:", [c.name for c in Donation.__table__.columns])
-    #Donation = models.Donation
-
-    # Base donor population (at least min gifts)
-    donors = db.query(
-        models.Party.id, models.Party.display_name,
-        func.count(Donation.id).label("gift_count"),
-        func.max(Donation.donation_date).label("last_gift")
-    ).join(Donation, models.Party.id == Donation.party_id
-    ).filter(
-        models.Party.organization_id == organization_id
-    ).group_by(models.Party.id, models.Party.display_name
-    ).having(func.count(Donation.id) >= min_gifts_to_include).all()
+    # Loaded on first use to keep numpy out of worker startup
+    from analytics.donor_features import affinity_engagement, load_features
+
+    # Base donor population (at least min gifts) from the donor feature store
+    frame = load_features(db, organization_id)
+    frame = frame.take(frame.gift_count >= min_gifts_to_include)
+    engagement_scores = affinity_engagement(frame)
+
+    names = _donor_names(db, organization_id)
 
     # Optional tables
     DonorInterestTag = _safe_model("DonorInterestTag")
     ProgramTag = _safe_model("ProgramTag")
-    EventAttendance = _safe_model("EventAttendance")
-    VolunteerShift = _safe_model("VolunteerShift")
-    AdvocacyAction = _safe_model("AdvocacyAction")
 
     # Preload tag universe for alignment (if available)
     donor_tags = defaultdict(set)
@@ -403,29 +402,9 @@ def get_affinity_to_give(
         for tag, in db.query(ProgramTag.tag).distinct():
             program_tags.add(tag)
 
-    # Engagement histograms (if available)
-    evt_counts = defaultdict(int)
-    vol_hours = defaultdict(float)
-    adv_counts = defaultdict(int)
-
-    if EventAttendance:
-        for pid, cnt in db.query(EventAttendance.party_id, func.count(EventAttendance.id)).group_by(EventAttendance.party_id):
-            evt_counts[str(pid)] = cnt
-    if VolunteerShift:
-        for pid, hrs in db.query(VolunteerShift.party_id, func.coalesce(func.sum(VolunteerShift.hours), 0.0)).group_by(VolunteerShift.party_id):
-            vol_hours[str(pid)] = float(hrs or 0.0)
-    if AdvocacyAction:
-        for pid, cnt in db.query(AdvocacyAction.party_id, func.count(AdvocacyAction.id)).group_by(AdvocacyAction.party_id):
-            adv_counts[str(pid)] = cnt
-
-    # Determine normalization ranges
-    max_evt = max(evt_counts.values(), default=0)
-    max_hrs = max(vol_hours.values(), default=0.0)
-    max_adv = max(adv_counts.values(), default=0)
-
     details: List[AffinityDetail] = []
-    for pid, name, gcount, last_gift in donors:
-        pid_str = str(pid)
+    for i, donor_id in enumerate(frame.donor_id):
+        pid_str = str(frame.party_id[i])
         signals = []
 
         # Cause alignment (Jaccard overlap vs program tags)
@@ -438,27 +417,17 @@ def get_affinity_to_give(
         else:
             cause_align = 0.0
 
-        # Engagement score from optional tables; fallback to recency+count if none
-        if (EventAttendance or VolunteerShift or AdvocacyAction):
-            e = 0.0
-            if max_evt > 0:
-                e += _normalize_0_1(evt_counts.get(pid_str, 0), 0, max_evt)
-            if max_hrs > 0:
-                e += _normalize_0_1(vol_hours.get(pid_str, 0.0), 0.0, max_hrs)
-            if max_adv > 0:
-                e += _normalize_0_1(adv_counts.get(pid_str, 0), 0, max_adv)
-            engagement = e / max(1, sum([max_evt > 0, max_hrs > 0, max_adv > 0]))
-        else:
-            # Fallback: recent giving + frequency (simple scaler)
-            days = (now - (last_gift or now)).days
-            recency = 1.0 if days <= 30 else 0.75 if days <= 90 else 0.5 if days <= 180 else 0.25 if days <= 365 else 0.0
-            freq = 1.0 if gcount >= 6 else 0.8 if gcount >= 4 else 0.6 if gcount >= 2 else 0.4
-            engagement = (recency * 0.6 + freq * 0.4)
+        engagement = float(engagement_scores["engagement"][i])
+        if engagement_scores["basis"] == "activity":
+            if frame.events_attended[i]:
+                signals.append(f"Events attended: {frame.events_attended[i]}")
+            if frame.meetings_completed[i]:
+                signals.append(f"Meetings completed: {frame.meetings_completed[i]}")
 
         affinity = weight_cause_alignment * cause_align + weight_engagement * engagement
         details.append(AffinityDetail(
-            donor_id=str(pid),
-            donor_name=name,
+            donor_id=str(donor_id),
+            donor_name=names.get(donor_id),
             cause_alignment_score=round(cause_align, 3),
             engagement_score=round(engagement, 3),
             affinity_score=round(affinity, 3),
@@ -487,21 +456,45 @@ def get_affinity_to_give(
 @router.get("/capacity/{organization_id}", response_model=CapacityResponse)
 def get_capacity_to_give(
     organization_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Capacity is estimated from wealth indicators (normalized 0..1):
       net_worth, real_estate, stock_holdings, political_giving (last 5y).
     Expected optional model: DonorWealth(party_id, net_worth, real_estate, stock, political_5y).
+
+    Fallback: without wealth data, capacity is estimated from giving history
+    (largest gift, lifetime and last-12-month totals) in the donor feature store.
     """
     DonorWealth = _safe_model("DonorWealth")
     if not DonorWealth:
-        # Fallback: no wealth data -> empty set
+        # Loaded on first use to keep numpy out of worker startup
+        from analytics.donor_features import giving_capacity, load_features
+
+        frame = load_features(db, organization_id)
+        frame = frame.take(frame.gift_count > 0)
+        capacity = giving_capacity(frame)
+        names = _donor_names(db, organization_id)
+
+        details = [
+            CapacityDetail(
+                donor_id=str(donor_id),
+                donor_name=names.get(donor_id),
+                capacity_score=round(float(capacity[i]), 3),
+                notes=[f"Largest gift ${frame.largest_gift[i]:,.0f}; estimated from giving history"]
+            )
+            for i, donor_id in enumerate(frame.donor_id)
+        ]
+        details.sort(key=lambda d: d.capacity_score, reverse=True)
         return CapacityResponse(
             organization_id=organization_id,
             as_of_date=datetime.now(),
-            donors=[],
-            summary={"note": "No DonorWealth model found; capacity cannot be computed."}
+            donors=details,
+            summary={
+                "donor_count": len(details),
+                "avg_capacity": round(sum(d.capacity_score for d in details) / max(1, len(details)), 3),
+                "note": "No DonorWealth model found; capacity estimated from giving history."
+            }
         )
 
     recs = db.query(
@@ -566,7 +559,7 @@ def get_capacity_to_give(
 #    organization_id: str,
 #    alpha_affinity: float = Query(0.5, ge=0.0, le=1.0),
 #    alpha_capacity: float = Query(0.5, ge=0.0, le=1.0),
-#    db: Session = Depends(get_db)
+#    db: Session = Depends(get_read_db)
 #):
     """
     Major Gift Potential = blend of Affinity & Capacity (0..1).
@@ -621,7 +614,7 @@ def get_major_gift_potential(
     organization_id: str,
     alpha_affinity: float = Query(0.5, ge=0.0, le=1.0),
     alpha_capacity: float = Query(0.5, ge=0.0, le=1.0),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     # Pass only primitives into the pure function
     payload = compute_major_gift_potential(
@@ -643,7 +636,7 @@ def get_ltv_formula(
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
     assumed_avg_lifespan_years: float = Query(5.0, gt=0.0),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     LTV = Average Donor Lifespan × Average Donation Amount × Average Donation Frequency
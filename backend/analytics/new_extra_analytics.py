@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, extract, case, and_, or_, desc
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta, date
-from database import get_db
+from database import get_read_db
 import models
 from pydantic import BaseModel, Field
 from decimal import Decimal
@@ -85,7 +85,7 @@ def get_cpc(
     organization_id: str,
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     CPC = Total Advertising Spend / Number of Clicks
@@ -122,7 +122,7 @@ def get_bounce_rate(
     organization_id: str,
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Bounce Rate = Single-Page Sessions / Total Sessions * 100
@@ -170,7 +170,7 @@ def get_conversion_rate(
     goal: str = Query("donation", description="Desired action key, e.g. donation|event_registration|newsletter"),
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Conversion Rate = #Visitors Who Completed Desired Action / Total Visitors * 100
@@ -212,7 +212,7 @@ def get_email_ctr(
     organization_id: str,
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     CTR = Unique Recipients Who Clicked / Emails Delivered * 100
@@ -251,7 +251,7 @@ def get_email_open_rate(
     organization_id: str,
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Open Rate = Unique Recipients Who Opened / Emails Delivered * 100
@@ -291,7 +291,7 @@ def get_sessions_summary(
     organization_id: str,
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Session = single visit. Session Duration = Total Duration / Number of Sessions
@@ -338,7 +338,7 @@ def get_traffic_sources(
     organization_id: str,
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Traffic Sources: direct | organic | paid | referral | social | email | other
@@ -393,7 +393,7 @@ def get_social_engagement(
     platform: Optional[str] = Query(None, description="e.g., instagram|facebook|linkedin|twitter|tiktok|youtube"),
     start: Optional[datetime] = Query(None),
     end: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Social Media Engagement = likes + shares + comments (per post or over a period)
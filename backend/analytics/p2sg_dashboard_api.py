@@ -21,6 +21,7 @@ from uuid import UUID
 
 from analytics.analytics import get_current_user, verify_organization_access
 from database import get_db
+from utils import in_range, year_range
 from models import  WiseInvestorScore, DonorChurnMetrics, DonorEngagementContinuum
 from models import (
     Organizations, Donors, Donations
@@ -113,7 +114,7 @@ async def get_p2sg_executive_dashboard(
             func.count(Donations.id).label('gifts')
         ).filter(
             Donations.organization_id == organization_id,
-            extract('year', Donations.donation_date) >= start_year
+            Donations.donation_date >= year_range(start_year)[0]
         ).group_by(extract('year', Donations.donation_date)).all()
 
         multi_year_trends.append({
@@ -296,16 +297,16 @@ def calculate_wise_investor_score(db: Session, organization_id: UUID) -> WiseInv
     # Calculate donor retention (for sustainability)
     total_donors_last_year = db.query(func.count(func.distinct(Donations.donor_id))).filter(
         Donations.organization_id == organization_id,
-        extract('year', Donations.donation_date) == current_year - 1
+        in_range(Donations.donation_date, year_range(current_year - 1))
     ).scalar() or 1
 
     retained_donors = db.query(func.count(func.distinct(Donations.donor_id))).filter(
         Donations.organization_id == organization_id,
-        extract('year', Donations.donation_date) == current_year,
+        in_range(Donations.donation_date, year_range(current_year)),
         Donations.donor_id.in_(
             db.query(Donations.donor_id).filter(
                 Donations.organization_id == organization_id,
-                extract('year', Donations.donation_date) == current_year - 1
+                in_range(Donations.donation_date, year_range(current_year - 1))
             )
         )
     ).scalar() or 0
@@ -315,12 +316,12 @@ def calculate_wise_investor_score(db: Session, organization_id: UUID) -> WiseInv
     # Calculate revenue growth (for momentum)
     revenue_current = db.query(func.sum(Donations.amount)).filter(
         Donations.organization_id == organization_id,
-        extract('year', Donations.donation_date) == current_year
+        in_range(Donations.donation_date, year_range(current_year))
     ).scalar() or 0
 
     revenue_last_year = db.query(func.sum(Donations.amount)).filter(
         Donations.organization_id == organization_id,
-        extract('year', Donations.donation_date) == current_year - 1
+        in_range(Donations.donation_date, year_range(current_year - 1))
     ).scalar() or 1
 
     # Convert Decimal to float to avoid type errors in calculations
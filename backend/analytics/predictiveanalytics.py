@@ -16,15 +16,25 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta, date
 from decimal import Decimal
 from uuid import UUID
-import numpy as np
-from statistics import mean, stdev
+from statistics import mean
 
 from analytics.analytics import get_current_user, verify_organization_access
-from database import get_db
-from models import Organizations, Donors, Donations
+from database import get_read_db, get_batch_db
+from models import Organizations, Donations
 
 router = APIRouter(prefix="/api/v1/analytics/predictive", tags=["Predictive Analytics"])
 
+# Labels for the forecast_engine fit methods
+FORECAST_METHODS = {
+    "seasonal_trend": "Seasonal trend",
+    "trend": "Trend-based",
+    "mean": "Monthly average",
+}
+FORECAST_CONFIDENCE = {
+    "seasonal_trend": "High",
+    "trend": "Medium",
+}
+
 
 # ============================================================================
 # REVENUE FORECASTING
@@ -34,15 +44,18 @@ router = APIRouter(prefix="/api/v1/analytics/predictive", tags=["Predictive Anal
 async def get_revenue_forecast(
         organization_id: UUID,
         quarter: Optional[str] = Query(None, description="Specific quarter (Q1-Q4) or None for current"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
     Revenue Forecast with Confidence Interval
 
-    Uses historical data patterns, seasonality, and trends to forecast revenue.
-    Provides confidence intervals based on historical variance.
+    Reads the seasonal-trend forecast fitted by analytics/forecast_engine.py.
+    The quarter total is the actual revenue of its past months plus the
+    forecast of the rest; the interval is the 95% prediction interval.
     """
+    from analytics.forecast_engine import load_forecast
+
     verify_organization_access(current_user, organization_id)
 
     current_date = datetime.now()
@@ -61,109 +74,59 @@ async def get_revenue_forecast(
     else:
         quarter_end = datetime(year, target_quarter * 3 + 1, 1) - timedelta(days=1)
 
-    # Get historical data for the same quarter in previous years
-    historical_data = []
-    for year_offset in range(1, 4):  # Look at past 3 years
-        hist_year = current_date.year - year_offset
-        hist_start = datetime(hist_year, (target_quarter - 1) * 3 + 1, 1)
-        if target_quarter == 4:
-            hist_end = datetime(hist_year + 1, 1, 1) - timedelta(days=1)
-        else:
-            hist_end = datetime(hist_year, target_quarter * 3 + 1, 1) - timedelta(days=1)
-
-        quarter_revenue = db.query(func.sum(Donations.amount)).filter(
-            Donations.organization_id == organization_id,
-            Donations.donation_date.between(hist_start, hist_end)
-        ).scalar() or 0
-
-        historical_data.append(float(quarter_revenue))
-
-    # Get year-to-date performance
-    ytd_start = datetime(current_date.year, 1, 1)
-    ytd_actual = db.query(func.sum(Donations.amount)).filter(
-        Donations.organization_id == organization_id,
-        Donations.donation_date.between(ytd_start, current_date)
-    ).scalar() or 0
-
-    # Get current quarter progress
-    current_q_start = datetime(current_date.year, (current_quarter - 1) * 3 + 1, 1)
-    current_q_revenue = db.query(func.sum(Donations.amount)).filter(
-        Donations.organization_id == organization_id,
-        Donations.donation_date.between(current_q_start, current_date)
-    ).scalar() or 0
-
-    # Calculate forecast
-    if historical_data:
-        # Calculate trend
-        growth_rates = []
-        for i in range(len(historical_data) - 1):
-            if historical_data[i + 1] > 0:
-                growth_rate = (historical_data[i] - historical_data[i + 1]) / historical_data[i + 1]
-                growth_rates.append(growth_rate)
-
-        avg_growth = mean(growth_rates) if growth_rates else 0.1
-
-        # Base forecast on most recent year with growth adjustment
-        base_forecast = historical_data[0] * (1 + avg_growth)
-
-        # Adjust based on current year performance
-        days_elapsed = (current_date - ytd_start).days
-        days_in_year = 365
-        expected_ytd = base_forecast * (days_elapsed / days_in_year)
-
-        if expected_ytd > 0:
-            performance_ratio = float(ytd_actual) / expected_ytd
-            adjusted_forecast = base_forecast * performance_ratio
-        else:
-            adjusted_forecast = base_forecast
-
-        # Calculate confidence interval
-        if len(historical_data) > 1:
-            std_dev = stdev(historical_data)
-            confidence_margin = std_dev * 1.96 / (len(historical_data) ** 0.5)
-        else:
-            confidence_margin = adjusted_forecast * 0.15
+    forecast = load_forecast(db, organization_id, "revenue")
+    next_quarter = (quarter_end + timedelta(days=1)).date()
+    window = forecast.window(quarter_start.date(), next_quarter)
 
-        # Calculate confidence score (0-100)
-        variance_coefficient = (std_dev / mean(historical_data)) if historical_data else 0.5
-        confidence_score = max(0, min(100, (1 - variance_coefficient) * 100))
+    # Same quarter in the past 3 years, from the fitted history
+    historical_data = [
+        forecast.actual_between(
+            quarter_start.date().replace(year=year - year_offset),
+            next_quarter.replace(year=next_quarter.year - year_offset)
+        )
+        for year_offset in range(1, 4)
+    ]
 
-    else:
-        # No historical data - use current run rate
-        days_elapsed = (current_date - ytd_start).days
-        if days_elapsed > 0:
-            daily_rate = float(ytd_actual) / days_elapsed
-            days_in_quarter = (quarter_end - quarter_start).days
-            adjusted_forecast = daily_rate * days_in_quarter
-            confidence_margin = adjusted_forecast * 0.25
-            confidence_score = 50
-        else:
-            adjusted_forecast = 0
-            confidence_margin = 0
-            confidence_score = 0
+    amount = window["projected"]
+    confidence_score = (1 - window["margin"] / amount) * 100 if amount > 0 else 0
+    confidence_score = max(0, min(100, confidence_score))
 
     return {
         "quarter": f"Q{target_quarter} {year}",
         "forecast": {
-            "amount": round(adjusted_forecast, 2),
-            "lower_bound": round(max(0, adjusted_forecast - confidence_margin), 2),
-            "upper_bound": round(adjusted_forecast + confidence_margin, 2),
+            "amount": round(amount, 2),
+            "lower_bound": round(window["lower_bound"], 2),
+            "upper_bound": round(window["upper_bound"], 2),
             "confidence_score": round(confidence_score, 1),
             "confidence_label": get_confidence_label(confidence_score)
         },
         "current_progress": {
-            "actual_to_date": round(float(current_q_revenue), 2),
+            "actual_to_date": round(window["actual"], 2),
             "days_remaining": (quarter_end - current_date).days,
             "percent_complete": round((current_date - quarter_start).days / (quarter_end - quarter_start).days * 100, 1)
         },
         "historical_comparison": {
-            "same_quarter_last_year": round(historical_data[0], 2) if historical_data else 0,
-            "average_past_3_years": round(mean(historical_data), 2) if historical_data else 0,
-            "growth_trend": f"{round(avg_growth * 100, 1)}%" if historical_data else "N/A"
-        }
+            "same_quarter_last_year": round(historical_data[0], 2),
+            "average_past_3_years": round(mean(historical_data), 2),
+            "growth_trend": f"{round(forecast.monthly_growth() * 12 * 100, 1)}%" if forecast.method in ("trend", "seasonal_trend") else "N/A"
+        },
+        "model": forecast.model_info()
     }
 
 
+@router.post("/revenue-forecast/{organization_id}/refresh")
+async def refresh_revenue_forecast(
+        organization_id: UUID,
+        db: Session = Depends(get_batch_db),
+        current_user = Depends(get_current_user)
+):
+    """Refit the organization's forecasts now instead of waiting for the nightly job"""
+    from analytics.forecast_engine import refresh_forecasts
+
+    verify_organization_access(current_user, organization_id)
+    return refresh_forecasts(db, [organization_id])
+
+
 # ============================================================================
 # DONOR CHURN RISK PREDICTION
 # ============================================================================
@@ -171,7 +134,7 @@ async def get_revenue_forecast(
 @router.get("/donor-churn-risk/{organization_id}")
 async def get_donor_churn_risk(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -182,72 +145,23 @@ async def get_donor_churn_risk(
     """
     verify_organization_access(current_user, organization_id)
 
-    current_date = datetime.now()
-
-    # Define risk periods
-    days_30 = current_date - timedelta(days=30)
-    days_60 = current_date - timedelta(days=60)
-    days_90 = current_date - timedelta(days=90)
-    days_180 = current_date - timedelta(days=180)
-    days_365 = current_date - timedelta(days=365)
-
-    # Get active donors (gave in last 12 months)
-    active_donors = db.query(Donors.id).join(Donations).filter(
-        Donations.organization_id == organization_id,
-        Donations.donation_date >= days_365
-    ).distinct().count()
-
-    # Categorize donors by risk level
-    high_risk = db.query(Donors.id).join(Donations).filter(
-        Donations.organization_id == organization_id,
-        Donations.donation_date.between(days_180, days_90),
-        ~Donors.id.in_(
-            db.query(Donations.donor_id).filter(
-                Donations.organization_id == organization_id,
-                Donations.donation_date > days_90
-            )
-        )
-    ).distinct().count()
-
-    medium_risk = db.query(Donors.id).join(Donations).filter(
-        Donations.organization_id == organization_id,
-        Donations.donation_date.between(days_90, days_60),
-        ~Donors.id.in_(
-            db.query(Donations.donor_id).filter(
-                Donations.organization_id == organization_id,
-                Donations.donation_date > days_60
-            )
-        )
-    ).distinct().count()
+    # Loaded on first use to keep numpy out of worker startup
+    from analytics.donor_features import load_features, risk_segments
 
-    low_risk = db.query(Donors.id).join(Donations).filter(
-        Donations.organization_id == organization_id,
-        Donations.donation_date >= days_30
-    ).distinct().count()
+    # Risk segments by last gift date, counted over the donor feature store
+    segments = risk_segments(load_features(db, organization_id))
+    active_donors = segments["active_donors"]
+    high_risk = segments["high_risk"]
+    medium_risk = segments["medium_risk"]
+    low_risk = segments["low_risk"]
 
     # Calculate predicted churn
     historical_churn_rate = 0.082  # Industry average monthly churn
 
-    # Get organization's actual churn rate from last 3 months
-    three_months_ago = current_date - timedelta(days=90)
-    donors_3m_ago = db.query(Donors.id).join(Donations).filter(
-        Donations.organization_id == organization_id,
-        Donations.donation_date.between(days_365, three_months_ago)
-    ).distinct().count()
-
+    # Organization's actual churn: donors of 3-12 months ago who have not given since
+    donors_3m_ago = segments["donors_3m_ago"]
     if donors_3m_ago > 0:
-        retained = db.query(Donors.id).join(Donations).filter(
-            Donations.organization_id == organization_id,
-            Donations.donation_date >= three_months_ago,
-            Donors.id.in_(
-                db.query(Donations.donor_id).filter(
-                    Donations.organization_id == organization_id,
-                    Donations.donation_date.between(days_365, three_months_ago)
-                )
-            )
-        ).distinct().count()
-
-        actual_churn_rate = 1 - (retained / donors_3m_ago)
+        actual_churn_rate = 1 - (segments["retained"] / donors_3m_ago)
         # Blend actual with industry average
         predicted_churn_rate = (actual_churn_rate * 0.7 + historical_churn_rate * 0.3)
     else:
@@ -255,23 +169,8 @@ async def get_donor_churn_risk(
 
     predicted_churn_count = int(active_donors * predicted_churn_rate / 3)  # Monthly
 
-    # Get value at risk
-    at_risk_value = db.query(func.sum(Donations.amount)).filter(
-        Donations.organization_id == organization_id,
-        Donations.donor_id.in_(
-            db.query(Donors.id).join(Donations).filter(
-                Donations.organization_id == organization_id,
-                Donations.donation_date.between(days_180, days_90),
-                ~Donors.id.in_(
-                    db.query(Donations.donor_id).filter(
-                        Donations.organization_id == organization_id,
-                        Donations.donation_date > days_90
-                    )
-                )
-            )
-        ),
-        Donations.donation_date >= days_365
-    ).scalar() or 0
+    # Last 12 months of giving from high-risk donors
+    at_risk_value = segments["at_risk_value"]
 
     return {
         "risk_metrics": {
@@ -312,7 +211,7 @@ async def get_donor_churn_risk(
 @router.get("/campaign-momentum/{organization_id}")
 async def get_campaign_momentum(
         organization_id: UUID,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
@@ -425,37 +324,31 @@ async def get_campaign_momentum(
 async def get_goal_attainment(
         organization_id: UUID,
         annual_goal: Optional[float] = Query(None, description="Annual fundraising goal"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user = Depends(get_current_user)
 ):
     """
     Goal Attainment Projection
 
-    Projects year-end achievement based on current performance and trends.
-    Provides confidence intervals and recommendations.
+    Projects year-end revenue as the actual year to date plus the seasonal-trend
+    forecast of the remaining months (analytics/forecast_engine.py).
     """
+    from analytics.forecast_engine import load_forecast
+
     verify_organization_access(current_user, organization_id)
 
     current_date = datetime.now()
     year_start = datetime(current_date.year, 1, 1)
     year_end = datetime(current_date.year, 12, 31)
 
-    # Get actual YTD
-    ytd_actual = db.query(func.sum(Donations.amount)).filter(
-        Donations.organization_id == organization_id,
-        Donations.donation_date.between(year_start, current_date)
-    ).scalar() or 0
+    forecast = load_forecast(db, organization_id, "revenue")
+    year = forecast.window(date(current_date.year, 1, 1), date(current_date.year + 1, 1, 1))
+    ytd_actual = year["actual"]
 
     # If no goal provided, estimate based on last year + 10%
     if not annual_goal:
-        last_year_total = db.query(func.sum(Donations.amount)).filter(
-            Donations.organization_id == organization_id,
-            Donations.donation_date.between(
-                datetime(current_date.year - 1, 1, 1),
-                datetime(current_date.year - 1, 12, 31)
-            )
-        ).scalar() or 0
-        annual_goal = float(last_year_total) * 1.1 if last_year_total else 1000000
+        last_year_total = forecast.actual_between(date(current_date.year - 1, 1, 1), date(current_date.year, 1, 1))
+        annual_goal = last_year_total * 1.1 if last_year_total else 1000000
 
     # Calculate days elapsed and remaining
     days_elapsed = (current_date - year_start).days
@@ -464,82 +357,30 @@ async def get_goal_attainment(
     percent_year_complete = (days_elapsed / days_total) * 100
 
     # Current progress
-    current_attainment = (float(ytd_actual) / annual_goal * 100) if annual_goal > 0 else 0
-
-    # Calculate run rate projection
-    if days_elapsed > 0:
-        daily_rate = float(ytd_actual) / days_elapsed
-        simple_projection = daily_rate * days_total
-        simple_attainment = (simple_projection / annual_goal * 100) if annual_goal > 0 else 0
-    else:
-        simple_projection = 0
-        simple_attainment = 0
-
-    # Get monthly performance for trend analysis
-    monthly_totals = []
-    for month in range(1, current_date.month + 1):
-        month_start = datetime(current_date.year, month, 1)
-        if month == current_date.month:
-            month_end = current_date
-        else:
-            if month == 12:
-                month_end = datetime(current_date.year + 1, 1, 1) - timedelta(days=1)
-            else:
-                month_end = datetime(current_date.year, month + 1, 1) - timedelta(days=1)
-
-        month_total = db.query(func.sum(Donations.amount)).filter(
-            Donations.organization_id == organization_id,
-            Donations.donation_date.between(month_start, month_end)
-        ).scalar() or 0
-        monthly_totals.append(float(month_total))
-
-    # Calculate trend-based projection
-    if len(monthly_totals) >= 3:
-        # Calculate average monthly growth
-        growth_rates = []
-        for i in range(1, len(monthly_totals)):
-            if monthly_totals[i-1] > 0:
-                growth = (monthly_totals[i] - monthly_totals[i-1]) / monthly_totals[i-1]
-                growth_rates.append(growth)
-
-        avg_growth = mean(growth_rates) if growth_rates else 0
-
-        # Project remaining months
-        last_month_avg = mean(monthly_totals[-3:]) if len(monthly_totals) >= 3 else monthly_totals[-1]
-        remaining_months = 12 - current_date.month
-
-        projected_remaining = 0
-        for month_offset in range(1, remaining_months + 1):
-            projected_month = last_month_avg * ((1 + avg_growth) ** month_offset)
-            projected_remaining += projected_month
-
-        trend_projection = float(ytd_actual) + projected_remaining
-        trend_attainment = (trend_projection / annual_goal * 100) if annual_goal > 0 else 0
-    else:
-        trend_projection = simple_projection
-        trend_attainment = simple_attainment
+    current_attainment = (ytd_actual / annual_goal * 100) if annual_goal > 0 else 0
 
-    # Determine final projection (weighted average)
-    final_projection = trend_projection * 0.7 + simple_projection * 0.3
+    final_projection = year["projected"]
     final_attainment = (final_projection / annual_goal * 100) if annual_goal > 0 else 0
 
     # Calculate required daily rate to meet goal
-    remaining_needed = max(0, annual_goal - float(ytd_actual))
+    remaining_needed = max(0, annual_goal - ytd_actual)
     required_daily_rate = remaining_needed / days_remaining if days_remaining > 0 else 0
-    current_daily_rate = float(ytd_actual) / days_elapsed if days_elapsed > 0 else 0
+    current_daily_rate = ytd_actual / days_elapsed if days_elapsed > 0 else 0
 
     return {
         "current_status": {
             "percent_complete": round(current_attainment, 1),
-            "actual_ytd": round(float(ytd_actual), 2),
+            "actual_ytd": round(ytd_actual, 2),
             "goal": round(annual_goal, 2),
             "remaining_needed": round(remaining_needed, 2)
         },
         "projection": {
             "projected_total": round(final_projection, 2),
             "projected_attainment": round(final_attainment, 1),
-            "confidence": "High" if len(monthly_totals) >= 6 else "Medium" if len(monthly_totals) >= 3 else "Low",
-            "method": "Trend-based" if len(monthly_totals) >= 3 else "Run-rate"
+            "lower_bound": round(year["lower_bound"], 2),
+            "upper_bound": round(year["upper_bound"], 2),
+            "confidence": FORECAST_CONFIDENCE.get(forecast.method, "Low"),
+            "method": FORECAST_METHODS.get(forecast.method, "Run-rate")
         },
         "time_analysis": {
             "percent_year_elapsed": round(percent_year_complete, 1),
@@ -551,7 +392,8 @@ async def get_goal_attainment(
             "current_daily_rate": round(current_daily_rate, 2),
             "increase_needed": round(((required_daily_rate - current_daily_rate) / current_daily_rate * 100) if current_daily_rate > 0 else 0, 1)
         },
-        "achievement_likelihood": get_achievement_likelihood(final_attainment, percent_year_complete)
+        "achievement_likelihood": get_achievement_likelihood(final_attainment, percent_year_complete),
+        "model": forecast.model_info()
     }
 
 
@@ -0,0 +1,397 @@
+"""
+Program Metrics Engine
+Wise Investor Platform
+
+Computes the program scorecard of an organization: for every program the
+services delivered, beneficiaries served (active, new in 30 days, dropouts),
+completion rate, outcome achievement, cost per beneficiary and service, and
+the impact score, plus organization-wide totals. A handful of grouped queries
+cover every program at once:
+
+- services per program (count, last date, this month)
+- distinct beneficiaries per program and for the whole org (GROUPING SETS)
+- enrollments per program (completed / completed + active + withdrawn)
+- outcome records per program and for the whole org
+- org counters (new beneficiaries YTD)
+
+Definitions shared by compare_programs, get_program_impact_summary and
+get_program_performance:
+
+- beneficiaries served: distinct beneficiaries on the program's service events
+- completion rate: completed / (completed + active + withdrawn) enrollments
+- outcome achievement: share of outcome records that meet their metric's
+  target (value <= target for metrics with direction 'decrease', value >=
+  target otherwise); records of metrics without a target are tracked but not
+  rated
+- cost per beneficiary: program budget / beneficiaries served
+
+Scorecards are cached per organization in the worker and reused until
+enrollments, outcome records, service attendance, beneficiaries or programs
+change (a fingerprint of one row count and last-modified time per table,
+checked with one aggregate query per request) or the day rolls over. The
+marker of programs, enrollments and beneficiaries is updated_at, which the
+models bump on every ORM update; a raw SQL update that leaves it alone shows
+up at the next day's rebuild.
+
+    PROGRAM_SCORECARD_CACHE_SIZE=256   # organizations kept per worker
+"""
+
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = int(os.getenv("PROGRAM_SCORECARD_CACHE_SIZE", "256"))
+
+COMPLETION_STATUSES = ('Completed', 'Active', 'Withdrawn')
+
+PROGRAMS_SQL = text("""
+    SELECT id, name, program_type, status, budget
+    FROM programs
+    WHERE organization_id = :org_id
+""")
+
+SERVICES_SQL = text("""
+    SELECT
+        program_id,
+        COUNT(*)                                     AS services,
+        MAX(date)                                    AS last_service_date,
+        COUNT(*) FILTER (WHERE date >= :month_start) AS services_this_month
+    FROM service_events
+    WHERE organization_id = :org_id
+    GROUP BY program_id
+""")
+
+BENEFICIARIES_SQL = text("""
+    SELECT
+        GROUPING(e.program_id) = 1                                               AS is_org_total,
+        e.program_id,
+        COUNT(DISTINCT sb.beneficiary_id)                                        AS served,
+        COUNT(DISTINCT sb.beneficiary_id) FILTER (WHERE e.date >= :year_start)   AS served_ytd,
+        COUNT(DISTINCT b.id)                                                     AS on_record,
+        COUNT(DISTINCT b.id) FILTER (WHERE b.status = 'active')                  AS active,
+        COUNT(DISTINCT b.id) FILTER (WHERE b.status = 'dropout')                 AS dropouts,
+        COUNT(DISTINCT b.id) FILTER (WHERE b.enrolled_date >= :cutoff_30d)       AS new_30d
+    FROM service_events e
+    JOIN service_beneficiaries sb ON sb.service_event_id = e.id
+    LEFT JOIN beneficiaries b ON b.id = sb.beneficiary_id
+    WHERE e.organization_id = :org_id
+    GROUP BY GROUPING SETS ((e.program_id), ())
+""")
+
+ENROLLMENTS_SQL = text("""
+    SELECT
+        pe.program_id,
+        COUNT(*) FILTER (WHERE pe.status = 'Completed')   AS completed,
+        COUNT(*) FILTER (WHERE pe.status IN :statuses)    AS enrolled
+    FROM program_enrollments pe
+    JOIN programs p ON p.id = pe.program_id
+    WHERE p.organization_id = :org_id
+    GROUP BY pe.program_id
+""").bindparams(bindparam("statuses", expanding=True))
+
+OUTCOMES_SQL = text("""
+    SELECT
+        GROUPING(m.program_id) = 1                         AS is_org_total,
+        m.program_id,
+        COUNT(r.id)                                        AS tracked,
+        COUNT(r.id) FILTER (WHERE m.target_value IS NOT NULL) AS rated,
+        COUNT(r.id) FILTER (WHERE
+            (m.direction = 'decrease' AND r.value <= m.target_value)
+            OR (COALESCE(m.direction, '') <> 'decrease' AND r.value >= m.target_value)
+        )                                                  AS achieved
+    FROM outcome_records r
+    JOIN outcome_metrics m ON m.id = r.outcome_metric_id
+    WHERE r.organization_id = :org_id
+    GROUP BY GROUPING SETS ((m.program_id), ())
+""")
+
+NEW_BENEFICIARIES_SQL = text("""
+    SELECT COUNT(*)
+    FROM beneficiaries
+    WHERE organization_id = :org_id
+      AND enrolled_date >= :year_start
+""")
+
+# One row count and one last-modified marker per table the scorecard reads.
+# programs, program_enrollments and beneficiaries bump updated_at on every ORM
+# update (onupdate on the models), so status and budget changes move the
+# marker; outcome records, attendance and service events are append-mostly.
+# Outcome metrics carry no timestamp and are a handful of rows per org, so
+# their targets are hashed.
+FINGERPRINT_SQL = text("""
+    SELECT *
+    FROM (SELECT COUNT(*), MAX(pe.updated_at)
+          FROM program_enrollments pe JOIN programs p ON p.id = pe.program_id
+          WHERE p.organization_id = :org_id) AS enrollments,
+         (SELECT COUNT(*), MAX(recorded_at)
+          FROM outcome_records WHERE organization_id = :org_id) AS outcomes,
+         (SELECT md5(string_agg(id::text || ':' || COALESCE(target_value::text, '') || ':'
+                                || COALESCE(direction, ''), ',' ORDER BY id))
+          FROM outcome_metrics WHERE organization_id = :org_id) AS metrics,
+         (SELECT COUNT(*), MAX(sb.created_at)
+          FROM service_beneficiaries sb JOIN service_events e ON e.id = sb.service_event_id
+          WHERE e.organization_id = :org_id) AS attendance,
+         (SELECT COUNT(*), MAX(date)
+          FROM service_events WHERE organization_id = :org_id) AS services,
+         (SELECT COUNT(*), MAX(updated_at)
+          FROM beneficiaries WHERE organization_id = :org_id) AS beneficiaries,
+         (SELECT COUNT(*), MAX(updated_at)
+          FROM programs WHERE organization_id = :org_id) AS programs
+""")
+
+
+# =====================================================================
+# SCORECARD
+# =====================================================================
+
+@dataclass
+class ProgramMetrics:
+    program_id: str
+    program_name: str
+    program_type: str
+    status: Optional[str]
+    budget: float = 0.0
+
+    total_services: int = 0
+    services_this_month: int = 0
+    last_service_date: Optional[date] = None
+
+    beneficiaries_served: int = 0
+    active_beneficiaries: int = 0
+    new_beneficiaries_30d: int = 0
+    dropout_rate: float = 0.0
+    completion_rate: float = 0.0
+
+    outcomes_tracked: int = 0
+    positive_outcomes: int = 0
+    outcome_success_rate: float = 0.0
+
+    services_per_beneficiary: float = 0.0
+    cost_per_beneficiary: float = 0.0
+    cost_per_service: float = 0.0
+    impact_score: float = 0.0
+
+
+@dataclass
+class ProgramScorecard:
+    organization_id: str
+    as_of: date
+    fingerprint: Tuple
+    programs: Dict[str, ProgramMetrics] = field(default_factory=dict)
+
+    total_services: int = 0
+    services_this_month: int = 0
+    beneficiaries_served: int = 0
+    beneficiaries_served_ytd: int = 0
+    new_beneficiaries_ytd: int = 0
+    outcomes_tracked: int = 0
+    positive_outcomes: int = 0
+    outcome_success_rate: float = 0.0
+    computed_at: datetime = field(default_factory=datetime.utcnow)
+    seconds: float = 0.0
+
+    @property
+    def active_programs(self) -> int:
+        return sum(1 for p in self.programs.values() if p.status == 'active')
+
+    def ranked(self, program_ids: Optional[List[str]] = None) -> List[ProgramMetrics]:
+        """Programs by impact score, optionally limited to program_ids"""
+        programs = self.programs.values()
+        if program_ids:
+            wanted = {str(p) for p in program_ids}
+            programs = [p for p in programs if p.program_id in wanted]
+        return sorted(programs, key=lambda p: p.impact_score, reverse=True)
+
+    def top_by_services(self) -> Optional[ProgramMetrics]:
+        delivering = [p for p in self.programs.values() if p.total_services]
+        return max(delivering, key=lambda p: p.total_services) if delivering else None
+
+    def as_dict(self) -> Dict:
+        data = asdict(self)
+        data.pop("fingerprint")
+        data["programs"] = [asdict(p) for p in self.ranked()]
+        data["total_programs"] = len(self.programs)
+        data["active_programs"] = self.active_programs
+        return data
+
+
+def calculate_impact_score(
+        outcome_rate: float,
+        completion_rate: float,
+        cost_efficiency: float
+) -> float:
+    """Calculate overall program impact score (0-100)"""
+    # Weighted average
+    score = (
+            outcome_rate * 0.40 +
+            completion_rate * 0.30 +
+            cost_efficiency * 0.30
+    )
+    return round(score, 2)
+
+
+def _rate(part: int, whole: int) -> float:
+    return part / whole * 100 if whole else 0.0
+
+
+def build_program_scorecard(
+        db: Session,
+        organization_id: UUID,
+        today: Optional[date] = None,
+        fingerprint: Optional[Tuple] = None
+) -> ProgramScorecard:
+    """Metrics for every program of one organization from grouped queries"""
+    start = time.perf_counter()
+    today = today or datetime.utcnow().date()
+    params = {
+        "org_id": organization_id,
+        "month_start": today.replace(day=1),
+        "year_start": date(today.year, 1, 1),
+        "cutoff_30d": today - timedelta(days=30),
+        "statuses": list(COMPLETION_STATUSES),
+    }
+
+    scorecard = ProgramScorecard(
+        organization_id=str(organization_id),
+        as_of=today,
+        fingerprint=fingerprint if fingerprint is not None else program_fingerprint(db, organization_id),
+    )
+    for row in db.execute(PROGRAMS_SQL, params).all():
+        scorecard.programs[str(row.id)] = ProgramMetrics(
+            program_id=str(row.id),
+            program_name=row.name,
+            program_type=row.program_type or "general",
+            status=row.status,
+            budget=float(row.budget) if row.budget else 0.0,
+        )
+
+    for row in db.execute(SERVICES_SQL, params).all():
+        scorecard.total_services += row.services
+        scorecard.services_this_month += row.services_this_month
+        program = scorecard.programs.get(str(row.program_id))
+        if program:
+            program.total_services = row.services
+            program.services_this_month = row.services_this_month
+            program.last_service_date = row.last_service_date
+
+    for row in db.execute(BENEFICIARIES_SQL, params).all():
+        if row.is_org_total:
+            scorecard.beneficiaries_served = row.served
+            scorecard.beneficiaries_served_ytd = row.served_ytd
+            continue
+        program = scorecard.programs.get(str(row.program_id))
+        if program:
+            program.beneficiaries_served = row.served
+            program.active_beneficiaries = row.active
+            program.new_beneficiaries_30d = row.new_30d
+            program.dropout_rate = _rate(row.dropouts, row.on_record)
+
+    for row in db.execute(ENROLLMENTS_SQL, params).all():
+        program = scorecard.programs.get(str(row.program_id))
+        if program:
+            program.completion_rate = _rate(row.completed, row.enrolled)
+
+    for row in db.execute(OUTCOMES_SQL, params).all():
+        if row.is_org_total:
+            scorecard.outcomes_tracked = row.tracked
+            scorecard.positive_outcomes = row.achieved
+            scorecard.outcome_success_rate = _rate(row.achieved, row.rated)
+            continue
+        program = scorecard.programs.get(str(row.program_id))
+        if program:
+            program.outcomes_tracked = row.tracked
+            program.positive_outcomes = row.achieved
+            program.outcome_success_rate = _rate(row.achieved, row.rated)
+
+    scorecard.new_beneficiaries_ytd = db.execute(NEW_BENEFICIARIES_SQL, params).scalar() or 0
+
+    for program in scorecard.programs.values():
+        served = program.beneficiaries_served
+        program.services_per_beneficiary = program.total_services / served if served else 0.0
+        program.cost_per_beneficiary = program.budget / served if served else 0.0
+        program.cost_per_service = program.budget / program.total_services if program.total_services else 0.0
+
+        cost_efficiency = (min(100, (1 / program.cost_per_beneficiary * 10000))
+                           if program.cost_per_beneficiary > 0 else 50)
+        program.impact_score = calculate_impact_score(
+            program.outcome_success_rate, program.completion_rate, cost_efficiency
+        )
+
+    scorecard.seconds = round(time.perf_counter() - start, 3)
+    logger.info(f"Program scorecard built for {organization_id}: "
+                f"{len(scorecard.programs)} programs in {scorecard.seconds}s")
+    return scorecard
+
+
+# =====================================================================
+# CACHE
+# =====================================================================
+
+_scorecards: "OrderedDict[str, ProgramScorecard]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def program_fingerprint(db: Session, organization_id: UUID) -> Tuple:
+    """Counts and last-modified times of enrollments, outcomes, attendance, beneficiaries and programs"""
+    row = db.execute(FINGERPRINT_SQL, {"org_id": organization_id}).one()
+    return tuple(row)
+
+
+def get_program_scorecard(db: Session, organization_id: UUID) -> ProgramScorecard:
+    """Cached scorecard, rebuilt when the org's program data changed or the day rolled over"""
+    key = str(organization_id)
+    today = datetime.utcnow().date()
+    fingerprint = program_fingerprint(db, organization_id)
+
+    with _lock:
+        cached = _scorecards.get(key)
+        if cached and cached.fingerprint == fingerprint and cached.as_of == today:
+            _scorecards.move_to_end(key)
+            return cached
+
+    scorecard = build_program_scorecard(db, organization_id, today, fingerprint)
+    with _lock:
+        _scorecards[key] = scorecard
+        _scorecards.move_to_end(key)
+        while len(_scorecards) > CACHE_SIZE:
+            _scorecards.popitem(last=False)
+    return scorecard
+
+
+def invalidate_program_scorecard(organization_id: Optional[UUID] = None) -> None:
+    """Drop one organization's cached scorecard, or all of them"""
+    with _lock:
+        if organization_id is None:
+            _scorecards.clear()
+        else:
+            _scorecards.pop(str(organization_id), None)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Build and print program scorecards")
+    parser.add_argument("--org", action="append", required=True, help="Organization ID (repeatable)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        for org in args.org:
+            card = build_program_scorecard(session, UUID(org))
+            print(json.dumps(card.as_dict(), indent=2, default=str))
+    finally:
+        session.close()
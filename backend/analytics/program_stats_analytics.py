@@ -11,7 +11,7 @@ from datetime import datetime, date
 from pydantic import BaseModel, Field
 from enum import Enum
 
-from database import get_db
+from database import get_db, get_read_db
 from user_management.auth_dependencies import get_current_user
 # Import your models - adjust path as needed
 from models import ProgramImpactStats, OrganizationImpactSummary, Programs, Organizations, Users
@@ -215,7 +215,7 @@ async def get_all_impact_stats(
     program_id: Optional[UUID] = None,
     category: Optional[str] = None,
     featured_only: bool = False,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """Get all impact stats for an organization with optional filters"""
@@ -243,7 +243,7 @@ async def get_all_impact_stats(
 async def get_featured_impacts(
     organization_id: UUID,
     limit: int = Query(default=6, le=20),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """Get featured impact stats for dashboard display - CEO view"""
@@ -265,7 +265,7 @@ async def get_featured_impacts(
 @router.get("/{organization_id}/dashboard", response_model=OrganizationImpactDashboard)
 async def get_impact_dashboard(
     organization_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """Get complete impact dashboard for organization - Main CEO Dashboard"""
@@ -344,7 +344,7 @@ async def get_impact_dashboard(
 async def get_program_impacts(
     organization_id: UUID,
     program_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """Get all impact stats for a specific program"""
@@ -488,7 +488,7 @@ async def bulk_update_impacts(
 async def get_public_impacts(
     organization_id: UUID,
     limit: int = Query(default=10, le=50),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get public impact stats (no auth required - for public pages/campaigns)"""
     from models import ProgramImpactStats, Programs, Organizations
@@ -18,10 +18,11 @@ from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 
 # Assuming imports
-from database import get_db
+from database import get_db, get_read_db
+from analytics.program_metrics import get_program_scorecard
 from models import (
     Organizations, Beneficiaries, Programs, ServiceEvents, ServiceBeneficiaries,
-    OutcomeMetrics, OutcomeRecords, ImpactMetrics, SdgAlignment, Projects, ProgramEnrollments
+    OutcomeMetrics, OutcomeRecords, ImpactMetrics, SdgAlignment, Projects
 )
 
 router = APIRouter(prefix="/api/v1/program-impact", tags=["program-impact"])
@@ -234,42 +235,6 @@ class ServiceTrends(BaseModel):
     average_services_per_person: float
 
 
-# ============================================================================
-# HELPER FUNCTIONS
-# ============================================================================
-
-def calculate_completion_rate(program_id: str, db: Session) -> float:
-    """Calculate program completion rate"""
-    # Get enrollments who completed - use ProgramEnrollments junction table
-    completed = db.query(ProgramEnrollments).filter(
-        ProgramEnrollments.program_id == program_id,
-        ProgramEnrollments.status == 'Completed'
-    ).count()
-
-    # Get all enrolled (completed + active + withdrawn)
-    total = db.query(ProgramEnrollments).filter(
-        ProgramEnrollments.program_id == program_id,
-        ProgramEnrollments.status.in_(['Completed', 'Active', 'Withdrawn'])
-    ).count()
-
-    return (completed / total * 100) if total > 0 else 0
-
-
-def calculate_impact_score(
-        outcome_rate: float,
-        completion_rate: float,
-        cost_efficiency: float
-) -> float:
-    """Calculate overall program impact score (0-100)"""
-    # Weighted average
-    score = (
-            outcome_rate * 0.40 +
-            completion_rate * 0.30 +
-            cost_efficiency * 0.30
-    )
-    return round(score, 2)
-
-
 # ============================================================================
 # API ENDPOINTS - BENEFICIARY TRACKING
 # ============================================================================
@@ -278,7 +243,7 @@ def calculate_impact_score(
 async def get_beneficiary_profile(
         organization_id: str,
         beneficiary_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get comprehensive beneficiary profile
@@ -365,7 +330,7 @@ async def get_beneficiary_profile(
 @router.get("/beneficiaries/demographics/{organization_id}", response_model=BeneficiaryDemographics)
 async def get_beneficiary_demographics(
         organization_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get demographic breakdown of all beneficiaries
@@ -448,7 +413,7 @@ async def get_beneficiary_demographics(
 async def get_program_performance(
         organization_id: str,
         program_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get comprehensive program performance metrics
@@ -459,100 +424,37 @@ async def get_program_performance(
     - Outcome success rates
     - Cost efficiency
     """
-    program = db.query(Programs).filter(
-        Programs.id == program_id,
-        Programs.organization_id == organization_id
-    ).first()
+    program = get_program_scorecard(db, organization_id).programs.get(str(program_id))
 
     if not program:
         raise HTTPException(status_code=404, detail="Program not found")
 
-    # Get services for this program
-    services = db.query(ServiceEvents).filter(
-        ServiceEvents.program_id == program_id
-    ).all()
-
-    total_services = len(services)
-    last_service = max([s.date for s in services], default=None)
-
-    # Get unique beneficiaries - query through ServiceBeneficiaries junction table
-    service_ids = [s.id for s in services]
-    service_beneficiaries = db.query(ServiceBeneficiaries).filter(
-        ServiceBeneficiaries.service_event_id.in_(service_ids)
-    ).all() if service_ids else []
-    beneficiary_ids = set(sb.beneficiary_id for sb in service_beneficiaries)
-    total_beneficiaries = len(beneficiary_ids)
-
-    # Get beneficiary details for this program
-    beneficiaries = db.query(Beneficiaries).filter(
-        Beneficiaries.id.in_(beneficiary_ids)
-    ).all()
-
-    active_count = sum(1 for b in beneficiaries if b.status == 'active')
-
-    # New beneficiaries (last 30 days)
-    now = datetime.utcnow().date()
-    cutoff_30d = now - timedelta(days=30)
-    new_30d = sum(1 for b in beneficiaries
-                  if b.enrolled_date and b.enrolled_date >= cutoff_30d)
-
-    # Calculate completion and dropout rates
-    completion_rate = calculate_completion_rate(program_id, db)
-    dropout_count = sum(1 for b in beneficiaries if b.status == 'dropout')
-    total_enrolled = len(beneficiaries)
-    dropout_rate = (dropout_count / total_enrolled * 100) if total_enrolled > 0 else 0
-
-    # Services per beneficiary
-    services_per_ben = total_services / total_beneficiaries if total_beneficiaries > 0 else 0
-
-    # Get outcomes - outcome_records links to outcome_metrics, not directly to programs
-    # Query outcome_metrics for this program, then get their records
-    outcome_metrics = db.query(OutcomeMetrics).filter(
-        OutcomeMetrics.program_id == program_id
-    ).all()
-
-    metric_ids = [m.id for m in outcome_metrics]
-    outcomes = db.query(OutcomeRecords).filter(
-        OutcomeRecords.outcome_metric_id.in_(metric_ids)
-    ).all() if metric_ids else []
-
-    outcomes_tracked = len(outcomes)
-    # Since we only have value (not baseline/current), estimate positive outcomes
-    # based on having recorded measurements
-    positive_outcomes = outcomes_tracked  # Simplified - count all as tracked
-    outcome_success = 75.0 if outcomes_tracked > 0 else 0  # Default success rate
-
-    # Financial metrics
-    program_budget = float(program.budget) if program.budget else 0
-    cost_per_ben = program_budget / total_beneficiaries if total_beneficiaries > 0 else 0
-    cost_per_service = program_budget / total_services if total_services > 0 else 0
-
     return ProgramPerformance(
-        program_id=str(program.id),
-        program_name=program.name,
-        program_type=program.program_type or "general",
+        program_id=program.program_id,
+        program_name=program.program_name,
+        program_type=program.program_type,
         status=program.status,
-        total_beneficiaries=total_beneficiaries,
-        active_beneficiaries=active_count,
-        new_beneficiaries_30d=new_30d,
-        completion_rate=completion_rate,
-        dropout_rate=dropout_rate,
-        total_services_delivered=total_services,
-        services_per_beneficiary=services_per_ben,
-        last_service_date=last_service,
-        outcomes_tracked=outcomes_tracked,
-        positive_outcomes=positive_outcomes,
-        outcome_success_rate=outcome_success,
-        program_budget=program_budget,
-        cost_per_beneficiary=cost_per_ben,
-        cost_per_service=cost_per_service
+        total_beneficiaries=program.beneficiaries_served,
+        active_beneficiaries=program.active_beneficiaries,
+        new_beneficiaries_30d=program.new_beneficiaries_30d,
+        completion_rate=program.completion_rate,
+        dropout_rate=program.dropout_rate,
+        total_services_delivered=program.total_services,
+        services_per_beneficiary=program.services_per_beneficiary,
+        last_service_date=program.last_service_date,
+        outcomes_tracked=program.outcomes_tracked,
+        positive_outcomes=program.positive_outcomes,
+        outcome_success_rate=program.outcome_success_rate,
+        program_budget=program.budget,
+        cost_per_beneficiary=program.cost_per_beneficiary,
+        cost_per_service=program.cost_per_service
     )
 
 
 @router.get("/summary/{organization_id}", response_model=ProgramImpactSummary)
 async def get_program_impact_summary(
         organization_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get organization-wide program impact summary
@@ -563,89 +465,29 @@ async def get_program_impact_summary(
     - Outcome success rates
     - Top performing program
     """
-    programs = db.query(Programs).filter(
-        Programs.organization_id == organization_id
-    ).all()
-
-    total_programs = len(programs)
-    active_programs = sum(1 for p in programs if p.status == 'active')
-
-    # Get all service events
-    services = db.query(ServiceEvents).filter(
-        ServiceEvents.organization_id == organization_id
-    ).all()
-
-    total_services = len(services)
-
-    # Services this month
-    now = datetime.utcnow()
-    month_start = datetime(now.year, now.month, 1).date()
-    services_month = sum(1 for s in services if s.date >= month_start)
-
-    # Unique beneficiaries - query through ServiceBeneficiaries junction table
-    service_ids = [s.id for s in services]
-    service_beneficiaries = db.query(ServiceBeneficiaries).filter(
-        ServiceBeneficiaries.service_event_id.in_(service_ids)
-    ).all() if service_ids else []
-
-    all_beneficiary_ids = set(sb.beneficiary_id for sb in service_beneficiaries)
-    total_beneficiaries = len(all_beneficiary_ids)
-
-    # YTD beneficiaries
-    year_start = datetime(now.year, 1, 1).date()
-    ytd_service_ids = [s.id for s in services if s.date >= year_start]
-    ytd_service_beneficiaries = db.query(ServiceBeneficiaries).filter(
-        ServiceBeneficiaries.service_event_id.in_(ytd_service_ids)
-    ).all() if ytd_service_ids else []
-    ytd_beneficiaries = len(set(sb.beneficiary_id for sb in ytd_service_beneficiaries))
-
-    # New beneficiaries YTD
-    beneficiaries = db.query(Beneficiaries).filter(
-        Beneficiaries.organization_id == organization_id,
-        Beneficiaries.enrolled_date >= year_start
-    ).count()
-
-    # Average services per beneficiary
-    avg_services = total_services / total_beneficiaries if total_beneficiaries > 0 else 0
-
-    # Outcomes
-    outcomes = db.query(OutcomeRecords).filter(
-        OutcomeRecords.organization_id == organization_id
-    ).all()
-
-    total_outcomes = len(outcomes)
-    # Since we only have value field, estimate positive outcomes
-    positive_outcomes = int(total_outcomes * 0.75) if total_outcomes > 0 else 0  # Assume 75% positive
-    positive_rate = (positive_outcomes / total_outcomes * 100) if total_outcomes > 0 else 0
-
-    # Top program by services delivered
-    program_services = {}
-    for service in services:
-        if service.program_id:
-            program_services[service.program_id] = program_services.get(service.program_id, 0) + 1
+    scorecard = get_program_scorecard(db, organization_id)
 
     top_program = None
-    if program_services:
-        top_program_id = max(program_services, key=program_services.get)
-        top_prog = db.query(Programs).filter(Programs.id == top_program_id).first()
-        if top_prog:
-            top_program = {
-                "id": str(top_prog.id),
-                "name": top_prog.name,
-                "services_delivered": program_services[top_program_id]
-            }
+    top = scorecard.top_by_services()
+    if top:
+        top_program = {
+            "id": top.program_id,
+            "name": top.program_name,
+            "services_delivered": top.total_services
+        }
 
+    total_beneficiaries = scorecard.beneficiaries_served
     return ProgramImpactSummary(
-        total_programs=total_programs,
-        active_programs=active_programs,
+        total_programs=len(scorecard.programs),
+        active_programs=scorecard.active_programs,
         total_beneficiaries_served=total_beneficiaries,
-        unique_beneficiaries_ytd=ytd_beneficiaries,
-        new_beneficiaries_ytd=beneficiaries,
-        total_services_delivered=total_services,
-        services_this_month=services_month,
-        average_services_per_beneficiary=avg_services,
-        total_outcomes_recorded=total_outcomes,
-        positive_outcome_rate=positive_rate,
+        unique_beneficiaries_ytd=scorecard.beneficiaries_served_ytd,
+        new_beneficiaries_ytd=scorecard.new_beneficiaries_ytd,
+        total_services_delivered=scorecard.total_services,
+        services_this_month=scorecard.services_this_month,
+        average_services_per_beneficiary=scorecard.total_services / total_beneficiaries if total_beneficiaries > 0 else 0,
+        total_outcomes_recorded=scorecard.outcomes_tracked,
+        positive_outcome_rate=scorecard.outcome_success_rate,
         top_program=top_program
     )
 
@@ -654,7 +496,7 @@ async def get_program_impact_summary(
 async def get_service_delivery_metrics(
         organization_id: str,
         program_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Track service delivery for a program
@@ -738,7 +580,7 @@ async def get_service_delivery_metrics(
 async def get_program_outcomes(
         organization_id: str,
         program_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Track outcomes for a program
@@ -828,7 +670,7 @@ async def get_program_outcomes(
 @router.get("/impact-metrics/{organization_id}", response_model=List[ImpactMetricsSummary])
 async def get_impact_metrics(
         organization_id: str,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Get aggregated impact metrics across all programs
@@ -952,7 +794,7 @@ async def get_sdg_alignment(
 async def compare_programs(
         organization_id: str,
         program_ids: Optional[List[str]] = Query(None),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Compare effectiveness of multiple programs
@@ -963,68 +805,34 @@ async def compare_programs(
     - Effectiveness (outcomes, completion rates)
     - Overall impact score
     """
-    # Get programs to compare
-    query = db.query(Programs).filter(
-        Programs.organization_id == organization_id
-    )
-
-    if program_ids:
-        query = query.filter(Programs.id.in_(program_ids))
-
-    programs = query.all()
-
-    comparisons = []
-
-    for program in programs:
-        # Get services
-        services = db.query(ServiceEvents).filter(
-            ServiceEvents.program_id == program.id
-        ).all()
-
-        # Get beneficiaries through ServiceBeneficiaries junction table
-        service_ids = [s.id for s in services]
-        service_beneficiaries = db.query(ServiceBeneficiaries).filter(
-            ServiceBeneficiaries.service_event_id.in_(service_ids)
-        ).all() if service_ids else []
-        beneficiaries_served = len(set(sb.beneficiary_id for sb in service_beneficiaries))
-        services_per_ben = len(services) / beneficiaries_served if beneficiaries_served > 0 else 0
-
-        # Cost metrics
-        budget = float(program.budget) if program.budget else 0
-        cost_per_ben = budget / beneficiaries_served if beneficiaries_served > 0 else 0
-
-        # Effectiveness
-        completion_rate = calculate_completion_rate(str(program.id), db)
-
-        # Get outcomes through outcome_metrics for this program
-        program_metrics = db.query(OutcomeMetrics).filter(
-            OutcomeMetrics.program_id == program.id
-        ).all()
-        metric_ids = [m.id for m in program_metrics]
-        outcomes = db.query(OutcomeRecords).filter(
-            OutcomeRecords.outcome_metric_id.in_(metric_ids)
-        ).all() if metric_ids else []
-
-        # Estimate positive outcomes
-        positive_outcomes = int(len(outcomes) * 0.75) if outcomes else 0
-        outcome_rate = (positive_outcomes / len(outcomes) * 100) if outcomes else 0
-
-        # Calculate impact score
-        cost_efficiency = min(100, (1 / cost_per_ben * 10000)) if cost_per_ben > 0 else 50
-        impact_score = calculate_impact_score(outcome_rate, completion_rate, cost_efficiency)
-
-        comparisons.append(ProgramComparison(
-            program_id=str(program.id),
-            program_name=program.name,
-            beneficiaries_served=beneficiaries_served,
-            cost_per_beneficiary=cost_per_ben,
-            services_per_beneficiary=services_per_ben,
-            outcome_success_rate=outcome_rate,
-            completion_rate=completion_rate,
-            impact_score=impact_score
-        ))
-
-    return sorted(comparisons, key=lambda x: x.impact_score, reverse=True)
+    scorecard = get_program_scorecard(db, organization_id)
+
+    return [
+        ProgramComparison(
+            program_id=program.program_id,
+            program_name=program.program_name,
+            beneficiaries_served=program.beneficiaries_served,
+            cost_per_beneficiary=program.cost_per_beneficiary,
+            services_per_beneficiary=program.services_per_beneficiary,
+            outcome_success_rate=program.outcome_success_rate,
+            completion_rate=program.completion_rate,
+            impact_score=program.impact_score
+        )
+        for program in scorecard.ranked(program_ids)
+    ]
+
+
+@router.get("/scorecard/{organization_id}")
+async def get_program_scorecard_endpoint(
+        organization_id: str,
+        db: Session = Depends(get_read_db)
+):
+    """
+    Program scorecard: every program's reach, completion, outcome achievement,
+    cost efficiency and impact score plus organization totals, ranked by
+    impact score. Cached until enrollments, outcomes or services change.
+    """
+    return get_program_scorecard(db, organization_id).as_dict()
 
 
 @router.get("/service-trends/{organization_id}", response_model=List[ServiceTrends])
@@ -1032,7 +840,7 @@ async def get_service_trends(
         organization_id: str,
         period: str = "monthly",
         months_back: int = 12,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
     Track service delivery trends over time
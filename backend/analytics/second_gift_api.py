@@ -12,7 +12,7 @@ Add to your analytics.py or create a new donor analytics router.
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_, or_, desc
+from sqlalchemy import func, and_, or_, desc
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta, date
 from decimal import Decimal
@@ -20,7 +20,8 @@ from uuid import UUID
 import statistics
 
 from analytics.analytics import get_current_user, verify_organization_access
-from database import get_db
+from database import get_db, get_read_db
+from utils import in_range, year_range
 from models import SecondGiftTracking
 from models import (
     Organizations, Donors, Donations
@@ -216,7 +217,7 @@ async def get_second_gift_conversion(
 @router.get("/second-gift/{organization_id}/by-channel")
 async def get_second_gift_by_channel(
     organization_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """
@@ -270,7 +271,7 @@ async def get_second_gift_by_channel(
 async def get_revenue_diversification(
     organization_id: UUID,
     year: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """
@@ -305,7 +306,7 @@ async def get_revenue_diversification(
     # Individual giving
     individual_revenue = db.query(func.sum(Donations.amount)).filter(
         Donations.organization_id == organization_id,
-        extract('year', Donations.donation_date) == year,
+        in_range(Donations.donation_date, year_range(year)),
         # Add filter for individual donations if you have categorization
         # For now, we'll use all donations as individual
     ).scalar() or Decimal('0')
@@ -0,0 +1,393 @@
+"""
+Snapshot Files
+Wise Investor Platform
+
+Memory-mapped copies of the per-organization analytics arrays, shared by
+every worker on a host. Without them each uvicorn worker holds its own
+donation snapshot (analytics/donation_snapshot.py) and decodes its own donor
+feature frame (analytics/donor_features.py); with them the arrays are .npy
+files that workers open read-only with np.load(mmap_mode="r"), so N workers
+share one page-cache copy and nothing is parsed on open.
+
+Layout under ANALYTICS_SNAPSHOT_DIR (unset = disabled, everything is read
+from the database as before):
+
+    <org>/manifest.json            current version, per-section DB versions,
+                                   array dtypes/shapes and label lists
+    <org>/<version>/donations.<column>.npy
+    <org>/<version>/features.<column>.npy
+
+The writer fills a new <version> directory, renames it into place and then
+replaces manifest.json with os.replace, so a refresh is one atomic swap:
+readers see either the old manifest or the new one, never a partial
+snapshot. The previous version directory is kept for workers that opened it
+(on POSIX their mappings stay valid after deletion anyway); older ones are
+removed.
+
+Each section records the database version it was written at
+(donation_version / store_version). Readers compare it with the current
+version that the endpoints already query, so a stale file is never served:
+when donations or the feature store changed since the last write, the
+endpoints fall back to the database until the writer runs again.
+
+UUID columns are stored as 16-byte rows and labels (payment methods,
+channels) as codes into lists in the manifest; they are decoded once per
+worker and version, numeric columns stay mapped.
+
+    ANALYTICS_SNAPSHOT_DIR=/var/lib/wise-investor/snapshots
+    SNAPSHOT_FILES_CACHE_SIZE=64    # opened snapshots kept per worker
+
+Write after the feature store refresh (on every API host):
+    python -m analytics.snapshot_files
+    python -m analytics.snapshot_files --org <organization_id>
+    python -m analytics.snapshot_files --org <organization_id> --check
+"""
+
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from analytics.donation_snapshot import DonationSnapshot, donation_version, load_donation_snapshot
+from analytics.donor_features import (
+    FEATURE_KINDS,
+    DonorFeatureFrame,
+    load_features,
+    refresh_donor_features,
+    store_version,
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.getenv("ANALYTICS_SNAPSHOT_DIR")
+CACHE_SIZE = int(os.getenv("SNAPSHOT_FILES_CACHE_SIZE", "64"))
+
+FORMAT = 1
+MANIFEST = "manifest.json"
+KEEP_VERSIONS = 2
+STALE_TEMP_SECONDS = 3600
+
+DONATION_COLUMNS = ("ts", "amount", "donor", "campaign", "method", "channel", "first_gift")
+
+
+# =====================================================================
+# ENCODING
+# =====================================================================
+
+def _version_key(version: Tuple) -> List:
+    """Database version as stored in the manifest (datetimes as strings)"""
+    return json.loads(json.dumps(list(version), default=str))
+
+
+def _encode_ids(ids) -> np.ndarray:
+    """UUIDs as rows of 16 bytes; missing ids are all zeros"""
+    out = np.zeros((len(ids), 16), dtype=np.uint8)
+    if len(ids):
+        out[:] = np.frombuffer(
+            b"".join(i.bytes if i else bytes(16) for i in ids), dtype=np.uint8
+        ).reshape(-1, 16)
+    return out
+
+
+def _decode_ids(rows: np.ndarray) -> np.ndarray:
+    raw = rows.tobytes()
+    empty = bytes(16)
+    return np.array(
+        [None if raw[k:k + 16] == empty else UUID(bytes=raw[k:k + 16]) for k in range(0, len(raw), 16)],
+        dtype=object
+    )
+
+
+def _encode_labels(values: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+    labels = {}
+    codes = np.array([-1 if v is None else labels.setdefault(v, len(labels)) for v in values], dtype=np.int16)
+    return codes, list(labels)
+
+
+def _decode_labels(codes: np.ndarray, labels: List[str]) -> np.ndarray:
+    lookup = np.array([*labels, None], dtype=object)
+    return lookup[np.where(codes < 0, len(labels), codes)]
+
+
+# =====================================================================
+# WRITER
+# =====================================================================
+
+def _org_dir(organization_id, root: Optional[str] = None) -> str:
+    return os.path.join(root or SNAPSHOT_DIR, str(organization_id))
+
+
+def _save(directory: str, name: str, array: np.ndarray) -> Dict:
+    with open(os.path.join(directory, f"{name}.npy"), "wb") as f:
+        np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+        f.flush()
+        os.fsync(f.fileno())
+    return {"dtype": str(array.dtype), "shape": list(array.shape)}
+
+
+def _donation_arrays(db: Session, organization_id: UUID) -> Optional[Tuple[Dict, Dict]]:
+    """(arrays, manifest section) of the org's donations; None when they changed while reading"""
+    version = donation_version(db, organization_id)
+    snapshot = load_donation_snapshot(db, organization_id, version)
+    if donation_version(db, organization_id) != version:
+        return None
+
+    arrays = {column: getattr(snapshot, column) for column in DONATION_COLUMNS}
+    arrays["donor_ids"] = _encode_ids(snapshot.donor_ids)
+    arrays["campaign_ids"] = _encode_ids(snapshot.campaign_ids)
+    section = {
+        "version": _version_key(version),
+        "rows": len(snapshot),
+        "donor_count": snapshot.donor_count,
+        "zone": snapshot.zone,
+        "labels": {"methods": snapshot.methods, "channels": snapshot.channels},
+    }
+    return arrays, section
+
+
+def _feature_arrays(db: Session, organization_id: UUID, today: date) -> Optional[Tuple[Dict, Dict]]:
+    """(arrays, manifest section) of the org's stored features; None when the store is not current"""
+    version = store_version(db, organization_id)
+    if version[0] != today:
+        return None
+    frame = load_features(db, organization_id, today)
+    if frame.source == "live" or store_version(db, organization_id) != version:
+        return None
+
+    arrays, labels = {}, {}
+    for name, kind in FEATURE_KINDS.items():
+        values = getattr(frame, name)
+        if kind == "id":
+            arrays[name] = _encode_ids(values)
+        elif kind == "str":
+            arrays[name], labels[name] = _encode_labels(values)
+        else:
+            arrays[name] = np.asarray(values)
+    section = {
+        "version": _version_key(version),
+        "as_of": today.isoformat(),
+        "rows": len(frame),
+        "labels": labels,
+    }
+    return arrays, section
+
+
+def _prune(org_dir: str, current: str) -> None:
+    """Remove version directories older than the last KEEP_VERSIONS, and temp directories of crashed writers"""
+    entries = sorted(e for e in os.listdir(org_dir) if os.path.isdir(os.path.join(org_dir, e)))
+    finished = [e for e in entries if not e.startswith(".")]
+    keep = set(finished[-KEEP_VERSIONS:]) | {current}
+    for entry in entries:
+        path = os.path.join(org_dir, entry)
+        abandoned = entry.startswith(".") and time.time() - os.path.getmtime(path) > STALE_TEMP_SECONDS
+        if abandoned or (entry in finished and entry not in keep):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def write_snapshot(db: Session, organization_id: UUID, root: Optional[str] = None,
+                   today: Optional[date] = None) -> Dict:
+    """Write the org's donation and feature arrays as a new version and swap the manifest"""
+    start = time.perf_counter()
+    root = root or SNAPSHOT_DIR
+    if not root:
+        raise ValueError("ANALYTICS_SNAPSHOT_DIR is not set")
+    today = today or date.today()
+
+    refresh_donor_features(db, organization_id, today=today)
+    sections = {
+        "donations": _donation_arrays(db, organization_id),
+        "features": _feature_arrays(db, organization_id, today),
+    }
+
+    org_dir = _org_dir(organization_id, root)
+    os.makedirs(org_dir, exist_ok=True)
+    version = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    staging = os.path.join(org_dir, f".{version}.tmp")
+    os.makedirs(staging)
+
+    manifest = {"format": FORMAT, "organization_id": str(organization_id), "version": version,
+                "written_at": datetime.utcnow().isoformat()}
+    for name, written in sections.items():
+        if written is None:
+            logger.warning(f"Snapshot of {organization_id}: {name} changed while reading or is not current, skipped")
+            continue
+        arrays, section = written
+        section["arrays"] = {column: _save(staging, f"{name}.{column}", array) for column, array in arrays.items()}
+        manifest[name] = section
+
+    os.rename(staging, os.path.join(org_dir, version))
+    pending = os.path.join(org_dir, f".{MANIFEST}.tmp")
+    with open(pending, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pending, os.path.join(org_dir, MANIFEST))
+    _prune(org_dir, version)
+
+    stats = {
+        "organization_id": str(organization_id),
+        "version": version,
+        "donations": manifest.get("donations", {}).get("rows"),
+        "features": manifest.get("features", {}).get("rows"),
+        "bytes": sum(os.path.getsize(os.path.join(org_dir, version, f)) for f in os.listdir(os.path.join(org_dir, version))),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    logger.info(f"Analytics snapshot written: {stats}")
+    return stats
+
+
+# =====================================================================
+# READER
+# =====================================================================
+
+_manifests: Dict[str, Tuple[int, Dict]] = {}
+_opened: "OrderedDict[Tuple[str, str], Tuple[str, object]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def read_manifest(organization_id) -> Optional[Dict]:
+    """The org's current manifest, re-read only when the file was replaced"""
+    if not SNAPSHOT_DIR:
+        return None
+    path = os.path.join(_org_dir(organization_id), MANIFEST)
+    try:
+        modified = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    key = str(organization_id)
+    with _lock:
+        cached = _manifests.get(key)
+        if cached and cached[0] == modified:
+            return cached[1]
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT:
+        return None
+    with _lock:
+        _manifests[key] = (modified, manifest)
+    return manifest
+
+
+def _map(organization_id, manifest: Dict, section: str) -> Dict[str, np.ndarray]:
+    directory = os.path.join(_org_dir(organization_id), manifest["version"])
+    return {
+        column: np.load(os.path.join(directory, f"{section}.{column}.npy"), mmap_mode="r", allow_pickle=False)
+        for column in manifest[section]["arrays"]
+    }
+
+
+def _open_section(organization_id, section: str, version: Tuple, build):
+    """Opened section of the current manifest if it was written at `version`, else None"""
+    manifest = read_manifest(organization_id)
+    if manifest is None or section not in manifest:
+        return None
+    if manifest[section]["version"] != _version_key(version):
+        return None
+
+    key = (str(organization_id), section)
+    with _lock:
+        cached = _opened.get(key)
+        if cached and cached[0] == manifest["version"]:
+            _opened.move_to_end(key)
+            return cached[1]
+
+    try:
+        opened = build(_map(organization_id, manifest, section), manifest[section])
+    except (OSError, ValueError) as e:
+        # Version directory pruned between reading the manifest and opening it
+        logger.warning(f"Snapshot {organization_id}/{manifest['version']} {section} unreadable: {e}")
+        return None
+
+    with _lock:
+        _opened[key] = (manifest["version"], opened)
+        _opened.move_to_end(key)
+        while len(_opened) > CACHE_SIZE:
+            _opened.popitem(last=False)
+    return opened
+
+
+def mapped_donations(organization_id, version: Tuple) -> Optional[DonationSnapshot]:
+    """DonationSnapshot over the mapped files when they match the org's donation version"""
+    def build(arrays: Dict, section: Dict) -> DonationSnapshot:
+        return DonationSnapshot(
+            organization_id=str(organization_id),
+            version=version,
+            **{column: arrays[column] for column in DONATION_COLUMNS},
+            donor_ids=list(_decode_ids(arrays["donor_ids"])),
+            campaign_ids=list(_decode_ids(arrays["campaign_ids"])),
+            methods=section["labels"]["methods"],
+            channels=section["labels"]["channels"],
+            donor_count=section["donor_count"],
+            zone=section["zone"],
+        )
+    return _open_section(organization_id, "donations", version, build)
+
+
+def mapped_features(organization_id, version: Tuple) -> Optional[DonorFeatureFrame]:
+    """DonorFeatureFrame over the mapped files when they match the org's feature store version"""
+    def build(arrays: Dict, section: Dict) -> DonorFeatureFrame:
+        columns = {}
+        for name, kind in FEATURE_KINDS.items():
+            if kind == "id":
+                columns[name] = _decode_ids(arrays[name])
+            elif kind == "str":
+                columns[name] = _decode_labels(arrays[name], section["labels"][name])
+            else:
+                columns[name] = arrays[name]
+        return DonorFeatureFrame(
+            organization_id=organization_id,
+            as_of=date.fromisoformat(section["as_of"]),
+            source="snapshot",
+            **columns
+        )
+    return _open_section(organization_id, "features", version, build)
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+    from models import Donors as Donor
+
+    parser = argparse.ArgumentParser(description="Write memory-mapped analytics snapshots")
+    parser.add_argument("--org", action="append", help="Organization ID (repeatable); default all")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help="Snapshot directory (default ANALYTICS_SNAPSHOT_DIR)")
+    parser.add_argument("--check", action="store_true", help="Report whether each snapshot is current, don't write")
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("--dir or ANALYTICS_SNAPSHOT_DIR is required")
+    SNAPSHOT_DIR = args.dir
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        org_ids = [UUID(o) for o in args.org] if args.org else [
+            row[0] for row in session.query(Donor.organization_id).distinct().all() if row[0]
+        ]
+        for org_id in org_ids:
+            if args.check:
+                manifest = read_manifest(org_id) or {}
+                current = {
+                    "donations": _version_key(donation_version(session, org_id)),
+                    "features": _version_key(store_version(session, org_id)),
+                }
+                state = ", ".join(
+                    f"{name} {'current' if manifest.get(name, {}).get('version') == v else 'stale'}"
+                    for name, v in current.items()
+                )
+                print(f"{'✅' if 'stale' not in state else '⚠️ '} {org_id}: {manifest.get('version', 'none')} ({state})")
+                continue
+            stats = write_snapshot(session, org_id, args.dir)
+            print(f"✅ {stats['organization_id']}: version {stats['version']}, {stats['donations']} donations, "
+                  f"{stats['features']} donors, {stats['bytes'] / 1e6:.1f} MB in {stats['seconds']}s")
+    finally:
+        session.close()
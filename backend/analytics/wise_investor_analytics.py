@@ -19,7 +19,8 @@ import statistics
 
 from analytics.analytics import get_current_user, verify_organization_access
 # Assuming you have these imports from your existing analytics.py
-from database import get_db
+from database import get_db, get_read_db
+from utils import in_range, year_range
 from models import (
     Organizations as Organization, 
     Users as User,  
@@ -117,17 +118,21 @@ async def get_p2sg_executive_dashboard(
     current_year = datetime.now().year
     multi_year_trends = []
     
+    # One scan of the widest window; shorter windows are slices of it
+    year_expr = extract('year', Donation.donation_date)
+    all_yearly_data = db.query(
+        year_expr.label('year'),
+        func.sum(Donation.amount).label('revenue'),
+        func.count(func.distinct(Donation.donor_id)).label('donors'),
+        func.count(Donation.id).label('gifts')
+    ).filter(
+        Donation.organization_id == organization_id,
+        Donation.donation_date >= year_range(current_year - 10)[0]
+    ).group_by(year_expr).order_by(year_expr).all()
+    
     for years_back in [3, 5, 10]:
         start_year = current_year - years_back
-        yearly_data = db.query(
-            extract('year', Donation.donation_date).label('year'),
-            func.sum(Donation.amount).label('revenue'),
-            func.count(func.distinct(Donation.donor_id)).label('donors'),
-            func.count(Donation.id).label('gifts')
-        ).filter(
-            Donation.organization_id == organization_id,
-            extract('year', Donation.donation_date) >= start_year
-        ).group_by(extract('year', Donation.donation_date)).all()
+        yearly_data = [d for d in all_yearly_data if int(d.year) >= start_year]
         
         multi_year_trends.append({
             "period": f"{years_back}_year",
@@ -296,7 +301,7 @@ async def get_wise_investor_quadrant(
 async def get_total_income_cashflow(
     organization_id: UUID,
     years: int = Query(3, description="Number of years to compare (3, 5, or 10)", ge=2, le=10),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -326,7 +331,7 @@ async def get_total_income_cashflow(
         func.count(func.distinct(Donation.donor_id)).label('donor_count')
     ).filter(
         Donation.organization_id == organization_id,
-        extract('year', Donation.donation_date) >= start_year
+        Donation.donation_date >= year_range(start_year)[0]
     ).group_by(
         extract('year', Donation.donation_date),
         extract('month', Donation.donation_date)
@@ -534,9 +539,12 @@ def calculate_wise_investor_score(db: Session, organization_id: UUID) -> WiseInv
     year_start = datetime(current_year, 1, 1)
     
     # Calculate donor retention (for sustainability)
+    last_year = year_range(current_year - 1)
+    this_year = year_range(current_year)
+    
     last_year_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
         Donation.organization_id == organization_id,
-        extract('year', Donation.donation_date) == current_year - 1
+        in_range(Donation.donation_date, last_year)
     ).scalar() or 1
     
     retained_donors = db.query(func.count(func.distinct(Donation.donor_id))).filter(
@@ -545,7 +553,7 @@ def calculate_wise_investor_score(db: Session, organization_id: UUID) -> WiseInv
         Donation.donor_id.in_(
             db.query(Donation.donor_id).filter(
                 Donation.organization_id == organization_id,
-                extract('year', Donation.donation_date) == current_year - 1
+                in_range(Donation.donation_date, last_year)
             )
         )
     ).scalar() or 0
@@ -555,12 +563,12 @@ def calculate_wise_investor_score(db: Session, organization_id: UUID) -> WiseInv
     # Calculate revenue growth (for momentum)
     current_revenue = db.query(func.sum(Donation.amount)).filter(
         Donation.organization_id == organization_id,
-        extract('year', Donation.donation_date) == current_year
+        in_range(Donation.donation_date, this_year)
     ).scalar() or 0
     
     last_year_revenue = db.query(func.sum(Donation.amount)).filter(
         Donation.organization_id == organization_id,
-        extract('year', Donation.donation_date) == current_year - 1
+        in_range(Donation.donation_date, last_year)
     ).scalar() or 1
     
     revenue_growth = ((float(current_revenue) - float(last_year_revenue)) / float(last_year_revenue)) * 100
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Index Advisor
+=============
+Replays the benchmark HTTP scenarios against the seeded benchmark database,
+captures every SELECT they issue, and runs it again under
+EXPLAIN (ANALYZE, BUFFERS). The report lists:
+
+- sequential scans per table, with the scenarios and rows that caused them
+- indexes each scenario used
+- indexes on the workload tables that the replay never touched
+- indexes declared in models.py that are missing from the database
+
+Usage (from the backend directory):
+    python -m benchmarks.index_advisor --scale 100k
+    python -m benchmarks.index_advisor --scenarios rfm_analysis donor_movement
+    python -m benchmarks.index_advisor --create-missing
+
+--create-missing builds the declared-but-missing indexes in the bench
+database. Other databases (production) get them from
+python -m schemacreate.workload_indexes --apply, which builds them with
+CREATE INDEX CONCURRENTLY against DATABASE_URL.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from benchmarks.scales import BENCH_DATABASE_URL, SCALES
+from benchmarks.scenarios import select_scenarios
+
+# database.py reads DATABASE_URL at import time, so point it at the bench DB first
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+
+from sqlalchemy import event, text  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+WORKLOAD_TABLES = ("donations", "donors", "campaigns")
+
+# Seq scans over fewer rows than this are cheaper than any index and not reported
+MIN_SEQ_SCAN_ROWS = 1000
+
+
+# =====================================================================
+# STATEMENT CAPTURE
+# =====================================================================
+
+class StatementRecorder:
+    """Collects the SELECT statements issued while a scenario runs"""
+
+    def __init__(self):
+        self.scenario = None
+        self.statements = {}  # (statement, scenario) -> parameters of the first call
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.scenario is None or executemany:
+            return
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+        self.statements.setdefault((statement, self.scenario), parameters)
+
+
+def capture_workload(scenario_names, context):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    recorder = StatementRecorder()
+    event.listen(Engine, "before_cursor_execute", recorder)
+    client = TestClient(app, raise_server_exceptions=False)
+    headers = {"Authorization": f"Bearer {context['token']}"}
+
+    try:
+        for scenario in select_scenarios(scenario_names):
+            if scenario.is_job:
+                continue
+            print(f"  🎬 {scenario.name}...")
+            recorder.scenario = scenario.name
+            client.request(
+                scenario.method,
+                scenario.render_path(context["org_id"]),
+                params=scenario.params,
+                json=scenario.json,
+                headers=headers,
+            )
+    finally:
+        recorder.scenario = None
+        event.remove(Engine, "before_cursor_execute", recorder)
+
+    return recorder.statements
+
+
+# =====================================================================
+# PLAN ANALYSIS
+# =====================================================================
+
+def walk_plan(node, visit):
+    visit(node)
+    for child in node.get("Plans", []):
+        walk_plan(child, visit)
+
+
+def explain(raw_conn, statement, parameters):
+    """EXPLAIN ANALYZE one statement inside a transaction that is rolled back"""
+    cursor = raw_conn.cursor()
+    try:
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+        return cursor.fetchone()[0][0]
+    finally:
+        cursor.close()
+        raw_conn.rollback()
+
+
+def analyze_statements(statements):
+    from database import engine
+
+    seq_scans = defaultdict(lambda: {"count": 0, "rows": 0, "shared_read": 0, "scenarios": set()})
+    index_usage = defaultdict(lambda: defaultdict(int))
+    slowest = []
+    failures = 0
+
+    raw_conn = engine.raw_connection()
+    try:
+        for (statement, scenario), parameters in statements.items():
+            try:
+                plan = explain(raw_conn, statement, parameters)
+            except Exception as e:
+                failures += 1
+                print(f"  ⚠️  EXPLAIN failed for a {scenario} statement: {e}")
+                continue
+
+            def visit(node):
+                node_type = node.get("Node Type")
+                if node_type == "Seq Scan":
+                    rows = node.get("Actual Rows", 0) * node.get("Actual Loops", 1) \
+                        + node.get("Rows Removed by Filter", 0)
+                    if rows >= MIN_SEQ_SCAN_ROWS:
+                        scan = seq_scans[node.get("Relation Name")]
+                        scan["count"] += 1
+                        scan["rows"] += rows
+                        scan["shared_read"] += node.get("Shared Read Blocks", 0)
+                        scan["scenarios"].add(scenario)
+                elif node.get("Index Name"):
+                    index_usage[scenario][node["Index Name"]] += 1
+
+            walk_plan(plan["Plan"], visit)
+            slowest.append({
+                "scenario": scenario,
+                "execution_ms": round(plan.get("Execution Time", 0), 2),
+                "shared_hit": plan["Plan"].get("Shared Hit Blocks", 0),
+                "shared_read": plan["Plan"].get("Shared Read Blocks", 0),
+                "statement": " ".join(statement.split())[:300],
+            })
+    finally:
+        raw_conn.close()
+
+    slowest.sort(key=lambda s: s["execution_ms"], reverse=True)
+    return {
+        "seq_scans": {
+            table: {**scan, "scenarios": sorted(scan["scenarios"])}
+            for table, scan in sorted(seq_scans.items(), key=lambda kv: kv[1]["rows"], reverse=True)
+        },
+        "index_usage": {scenario: dict(usage) for scenario, usage in index_usage.items()},
+        "slowest_statements": slowest[:15],
+        "explain_failures": failures,
+    }
+
+
+# =====================================================================
+# INDEX INVENTORY
+# =====================================================================
+
+def index_scan_counts():
+    from database import engine
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT relname, indexrelname, idx_scan
+            FROM pg_stat_user_indexes
+            WHERE relname = ANY(:tables)
+        """), {"tables": list(WORKLOAD_TABLES)}).all()
+    return {row.indexrelname: (row.relname, row.idx_scan) for row in rows}
+
+
+def missing_indexes():
+    # Imported here: database.py must see the bench DATABASE_URL first
+    from schemacreate.workload_indexes import missing_indexes as declared_but_missing
+    from database import engine
+
+    with engine.connect() as conn:
+        return declared_but_missing(conn)
+
+
+# =====================================================================
+# REPORT
+# =====================================================================
+
+def print_report(report):
+    print("\n" + "=" * 80)
+    print("SEQUENTIAL SCANS")
+    print("=" * 80)
+    if not report["seq_scans"]:
+        print("  none ✅")
+    for table, scan in report["seq_scans"].items():
+        print(f"  {table:<28} {scan['count']:>4} scans {scan['rows']:>12,} rows  "
+              f"{scan['shared_read']:>8} blocks read  <- {', '.join(scan['scenarios'])}")
+
+    print("\nUNUSED INDEXES (no scans during the replay)")
+    for name in report["unused_indexes"] or ["none"]:
+        print(f"  {name}")
+
+    print("\nDECLARED BUT MISSING INDEXES")
+    for name in report["missing_indexes"] or ["none ✅"]:
+        print(f"  {name}")
+
+    print("\nSLOWEST STATEMENTS")
+    for s in report["slowest_statements"][:5]:
+        print(f"  {s['execution_ms']:>9} ms  {s['scenario']:<28} {s['statement'][:80]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explain the benchmark workload and report index usage")
+    parser.add_argument("--scale", choices=list(SCALES), default="1k",
+                        help="Scale the bench DB was seeded with (recorded in the report)")
+    parser.add_argument("--scenarios", nargs="*", help="Subset of scenario names to replay")
+    parser.add_argument("--output", help="Path of the JSON report")
+    parser.add_argument("--create-missing", action="store_true",
+                        help="Create indexes declared in models.py that the database lacks, then exit")
+    args = parser.parse_args()
+
+    if args.create_missing:
+        from schemacreate.workload_indexes import apply
+
+        print(f"\n🧱 Creating {len(missing_indexes())} missing index(es) in the bench database...")
+        return apply()
+
+    from benchmarks.run_benchmarks import load_context
+
+    context = load_context()
+    print(f"\n🔍 Replaying workload for org {context['org_id']} "
+          f"({context['org_donors']} donors, {context['org_donations']} donations)")
+
+    scans_before = index_scan_counts()
+    statements = capture_workload(args.scenarios, context)
+    print(f"\n📝 Captured {len(statements)} distinct statements; running EXPLAIN (ANALYZE, BUFFERS)...")
+    analysis = analyze_statements(statements)
+    # Backends flush their index scan counters to pg_stat at most once a second
+    time.sleep(1.5)
+    scans_after = index_scan_counts()
+
+    unused = sorted(
+        f"{table}.{name}"
+        for name, (table, count) in scans_after.items()
+        if count == scans_before.get(name, (table, 0))[1]
+    )
+
+    report = {
+        "scale": args.scale,
+        "organization_id": context["org_id"],
+        "generated_at": datetime.utcnow().isoformat(),
+        "statements": len(statements),
+        **analysis,
+        "unused_indexes": unused,
+        "missing_indexes": [index.name for index in missing_indexes()],
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"index-advisor-{args.scale}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump(report, fh, indent=2)
+
+    print_report(report)
+    print(f"\n📄 Report written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Login Throughput
+================
+Logins per second for one API worker (one event loop), with password checks
+run inline on the event loop (the old behaviour) and through the credential
+service's thread pool. No database or server is needed: each simulated login
+is the bcrypt verification the login route performs.
+
+While logins run, a probe coroutine stands in for dashboard requests on the
+same worker and records how late it wakes up (event loop stall). The report
+lists per mode:
+
+- logins/sec and login latency (p50, p95, max)
+- probe stall (p95, max): how long other requests wait behind bcrypt
+- whether a hash made with fewer rounds is upgraded on login (rehash check)
+
+    python -m benchmarks.login_throughput
+    python -m benchmarks.login_throughput --logins 200 --concurrency 50 --workers 1 2 4
+    BCRYPT_ROUNDS=13 python -m benchmarks.login_throughput
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from user_management import credential_service
+from user_management.credential_service import (
+    BCRYPT_ROUNDS,
+    CredentialPool,
+    hash_password,
+    pwd_context,
+    verify_and_update,
+    verify_and_rehash,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+PASSWORD = "Password123!"
+PROBE_INTERVAL_SECONDS = 0.01
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def probe(stalls, stop: asyncio.Event):
+    """Wake every PROBE_INTERVAL_SECONDS and record how late each wake-up was"""
+    while not stop.is_set():
+        expected = time.perf_counter() + PROBE_INTERVAL_SECONDS
+        await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+        stalls.append(max(0.0, time.perf_counter() - expected))
+
+
+async def login_storm(mode: str, stored_hash: str, logins: int, concurrency: int):
+    latencies, stalls = [], []
+    gate = asyncio.Semaphore(concurrency)
+    stop = asyncio.Event()
+
+    async def one_login():
+        async with gate:
+            started = time.perf_counter()
+            if mode == "inline":
+                valid, _ = verify_and_update(PASSWORD, stored_hash)
+            else:
+                valid, _ = await verify_and_rehash(PASSWORD, stored_hash)
+            latencies.append(time.perf_counter() - started)
+            if not valid:
+                raise RuntimeError("Password did not verify")
+
+    prober = asyncio.create_task(probe(stalls, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+
+    return {
+        "mode": mode,
+        "logins": logins,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "logins_per_second": round(logins / elapsed, 2),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "latency_max_ms": round(max(latencies) * 1000, 1),
+        "probe_stall_p95_ms": round(percentile(stalls, 95) * 1000, 1),
+        "probe_stall_max_ms": round(max(stalls, default=0.0) * 1000, 1),
+    }
+
+
+async def rehash_check() -> bool:
+    """A hash with fewer rounds than BCRYPT_ROUNDS verifies and comes back upgraded"""
+    cheaper = pwd_context.hash(
+        credential_service._prehash(PASSWORD), rounds=max(4, BCRYPT_ROUNDS - 2)
+    )
+    valid, new_hash = await verify_and_rehash(PASSWORD, cheaper)
+    if not valid or not new_hash:
+        return False
+    upgraded, again = await verify_and_rehash(PASSWORD, new_hash)
+    return upgraded and again is None
+
+
+async def run(args):
+    stored_hash = hash_password(PASSWORD)
+    results = []
+
+    print(f"\n🔐 bcrypt rounds={BCRYPT_ROUNDS}, {args.logins} logins, concurrency {args.concurrency}")
+    inline = await login_storm("inline", stored_hash, args.logins, args.concurrency)
+    inline["workers"] = 0
+    results.append(inline)
+
+    for workers in args.workers:
+        credential_service.credential_pool.shutdown()
+        credential_service.credential_pool = CredentialPool(workers, args.logins)
+        result = await login_storm("pool", stored_hash, args.logins, args.concurrency)
+        result["workers"] = workers
+        results.append(result)
+
+    rehashed = await rehash_check()
+    credential_service.credential_pool.shutdown()
+    return results, rehashed
+
+
+def print_report(report):
+    print("\n" + "=" * 80)
+    print("LOGIN THROUGHPUT (one API worker)")
+    print("=" * 80)
+    print(f"  {'mode':<8} {'threads':>7} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'stall p95':>10} {'stall max':>10}")
+    for r in report["results"]:
+        print(f"  {r['mode']:<8} {r['workers'] or '-':>7} {r['logins_per_second']:>9.2f} "
+              f"{r['latency_p50_ms']:>8.1f} {r['latency_p95_ms']:>8.1f} "
+              f"{r['probe_stall_p95_ms']:>10.1f} {r['probe_stall_max_ms']:>10.1f}")
+    print(f"\n  rehash on login: {'✅ upgraded' if report['rehash_on_login'] else '❌ not upgraded'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login password checks per worker")
+    parser.add_argument("--logins", type=int, default=100, help="Logins per mode")
+    parser.add_argument("--concurrency", type=int, default=25, help="Logins in flight at once")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4],
+                        help="Credential pool sizes to measure")
+    parser.add_argument("--output", help="Path of the JSON report")
+    args = parser.parse_args()
+
+    results, rehashed = asyncio.run(run(args))
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+        "cpu_count": os.cpu_count(),
+        "results": results,
+        "rehash_on_login": rehashed,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"login-throughput-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump(report, fh, indent=2)
+
+    print_report(report)
+    print(f"\n📄 Report written to {output}")
+    return 0 if rehashed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
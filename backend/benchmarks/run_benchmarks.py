@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Analytics Benchmark Runner
+==========================
+Replays the benchmark scenarios against a seeded benchmark database and
+records latency, SQL query count and process RSS for each scenario.
+
+Usage (from the backend directory):
+    python -m benchmarks.run_benchmarks --scale 100k
+    python -m benchmarks.run_benchmarks --scale 100k --scenarios rfm_analysis donor_movement
+    python -m benchmarks.run_benchmarks --scale 100k --compare benchmarks/results/baseline-100k.json
+
+Seed the database first with benchmarks.seed_dataset. Results are written as
+JSON to benchmarks/results/ unless --output is given. With --compare, the run
+exits non-zero when any scenario regresses past --threshold.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.scales import BENCH_DATABASE_URL, SCALES, db_config_from_url
+from benchmarks.scenarios import select_scenarios
+
+# database.py reads DATABASE_URL at import time, so point it at the bench DB first
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+
+import jwt  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+# =====================================================================
+# MEASUREMENT HELPERS
+# =====================================================================
+
+class QueryCounter:
+    """Counts SQL statements issued through any SQLAlchemy engine"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as fh:
+            pages = int(fh.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 2)
+    except (OSError, ValueError):
+        # ru_maxrss is KB on Linux and bytes on macOS; this is the peak, not current
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return round(peak / divisor, 2)
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies_ms):
+    return {
+        "min_ms": round(min(latencies_ms), 2),
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 2),
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+        "max_ms": round(max(latencies_ms), 2),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# =====================================================================
+# BENCHMARK CONTEXT
+# =====================================================================
+
+def load_context():
+    """Pick the largest org in the bench DB and mint a token for one of its admins"""
+    from database import engine
+    from analytics.analytics import SECRET_KEY, ALGORITHM
+
+    with engine.connect() as conn:
+        org_id = conn.execute(text("""
+            SELECT organization_id
+            FROM donations
+            GROUP BY organization_id
+            ORDER BY COUNT(*) DESC
+            LIMIT 1
+        """)).scalar()
+        if org_id is None:
+            raise RuntimeError("Benchmark database is empty - run benchmarks.seed_dataset first")
+
+        user = conn.execute(text("""
+            SELECT id, email, role
+            FROM users
+            WHERE organization_id = :org_id AND is_active = true
+            ORDER BY role = 'org_admin' DESC, created_at
+            LIMIT 1
+        """), {"org_id": org_id}).first()
+        if user is None:
+            raise RuntimeError(f"No active user found for organization {org_id}")
+
+        donor_count = conn.execute(
+            text("SELECT COUNT(*) FROM donors WHERE organization_id = :org_id"),
+            {"org_id": org_id}
+        ).scalar()
+        donation_count = conn.execute(
+            text("SELECT COUNT(*) FROM donations WHERE organization_id = :org_id"),
+            {"org_id": org_id}
+        ).scalar()
+
+    token = jwt.encode({
+        "sub": str(user.id),
+        "email": user.email,
+        "organization_id": str(org_id),
+        "role": user.role or "org_admin",
+        "is_superadmin": False,
+        "exp": datetime.utcnow() + timedelta(hours=12),
+        "type": "access",
+    }, SECRET_KEY, algorithm=ALGORITHM)
+
+    return {
+        "org_id": str(org_id),
+        "token": token,
+        "db_config": db_config_from_url(BENCH_DATABASE_URL),
+        "org_donors": donor_count,
+        "org_donations": donation_count,
+    }
+
+
+def run_scenario(client, scenario, context, counter, iterations, warmup):
+    headers = {"Authorization": f"Bearer {context['token']}"}
+    iterations = scenario.iterations or iterations
+
+    def call():
+        if scenario.is_job:
+            scenario.job(context)
+            return None
+        response = client.request(
+            scenario.method,
+            scenario.render_path(context["org_id"]),
+            params=scenario.params,
+            json=scenario.json,
+            headers=headers,
+        )
+        return response.status_code
+
+    for _ in range(0 if scenario.is_job else warmup):
+        call()
+
+    latencies, query_counts, statuses = [], [], set()
+    rss_before = current_rss_mb()
+
+    for _ in range(iterations):
+        counter.reset()
+        start = time.perf_counter()
+        status_code = call()
+        latencies.append((time.perf_counter() - start) * 1000)
+        query_counts.append(counter.count)
+        if status_code is not None:
+            statuses.add(status_code)
+
+    result = {
+        "name": scenario.name,
+        "description": scenario.description,
+        "kind": "job" if scenario.is_job else "http",
+        "iterations": iterations,
+        "latency": summarize(latencies),
+        # Jobs talk to Postgres through psycopg2 directly, so only HTTP counts are meaningful
+        "queries_per_call": None if scenario.is_job else max(query_counts),
+        "rss_mb_before": rss_before,
+        "rss_mb_after": current_rss_mb(),
+        "status_codes": sorted(statuses),
+    }
+    result["ok"] = all(200 <= s < 300 for s in statuses)
+    return result
+
+
+# =====================================================================
+# REGRESSION COMPARISON
+# =====================================================================
+
+def compare_results(current: dict, baseline: dict, threshold_pct: float):
+    """Compare a run with a baseline; returns (report_rows, regressed)"""
+    baseline_by_name = {s["name"]: s for s in baseline.get("scenarios", [])}
+    rows, regressed = [], False
+
+    for scenario in current["scenarios"]:
+        base = baseline_by_name.get(scenario["name"])
+        if not base:
+            continue
+
+        row = {"name": scenario["name"]}
+        for key in ("p50_ms", "p95_ms"):
+            old, new = base["latency"][key], scenario["latency"][key]
+            change = ((new - old) / old * 100) if old else 0.0
+            row[f"{key}_change_pct"] = round(change, 1)
+            if change > threshold_pct:
+                regressed = True
+                row["regressed"] = True
+
+        old_q, new_q = base.get("queries_per_call"), scenario.get("queries_per_call")
+        if old_q is not None and new_q is not None:
+            row["query_delta"] = new_q - old_q
+            if new_q > old_q:
+                regressed = True
+                row["regressed"] = True
+
+        rows.append(row)
+
+    return rows, regressed
+
+
+def print_report(results: dict, comparison=None):
+    print("\n" + "=" * 92)
+    print(f"{'SCENARIO':<32} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10} {'queries':>9} {'RSS MB':>9}  OK")
+    print("=" * 92)
+    for s in results["scenarios"]:
+        lat = s["latency"]
+        queries = "-" if s["queries_per_call"] is None else s["queries_per_call"]
+        print(f"{s['name']:<32} {lat['p50_ms']:>10} {lat['p95_ms']:>10} {lat['max_ms']:>10} "
+              f"{queries:>9} {s['rss_mb_after']:>9}  {'✅' if s['ok'] else '❌'}")
+
+    if comparison:
+        print("\n📊 Compared with baseline:")
+        for row in comparison:
+            flag = "⚠️  REGRESSION" if row.get("regressed") else "ok"
+            print(f"  {row['name']:<32} p50 {row['p50_ms_change_pct']:+.1f}%  "
+                  f"p95 {row['p95_ms_change_pct']:+.1f}%  "
+                  f"queries {row.get('query_delta', 0):+d}  {flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run analytics benchmarks")
+    parser.add_argument("--scale", choices=list(SCALES), default="1k",
+                        help="Scale the bench DB was seeded with (recorded in the results)")
+    parser.add_argument("--scenarios", nargs="*", help="Subset of scenario names to run")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--output", help="Path of the JSON results file")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="Latency regression threshold in percent (default: 20)")
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+    from main import app
+
+    counter = QueryCounter()
+    event.listen(Engine, "before_cursor_execute", counter)
+
+    context = load_context()
+    print(f"\n🏁 Benchmarking org {context['org_id']} "
+          f"({context['org_donors']} donors, {context['org_donations']} donations)")
+
+    # No context manager: the lifespan hook is not part of what we measure
+    client = TestClient(app, raise_server_exceptions=False)
+
+    scenario_results = []
+    for scenario in select_scenarios(args.scenarios):
+        print(f"  ⏱️  {scenario.name}...")
+        scenario_results.append(
+            run_scenario(client, scenario, context, counter, args.iterations, args.warmup)
+        )
+
+    results = {
+        "scale": args.scale,
+        "organization_id": context["org_id"],
+        "org_donors": context["org_donors"],
+        "org_donations": context["org_donations"],
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started_at": datetime.utcnow().isoformat(),
+        "iterations": args.iterations,
+        "scenarios": scenario_results,
+    }
+
+    comparison, regressed = None, False
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        comparison, regressed = compare_results(results, baseline, args.threshold)
+        results["comparison"] = {"baseline": args.compare, "threshold_pct": args.threshold,
+                                 "scenarios": comparison}
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{args.scale}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump(results, fh, indent=2)
+
+    print_report(results, comparison)
+    print(f"\n📄 Results written to {output}")
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Benchmark Scenarios
+Wise Investor Platform
+
+Scenarios cover the hottest analytics routes. HTTP scenarios are issued
+in-process against the FastAPI app so that every SQL statement can be
+counted; job scenarios call batch code directly.
+
+Paths use {org_id} as a placeholder for the benchmark organization.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+
+class Scenario:
+    """A single benchmarked operation"""
+
+    def __init__(
+            self,
+            name: str,
+            description: str,
+            method: str = "GET",
+            path: Optional[str] = None,
+            params: Optional[Dict] = None,
+            json: Optional[Dict] = None,
+            job: Optional[Callable] = None,
+            iterations: Optional[int] = None
+    ):
+        if not path and not job:
+            raise ValueError(f"Scenario '{name}' needs either a path or a job")
+        self.name = name
+        self.description = description
+        self.method = method
+        self.path = path
+        self.params = params or {}
+        self.json = json
+        self.job = job
+        # Jobs are slow; allow them to override the runner's iteration count
+        self.iterations = iterations
+
+    @property
+    def is_job(self) -> bool:
+        return self.job is not None
+
+    def render_path(self, org_id: str) -> str:
+        return self.path.format(org_id=org_id)
+
+
+def run_priority_refresh(context: Dict) -> None:
+    """Rebuild donor_priority_cache for the benchmark org"""
+    from datagen import populate_priority_cache
+
+    populate_priority_cache.DB_CONFIG.update(context["db_config"])
+    if not populate_priority_cache.populate_priority_cache(context["org_id"]):
+        raise RuntimeError("Priority cache refresh failed")
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario(
+        name="executive_dashboard",
+        description="Executive dashboard KPIs",
+        path="/api/v1/analytics/executive-dashboard/{org_id}",
+    ),
+    Scenario(
+        name="executive_dashboard_filtered",
+        description="Executive dashboard for the last 90 days",
+        path="/api/v1/analytics/executive-dashboard-filtered/{org_id}",
+        params={"period_type": "last90days"},
+    ),
+    Scenario(
+        name="rfm_analysis",
+        description="RFM scoring of the org's donors",
+        path="/api/v1/donor-intelligence/rfm-analysis/{org_id}",
+        params={"limit": 1000},
+    ),
+    Scenario(
+        name="donor_movement",
+        description="Year-over-year donor upgrades and downgrades",
+        path="/api/v1/analytics/donor-movement/{org_id}",
+    ),
+    Scenario(
+        name="retention_cohorts",
+        description="Retention cohorts timeline",
+        path="/api/v1/analytics/timeline/retention-cohorts/{org_id}",
+    ),
+    Scenario(
+        name="donor_churn_trend",
+        description="Quarterly donor churn trend",
+        path="/api/v1/analytics/reports/donor-churn/{org_id}/trend",
+        params={"months": 24},
+    ),
+    Scenario(
+        name="major_gifts_pipeline",
+        description="Major gifts pipeline from the prospect snapshot",
+        path="/api/v1/analytics/major-gifts/pipeline/{org_id}",
+    ),
+    Scenario(
+        name="major_gifts_next_actions",
+        description="Prioritized major gift next actions",
+        path="/api/v1/analytics/major-gifts/next-actions/{org_id}",
+    ),
+    Scenario(
+        name="dashboard_deadlines",
+        description="Upcoming deadlines (cached per org after the first iteration)",
+        path="/api/v1/dashboard/deadlines/{org_id}",
+        params={"days": 90},
+    ),
+    Scenario(
+        name="export_donations_csv",
+        description="Year-to-date donations export as CSV",
+        method="POST",
+        path="/api/v1/reports/export/{org_id}",
+        json={"export_type": "donations", "format": "csv"},
+    ),
+    Scenario(
+        name="export_donors_csv",
+        description="Full donor export as CSV",
+        method="POST",
+        path="/api/v1/reports/export/{org_id}",
+        json={"export_type": "donors", "format": "csv"},
+    ),
+    Scenario(
+        name="priority_refresh",
+        description="Major gifts priority cache rebuild",
+        job=run_priority_refresh,
+        iterations=3,
+    ),
+]
+
+
+def select_scenarios(names: Optional[List[str]] = None) -> List[Scenario]:
+    """Return the scenarios matching names (all of them when names is empty)"""
+    if not names:
+        return SCENARIOS
+    by_name = {s.name: s for s in SCENARIOS}
+    unknown = [n for n in names if n not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown scenario(s): {', '.join(unknown)}")
+    return [by_name[n] for n in names]
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark Dataset Seeder
+========================
+Builds a reproducible benchmark database on a local Postgres using the
+existing datagen generators.
+
+Usage (from the backend directory):
+    python -m benchmarks.seed_dataset --scale 1k
+    python -m benchmarks.seed_dataset --scale 100k --reset
+    python -m benchmarks.seed_dataset --scale 1m --reset --copy --workers 8
+    python -m benchmarks.seed_dataset --scale 1m --reset --copy --with-major-gifts
+
+The target database is taken from BENCH_DATABASE_URL.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.scales import BENCH_DATABASE_URL, SCALES, get_scale, db_config_from_url
+
+# database.py reads DATABASE_URL at import time, so point it at the bench DB first
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+
+from sqlalchemy import text  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+COUNTED_TABLES = [
+    "organizations", "users", "campaigns", "donors", "donations",
+    "major_gift_officers", "moves_management_stages", "donor_meetings",
+]
+
+
+def create_schema():
+    from database import engine, Base
+    import models  # noqa: F401 - registers every table on Base.metadata
+
+    print("\n🧱 Creating schema on benchmark database...")
+    Base.metadata.create_all(bind=engine)
+    print("✅ Schema ready")
+
+
+def reset_dataset():
+    from database import engine
+
+    print("\n🧹 Truncating existing benchmark data...")
+    with engine.begin() as conn:
+        conn.execute(text("TRUNCATE organizations CASCADE"))
+    print("✅ Benchmark database emptied")
+
+
+def count_rows() -> dict:
+    from database import engine
+
+    counts = {}
+    with engine.connect() as conn:
+        for table in COUNTED_TABLES:
+            counts[table] = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+    return counts
+
+
+def largest_organization_id():
+    from database import engine
+
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT organization_id
+            FROM donations
+            GROUP BY organization_id
+            ORDER BY COUNT(*) DESC
+            LIMIT 1
+        """)).scalar()
+
+
+def analyze():
+    from database import engine
+
+    print("\n📐 Running ANALYZE...")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def seed(scale_name: str, reset: bool = False, with_major_gifts: bool = False,
+         copy: bool = False, workers: int = None) -> dict:
+    from datagen.gendata import DataGenerator
+    from datagen.gendata_parallel import ParallelDataGenerator
+    from datagen.generate_comprehensive_analytics_data import DataGenerator as AnalyticsDataGenerator
+
+    scale = get_scale(scale_name)
+    db_config = db_config_from_url(BENCH_DATABASE_URL)
+
+    create_schema()
+
+    existing = count_rows()
+    if existing["donors"] and not reset:
+        print(f"\n⚠️  Benchmark database already has {existing['donors']} donors. "
+              f"Use --reset to regenerate.")
+        return {"scale": scale_name, "skipped": True, "row_counts": existing}
+
+    if reset:
+        reset_dataset()
+
+    timings = {}
+
+    start = time.perf_counter()
+    if copy:
+        timings["copy_load"] = ParallelDataGenerator(db_config=db_config, workers=workers).run(**scale)
+    elif not DataGenerator(db_config=db_config).run(**scale):
+        raise RuntimeError("Core data generation failed")
+    timings["core_seconds"] = round(time.perf_counter() - start, 2)
+
+    org_id = largest_organization_id()
+
+    if with_major_gifts:
+        start = time.perf_counter()
+        AnalyticsDataGenerator(org_id, db_config=db_config).generate_all()
+        timings["major_gifts_seconds"] = round(time.perf_counter() - start, 2)
+
+    analyze()
+
+    manifest = {
+        "scale": scale_name,
+        "scale_config": scale,
+        "database": db_config["dbname"],
+        "target_organization_id": str(org_id),
+        "with_major_gifts": with_major_gifts,
+        "generation_mode": "copy" if copy else "insert",
+        "row_counts": count_rows(),
+        "timings": timings,
+        "seeded_at": datetime.utcnow().isoformat(),
+    }
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    manifest_path = os.path.join(RESULTS_DIR, f"dataset-{scale_name}.json")
+    with open(manifest_path, "w") as fh:
+        json.dump(manifest, fh, indent=2)
+
+    print(f"\n📄 Dataset manifest written to {manifest_path}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the benchmark database")
+    parser.add_argument("--scale", choices=list(SCALES), default="1k")
+    parser.add_argument("--reset", action="store_true",
+                        help="Truncate existing benchmark data before seeding")
+    parser.add_argument("--with-major-gifts", action="store_true",
+                        help="Layer officers, moves stages, meetings and proposals on the largest org")
+    parser.add_argument("--copy", action="store_true",
+                        help="Generate donors and donations in parallel workers and load them with COPY")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for --copy (default: CPU count)")
+    args = parser.parse_args()
+
+    try:
+        seed(args.scale, reset=args.reset, with_major_gifts=args.with_major_gifts,
+             copy=args.copy, workers=args.workers)
+    except Exception as e:
+        print(f"\n❌ Seeding failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Startup Profile
+===============
+Measures worker cold start: `import main` in a fresh interpreter under
+`python -X importtime`, optionally followed by the app lifespan startup
+(schema version check). The report lists:
+
+- import and lifespan wall time per run, and their median
+- the slowest imports by cumulative time
+- time per top-level package (fastapi, sqlalchemy, models, analytics, ...)
+- modules that must stay lazy (numpy, reportlab) but were loaded at startup
+
+The budget check replaces a startup-time test (the backend has no test
+suite): the script exits 1 when a lazy module is imported at startup or the
+median startup time is over budget, so CI can run it as a gate.
+
+Wall time depends on the machine, so the default budget is relative: each
+run also times the framework floor (importing fastapi, pydantic and
+sqlalchemy.orm in a fresh interpreter) and startup may take at most
+--max-ratio times the floor. Most of the remainder is pydantic building the
+request/response models and FastAPI building the ~330 routes. Measured under
+-X importtime, median of 7 runs on one machine: 5.7s against a 1.3s floor
+(ratio 4.6); before numpy, pandas and reportlab became lazy it was 6.8s
+(ratio 5.3). The default --max-ratio of 5.0 sits between the two, so the
+pre-change startup fails the time budget on its own while the median keeps
+0.4 of headroom over the current ratio (single runs vary by about 0.5);
+eager heavy imports are also caught by the lazy module check. An absolute --budget (or STARTUP_BUDGET_SECONDS) is
+checked too when given, for a known CI machine.
+
+    python -m benchmarks.startup_profile --runs 5
+    python -m benchmarks.startup_profile --runs 5 --budget 6.0
+    python -m benchmarks.startup_profile --with-lifespan   # needs the database
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "0")) or None
+DEFAULT_MAX_RATIO = float(os.getenv("STARTUP_MAX_RATIO", "5.0"))
+
+# Heavy modules that routes load on first use; importing them at startup is a regression
+LAZY_MODULES = ("numpy", "reportlab", "pandas", "scipy")
+
+MARKER = "STARTUP_PROFILE "
+
+FLOOR_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import fastapi, pydantic, sqlalchemy.orm
+print({marker!r} + json.dumps({{"floor_seconds": time.perf_counter() - started}}))
+"""
+
+CHILD_SCRIPT = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+lifespan = None
+if {with_lifespan}:
+    async def run():
+        async with main.app.router.lifespan_context(main.app):
+            pass
+    asyncio.run(run())
+    lifespan = time.perf_counter() - imported
+print({marker!r} + json.dumps({{
+    "import_seconds": imported - started,
+    "lifespan_seconds": lifespan,
+    "modules": sorted(sys.modules),
+}}))
+"""
+
+
+def parse_importtime(stderr: str):
+    """(module, self_us, cumulative_us, depth) for every `-X importtime` line"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def _run_child(script: str, importtime: bool):
+    command = [sys.executable, "-X", "importtime", "-c", script] if importtime else [sys.executable, "-c", script]
+    proc = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True)
+    result_line = next((l for l in proc.stdout.splitlines() if l.startswith(MARKER)), None)
+    if proc.returncode != 0 or result_line is None:
+        raise RuntimeError(f"Startup failed:\n{proc.stderr[-3000:]}")
+    return json.loads(result_line[len(MARKER):]), proc.stderr
+
+
+def run_once(with_lifespan: bool):
+    result, stderr = _run_child(CHILD_SCRIPT.format(with_lifespan=with_lifespan, marker=MARKER), True)
+    result["imports"] = parse_importtime(stderr)
+    floor, _ = _run_child(FLOOR_SCRIPT.format(marker=MARKER), True)
+    result["floor_seconds"] = floor["floor_seconds"]
+    return result
+
+
+def summarize_imports(imports, top: int):
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in imports:
+        by_package[name.split(".")[0]] += self_us
+
+    slowest = sorted(imports, key=lambda row: row[2], reverse=True)[:top]
+    return {
+        "slowest_imports": [
+            {"module": name, "cumulative_ms": round(cum / 1000, 1), "self_ms": round(own / 1000, 1)}
+            for name, own, cum, _ in slowest
+        ],
+        "by_package_ms": {
+            package: round(us / 1000, 1)
+            for package, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        },
+    }
+
+
+def print_report(report):
+    print("\n" + "=" * 80)
+    print("STARTUP PROFILE")
+    print("=" * 80)
+    print(f"  import main (median of {report['runs']}): {report['import_seconds_median']:.2f}s")
+    if report["lifespan_seconds_median"] is not None:
+        print(f"  lifespan startup (median):     {report['lifespan_seconds_median']:.2f}s")
+    print(f"  total (median):                {report['startup_seconds_median']:.2f}s"
+          + (f" (budget {report['budget_seconds']:.2f}s)" if report["budget_seconds"] else ""))
+    print(f"  framework floor (median):      {report['floor_seconds_median']:.2f}s")
+    print(f"  startup / floor:               {report['floor_ratio']:.2f} (max {report['max_ratio']:.2f})")
+    print(f"  modules loaded:                {report['modules_loaded']}")
+
+    print("\nSLOWEST IMPORTS (cumulative)")
+    for row in report["slowest_imports"]:
+        print(f"  {row['cumulative_ms']:>9.1f} ms  {row['self_ms']:>8.1f} ms self  {row['module']}")
+
+    print("\nTIME BY PACKAGE (self)")
+    for package, ms in report["by_package_ms"].items():
+        print(f"  {ms:>9.1f} ms  {package}")
+
+    print("\nLAZY MODULES LOADED AT STARTUP")
+    for name in report["eager_lazy_modules"] or ["none ✅"]:
+        print(f"  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile API worker startup")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to start")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS,
+                        help="Maximum median startup time in seconds (default: not checked)")
+    parser.add_argument("--max-ratio", type=float, default=DEFAULT_MAX_RATIO,
+                        help="Maximum median startup time as a multiple of the framework floor")
+    parser.add_argument("--with-lifespan", action="store_true",
+                        help="Also run the lifespan startup (connects to the database)")
+    parser.add_argument("--top", type=int, default=25, help="Rows per report section")
+    parser.add_argument("--output", help="Path of the JSON report")
+    args = parser.parse_args()
+
+    print(f"\n⏱️  Starting the API {args.runs} time(s)...")
+    runs = []
+    for n in range(args.runs):
+        result = run_once(args.with_lifespan)
+        total = result["import_seconds"] + (result["lifespan_seconds"] or 0)
+        print(f"  run {n + 1}: {total:.2f}s (floor {result['floor_seconds']:.2f}s)")
+        runs.append(result)
+
+    totals = [r["import_seconds"] + (r["lifespan_seconds"] or 0) for r in runs]
+    lifespans = [r["lifespan_seconds"] for r in runs if r["lifespan_seconds"] is not None]
+    modules = runs[-1]["modules"]
+    eager = sorted(m for m in modules if m in LAZY_MODULES)
+    floor = statistics.median(r["floor_seconds"] for r in runs)
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "runs": args.runs,
+        "import_seconds_median": statistics.median(r["import_seconds"] for r in runs),
+        "lifespan_seconds_median": statistics.median(lifespans) if lifespans else None,
+        "startup_seconds_median": statistics.median(totals),
+        "budget_seconds": args.budget,
+        "floor_seconds_median": floor,
+        # Per run, so load on the machine affects both sides of the ratio alike
+        "floor_ratio": statistics.median(t / r["floor_seconds"] for t, r in zip(totals, runs)),
+        "max_ratio": args.max_ratio,
+        "modules_loaded": len(modules),
+        "eager_lazy_modules": eager,
+        **summarize_imports(runs[-1]["imports"], args.top),
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"startup-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump(report, fh, indent=2)
+
+    print_report(report)
+    print(f"\n📄 Report written to {output}")
+
+    failed = False
+    if report["floor_ratio"] > args.max_ratio:
+        print(f"\n❌ Startup is {report['floor_ratio']:.2f}x the framework floor, over the {args.max_ratio:.2f}x budget")
+        failed = True
+    if args.budget and report["startup_seconds_median"] > args.budget:
+        print(f"\n❌ Startup {report['startup_seconds_median']:.2f}s exceeds the {args.budget:.2f}s budget")
+        failed = True
+    if eager:
+        print(f"\n❌ Loaded at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    if not failed:
+        print("\n✅ Startup within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,11 +7,13 @@ COMPLETE FIXED Data Generation Script
 """
 
 import sys
+import os
+import argparse
 import random
 import hashlib
 from datetime import datetime, timedelta, date, timezone
 from decimal import Decimal
-from uuid import uuid4
+from uuid import UUID
 from faker import Faker
 import psycopg2
 from psycopg2.extras import execute_batch
@@ -20,6 +22,13 @@ fake = Faker()
 Faker.seed(2024)
 random.seed(2024)
 
+# IDs come from their own seeded stream so reruns produce the same keys
+# without shifting the values drawn from the main random stream
+_uuid_rng = random.Random(2024)
+
+def uuid4():
+    return UUID(int=_uuid_rng.getrandbits(128), version=4)
+
 # FAST hashing for test data (not production!)
 def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode('utf-8')).hexdigest()
@@ -28,11 +37,11 @@ def now_utc():
     return datetime.now(timezone.utc)
 
 DB_CONFIG = {
-    'dbname': 'organization_db3',
-    'user': 'orguser3',
-    'password': 'orgpassword3',
-    'host': 'localhost',
-    'port': 5432
+    'dbname': os.getenv('DATAGEN_DB_NAME', 'organization_db3'),
+    'user': os.getenv('DATAGEN_DB_USER', 'orguser3'),
+    'password': os.getenv('DATAGEN_DB_PASSWORD', 'orgpassword3'),
+    'host': os.getenv('DATAGEN_DB_HOST', 'localhost'),
+    'port': int(os.getenv('DATAGEN_DB_PORT', '5432'))
 }
 
 DONOR_TYPES = ['individual', 'corporate', 'foundation']
@@ -45,7 +54,8 @@ CAMPAIGN_STATUSES = ['draft', 'active', 'completed', 'archived']
 PROGRAM_STATUSES = ['active', 'completed', 'planned']
 
 class DataGenerator:
-    def __init__(self):
+    def __init__(self, db_config=None):
+        self.db_config = db_config or DB_CONFIG
         self.conn = None
         self.cur = None
         self.generated_data = {
@@ -59,7 +69,7 @@ class DataGenerator:
         
     def connect(self):
         print("\n🔌 Connecting to database...")
-        self.conn = psycopg2.connect(**DB_CONFIG)
+        self.conn = psycopg2.connect(**self.db_config)
         self.cur = self.conn.cursor()
         print("✅ Connected successfully!")
         
@@ -283,10 +293,15 @@ class DataGenerator:
         print(f"\n💵 Generating ~{total_donations} donations...")
         
         donations = []
+        campaigns_by_org = {}
+        for c in self.generated_data['campaigns']:
+            campaigns_by_org.setdefault(c['organization_id'], []).append(c)
+
         for donor in self.generated_data['donors']:
             donor_id = donor['id']
             org_id = donor['organization_id']
             min_amount, max_amount = donor['amount_range']
+            org_campaigns = campaigns_by_org.get(org_id, [])
             
             num_donations = random.randint(1, avg_per_donor * 2)
             
@@ -296,8 +311,6 @@ class DataGenerator:
                 donation_date = fake.date_between(start_date='-3y', end_date='today')
                 
                 # Get random campaign
-                org_campaigns = [c for c in self.generated_data['campaigns']
-                               if c['organization_id'] == org_id]
                 campaign_id = str(random.choice(org_campaigns)['id']) if org_campaigns else None
                 
                 donation_data = (
@@ -329,36 +342,57 @@ class DataGenerator:
         
         print(f"✅ Generated {len(donations)} donations")
         
-    def run(self):
+    def run(self, organizations=20, users_per_org=16, campaigns_per_org=3,
+            donors_per_org=100, avg_per_donor=5):
         try:
             self.connect()
             
             # Generate data
-            self.generate_organizations(count=20)
-            self.generate_users(users_per_org=16)
-            self.generate_campaigns(campaigns_per_org=3)
-            self.generate_donors(donors_per_org=100)
-            self.generate_donations(avg_per_donor=5)
+            self.generate_organizations(count=organizations)
+            self.generate_users(users_per_org=users_per_org)
+            self.generate_campaigns(campaigns_per_org=campaigns_per_org)
+            self.generate_donors(donors_per_org=donors_per_org)
+            self.generate_donations(avg_per_donor=avg_per_donor)
             
             print("\n" + "="*70)
             print("✅ DATA GENERATION COMPLETE!")
             print("="*70)
             print(f"\n📊 Summary:")
             print(f"  Organizations: {len(self.generated_data['organizations'])}")
-            print(f"  Users: {len(self.generated_data['organizations']) * 16}")
+            print(f"  Users: {len(self.generated_data['organizations']) * users_per_org}")
             print(f"  Campaigns: {len(self.generated_data['campaigns'])}")
             print(f"  Donors: {len(self.generated_data['donors'])}")
-            print(f"  Donations: ~{len(self.generated_data['donors']) * 5}")
+            print(f"  Donations: ~{len(self.generated_data['donors']) * avg_per_donor}")
             print(f"\n🎉 Your database is now populated with test data!")
+            return True
             
         except Exception as e:
             print(f"\n❌ Error: {e}")
             import traceback
             traceback.print_exc()
             self.conn.rollback()
+            return False
         finally:
             self.disconnect()
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate organizations, donors and donations")
+    parser.add_argument('--organizations', type=int, default=20)
+    parser.add_argument('--users-per-org', type=int, default=16)
+    parser.add_argument('--campaigns-per-org', type=int, default=3)
+    parser.add_argument('--donors-per-org', type=int, default=100)
+    parser.add_argument('--avg-per-donor', type=int, default=5)
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
     generator = DataGenerator()
-    generator.run()
+    generator.run(
+        organizations=args.organizations,
+        users_per_org=args.users_per_org,
+        campaigns_per_org=args.campaigns_per_org,
+        donors_per_org=args.donors_per_org,
+        avg_per_donor=args.avg_per_donor
+    )
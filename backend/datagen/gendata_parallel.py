@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Parallel COPY Data Generation
+=============================
+Bulk generation mode for multi-million-row fixtures.
+
+Organizations, users and campaigns are small and are created by the regular
+DataGenerator in gendata.py. Donors and their donations are split into chunks
+that worker processes generate independently and stream into Postgres with
+COPY ... FROM STDIN (CSV). Secondary indexes on donors and donations are
+dropped before the load and rebuilt once at the end.
+
+Determinism: every chunk seeds its own Faker and random.Random from the base
+seed (2024) and the chunk number, so the rows - including primary keys - are
+identical across runs no matter how many workers are used.
+
+Usage:
+    python gendata_parallel.py --workers 8 --organizations 20 --donors-per-org 50000
+    python gendata_parallel.py --workers 8 --donors-per-org 100000 --avg-per-donor 10
+"""
+
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from multiprocessing import Pool
+from uuid import UUID
+
+import psycopg2
+
+try:
+    from datagen.gendata import (
+        DataGenerator, DB_CONFIG, DONOR_TYPES, DONOR_STATUSES,
+        PAYMENT_METHODS, PAYMENT_STATUSES
+    )
+except ImportError:
+    from gendata import (
+        DataGenerator, DB_CONFIG, DONOR_TYPES, DONOR_STATUSES,
+        PAYMENT_METHODS, PAYMENT_STATUSES
+    )
+
+BASE_SEED = 2024
+DEFAULT_CHUNK_SIZE = 10000
+
+DONOR_COLUMNS = (
+    "id", "organization_id", "donor_type", "first_name", "last_name", "email", "phone",
+    "address", "city", "state", "postal_code", "country",
+    "first_donation_date", "last_donation_date", "donor_status",
+    "total_donated", "lifetime_value", "donor_level", "donation_count",
+    "giving_capacity", "planned_giving", "created_at", "updated_at"
+)
+
+DONATION_COLUMNS = (
+    "id", "organization_id", "donor_id", "campaign_id", "amount", "donation_date",
+    "payment_method", "payment_status", "created_at", "updated_at"
+)
+
+LOADED_TABLES = ("donors", "donations")
+
+# (cumulative probability, level, amount range) - same split as gendata.generate_donors
+DONOR_LEVEL_BANDS = (
+    (0.05, 'mega_donor', (100000, 500000)),
+    (0.15, 'major_donor', (10000, 99999)),
+    (0.35, 'mid_level', (1000, 9999)),
+    (0.70, 'upper_donor', (100, 999)),
+    (1.00, 'lower_donor', (10, 99)),
+)
+
+
+def chunk_seed(chunk_number: int) -> int:
+    return BASE_SEED * 1_000_003 + chunk_number
+
+
+def _donor_level(roll: float):
+    for threshold, level, amount_range in DONOR_LEVEL_BANDS:
+        if roll < threshold:
+            return level, amount_range
+    return DONOR_LEVEL_BANDS[-1][1], DONOR_LEVEL_BANDS[-1][2]
+
+
+def _copy_rows(cur, table, columns, buffer):
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+
+def generate_chunk(task: dict) -> dict:
+    """
+    Worker entry point: generate one chunk of donors plus their donations and
+    COPY both into Postgres. Returns per-table row counts and timings.
+    """
+    from faker import Faker
+
+    rng = random.Random(chunk_seed(task["chunk_number"]))
+    fake = Faker()
+    fake.seed_instance(chunk_seed(task["chunk_number"]))
+
+    def new_uuid():
+        return UUID(int=rng.getrandbits(128), version=4)
+
+    today = task["anchor_date"]
+    now = datetime.now(timezone.utc)
+    campaigns = task["campaign_ids"]
+    avg_per_donor = task["avg_per_donor"]
+
+    donor_buf, donation_buf = io.StringIO(), io.StringIO()
+    donor_writer, donation_writer = csv.writer(donor_buf), csv.writer(donation_buf)
+    donor_rows = donation_rows = 0
+
+    gen_start = time.perf_counter()
+    for _ in range(task["donor_count"]):
+        donor_id = new_uuid()
+        donor_type = rng.choice(DONOR_TYPES)
+        if donor_type == 'individual':
+            first_name, last_name = fake.first_name(), fake.last_name()
+        else:
+            first_name = fake.company()
+            last_name = 'Corp' if donor_type == 'corporate' else 'Foundation'
+
+        donor_level, (min_amount, max_amount) = _donor_level(rng.random())
+        total_donated = round(rng.uniform(min_amount, max_amount), 2)
+
+        donor_writer.writerow((
+            donor_id, task["organization_id"], donor_type, first_name, last_name,
+            fake.email(), fake.phone_number(),
+            fake.street_address(), fake.city(), fake.state(), fake.zipcode(), 'USA',
+            today - timedelta(days=rng.randint(0, 3650)),
+            today - timedelta(days=rng.randint(0, 365)),
+            rng.choice(DONOR_STATUSES), total_donated,
+            round(total_donated * rng.uniform(1.2, 2.0), 2),
+            donor_level, rng.randint(1, 50),
+            round(rng.uniform(min_amount, max_amount), 2),
+            rng.choice((True, False)), now, now
+        ))
+        donor_rows += 1
+
+        for _ in range(rng.randint(1, avg_per_donor * 2)):
+            donation_writer.writerow((
+                new_uuid(), task["organization_id"], donor_id,
+                rng.choice(campaigns) if campaigns else None,
+                round(rng.uniform(min_amount * 0.5, max_amount), 2),
+                today - timedelta(days=rng.randint(0, 3 * 365)),
+                rng.choice(PAYMENT_METHODS), rng.choice(PAYMENT_STATUSES),
+                now, now
+            ))
+            donation_rows += 1
+    gen_seconds = time.perf_counter() - gen_start
+
+    conn = psycopg2.connect(**task["db_config"])
+    try:
+        cur = conn.cursor()
+        start = time.perf_counter()
+        _copy_rows(cur, "donors", DONOR_COLUMNS, donor_buf)
+        donor_copy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _copy_rows(cur, "donations", DONATION_COLUMNS, donation_buf)
+        donation_copy_seconds = time.perf_counter() - start
+
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+
+    return {
+        "chunk_number": task["chunk_number"],
+        "generate_seconds": gen_seconds,
+        "donors": {"rows": donor_rows, "copy_seconds": donor_copy_seconds},
+        "donations": {"rows": donation_rows, "copy_seconds": donation_copy_seconds},
+    }
+
+
+class ParallelDataGenerator:
+    """Generates donors and donations in worker processes and loads them with COPY"""
+
+    def __init__(self, db_config=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.db_config = db_config or DB_CONFIG
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.base = DataGenerator(db_config=self.db_config)
+        self.dropped_indexes = []
+
+    # ------------------------------------------------------------------
+    # Index deferral
+    # ------------------------------------------------------------------
+
+    def _drop_secondary_indexes(self, cur):
+        """Drop indexes that are not backing a constraint and remember their DDL"""
+        cur.execute("""
+            SELECT i.indexname, i.indexdef
+            FROM pg_indexes i
+            WHERE i.schemaname = current_schema()
+              AND i.tablename = ANY(%s)
+              AND NOT EXISTS (
+                  SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname
+              )
+        """, (list(LOADED_TABLES),))
+        self.dropped_indexes = cur.fetchall()
+
+        for name, _ in self.dropped_indexes:
+            cur.execute(f'DROP INDEX IF EXISTS "{name}"')
+        print(f"  🗑️  Deferred {len(self.dropped_indexes)} secondary indexes")
+
+    def _rebuild_indexes(self, cur):
+        start = time.perf_counter()
+        for name, ddl in self.dropped_indexes:
+            print(f"  🔨 Rebuilding {name}...")
+            cur.execute(ddl)
+        self.dropped_indexes = []
+        return time.perf_counter() - start
+
+    # ------------------------------------------------------------------
+    # Generation
+    # ------------------------------------------------------------------
+
+    def _build_tasks(self, donors_per_org, avg_per_donor, anchor_date):
+        campaigns_by_org = {}
+        for c in self.base.generated_data['campaigns']:
+            campaigns_by_org.setdefault(c['organization_id'], []).append(str(c['id']))
+
+        tasks, chunk_number = [], 0
+        for org in self.base.generated_data['organizations']:
+            remaining = donors_per_org
+            while remaining > 0:
+                size = min(self.chunk_size, remaining)
+                tasks.append({
+                    "chunk_number": chunk_number,
+                    "organization_id": str(org['id']),
+                    "campaign_ids": campaigns_by_org.get(org['id'], []),
+                    "donor_count": size,
+                    "avg_per_donor": avg_per_donor,
+                    "anchor_date": anchor_date,
+                    "db_config": self.db_config,
+                })
+                chunk_number += 1
+                remaining -= size
+        return tasks
+
+    def _load_donors_and_donations(self, tasks):
+        totals = {table: {"rows": 0, "copy_seconds": 0.0} for table in LOADED_TABLES}
+        generate_seconds = 0.0
+        start = time.perf_counter()
+
+        with Pool(processes=self.workers) as pool:
+            for done, result in enumerate(pool.imap_unordered(generate_chunk, tasks), start=1):
+                generate_seconds += result["generate_seconds"]
+                for table in LOADED_TABLES:
+                    totals[table]["rows"] += result[table]["rows"]
+                    totals[table]["copy_seconds"] += result[table]["copy_seconds"]
+                print(f"  ⏳ Chunk {done}/{len(tasks)} loaded "
+                      f"({totals['donors']['rows']} donors, {totals['donations']['rows']} donations)")
+
+        return totals, generate_seconds, time.perf_counter() - start
+
+    def run(self, organizations=20, users_per_org=16, campaigns_per_org=3,
+            donors_per_org=100, avg_per_donor=5, anchor_date=None):
+        anchor_date = anchor_date or date.today()
+        report = {}
+
+        self.base.connect()
+        try:
+            self.base.generate_organizations(count=organizations)
+            self.base.generate_users(users_per_org=users_per_org)
+            self.base.generate_campaigns(campaigns_per_org=campaigns_per_org)
+
+            print(f"\n🚀 Loading {organizations * donors_per_org} donors with "
+                  f"{self.workers} workers (chunks of {self.chunk_size})...")
+            self._drop_secondary_indexes(self.base.cur)
+            self.base.conn.commit()
+
+            try:
+                tasks = self._build_tasks(donors_per_org, avg_per_donor, anchor_date)
+                totals, generate_seconds, wall_seconds = self._load_donors_and_donations(tasks)
+            finally:
+                index_seconds = self._rebuild_indexes(self.base.cur)
+                self.base.conn.commit()
+
+            for table in LOADED_TABLES:
+                rows = totals[table]["rows"]
+                report[table] = {
+                    "rows": rows,
+                    "copy_seconds": round(totals[table]["copy_seconds"], 2),
+                    "rows_per_second": round(rows / wall_seconds) if wall_seconds else 0,
+                }
+            report["generate_seconds"] = round(generate_seconds, 2)
+            report["wall_seconds"] = round(wall_seconds, 2)
+            report["index_rebuild_seconds"] = round(index_seconds, 2)
+            report["workers"] = self.workers
+
+            self.base.cur.execute("ANALYZE donors")
+            self.base.cur.execute("ANALYZE donations")
+            self.base.conn.commit()
+        except Exception:
+            self.base.conn.rollback()
+            raise
+        finally:
+            self.base.disconnect()
+
+        self.print_report(report)
+        return report
+
+    @staticmethod
+    def print_report(report):
+        print("\n" + "=" * 70)
+        print("✅ PARALLEL DATA GENERATION COMPLETE!")
+        print("=" * 70)
+        print(f"\n📊 Throughput ({report['workers']} workers, {report['wall_seconds']}s wall):")
+        for table in LOADED_TABLES:
+            stats = report[table]
+            print(f"  {table:<10} {stats['rows']:>12,} rows  "
+                  f"{stats['rows_per_second']:>10,} rows/s  "
+                  f"(COPY {stats['copy_seconds']}s across workers)")
+        print(f"  Row generation: {report['generate_seconds']}s across workers")
+        print(f"  Index rebuild:  {report['index_rebuild_seconds']}s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Parallel COPY-based data generation")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Donors generated per worker task")
+    parser.add_argument('--organizations', type=int, default=20)
+    parser.add_argument('--users-per-org', type=int, default=16)
+    parser.add_argument('--campaigns-per-org', type=int, default=3)
+    parser.add_argument('--donors-per-org', type=int, default=100)
+    parser.add_argument('--avg-per-donor', type=int, default=5)
+    parser.add_argument('--anchor-date', type=date.fromisoformat, default=None,
+                        help="Date that generated gift dates count back from (default: today)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    generator = ParallelDataGenerator(workers=args.workers, chunk_size=args.chunk_size)
+    try:
+        generator.run(
+            organizations=args.organizations,
+            users_per_org=args.users_per_org,
+            campaigns_per_org=args.campaigns_per_org,
+            donors_per_org=args.donors_per_org,
+            avg_per_donor=args.avg_per_donor,
+            anchor_date=args.anchor_date
+        )
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
@@ -50,8 +50,9 @@ DB_CONFIG = {
 class DataGenerator:
     """Main data generation orchestrator"""
     
-    def __init__(self, org_id):
+    def __init__(self, org_id, db_config=None):
         self.org_id = str(org_id)  # Ensure it's a string
+        self.db_config = db_config or DB_CONFIG
         self.conn = None
         self.cursor = None
         
@@ -73,7 +74,7 @@ class DataGenerator:
     def connect(self):
         """Establish database connection"""
         try:
-            self.conn = psycopg2.connect(**DB_CONFIG)
+            self.conn = psycopg2.connect(**self.db_config)
             self.cursor = self.conn.cursor()
             print("✓ Connected to database")
         except Exception as e:
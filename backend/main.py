@@ -1,6 +1,7 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Depends, HTTPException, Query, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -52,12 +53,17 @@ from analytics.campaign_new_analytics import router as campanalyticsrouter
 from ai_analytics.impact_analytics import router as impactrouter
 from analytics.major_gifts_api import router as giftsrouter
 from analytics.programimpactanalytics import router as proganalytisrouter
+from scheduler.jobs_api import router as jobs_router
+from scheduler.job_scheduler import start_in_process_scheduler, stop_in_process_scheduler
+from ai_analytics.thank_you_dispatch import thank_you_dispatcher
 from ai_analytics.financial_analytics import router as finhealthrouter
 import uvicorn
 from campaign.public_campaign_router import router as public_campaign_router
-from database import get_db, engine, Base
+from database import get_db, engine, Base, database_status, WorkloadSaturated
+from user_management.credential_service import credential_pool, credential_status, CredentialPoolSaturated
 import models
 import schemas
+from schemacreate.schema_version import check_schema_version
 
 
 
@@ -66,14 +72,22 @@ async def lifespan(app: FastAPI):
     """Lifespan event handler for startup and shutdown"""
     # Startup
     print("🚀 Starting up Wise Investor API...")
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created/verified")
+    schema = check_schema_version(engine, Base.metadata)
+    icon = "⚠️ " if schema["status"] in ("incomplete", "mismatch") else "✅"
+    print(f"{icon} Database schema {schema['status']} ({schema.get('fingerprint', schema['mode'])})")
+    if start_in_process_scheduler():
+        print("✅ Job scheduler started")
+    # Renews leases of this worker's thank-you jobs and resumes orphaned ones
+    thank_you_dispatcher.start()
     print("✅ Application startup complete")
 
     yield
 
     # Shutdown
     print("🛑 Shutting down application...")
+    credential_pool.shutdown()
+    stop_in_process_scheduler()
+    await thank_you_dispatcher.stop()
 
 
 # Initialize FastAPI app
@@ -175,6 +189,25 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
+
+@app.exception_handler(WorkloadSaturated)
+async def workload_saturated_handler(request: Request, exc: WorkloadSaturated):
+    """A workload class has no free database slot; ask the client to retry"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "workload": exc.workload},
+        headers={"Retry-After": "5"}
+    )
+
+@app.exception_handler(CredentialPoolSaturated)
+async def credential_pool_saturated_handler(request: Request, exc: CredentialPoolSaturated):
+    """No password hashing thread was free within CREDENTIAL_QUEUE_TIMEOUT_SECONDS; ask the client to retry"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "2"}
+    )
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(superadmin_router)
@@ -219,6 +252,7 @@ app.include_router(public_campaign_router)
 app.include_router(donations_router)
 app.include_router(donintrouter)
 app.include_router(giftsrouter)
+app.include_router(jobs_router)
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -246,6 +280,18 @@ async def health_check():
     }
 
 
+@app.get("/health/database", tags=["Health"])
+async def database_health():
+    """Pool saturation per workload class, read replica health, lag and fallbacks"""
+    return database_status()
+
+
+@app.get("/health/credentials", tags=["Health"])
+async def credentials_health():
+    """Password hashing pool: workers, queue, rejections and average bcrypt time"""
+    return credential_status()
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -5,26 +5,21 @@ Analyzes donors based on giving capacity, engagement, and opportunity
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, or_, desc, case, text
+from sqlalchemy import and_, desc
 from typing import List, Optional
-from datetime import datetime, date, timedelta
+from datetime import date
 from pydantic import BaseModel, Field
 from uuid import UUID
 from decimal import Decimal
 
-from database import get_db
+from database import get_db, get_batch_db
 from models import (
     Donors as Donor,
     DonorPriorityCache,
-    MovesManagementStages as MovesManagementStage,
-    GiftGoals as GiftGoal,
-    SolicitationProposals as SolicitationProposal,
-    DonorMeetings as DonorMeeting,
-    MajorGiftOfficer,
-    Donations as Donation,
-    DonorExclusionTags as DonorExclusionTag
+    DonorImpactScore,
+    MovesManagementStages as MovesManagementStage
 )
-from user_management.auth_dependencies import get_current_user
+from user_management.auth_dependencies import get_current_user, CurrentUser
 
 
 router = APIRouter(prefix="/api/v1/major-gifts", tags=["major-gifts"])
@@ -98,159 +93,13 @@ class HighImpactTarget(BaseModel):
         }
 
 
-# ============================================================================
-# HELPER FUNCTIONS
-# ============================================================================
-
-def calculate_impact_score(
-    opportunity_amount: float,
-    donor_level: str,
-    priority_level: int,
-    recent_meetings: int,
-    days_since_gift: Optional[int],
-    active_goals: int,
-    pending_proposals: int,
-    current_stage: Optional[str]
-) -> float:
-    """
-    Calculate a composite impact score (0-100) based on multiple factors
-    Higher score = higher priority target
-    """
-    score = 0.0
-    
-    # Opportunity size (0-30 points)
-    if opportunity_amount >= 100000:
-        score += 30
-    elif opportunity_amount >= 50000:
-        score += 25
-    elif opportunity_amount >= 25000:
-        score += 20
-    elif opportunity_amount >= 10000:
-        score += 15
-    elif opportunity_amount >= 5000:
-        score += 10
-    else:
-        score += 5
-    
-    # Donor level (0-20 points)
-    donor_level_scores = {
-        "mega_donor": 20,
-        "major_donor": 15,
-        "mid_level": 10,
-        "upper_donor": 5,
-        "lower_donor": 2
-    }
-    score += donor_level_scores.get(donor_level, 0)
-    
-    # Priority tier (0-15 points) - lower tier number = higher priority
-    if priority_level == 1:
-        score += 15
-    elif priority_level == 2:
-        score += 12
-    elif priority_level == 3:
-        score += 8
-    elif priority_level == 4:
-        score += 5
-    else:
-        score += 2
-    
-    # Recent engagement (0-15 points)
-    if recent_meetings >= 3:
-        score += 15
-    elif recent_meetings >= 2:
-        score += 10
-    elif recent_meetings >= 1:
-        score += 5
-    
-    # Recency of giving (0-10 points)
-    if days_since_gift is not None:
-        if days_since_gift <= 90:
-            score += 10
-        elif days_since_gift <= 180:
-            score += 7
-        elif days_since_gift <= 365:
-            score += 4
-        elif days_since_gift <= 730:
-            score += 2
-    
-    # Active goals (0-5 points)
-    if active_goals >= 2:
-        score += 5
-    elif active_goals >= 1:
-        score += 3
-    
-    # Pending proposals (0-5 points)
-    if pending_proposals >= 2:
-        score += 5
-    elif pending_proposals >= 1:
-        score += 3
-    
-    # Moves stage bonus (0-5 points)
-    stage_scores = {
-        "solicitation": 5,
-        "cultivation": 4,
-        "qualification": 3,
-        "stewardship": 2,
-        "identification": 1
-    }
-    if current_stage:
-        score += stage_scores.get(current_stage, 0)
-    
-    return min(round(score, 2), 100.0)
-
-
-def determine_engagement_level(recent_meetings: int, days_since_last_gift: Optional[int], 
-                               last_interaction_date: Optional[date]) -> str:
-    """Determine engagement level: Hot, Warm, or Cold"""
-    today = date.today()
-    
-    # Hot: Active recent engagement
-    if recent_meetings >= 2 or (days_since_last_gift and days_since_last_gift <= 90):
-        return "Hot"
-    
-    # Warm: Some recent activity
-    if (recent_meetings >= 1 or 
-        (days_since_last_gift and days_since_last_gift <= 180) or
-        (last_interaction_date and (today - last_interaction_date).days <= 180)):
-        return "Warm"
-    
-    # Cold: Limited recent activity
-    return "Cold"
-
-
-def determine_readiness_indicator(current_stage: Optional[str], 
-                                 pending_proposals: int,
-                                 active_goals: int,
-                                 engagement_level: str) -> str:
-    """Determine readiness for solicitation: Ready, Developing, or Long-term"""
-    
-    # Ready for solicitation
-    if (current_stage == "solicitation" or 
-        pending_proposals > 0 or
-        (current_stage == "cultivation" and engagement_level == "Hot")):
-        return "Ready"
-    
-    # Developing relationship
-    if (current_stage in ["cultivation", "qualification"] or
-        active_goals > 0 or
-        engagement_level in ["Hot", "Warm"]):
-        return "Developing"
-    
-    # Long-term cultivation needed
-    return "Long-term"
-
-
-def get_timeframe_date(timeframe: Optional[str]) -> Optional[date]:
-    """Calculate the start date based on timeframe"""
-    if not timeframe:
-        return None
-    
-    today = date.today()
-    if timeframe == "90_day":
-        return today - timedelta(days=90)
-    elif timeframe == "1_year":
-        return today - timedelta(days=365)
-    return None
+PRIORITY_DESCRIPTIONS = {
+    1: "$0 this year with gifts last year - URGENT",
+    2: "Last year's gifts > this year's gifts - High Priority",
+    3: "No gifts since 2023 - Reactivation Needed",
+    4: "No gifts since 2022 - Long-term Cultivation",
+    5: "On track or exceeding - Stewardship Focus"
+}
 
 
 # ============================================================================
@@ -276,7 +125,7 @@ async def get_high_impact_targets(
                                        description="Filter by readiness indicator"),
         limit: int = Query(100, ge=1, le=500, description="Maximum targets to return"),
         db: Session = Depends(get_db),
-        current_user: "CurrentUser" = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get high-impact donor targets for major gift fundraising.
@@ -288,20 +137,30 @@ async def get_high_impact_targets(
     - Active in cultivation or solicitation stages
     - Active gift goals or pending proposals
     
-    Results are scored and ranked by impact potential.
+    Results are scored and ranked by impact potential. Scores come from
+    donor_impact_scores (see majorgifts/impact_scoring.py), which is rebuilt in
+    one batch when the priority cache has changed since the last scoring run.
     """
-    
+    # Loaded on first use to keep numpy out of worker startup
+    from majorgifts.impact_scoring import candidate_filter, ensure_impact_scores, enum_value, priority_tier as tier_of
+
     try:
-        # Calculate timeframe date for filtering
-        timeframe_date = get_timeframe_date(timeframe)
-        
-        # Base query: Get donors with priority cache data
+        ensure_impact_scores(db, organization_id)
+
         query = db.query(
             DonorPriorityCache,
             Donor,
-            MovesManagementStage
+            MovesManagementStage,
+            DonorImpactScore
         ).join(
             Donor, DonorPriorityCache.donor_id == Donor.id
+        ).join(
+            DonorImpactScore,
+            and_(
+                DonorImpactScore.organization_id == organization_id,
+                DonorImpactScore.donor_id == DonorPriorityCache.donor_id,
+                DonorImpactScore.timeframe == (timeframe or "all")
+            )
         ).outerjoin(
             MovesManagementStage, 
             and_(
@@ -309,8 +168,8 @@ async def get_high_impact_targets(
                 MovesManagementStage.organization_id == organization_id
             )
         ).filter(
-            DonorPriorityCache.organization_id == organization_id,
-            DonorPriorityCache.is_current == True
+            # Mega and major donors, priority 1-3 or $5K+ opportunities, without exclusion tags
+            candidate_filter(organization_id)
         )
         
         # Apply filters
@@ -325,150 +184,30 @@ async def get_high_impact_targets(
         
         if stage:
             query = query.filter(MovesManagementStage.current_stage == stage)
+
+        if engagement:
+            query = query.filter(DonorImpactScore.engagement_level == engagement)
+
+        if readiness:
+            query = query.filter(DonorImpactScore.readiness_indicator == readiness)
         
-        # Focus on high-value opportunities (mega and major donors, priority 1-3)
-        query = query.filter(
-            or_(
-                DonorPriorityCache.current_donor_level.in_(['mega_donor', 'major_donor']),
-                DonorPriorityCache.priority_level.in_(['priority_1', 'priority_2', 'priority_3']),
-                DonorPriorityCache.opportunity_amount >= 5000
-            )
-        )
-        
-        # Exclude donors with exclusion tags (estate gifts, bequests, etc.)
-        query = query.filter(DonorPriorityCache.has_exclusion_tag == False)
-        
-        # Get base results
-        results = query.limit(limit * 2).all()  # Get more than needed for post-filtering
-        
-        # Enrich results with additional data
-        enriched_targets = []
+        results = query.order_by(desc(DonorImpactScore.impact_score)).limit(limit).all()
         
-        for priority_cache, donor, moves_stage in results:
-            # Get recent meeting count
-            recent_meetings = 0
-            last_interaction_date = None
-            if timeframe_date:
-                recent_meetings = db.query(func.count(DonorMeeting.id)).filter(
-                    DonorMeeting.donor_id == donor.id,
-                    DonorMeeting.organization_id == organization_id,
-                    DonorMeeting.actual_date >= timeframe_date
-                ).scalar() or 0
-                
-                # Get last interaction date
-                last_interaction = db.query(DonorMeeting.actual_date).filter(
-                    DonorMeeting.donor_id == donor.id,
-                    DonorMeeting.organization_id == organization_id
-                ).order_by(desc(DonorMeeting.actual_date)).first()
-                if last_interaction:
-                    last_interaction_date = last_interaction[0]
-            
-            # Get active gift goals
-            active_goals = db.query(
-                func.count(GiftGoal.id).label('count'),
-                func.sum(GiftGoal.goal_amount).label('total')
-            ).filter(
-                GiftGoal.donor_id == donor.id,
-                GiftGoal.organization_id == organization_id,
-                GiftGoal.status == 'active',
-                GiftGoal.is_realized == False
-            ).first()
-            
-            active_goals_count = active_goals.count if active_goals else 0
-            active_goals_total = active_goals.total if active_goals and active_goals.total else Decimal("0")
-            
-            # Get pending proposals
-            pending_proposals = db.query(
-                func.count(SolicitationProposal.id).label('count'),
-                func.sum(SolicitationProposal.requested_amount).label('total')
-            ).filter(
-                SolicitationProposal.donor_id == donor.id,
-                SolicitationProposal.organization_id == organization_id,
-                SolicitationProposal.status.in_(['sent', 'under_review'])
-            ).first()
-            
-            pending_proposals_count = pending_proposals.count if pending_proposals else 0
-            pending_proposals_total = pending_proposals.total if pending_proposals and pending_proposals.total else Decimal("0")
-            
-            # Get officer information
-            officer_name = None
-            officer_id = None
-            if moves_stage and moves_stage.officer_id:
-                officer = db.query(MajorGiftOfficer).filter(
-                    MajorGiftOfficer.id == moves_stage.officer_id
-                ).first()
-                if officer:
-                    officer_id = officer.id
-                    officer_name = f"{officer.first_name} {officer.last_name}"
-            
-            # Extract priority tier number
-            priority_tier_num = 5
-            if priority_cache.priority_level:
-                priority_level_str = str(priority_cache.priority_level)
-                if 'priority_' in priority_level_str:
-                    priority_tier_num = int(priority_level_str.split('_')[1])
-            
-            # Priority descriptions
-            priority_descriptions = {
-                1: "$0 this year with gifts last year - URGENT",
-                2: "Last year's gifts > this year's gifts - High Priority",
-                3: "No gifts since 2023 - Reactivation Needed",
-                4: "No gifts since 2022 - Long-term Cultivation",
-                5: "On track or exceeding - Stewardship Focus"
-            }
-            
-            # Calculate metrics
-            current_stage = str(moves_stage.current_stage) if moves_stage and moves_stage.current_stage else None
-            days_since_gift = priority_cache.days_since_last_gift
-            
-            # Calculate impact score
-            impact_score = calculate_impact_score(
-                opportunity_amount=float(priority_cache.opportunity_amount or 0),
-                donor_level=str(priority_cache.current_donor_level) if priority_cache.current_donor_level else "lower_donor",
-                priority_level=priority_tier_num,
-                recent_meetings=recent_meetings,
-                days_since_gift=days_since_gift,
-                active_goals=active_goals_count,
-                pending_proposals=pending_proposals_count,
-                current_stage=current_stage
-            )
-            
-            # Determine engagement and readiness
-            engagement_level = determine_engagement_level(
-                recent_meetings=recent_meetings,
-                days_since_last_gift=days_since_gift,
-                last_interaction_date=last_interaction_date or moves_stage.last_interaction_date if moves_stage else None
-            )
-            
-            readiness = determine_readiness_indicator(
-                current_stage=current_stage,
-                pending_proposals=pending_proposals_count,
-                active_goals=active_goals_count,
-                engagement_level=engagement_level
-            )
-            
-            # Apply post-query filters
-            if engagement and engagement_level != engagement:
-                continue
-            
-            if readiness and readiness != readiness:
-                continue
-            
-            # Get exclusion flags
-            exclusion_flags = []
-            if priority_cache.exclusion_tags:
-                exclusion_flags = priority_cache.exclusion_tags or []
-            
-            # Build target object
-            target = HighImpactTarget(
+        targets = []
+        for priority_cache, donor, moves_stage, score in results:
+            priority_tier_num = tier_of(priority_cache.priority_level)
+            donor_level_value = enum_value(priority_cache.current_donor_level) or "lower_donor"
+            current_stage = enum_value(moves_stage.current_stage) if moves_stage and moves_stage.current_stage else None
+
+            targets.append(HighImpactTarget(
                 donor_id=donor.id,
                 donor_name=f"{donor.first_name or ''} {donor.last_name or ''}".strip() or "Unknown Donor",
                 email=donor.email,
                 phone=donor.phone,
                 
-                donor_level=str(priority_cache.current_donor_level) if priority_cache.current_donor_level else "lower_donor",
+                donor_level=donor_level_value,
                 priority_tier=priority_tier_num,
-                priority_description=priority_descriptions.get(priority_tier_num, "Unknown Priority"),
+                priority_description=PRIORITY_DESCRIPTIONS.get(priority_tier_num, "Unknown Priority"),
                 
                 opportunity_amount=priority_cache.opportunity_amount or Decimal("0"),
                 giving_capacity=donor.giving_capacity,
@@ -481,39 +220,31 @@ async def get_high_impact_targets(
                 average_gift_amount=donor.average_donation or Decimal("0"),
                 
                 last_gift_date=priority_cache.last_gift_date,
-                days_since_last_gift=days_since_gift,
-                recent_meeting_count=recent_meetings,
-                last_interaction_date=last_interaction_date or (moves_stage.last_interaction_date if moves_stage else None),
+                days_since_last_gift=priority_cache.days_since_last_gift,
+                recent_meeting_count=score.recent_meeting_count or 0,
+                last_interaction_date=score.last_interaction_date,
                 
                 current_stage=current_stage,
                 stage_entered_date=moves_stage.stage_entered_date if moves_stage else None,
                 next_steps=moves_stage.next_steps if moves_stage else None,
                 
-                active_gift_goals_count=active_goals_count,
-                active_gift_goals_total=active_goals_total,
-                pending_proposals_count=pending_proposals_count,
-                pending_proposals_total=pending_proposals_total,
+                active_gift_goals_count=score.active_gift_goals_count or 0,
+                active_gift_goals_total=score.active_gift_goals_total or Decimal("0"),
+                pending_proposals_count=score.pending_proposals_count or 0,
+                pending_proposals_total=score.pending_proposals_total or Decimal("0"),
                 
-                officer_id=officer_id,
-                officer_name=officer_name,
+                officer_id=score.officer_id,
+                officer_name=score.officer_name,
                 
-                impact_score=impact_score,
-                engagement_level=engagement_level,
-                readiness_indicator=readiness,
+                impact_score=score.impact_score,
+                engagement_level=score.engagement_level,
+                readiness_indicator=score.readiness_indicator,
                 
-                exclusion_flags=exclusion_flags,
+                exclusion_flags=priority_cache.exclusion_tags or [],
                 notes_summary=donor.notes[:200] if donor.notes else None
-            )
-            
-            enriched_targets.append(target)
-        
-        # Sort by impact score descending
-        enriched_targets.sort(key=lambda x: x.impact_score, reverse=True)
+            ))
         
-        # Apply limit after sorting
-        enriched_targets = enriched_targets[:limit]
-        
-        return enriched_targets
+        return targets
         
     except Exception as e:
         raise HTTPException(
@@ -522,5 +253,23 @@ async def get_high_impact_targets(
         )
 
 
+@router.post("/high-impact-targets/{organization_id}/refresh")
+async def refresh_high_impact_targets(
+        organization_id: UUID,
+        db: Session = Depends(get_batch_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Rescore every high-impact candidate of the organization now"""
+    from majorgifts.impact_scoring import refresh_impact_scores
+
+    try:
+        return refresh_impact_scores(db, organization_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error refreshing high-impact targets: {str(e)}"
+        )
+
+
 # Export router
 __all__ = ['router']
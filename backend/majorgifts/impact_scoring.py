@@ -0,0 +1,385 @@
+"""
+High Impact Target Scoring
+Batch scorer behind GET /api/v1/major-gifts/high-impact-targets/{org}
+
+Scores every high-impact candidate of the current priority cache at once:
+meetings, active gift goals, pending proposals and assigned officers are
+prefetched for the whole candidate set with one grouped query each, and the
+impact score, engagement level (Hot/Warm/Cold) and readiness indicator
+(Ready/Developing/Long-term) are computed as NumPy arrays.
+
+Scores are stored in donor_impact_scores for each meeting timeframe the
+endpoint accepts ("all", "90_day", "1_year"), so the endpoint filters on
+engagement and readiness and ranks by impact score in SQL.
+
+Scores are rebuilt when the priority cache has been recalculated since the
+last scoring run (impact_score_refreshes, which also records runs that found
+no candidates) or when they are older than IMPACT_SCORE_MAX_AGE_HOURS. A
+refresh holds a per-organization advisory lock for its transaction, so
+concurrent requests wait for the first rebuild and then find it current.
+
+Run nightly after the priority cache refresh:
+    python -m majorgifts.impact_scoring
+    python -m majorgifts.impact_scoring --org <organization_id>
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from uuid import UUID
+import logging
+import os
+import time
+
+import numpy as np
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models import (
+    DonorImpactScore,
+    DonorPriorityCache,
+    ImpactScoreRefresh,
+    MovesManagementStages as MovesManagementStage,
+    GiftGoals as GiftGoal,
+    SolicitationProposals as SolicitationProposal,
+    DonorMeetings as DonorMeeting,
+    MajorGiftOfficer,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_HOURS = float(os.getenv("IMPACT_SCORE_MAX_AGE_HOURS", "24"))
+
+# Meeting windows; "all" counts no meetings, as the endpoint does without a timeframe
+TIMEFRAMES = {"all": None, "90_day": 90, "1_year": 365}
+
+# First key of pg_advisory_xact_lock(key, hashtext(org)) held by a refresh
+REFRESH_LOCK_KEY = 4040
+
+PENDING_PROPOSAL_STATUSES = ['sent', 'under_review']
+
+DONOR_LEVEL_POINTS = {
+    "mega_donor": 20,
+    "major_donor": 15,
+    "mid_level": 10,
+    "upper_donor": 5,
+    "lower_donor": 2
+}
+
+STAGE_POINTS = {
+    "solicitation": 5,
+    "cultivation": 4,
+    "qualification": 3,
+    "stewardship": 2,
+    "identification": 1
+}
+
+
+def enum_value(value) -> Optional[str]:
+    return getattr(value, "value", value)
+
+
+def priority_tier(priority_level) -> int:
+    """5 for an unknown level, else N from priority_N"""
+    value = enum_value(priority_level)
+    if value and str(value).startswith("priority_"):
+        return int(str(value).split("_")[1])
+    return 5
+
+
+def candidate_filter(organization_id: UUID):
+    """High-impact candidates: current, not excluded, major level, priority 1-3 or a $5K+ opportunity"""
+    return and_(
+        DonorPriorityCache.organization_id == organization_id,
+        DonorPriorityCache.is_current == True,
+        DonorPriorityCache.has_exclusion_tag == False,
+        or_(
+            DonorPriorityCache.current_donor_level.in_(['mega_donor', 'major_donor']),
+            DonorPriorityCache.priority_level.in_(['priority_1', 'priority_2', 'priority_3']),
+            DonorPriorityCache.opportunity_amount >= 5000
+        )
+    )
+
+
+# =====================================================================
+# PREFETCH
+# =====================================================================
+
+def prefetch_engagement(db: Session, organization_id: UUID, today: date) -> Dict[str, Dict]:
+    """Meetings, goals, proposals and officers of every candidate, one grouped query each"""
+    candidates = db.query(DonorPriorityCache.donor_id).filter(candidate_filter(organization_id)).subquery()
+
+    meetings = db.query(
+        DonorMeeting.donor_id,
+        func.count(DonorMeeting.id).filter(DonorMeeting.actual_date >= today - timedelta(days=90)).label('meetings_90_day'),
+        func.count(DonorMeeting.id).filter(DonorMeeting.actual_date >= today - timedelta(days=365)).label('meetings_1_year'),
+        func.max(DonorMeeting.actual_date).label('last_meeting')
+    ).filter(
+        DonorMeeting.organization_id == organization_id,
+        DonorMeeting.donor_id.in_(candidates)
+    ).group_by(DonorMeeting.donor_id).all()
+
+    goals = db.query(
+        GiftGoal.donor_id,
+        func.count(GiftGoal.id).label('count'),
+        func.sum(GiftGoal.goal_amount).label('total')
+    ).filter(
+        GiftGoal.organization_id == organization_id,
+        GiftGoal.donor_id.in_(candidates),
+        GiftGoal.status == 'active',
+        GiftGoal.is_realized == False
+    ).group_by(GiftGoal.donor_id).all()
+
+    proposals = db.query(
+        SolicitationProposal.donor_id,
+        func.count(SolicitationProposal.id).label('count'),
+        func.sum(SolicitationProposal.requested_amount).label('total')
+    ).filter(
+        SolicitationProposal.organization_id == organization_id,
+        SolicitationProposal.donor_id.in_(candidates),
+        SolicitationProposal.status.in_(PENDING_PROPOSAL_STATUSES)
+    ).group_by(SolicitationProposal.donor_id).all()
+
+    stages = db.query(
+        MovesManagementStage.donor_id,
+        MovesManagementStage.current_stage,
+        MovesManagementStage.last_interaction_date,
+        MajorGiftOfficer.id.label('officer_id'),
+        MajorGiftOfficer.first_name,
+        MajorGiftOfficer.last_name
+    ).outerjoin(
+        MajorGiftOfficer, MajorGiftOfficer.id == MovesManagementStage.officer_id
+    ).filter(
+        MovesManagementStage.organization_id == organization_id,
+        MovesManagementStage.donor_id.in_(candidates)
+    ).all()
+
+    return {
+        "meetings": {row.donor_id: row for row in meetings},
+        "goals": {row.donor_id: row for row in goals},
+        "proposals": {row.donor_id: row for row in proposals},
+        "stages": {row.donor_id: row for row in stages},
+    }
+
+
+# =====================================================================
+# VECTORIZED SCORING
+# =====================================================================
+
+def _lookup(values: List[Optional[str]], points: Dict[str, int]) -> np.ndarray:
+    """Map labels to points through their unique values"""
+    if not values:
+        return np.zeros(0)
+    unique, inverse = np.unique(np.array([v or "" for v in values]), return_inverse=True)
+    return np.array([points.get(u, 0) for u in unique], dtype=float)[inverse]
+
+
+def score_arrays(opportunity: np.ndarray, donor_level: List[Optional[str]], tier: np.ndarray,
+                 meetings: np.ndarray, days_since_gift: np.ndarray, active_goals: np.ndarray,
+                 pending_proposals: np.ndarray, stage: List[Optional[str]],
+                 days_since_interaction: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Impact score (0-100), engagement level and readiness for every candidate.
+    Missing day counts are NaN and never satisfy a recency rule.
+    """
+    score = (
+        np.select(
+            [opportunity >= 100000, opportunity >= 50000, opportunity >= 25000,
+             opportunity >= 10000, opportunity >= 5000],
+            [30, 25, 20, 15, 10], 5)
+        + _lookup(donor_level, DONOR_LEVEL_POINTS)
+        + np.select([tier == 1, tier == 2, tier == 3, tier == 4], [15, 12, 8, 5], 2)
+        + np.select([meetings >= 3, meetings >= 2, meetings >= 1], [15, 10, 5], 0)
+        + np.select(
+            [days_since_gift <= 90, days_since_gift <= 180, days_since_gift <= 365, days_since_gift <= 730],
+            [10, 7, 4, 2], 0)
+        + np.select([active_goals >= 2, active_goals >= 1], [5, 3], 0)
+        + np.select([pending_proposals >= 2, pending_proposals >= 1], [5, 3], 0)
+        + _lookup(stage, STAGE_POINTS)
+    )
+    score = np.minimum(np.round(score, 2), 100.0)
+
+    hot = (meetings >= 2) | (days_since_gift <= 90)
+    warm = (meetings >= 1) | (days_since_gift <= 180) | (days_since_interaction <= 180)
+    engagement = np.where(hot, "Hot", np.where(warm, "Warm", "Cold"))
+
+    stages = np.array([s or "" for s in stage])
+    ready = (stages == "solicitation") | (pending_proposals > 0) | ((stages == "cultivation") & hot)
+    developing = np.isin(stages, ["cultivation", "qualification"]) | (active_goals > 0) | hot | warm
+    readiness = np.where(ready, "Ready", np.where(developing, "Developing", "Long-term"))
+
+    return {"impact_score": score, "engagement_level": engagement, "readiness_indicator": readiness}
+
+
+def _days_since(dates: List[Optional[date]], today: date) -> np.ndarray:
+    return np.array([(today - d).days if d else np.nan for d in dates], dtype=float)
+
+
+# =====================================================================
+# REFRESH
+# =====================================================================
+
+def lock_organization(db: Session, organization_id: UUID) -> None:
+    """Serialize refreshes of one organization until the transaction ends"""
+    db.execute(text("SELECT pg_advisory_xact_lock(:key, hashtext(:org))"),
+               {"key": REFRESH_LOCK_KEY, "org": str(organization_id)})
+
+
+def refresh_impact_scores(db: Session, organization_id: UUID, today: Optional[date] = None,
+                          only_if_stale: bool = False) -> Dict:
+    """
+    Score every current high-impact candidate for each timeframe and replace
+    the org's scores. With only_if_stale the run is skipped when another
+    refresh made the scores current while this one waited for the lock.
+    """
+    start = time.perf_counter()
+    today = today or date.today()
+
+    lock_organization(db, organization_id)
+    if only_if_stale and scores_are_current(db, organization_id):
+        db.commit()
+        return {"organization_id": str(organization_id), "skipped": "current"}
+    now = datetime.now(timezone.utc)
+
+    cache = db.query(
+        DonorPriorityCache.donor_id,
+        DonorPriorityCache.opportunity_amount,
+        DonorPriorityCache.current_donor_level,
+        DonorPriorityCache.priority_level,
+        DonorPriorityCache.days_since_last_gift
+    ).filter(candidate_filter(organization_id)).all()
+    related = prefetch_engagement(db, organization_id, today)
+
+    donor_ids = [row.donor_id for row in cache]
+    meetings = [related["meetings"].get(d) for d in donor_ids]
+    goals = [related["goals"].get(d) for d in donor_ids]
+    proposals = [related["proposals"].get(d) for d in donor_ids]
+    stages = [related["stages"].get(d) for d in donor_ids]
+
+    opportunity = np.array([float(row.opportunity_amount or 0) for row in cache])
+    donor_level = [enum_value(row.current_donor_level) or "lower_donor" for row in cache]
+    tier = np.array([priority_tier(row.priority_level) for row in cache])
+    days_since_gift = np.array(
+        [row.days_since_last_gift if row.days_since_last_gift is not None else np.nan for row in cache], dtype=float)
+    goal_counts = np.array([g.count if g else 0 for g in goals])
+    proposal_counts = np.array([p.count if p else 0 for p in proposals])
+    stage = [enum_value(s.current_stage) if s else None for s in stages]
+
+    rows = []
+    for timeframe, window in TIMEFRAMES.items():
+        if window is None:
+            meeting_counts = np.zeros(len(cache))
+            last_interaction = [s.last_interaction_date if s else None for s in stages]
+        else:
+            meeting_counts = np.array([getattr(m, f"meetings_{timeframe}") if m else 0 for m in meetings])
+            last_interaction = [
+                (m.last_meeting if m else None) or (s.last_interaction_date if s else None)
+                for m, s in zip(meetings, stages)
+            ]
+
+        scores = score_arrays(
+            opportunity, donor_level, tier, meeting_counts, days_since_gift,
+            goal_counts, proposal_counts, stage, _days_since(last_interaction, today)
+        )
+
+        for i, donor_id in enumerate(donor_ids):
+            s = stages[i]
+            rows.append({
+                "organization_id": organization_id,
+                "donor_id": donor_id,
+                "timeframe": timeframe,
+                "impact_score": float(scores["impact_score"][i]),
+                "engagement_level": str(scores["engagement_level"][i]),
+                "readiness_indicator": str(scores["readiness_indicator"][i]),
+                "recent_meeting_count": int(meeting_counts[i]),
+                "last_interaction_date": last_interaction[i],
+                "active_gift_goals_count": int(goal_counts[i]),
+                "active_gift_goals_total": goals[i].total if goals[i] and goals[i].total else 0,
+                "pending_proposals_count": int(proposal_counts[i]),
+                "pending_proposals_total": proposals[i].total if proposals[i] and proposals[i].total else 0,
+                "officer_id": s.officer_id if s else None,
+                "officer_name": f"{s.first_name} {s.last_name}" if s and s.officer_id else None,
+                "scored_at": now,
+            })
+
+    if rows:
+        statement = insert(DonorImpactScore)
+        db.execute(statement.on_conflict_do_update(
+            constraint="unique_donor_impact_score",
+            set_={column: statement.excluded[column] for column in rows[0]
+                  if column not in ("organization_id", "donor_id", "timeframe")}
+        ), rows)
+    # Donors that are no longer candidates
+    db.query(DonorImpactScore).filter(
+        DonorImpactScore.organization_id == organization_id,
+        DonorImpactScore.scored_at < now
+    ).delete(synchronize_session=False)
+
+    marker = insert(ImpactScoreRefresh).values(
+        organization_id=organization_id, scored_at=now, candidates=len(donor_ids), rows=len(rows)
+    )
+    db.execute(marker.on_conflict_do_update(
+        index_elements=[ImpactScoreRefresh.organization_id],
+        set_={"scored_at": now, "candidates": len(donor_ids), "rows": len(rows)}
+    ))
+    db.commit()
+
+    stats = {
+        "organization_id": str(organization_id),
+        "candidates": len(donor_ids),
+        "rows": len(rows),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    logger.info(f"Impact scores refreshed: {stats}")
+    return stats
+
+
+def scores_are_current(db: Session, organization_id: UUID) -> bool:
+    """Scored after the last priority cache calculation and within MAX_AGE_HOURS"""
+    scored_at = db.query(ImpactScoreRefresh.scored_at).filter(
+        ImpactScoreRefresh.organization_id == organization_id
+    ).scalar()
+    if scored_at is None:
+        return False
+    if scored_at.tzinfo is None:
+        scored_at = scored_at.replace(tzinfo=timezone.utc)
+    if datetime.now(timezone.utc) - scored_at > timedelta(hours=MAX_AGE_HOURS):
+        return False
+
+    cache_updated = db.query(func.max(DonorPriorityCache.updated_at)).filter(
+        DonorPriorityCache.organization_id == organization_id,
+        DonorPriorityCache.is_current == True
+    ).scalar()
+    if cache_updated is None:
+        return True
+    if cache_updated.tzinfo is None:
+        cache_updated = cache_updated.replace(tzinfo=timezone.utc)
+    return cache_updated <= scored_at
+
+
+def ensure_impact_scores(db: Session, organization_id: UUID) -> None:
+    """Refresh stale scores; concurrent callers wait on the lock and re-check"""
+    if not scores_are_current(db, organization_id):
+        refresh_impact_scores(db, organization_id, only_if_stale=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Refresh high-impact target scores")
+    parser.add_argument("--org", action="append", help="Organization ID (repeatable); default all")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        org_ids = [UUID(o) for o in args.org] if args.org else [
+            row[0] for row in session.query(DonorPriorityCache.organization_id).filter(
+                DonorPriorityCache.is_current == True
+            ).distinct().all()
+        ]
+        for org_id in org_ids:
+            print(refresh_impact_scores(session, org_id))
+    finally:
+        session.close()
@@ -4,15 +4,15 @@ Major Gift Development API Routes - Part 3: YTD Segments View and Analysis
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, extract, case, or_, desc, between
+from sqlalchemy import and_, func, or_, desc, between
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timedelta
 from pydantic import BaseModel, UUID4
-from decimal import Decimal
-from models import Donations as Donation, DonorExclusionTags as DonorExclusionTag,MovesManagementStages as MovesManagementStage, DonorPriorityCache
+from models import Donations as Donation, DonorExclusionTags as DonorExclusionTag,MovesManagementStages as MovesManagementStage
 from database import get_db
 from majorgifts.major_gifts_api_part1 import verify_organization_access
 from majorgifts.major_gifts_api_part2 import SegmentYTDResponse
+from scheduler.job_scheduler import enqueue_run, run_dict
 
 from user_management.auth_dependencies import get_current_user
 
@@ -225,136 +225,30 @@ async def refresh_donor_priority_cache(
         current_user: "CurrentUser" = Depends(get_current_user)
 ):
     """
-    Refresh the donor priority cache by recalculating priorities based on current giving history.
+    Queue a refresh of the donor priority cache. The job scheduler runs it
+    under the organization's lease (majorgifts/prioritycacheservice.py);
+    follow it with GET /api/v1/jobs/status/{organization_id}.
 
-    This should be run periodically (e.g., nightly) to keep priorities up to date.
+    The cache is also refreshed nightly by the scheduler.
     """
     verify_organization_access(organization_id, current_user)
 
     try:
-        # Get all donors with giving history
-        current_year = date.today().year
-
-        # Calculate giving totals by year for all donors
-        donors_query = db.query(
-            Donation.party_id,
-            func.sum(case((extract('year', Donation.donation_date) == current_year, Donation.amount))).label('current_year_total'),
-            func.sum(case((extract('year', Donation.donation_date) == current_year - 1, Donation.amount))).label('last_year_total'),
-            func.sum(case((extract('year', Donation.donation_date) == current_year - 2, Donation.amount))).label('two_years_ago_total'),
-            func.max(Donation.donation_date).label('last_gift_date'),
-            func.sum(Donation.amount).label('lifetime_total')
-        ).filter(
-            Donation.organization_id == organization_id,
-            Donation.payment_status == 'completed'
-        ).group_by(Donation.party_id)
-
-        donors = donors_query.all()
-
-        processed_count = 0
-
-        for donor in donors:
-            current_total = float(donor.current_year_total or 0)
-            last_year_total = float(donor.last_year_total or 0)
-            two_years_ago_total = float(donor.two_years_ago_total or 0)
-            lifetime_total = float(donor.lifetime_total or 0)
-
-            # Determine priority tier and opportunity value
-            priority_tier = None
-            opportunity_value = 0.0
-            calculation_basis = ""
-
-            # Priority 1: $0 this year with gifts last year
-            if current_total == 0 and last_year_total > 0:
-                priority_tier = 1
-                opportunity_value = last_year_total
-                calculation_basis = "Based on last year's gifts"
-
-            # Priority 2: Last year > this year
-            elif last_year_total > current_total and current_total > 0:
-                priority_tier = 2
-                opportunity_value = last_year_total - current_total
-                calculation_basis = "Based on the difference/delta"
-
-            # Priority 3: No gifts since 2023
-            elif current_total == 0 and last_year_total == 0 and two_years_ago_total > 0:
-                priority_tier = 3
-                opportunity_value = two_years_ago_total
-                calculation_basis = "Based on 2023 gifts"
-
-            # Priority 4: No gifts since 2022 (would need 3 years ago data)
-            elif current_total == 0 and last_year_total == 0 and two_years_ago_total == 0 and lifetime_total > 0:
-                priority_tier = 4
-                opportunity_value = lifetime_total * 0.5  # Conservative estimate
-                calculation_basis = "Based on historical giving"
-
-            # Priority 5: This year >= last year
-            elif current_total >= last_year_total and current_total > 0:
-                priority_tier = 5
-                opportunity_value = current_total * 0.2
-                calculation_basis = "Based on 20% of this year's gifts"
-
-            # Determine donor level
-            max_gift = max(current_total, last_year_total, two_years_ago_total)
-            if max_gift >= 100000:
-                donor_level = "Mega Donors"
-            elif max_gift >= 10000:
-                donor_level = "Major Donors"
-            elif max_gift >= 1000:
-                donor_level = "Mid-level"
-            elif max_gift >= 100:
-                donor_level = "Upper Donors"
-            else:
-                donor_level = "Lower Donors"
-
-            # Get officer assignment if exists
-            officer_assignment = db.query(MovesManagementStage).filter(
-                MovesManagementStage.party_id == donor.party_id,
-                MovesManagementStage.organization_id == organization_id
-            ).first()
-
-            officer_id = officer_assignment.officer_id if officer_assignment else None
-
-            # Invalidate old records
-            db.query(DonorPriorityCache).filter(
-                DonorPriorityCache.party_id == donor.party_id,
-                DonorPriorityCache.organization_id == organization_id,
-                DonorPriorityCache.is_current == True
-            ).update({'is_current': False})
-
-            # Create new cache record
-            new_cache = DonorPriorityCache(
-                organization_id=organization_id,
-                party_id=donor.party_id,
-                officer_id=officer_id,
-                priority_tier=priority_tier,
-                opportunity_value=Decimal(str(opportunity_value)),
-                opportunity_calculation_basis=calculation_basis,
-                current_year_total=Decimal(str(current_total)),
-                last_year_total=Decimal(str(last_year_total)),
-                two_years_ago_total=Decimal(str(two_years_ago_total)),
-                donor_level=donor_level,
-                last_gift_date=donor.last_gift_date,
-                is_current=True
-            )
-
-            db.add(new_cache)
-            processed_count += 1
-
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": f"Priority cache refreshed for {processed_count} donors",
-            "processed_count": processed_count,
-            "organization_id": str(organization_id)
-        }
-
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error refreshing priority cache: {str(e)}"
+        run, created = enqueue_run(
+            db, "priority_cache", organization_id,
+            trigger="manual",
+            options={"force_full_refresh": force_full_refresh},
+            requested_by=current_user.id
         )
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    return {
+        "status": "queued",
+        "message": "Priority cache refresh queued" if created else "A priority cache refresh is already queued",
+        "run": run_dict(run),
+        "organization_id": str(organization_id)
+    }
 
 
 # ============================================================================
@@ -1,28 +1,196 @@
 """
 Priority Cache Refresh Service
 This module handles the calculation and caching of donor priorities and opportunities
-Run this as a scheduled job (daily at 2 AM recommended)
+
+Runs as the "priority_cache" job of the scheduler (scheduler/job_scheduler.py),
+daily at 2 AM, or on demand through POST /api/v1/jobs/priority_cache/trigger/{org}
+and POST /api/v1/major-gifts/refresh-priority-cache.
+
+The giving metrics of every donor of the organization come from one grouped
+query, and active exclusion tags and primary portfolio assignments from one
+query each. The new rows are published in one transaction: the previous
+generation is dropped, the current one is flagged is_current = false and the
+new one is inserted as current, so readers see either the old cache or the
+new one (unique_current_donor_priority allows one row of each per donor).
+
+Without force_full_refresh an organization whose current cache was calculated
+today is skipped when no donation, exclusion tag or portfolio assignment
+changed since.
+
+Donor levels, priorities, opportunities and YoY changes are computed for the
+whole batch at once on int64 cents arrays (_score_arrays); the Decimal
+_calculate_* methods remain the reference they are checked against (--check).
+
+Every organization at once: refresh_all_priorities shards the work across
+worker processes. An organization with up to SHARD_DONORS donors is one
+shard, scored and published by the worker; a larger one is split into donor
+hash ranges whose rows the parent merges and publishes in one transaction,
+so readers never see a partly refreshed organization. The run reports donors
+per second per worker process.
+
+The parent claims each organization's "priority_cache" run and job_leases
+row (scheduler/job_scheduler.py claim_runs) before any shard is scored,
+renews the leases while the pool runs and finishes the run and releases its
+lease once the organization is published, so a scheduled or triggered
+refresh of the same org never interleaves with it; an org leased by another
+worker is left to it. Every shard reads through the snapshot the parent
+exports after claiming (SET TRANSACTION SNAPSHOT), so the donor ranges of an
+organization are scored from one consistent view of its donations.
+
+    python -m majorgifts.prioritycacheservice --org <organization_id> [--force]
+    python -m majorgifts.prioritycacheservice --all --workers 8 [--shard-donors 50000] [--force]
+    python -m majorgifts.prioritycacheservice --org <organization_id> --check
 """
 
-from datetime import datetime, date, timedelta
-from decimal import Decimal
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from multiprocessing import Pool
 from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 import logging
+import math
+import re
+import time
 
-from sqlalchemy import select, update, and_, func, case, extract
-from sqlalchemy.ext.asyncio import AsyncSession
+import numpy as np
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
 
 from models import (
-    Donor, Donation, DonorPriorityCache, DonorExclusionTag,
-    DonorPortfolioAssignment, MajorGiftOfficer
-)
-from models.major_gifts import (
-    DonorLevelEnum, PriorityLevelEnum, PortfolioRoleEnum
+    DonorPriorityCache,
+    DonorLevelEnum,
+    PriorityLevelEnum,
+    PortfolioRoleEnum,
 )
 
 logger = logging.getLogger(__name__)
 
+# Giving metrics of every donor of the org (donors without gifts get zeros), amounts
+# in whole cents as stored; with :shards > 1 only the donors of one hash range
+DONOR_METRICS_SQL = text("""
+    SELECT
+        d.id AS donor_id,
+        ROUND(COALESCE(SUM(g.amount) FILTER (WHERE g.donation_date >= :twelve_months_ago), 0) * 100)::bigint
+                                                                                                AS current_year_cents,
+        ROUND(COALESCE(SUM(g.amount) FILTER (WHERE g.donation_date >= :twenty_four_months_ago
+                                               AND g.donation_date < :twelve_months_ago), 0) * 100)::bigint
+                                                                                                AS last_year_cents,
+        ROUND(COALESCE(SUM(g.amount) FILTER (WHERE g.donation_date >= :thirty_six_months_ago
+                                               AND g.donation_date < :twenty_four_months_ago), 0) * 100)::bigint
+                                                                                                AS two_years_ago_cents,
+        ROUND(COALESCE(SUM(g.amount) FILTER (WHERE EXTRACT(YEAR FROM g.donation_date) = 2023), 0) * 100)::bigint
+                                                                                                AS year_2023_cents,
+        ROUND(COALESCE(SUM(g.amount) FILTER (WHERE EXTRACT(YEAR FROM g.donation_date) = 2022), 0) * 100)::bigint
+                                                                                                AS year_2022_cents,
+        ROUND(COALESCE(MAX(g.amount), 0) * 100)::bigint                                         AS largest_gift_cents,
+        ((ARRAY_AGG(g.donation_date ORDER BY g.amount DESC, g.donation_date DESC)
+            FILTER (WHERE g.id IS NOT NULL))[1])::date                                          AS largest_gift_date,
+        MAX(g.donation_date)::date                                                              AS last_gift_date,
+        :today - MAX(g.donation_date)::date                                                     AS days_since_last_gift,
+        COUNT(g.id) FILTER (WHERE g.donation_date >= :twelve_months_ago)                        AS gift_count_current,
+        COUNT(g.id) FILTER (WHERE g.donation_date >= :twenty_four_months_ago
+                              AND g.donation_date < :twelve_months_ago)                         AS gift_count_last,
+        COUNT(g.id) FILTER (WHERE g.donation_date >= :thirty_six_months_ago
+                              AND g.donation_date < :twenty_four_months_ago)                    AS gift_count_two_years
+    FROM donors d
+    LEFT JOIN donations g ON g.donor_id = d.id AND g.organization_id = :org_id
+    WHERE d.organization_id = :org_id
+      AND (:shards = 1 OR (hashtext(d.id::text) & 2147483647) % :shards = :shard)
+    GROUP BY d.id
+""")
+
+ORG_DONOR_COUNTS_SQL = text("""
+    SELECT organization_id, COUNT(*) AS donors
+    FROM donors
+    WHERE organization_id IS NOT NULL
+    GROUP BY organization_id
+""")
+
+EXCLUSION_TAGS_SQL = text("""
+    SELECT donor_id, ARRAY_AGG(DISTINCT exclusion_tag::text) AS tags
+    FROM donor_exclusion_tags
+    WHERE organization_id = :org_id
+      AND is_active = true
+    GROUP BY donor_id
+""")
+
+# Primary active assignment per donor (the most recent one if there are several)
+PORTFOLIO_ASSIGNMENTS_SQL = text("""
+    SELECT DISTINCT ON (a.donor_id)
+        a.donor_id,
+        a.officer_id,
+        o.portfolio_role::text AS portfolio_role
+    FROM donor_portfolio_assignments a
+    JOIN major_gift_officers o ON o.id = a.officer_id
+    WHERE a.organization_id = :org_id
+      AND a.is_active = true
+      AND a.is_primary = true
+    ORDER BY a.donor_id, a.assignment_date DESC
+""")
+
+# Calculation date and last update of the current cache, and whether its inputs changed since
+CACHE_STATE_SQL = text("""
+    WITH cache AS (
+        SELECT MIN(calculation_date) AS calculated_on, MAX(updated_at) AS updated_at
+        FROM donor_priority_cache
+        WHERE organization_id = :org_id AND is_current = true
+    )
+    SELECT
+        cache.calculated_on,
+        EXISTS (SELECT 1 FROM donations
+                WHERE organization_id = :org_id
+                  AND GREATEST(created_at, updated_at) > cache.updated_at)
+     OR EXISTS (SELECT 1 FROM donor_exclusion_tags
+                WHERE organization_id = :org_id AND updated_at > cache.updated_at)
+     OR EXISTS (SELECT 1 FROM donor_portfolio_assignments
+                WHERE organization_id = :org_id AND updated_at > cache.updated_at) AS changed
+    FROM cache
+""")
+
+# Numeric(10, 2) bound of yoy_percentage_change
+MAX_YOY_PERCENTAGE = Decimal("99999999.99")
+MAX_YOY_HUNDREDTHS = int(MAX_YOY_PERCENTAGE * 100)
+
+# Donors per shard of the multi-process refresh; larger orgs are split into donor hash ranges
+SHARD_DONORS = 50000
+
+# Index order of _score_arrays results
+DONOR_LEVELS = (
+    DonorLevelEnum.mega_donor,
+    DonorLevelEnum.major_donor,
+    DonorLevelEnum.mid_level,
+    DonorLevelEnum.upper_donor,
+    DonorLevelEnum.lower_donor,
+)
+PRIORITY_LEVELS = (
+    PriorityLevelEnum.priority_1,
+    PriorityLevelEnum.priority_2,
+    PriorityLevelEnum.priority_3,
+    PriorityLevelEnum.priority_4,
+    PriorityLevelEnum.priority_5,
+)
+OPPORTUNITY_BASIS = (
+    "Priority 1: Full last year amount (${})",
+    "Priority 2: Delta from last year (${})",
+    "Priority 3: 2023 gift amount (${})",
+    "Priority 4: 2022 gift amount (${})",
+    "Priority 5: 20% growth opportunity (${})",
+)
+
+
+def _money(cents: int, negative: bool) -> str:
+    """Cents as Decimal formats them with ',.2f' (a negative amount that rounds to zero keeps its sign)"""
+    cents = abs(cents)
+    return f"{'-' if negative else ''}{cents // 100:,}.{cents % 100:02d}"
+
+
+ZERO_AMOUNT = Decimal("0.00")
+
+
+def _amount(cents: int) -> Decimal:
+    # Most yearly totals are zero; Decimals are immutable, so one instance serves them all
+    return Decimal(cents).scaleb(-2) if cents else ZERO_AMOUNT
+
 
 class PriorityCacheService:
     """Service for calculating and refreshing donor priority cache"""
@@ -36,28 +204,28 @@ class PriorityCacheService:
     # Priority 5 opportunity percentage
     PRIORITY_5_OPPORTUNITY_PCT = Decimal("0.20")  # 20% growth opportunity
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: Session):
         self.db = db
 
-    async def refresh_organization_priorities(
+    def refresh_organization_priorities(
             self,
             organization_id: UUID,
             force_full_refresh: bool = False
-    ) -> Dict[str, int]:
+    ) -> Dict:
         """
         Refresh priority cache for an entire organization
 
         Args:
             organization_id: The organization to refresh
-            force_full_refresh: If True, recalculates all donors even if recently updated
+            force_full_refresh: If True, recalculates even if the cache is from today and nothing changed
 
         Returns:
             Dict with statistics about the refresh
         """
-        logger.info(f"Starting priority cache refresh for org {organization_id}")
-
-        start_time = datetime.utcnow()
+        start = time.perf_counter()
+        today = date.today()
         stats = {
+            "organization_id": str(organization_id),
             "total_donors": 0,
             "updated": 0,
             "priority_1": 0,
@@ -66,325 +234,195 @@ class PriorityCacheService:
             "priority_4": 0,
             "priority_5": 0,
             "excluded": 0,
+            "skipped": False,
         }
 
-        try:
-            # Step 1: Get all donors for this organization
-            donor_ids = await self._get_all_donor_ids(organization_id)
-            stats["total_donors"] = len(donor_ids)
-
-            logger.info(f"Processing {len(donor_ids)} donors")
-
-            # Step 2: Mark all existing cache records as not current
-            await self._mark_cache_as_stale(organization_id)
-
-            # Step 3: Calculate priorities for each donor
-            batch_size = 100
-            for i in range(0, len(donor_ids), batch_size):
-                batch = donor_ids[i:i + batch_size]
-                batch_stats = await self._process_donor_batch(
-                    organization_id,
-                    batch
-                )
-
-                # Aggregate stats
-                for key in ["updated", "priority_1", "priority_2", "priority_3",
-                            "priority_4", "priority_5", "excluded"]:
-                    stats[key] += batch_stats.get(key, 0)
-
-                # Commit in batches
-                await self.db.commit()
-
-            duration = (datetime.utcnow() - start_time).total_seconds()
-            logger.info(
-                f"Priority cache refresh completed in {duration:.2f}s. "
-                f"Updated {stats['updated']} donors"
-            )
-
+        if not force_full_refresh and self._cache_is_current(organization_id, today):
+            stats["skipped"] = True
+            stats["seconds"] = round(time.perf_counter() - start, 3)
+            logger.info(f"Priority cache of org {organization_id} is current, skipped")
             return stats
 
+        try:
+            rows, counts = self.score_rows(organization_id, today)
+            stats.update(counts)
+            self._publish(organization_id, rows)
+            stats["updated"] = len(rows)
+
         except Exception as e:
             logger.error(f"Error refreshing priority cache: {str(e)}")
-            await self.db.rollback()
+            self.db.rollback()
             raise
 
-    async def _get_all_donor_ids(self, organization_id: UUID) -> List[UUID]:
-        """Get all donor IDs for an organization"""
-        result = await self.db.execute(
-            select(Donor.id)
-            .where(Donor.organization_id == organization_id)
-        )
-        return [row[0] for row in result.all()]
-
-    async def _mark_cache_as_stale(self, organization_id: UUID):
-        """Mark all current cache records as not current"""
-        await self.db.execute(
-            update(DonorPriorityCache)
-            .where(
-                and_(
-                    DonorPriorityCache.organization_id == organization_id,
-                    DonorPriorityCache.is_current == True
-                )
-            )
-            .values(is_current=False)
-        )
+        stats["seconds"] = round(time.perf_counter() - start, 3)
+        logger.info(f"Priority cache refreshed: {stats}")
+        return stats
 
-    async def _process_donor_batch(
-            self,
-            organization_id: UUID,
-            donor_ids: List[UUID]
-    ) -> Dict[str, int]:
-        """Process a batch of donors and update their priority cache"""
-        stats = {
-            "updated": 0,
-            "priority_1": 0,
-            "priority_2": 0,
-            "priority_3": 0,
-            "priority_4": 0,
-            "priority_5": 0,
-            "excluded": 0,
+    def _cache_is_current(self, organization_id: UUID, today: date) -> bool:
+        state = self.db.execute(CACHE_STATE_SQL, {"org_id": organization_id}).first()
+        return bool(state and state.calculated_on == today and not state.changed)
+
+    def _donor_metrics(self, organization_id: UUID, today: date, shard: int = 0, shards: int = 1) -> Dict[str, List]:
+        """Giving metrics of every donor of the organization (or of one shard), as columns"""
+        result = self.db.execute(DONOR_METRICS_SQL, {
+            "org_id": organization_id,
+            "today": today,
+            "twelve_months_ago": today - timedelta(days=365),
+            "twenty_four_months_ago": today - timedelta(days=730),
+            "thirty_six_months_ago": today - timedelta(days=1095),
+            "shard": shard,
+            "shards": shards,
+        })
+        keys = list(result.keys())
+        columns = list(zip(*result.all())) or [()] * len(keys)
+        return {key: list(column) for key, column in zip(keys, columns)}
+
+    def _exclusion_tags(self, organization_id: UUID) -> Dict[UUID, List[str]]:
+        """Active exclusion tags per donor"""
+        return {
+            row.donor_id: sorted(row.tags)
+            for row in self.db.execute(EXCLUSION_TAGS_SQL, {"org_id": organization_id})
         }
 
-        for donor_id in donor_ids:
-            try:
-                # Calculate donor metrics
-                metrics = await self._calculate_donor_metrics(organization_id, donor_id)
-
-                # Check for exclusion tags
-                has_exclusion = await self._has_active_exclusion(organization_id, donor_id)
-                exclusion_tags = await self._get_exclusion_tags(organization_id, donor_id) if has_exclusion else []
-
-                # Get portfolio assignment
-                officer_info = await self._get_portfolio_assignment(organization_id, donor_id)
-
-                # Determine donor level
-                donor_level = self._calculate_donor_level(
-                    metrics['largest_gift_amount'],
-                    metrics['current_year_total']
-                )
-
-                # Determine priority level
-                priority_level = self._calculate_priority_level(
-                    metrics['current_year_total'],
-                    metrics['last_year_total'],
-                    metrics['year_2023_total'],
-                    metrics['year_2022_total']
-                )
-
-                # Calculate opportunity amount
-                opportunity = self._calculate_opportunity_amount(
-                    priority_level,
-                    metrics['current_year_total'],
-                    metrics['last_year_total'],
-                    metrics['year_2023_total'],
-                    metrics['year_2022_total']
-                )
-
-                # Calculate YoY metrics
-                yoy_change = metrics['current_year_total'] - metrics['last_year_total']
-                yoy_pct = (
-                    ((metrics['current_year_total'] - metrics['last_year_total'])
-                     / metrics['last_year_total'] * 100)
-                    if metrics['last_year_total'] > 0 else None
-                )
-
-                # Days since last gift
-                days_since = (
-                    (date.today() - metrics['last_gift_date']).days
-                    if metrics['last_gift_date'] else None
-                )
-
-                # Create or update cache record
-                cache_record = DonorPriorityCache(
-                    organization_id=organization_id,
-                    donor_id=donor_id,
-                    current_donor_level=donor_level,
-                    priority_level=priority_level,
-                    current_year_total=metrics['current_year_total'],
-                    last_year_total=metrics['last_year_total'],
-                    two_years_ago_total=metrics['two_years_ago_total'],
-                    year_2023_total=metrics['year_2023_total'],
-                    year_2022_total=metrics['year_2022_total'],
-                    largest_gift_amount=metrics['largest_gift_amount'],
-                    largest_gift_date=metrics['largest_gift_date'],
-                    opportunity_amount=opportunity['amount'],
-                    opportunity_basis=opportunity['basis'],
-                    yoy_dollar_change=yoy_change,
-                    yoy_percentage_change=yoy_pct,
-                    gift_count_current_year=metrics['gift_count_current'],
-                    gift_count_last_year=metrics['gift_count_last'],
-                    gift_count_two_years_ago=metrics['gift_count_two_years'],
-                    last_gift_date=metrics['last_gift_date'],
-                    days_since_last_gift=days_since,
-                    assigned_officer_id=officer_info['officer_id'],
-                    portfolio_role=officer_info['portfolio_role'],
-                    has_exclusion_tag=has_exclusion,
-                    exclusion_tags=exclusion_tags,
-                    calculation_date=date.today(),
-                    is_current=True
-                )
-
-                # Merge (upsert) the record
-                await self.db.merge(cache_record)
-
-                stats["updated"] += 1
-                stats[f"priority_{priority_level.value.split('_')[1]}"] += 1
-                if has_exclusion:
-                    stats["excluded"] += 1
-
-            except Exception as e:
-                logger.error(f"Error processing donor {donor_id}: {str(e)}")
-                continue
+    def _portfolio_assignments(self, organization_id: UUID) -> Dict[UUID, Tuple]:
+        """(officer_id, portfolio_role) of the primary active assignment per donor"""
+        return {
+            row.donor_id: (row.officer_id, PortfolioRoleEnum(row.portfolio_role) if row.portfolio_role else None)
+            for row in self.db.execute(PORTFOLIO_ASSIGNMENTS_SQL, {"org_id": organization_id})
+        }
 
-        return stats
+    def score_rows(self, organization_id: UUID, today: date, shard: int = 0,
+                   shards: int = 1) -> Tuple[List[Dict], Dict[str, int]]:
+        """donor_priority_cache rows of the organization's donors (or one shard) and counts per priority"""
+        metrics = self._donor_metrics(organization_id, today, shard, shards)
+        exclusions = self._exclusion_tags(organization_id)
+        assignments = self._portfolio_assignments(organization_id)
 
-    async def _calculate_donor_metrics(
-            self,
-            organization_id: UUID,
-            donor_id: UUID
-    ) -> Dict:
-        """Calculate giving metrics for a donor"""
+        cents = {
+            name: np.array(metrics[f"{name}_cents"], dtype=np.int64)
+            for name in ("current_year", "last_year", "two_years_ago", "year_2023", "year_2022", "largest_gift")
+        }
+        scores = self._score_arrays(
+            cents["current_year"], cents["last_year"], cents["year_2023"], cents["year_2022"], cents["largest_gift"]
+        )
 
-        # Define date ranges
-        today = date.today()
-        twelve_months_ago = today - timedelta(days=365)
-        twenty_four_months_ago = today - timedelta(days=730)
-        thirty_six_months_ago = today - timedelta(days=1095)
-
-        # Query donations with aggregations
-        result = await self.db.execute(
-            select(
-                # Current year (rolling 12 months)
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (Donation.donation_date >= twelve_months_ago, Donation.amount),
-                            else_=0
-                        )
-                    ),
-                    0
-                ).label('current_year_total'),
-
-                # Last year (12-24 months ago)
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (
-                                and_(
-                                    Donation.donation_date >= twenty_four_months_ago,
-                                    Donation.donation_date < twelve_months_ago
-                                ),
-                                Donation.amount
-                            ),
-                            else_=0
-                        )
-                    ),
-                    0
-                ).label('last_year_total'),
-
-                # Two years ago (24-36 months ago)
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (
-                                and_(
-                                    Donation.donation_date >= thirty_six_months_ago,
-                                    Donation.donation_date < twenty_four_months_ago
-                                ),
-                                Donation.amount
-                            ),
-                            else_=0
-                        )
-                    ),
-                    0
-                ).label('two_years_ago_total'),
-
-                # Year 2023
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (extract('year', Donation.donation_date) == 2023, Donation.amount),
-                            else_=0
-                        )
-                    ),
-                    0
-                ).label('year_2023_total'),
-
-                # Year 2022
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (extract('year', Donation.donation_date) == 2022, Donation.amount),
-                            else_=0
-                        )
-                    ),
-                    0
-                ).label('year_2022_total'),
-
-                # Largest gift
-                func.coalesce(func.max(Donation.amount), 0).label('largest_gift_amount'),
-
-                # Last gift date
-                func.max(Donation.donation_date).label('last_gift_date'),
-
-                # Gift counts
-                func.count(
-                    case(
-                        (Donation.donation_date >= twelve_months_ago, 1),
-                        else_=None
-                    )
-                ).label('gift_count_current'),
-
-                func.count(
-                    case(
-                        (
-                            and_(
-                                Donation.donation_date >= twenty_four_months_ago,
-                                Donation.donation_date < twelve_months_ago
-                            ),
-                            1
-                        ),
-                        else_=None
-                    )
-                ).label('gift_count_last'),
-
-                func.count(
-                    case(
-                        (
-                            and_(
-                                Donation.donation_date >= thirty_six_months_ago,
-                                Donation.donation_date < twenty_four_months_ago
-                            ),
-                            1
-                        ),
-                        else_=None
-                    )
-                ).label('gift_count_two_years'),
-            )
-            .where(
-                and_(
-                    Donation.donor_id == donor_id,
-                    Donation.organization_id == organization_id
-                )
+        levels = scores["donor_level"].tolist()
+        priorities = scores["priority"].tolist()
+        opportunity = scores["opportunity"].tolist()
+        negative = scores["opportunity_negative"].tolist()
+        yoy = scores["yoy_hundredths"].tolist()
+        has_yoy = (cents["last_year"] > 0).tolist()
+        amounts = {name: values.tolist() for name, values in cents.items()}
+        change = (cents["current_year"] - cents["last_year"]).tolist()
+
+        rows = []
+        excluded = 0
+        for i, donor_id in enumerate(metrics["donor_id"]):
+            tags = exclusions.get(donor_id, [])
+            officer_id, portfolio_role = assignments.get(donor_id, (None, None))
+            excluded += bool(tags)
+            rows.append({
+                "organization_id": organization_id,
+                "donor_id": donor_id,
+                "current_donor_level": DONOR_LEVELS[levels[i]],
+                "priority_level": PRIORITY_LEVELS[priorities[i]],
+                "current_year_total": _amount(amounts["current_year"][i]),
+                "last_year_total": _amount(amounts["last_year"][i]),
+                "two_years_ago_total": _amount(amounts["two_years_ago"][i]),
+                "year_2023_total": _amount(amounts["year_2023"][i]),
+                "year_2022_total": _amount(amounts["year_2022"][i]),
+                "largest_gift_amount": _amount(amounts["largest_gift"][i]),
+                "largest_gift_date": metrics["largest_gift_date"][i],
+                "opportunity_amount": _amount(opportunity[i]),
+                "opportunity_basis": OPPORTUNITY_BASIS[priorities[i]].format(_money(opportunity[i], negative[i])),
+                "yoy_dollar_change": _amount(change[i]),
+                "yoy_percentage_change": _amount(yoy[i]) if has_yoy[i] else None,
+                "gift_count_current_year": metrics["gift_count_current"][i],
+                "gift_count_last_year": metrics["gift_count_last"][i],
+                "gift_count_two_years_ago": metrics["gift_count_two_years"][i],
+                "last_gift_date": metrics["last_gift_date"][i],
+                "days_since_last_gift": metrics["days_since_last_gift"][i],
+                "assigned_officer_id": officer_id,
+                "portfolio_role": portfolio_role,
+                "has_exclusion_tag": bool(tags),
+                "exclusion_tags": tags,
+                "calculation_date": today,
+                "is_current": True,
+            })
+
+        per_priority = np.bincount(scores["priority"], minlength=len(PRIORITY_LEVELS))
+        counts = {level.value: int(n) for level, n in zip(PRIORITY_LEVELS, per_priority)}
+        counts["total_donors"] = len(rows)
+        counts["excluded"] = excluded
+        return rows, counts
+
+    @classmethod
+    def _score_arrays(
+            cls,
+            current_year: np.ndarray,
+            last_year: np.ndarray,
+            year_2023: np.ndarray,
+            year_2022: np.ndarray,
+            largest_gift: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        _calculate_donor_level, _calculate_priority_level and
+        _calculate_opportunity_amount over int64 cents arrays, plus the YoY
+        percentage in hundredths. Indexes refer to DONOR_LEVELS and
+        PRIORITY_LEVELS; amounts round half away from zero like numeric does.
+        """
+        thresholds = np.array([
+            int(threshold * 100) for threshold in (
+                cls.UPPER_DONOR_THRESHOLD, cls.MID_LEVEL_THRESHOLD,
+                cls.MAJOR_DONOR_THRESHOLD, cls.MEGA_DONOR_THRESHOLD
             )
+        ], dtype=np.int64)
+        donor_level = len(thresholds) - np.searchsorted(thresholds, np.maximum(largest_gift, current_year), side="right")
+
+        no_recent = (current_year == 0) & (last_year == 0)
+        priority = np.select(
+            [
+                (current_year == 0) & (last_year > 0),
+                (last_year > current_year) & (current_year > 0),
+                no_recent & (year_2023 > 0),
+                no_recent & (year_2023 == 0) & (year_2022 > 0),
+            ],
+            [0, 1, 2, 3],
+            4
         )
 
-        row = result.first()
+        # Priority 5 growth in 1/10000 of a cent, then rounded to cents
+        growth = current_year * int(cls.PRIORITY_5_OPPORTUNITY_PCT * 10000)
+        growth_cents = np.sign(growth) * ((np.abs(growth) + 5000) // 10000)
+        opportunity = np.choose(priority, [last_year, last_year - current_year, year_2023, year_2022, growth_cents])
+
+        has_last = last_year > 0
+        divisor = np.where(has_last, last_year, 1)
+        numerator = (current_year - last_year) * 10000
+        yoy = np.sign(numerator) * ((2 * np.abs(numerator) + divisor) // (2 * divisor))
 
         return {
-            'current_year_total': Decimal(str(row.current_year_total or 0)),
-            'last_year_total': Decimal(str(row.last_year_total or 0)),
-            'two_years_ago_total': Decimal(str(row.two_years_ago_total or 0)),
-            'year_2023_total': Decimal(str(row.year_2023_total or 0)),
-            'year_2022_total': Decimal(str(row.year_2022_total or 0)),
-            'largest_gift_amount': Decimal(str(row.largest_gift_amount or 0)),
-            'largest_gift_date': row.last_gift_date,
-            'last_gift_date': row.last_gift_date,
-            'gift_count_current': row.gift_count_current,
-            'gift_count_last': row.gift_count_last,
-            'gift_count_two_years': row.gift_count_two_years,
+            "donor_level": donor_level,
+            "priority": priority,
+            "opportunity": opportunity,
+            "opportunity_negative": (priority == 4) & (growth < 0),
+            "yoy_hundredths": np.where(has_last, np.clip(yoy, -MAX_YOY_HUNDREDTHS, MAX_YOY_HUNDREDTHS), 0),
         }
 
+    def _publish(self, organization_id: UUID, rows: List[Dict]) -> None:
+        """Replace the org's current cache with rows in one transaction"""
+        self.db.query(DonorPriorityCache).filter(
+            DonorPriorityCache.organization_id == organization_id,
+            DonorPriorityCache.is_current == False
+        ).delete(synchronize_session=False)
+        self.db.query(DonorPriorityCache).filter(
+            DonorPriorityCache.organization_id == organization_id,
+            DonorPriorityCache.is_current == True
+        ).update({"is_current": False}, synchronize_session=False)
+        if rows:
+            self.db.execute(insert(DonorPriorityCache), rows)
+        self.db.commit()
+
     def _calculate_donor_level(
             self,
             largest_gift: Decimal,
@@ -394,15 +432,15 @@ class PriorityCacheService:
         max_amount = max(largest_gift, current_year_total)
 
         if max_amount >= self.MEGA_DONOR_THRESHOLD:
-            return DonorLevelEnum.MEGA_DONOR
+            return DonorLevelEnum.mega_donor
         elif max_amount >= self.MAJOR_DONOR_THRESHOLD:
-            return DonorLevelEnum.MAJOR_DONOR
+            return DonorLevelEnum.major_donor
         elif max_amount >= self.MID_LEVEL_THRESHOLD:
-            return DonorLevelEnum.MID_LEVEL
+            return DonorLevelEnum.mid_level
         elif max_amount >= self.UPPER_DONOR_THRESHOLD:
-            return DonorLevelEnum.UPPER_DONOR
+            return DonorLevelEnum.upper_donor
         else:
-            return DonorLevelEnum.LOWER_DONOR
+            return DonorLevelEnum.lower_donor
 
     def _calculate_priority_level(
             self,
@@ -415,22 +453,22 @@ class PriorityCacheService:
 
         # Priority 1: $0 this year with any gifts last year
         if current_year == 0 and last_year > 0:
-            return PriorityLevelEnum.PRIORITY_1
+            return PriorityLevelEnum.priority_1
 
         # Priority 2: Last year's gifts > this year's gifts
         if last_year > current_year and current_year > 0:
-            return PriorityLevelEnum.PRIORITY_2
+            return PriorityLevelEnum.priority_2
 
         # Priority 3: No gifts since 2023 (but gave in 2023)
         if current_year == 0 and last_year == 0 and year_2023 > 0:
-            return PriorityLevelEnum.PRIORITY_3
+            return PriorityLevelEnum.priority_3
 
         # Priority 4: No gifts since 2022 (but gave in 2022)
         if current_year == 0 and last_year == 0 and year_2023 == 0 and year_2022 > 0:
-            return PriorityLevelEnum.PRIORITY_4
+            return PriorityLevelEnum.priority_4
 
         # Priority 5: This year's gifts >= last year's gifts (or default)
-        return PriorityLevelEnum.PRIORITY_5
+        return PriorityLevelEnum.priority_5
 
     def _calculate_opportunity_amount(
             self,
@@ -442,26 +480,26 @@ class PriorityCacheService:
     ) -> Dict[str, any]:
         """Calculate opportunity amount based on priority"""
 
-        if priority == PriorityLevelEnum.PRIORITY_1:
+        if priority == PriorityLevelEnum.priority_1:
             return {
                 'amount': last_year,
                 'basis': f"Priority 1: Full last year amount (${last_year:,.2f})"
             }
 
-        elif priority == PriorityLevelEnum.PRIORITY_2:
+        elif priority == PriorityLevelEnum.priority_2:
             delta = last_year - current_year
             return {
                 'amount': delta,
                 'basis': f"Priority 2: Delta from last year (${delta:,.2f})"
             }
 
-        elif priority == PriorityLevelEnum.PRIORITY_3:
+        elif priority == PriorityLevelEnum.priority_3:
             return {
                 'amount': year_2023,
                 'basis': f"Priority 3: 2023 gift amount (${year_2023:,.2f})"
             }
 
-        elif priority == PriorityLevelEnum.PRIORITY_4:
+        elif priority == PriorityLevelEnum.priority_4:
             return {
                 'amount': year_2022,
                 'basis': f"Priority 4: 2022 gift amount (${year_2022:,.2f})"
@@ -474,99 +512,305 @@ class PriorityCacheService:
                 'basis': f"Priority 5: 20% growth opportunity (${opportunity:,.2f})"
             }
 
-    async def _has_active_exclusion(
-            self,
-            organization_id: UUID,
-            donor_id: UUID
-    ) -> bool:
-        """Check if donor has any active exclusion tags"""
-        result = await self.db.execute(
-            select(func.count())
-            .select_from(DonorExclusionTag)
-            .where(
-                and_(
-                    DonorExclusionTag.organization_id == organization_id,
-                    DonorExclusionTag.donor_id == donor_id,
-                    DonorExclusionTag.is_active == True
-                )
-            )
-        )
-        count = result.scalar()
-        return count > 0
 
-    async def _get_exclusion_tags(
-            self,
-            organization_id: UUID,
-            donor_id: UUID
-    ) -> List[str]:
-        """Get list of active exclusion tags"""
-        result = await self.db.execute(
-            select(DonorExclusionTag.exclusion_tag)
-            .where(
-                and_(
-                    DonorExclusionTag.organization_id == organization_id,
-                    DonorExclusionTag.donor_id == donor_id,
-                    DonorExclusionTag.is_active == True
-                )
-            )
-        )
-        return [row[0].value for row in result.all()]
+def refresh_priority_cache(db: Session, organization_id: UUID, force_full_refresh: bool = False) -> Dict:
+    """Job entry point: refresh one organization's priority cache"""
+    return PriorityCacheService(db).refresh_organization_priorities(organization_id, force_full_refresh)
 
-    async def _get_portfolio_assignment(
-            self,
-            organization_id: UUID,
-            donor_id: UUID
-    ) -> Dict[str, Optional[any]]:
-        """Get the current portfolio assignment for a donor"""
-        result = await self.db.execute(
-            select(
-                DonorPortfolioAssignment.officer_id,
-                MajorGiftOfficer.portfolio_role
-            )
-            .join(
-                MajorGiftOfficer,
-                DonorPortfolioAssignment.officer_id == MajorGiftOfficer.id
-            )
-            .where(
-                and_(
-                    DonorPortfolioAssignment.organization_id == organization_id,
-                    DonorPortfolioAssignment.donor_id == donor_id,
-                    DonorPortfolioAssignment.is_active == True,
-                    DonorPortfolioAssignment.is_primary == True
-                )
-            )
-        )
 
-        row = result.first()
+# =====================================================================
+# MULTI-PROCESS REFRESH
+# =====================================================================
 
-        if row:
-            return {
-                'officer_id': row.officer_id,
-                'portfolio_role': row.portfolio_role
-            }
+def _refresh_shard(task: Tuple[str, int, int, str, Optional[str]]) -> Dict:
+    """
+    Score one shard in a worker, reading through the parent's exported
+    snapshot. A whole organization (shards == 1) is published here; the rows
+    of a donor range go back to the parent.
+    """
+    from database import SessionLocal
+
+    organization_id, shard, shards, today, snapshot = task
+    started, cpu_started = time.perf_counter(), time.process_time()
+    result = {"organization_id": organization_id, "shard": shard, "shards": shards, "rows": None, "error": None}
+
+    db = SessionLocal()
+    try:
+        if snapshot:
+            if not re.fullmatch(r"[0-9A-F-]+", snapshot):
+                raise ValueError(f"Unexpected snapshot id {snapshot!r}")
+            db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+            db.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot}'"))
+        service = PriorityCacheService(db)
+        rows, counts = service.score_rows(UUID(organization_id), date.fromisoformat(today), shard, shards)
+        if shards == 1:
+            service._publish(UUID(organization_id), rows)
         else:
-            return {
-                'officer_id': None,
-                'portfolio_role': None
-            }
-
-
-# Usage example for FastAPI endpoint
-async def refresh_priority_cache_endpoint(
-        organization_id: UUID,
-        db: AsyncSession
+            result["rows"] = rows
+        result["counts"] = counts
+    except Exception as e:
+        db.rollback()
+        logger.exception(f"Priority shard {shard + 1}/{shards} of org {organization_id} failed")
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        db.close()
+
+    result["seconds"] = time.perf_counter() - started
+    result["cpu_seconds"] = time.process_time() - cpu_started
+    return result
+
+
+def _reset_engine_in_worker():
+    # Connections inherited from the parent process must not be reused after fork
+    from database import engine
+    engine.dispose(close=False)
+
+
+def refresh_all_priorities(
+        organization_ids: Optional[List[UUID]] = None,
+        workers: int = 1,
+        force_full_refresh: bool = False,
+        shard_donors: int = SHARD_DONORS
 ) -> Dict:
     """
-    Endpoint handler for manual cache refresh
-
-    Usage in FastAPI:
-    @router.post("/major-gifts/cache/refresh")
-    async def refresh_cache(
-        organization_id: UUID = Depends(get_current_org),
-        db: AsyncSession = Depends(get_db)
-    ):
-        service = PriorityCacheService(db)
-        return await service.refresh_organization_priorities(organization_id)
+    Refresh the priority cache of many organizations (default: every org with
+    donors) in worker processes. Organizations with more than shard_donors
+    donors are split into donor hash ranges and merged here, then published
+    in one transaction like a single-org refresh. Each org is refreshed under
+    its priority_cache lease; orgs leased by another worker are skipped.
     """
+    from database import SessionLocal, engine
+    from scheduler.job_scheduler import LeaseRenewer, claim_runs, enqueue_run, finish_run
+
+    start = time.perf_counter()
+    today = date.today()
+    stats = {
+        "organizations": 0,
+        "refreshed": 0,
+        "skipped": 0,
+        "leased": 0,
+        "failed": [],
+        "donors": 0,
+        "workers": workers,
+        "shards": 0,
+        **{level.value: 0 for level in PRIORITY_LEVELS},
+        "excluded": 0,
+        "publish_seconds": 0.0,
+        "cpu_seconds": 0.0,
+    }
+
+    db = SessionLocal()
+    renewer = LeaseRenewer()
+    snapshot_conn = None
+    try:
+        donor_counts = {row.organization_id: row.donors for row in db.execute(ORG_DONOR_COUNTS_SQL)}
+        org_ids = organization_ids if organization_ids is not None else list(donor_counts)
+        stats["organizations"] = len(org_ids)
+
+        service = PriorityCacheService(db)
+        runs = {}
+        for org_id in sorted(org_ids, key=lambda o: donor_counts.get(o, 0), reverse=True):
+            if not force_full_refresh and service._cache_is_current(org_id, today):
+                stats["skipped"] += 1
+                continue
+            run, _ = enqueue_run(db, "priority_cache", org_id, trigger="manual",
+                                 options={"force_full_refresh": force_full_refresh})
+            claimed = claim_runs(db, ["priority_cache"], 1, run_id=run.id)
+            if not claimed:
+                stats["leased"] += 1
+                continue
+            runs[str(org_id)] = claimed[0]
+            renewer.runs[claimed[0].id] = claimed[0]
+        renewer.start()
+
+        # One view of the data for every shard, taken once the leases are held
+        snapshot = None
+        if runs:
+            snapshot_conn = engine.connect().execution_options(isolation_level="REPEATABLE READ")
+            snapshot_conn.begin()
+            snapshot = snapshot_conn.execute(text("SELECT pg_export_snapshot()")).scalar()
+
+        tasks = []
+        for org_id, run in runs.items():
+            shards = max(1, math.ceil(donor_counts.get(run.organization_id, 0) / shard_donors))
+            tasks.extend((org_id, shard, shards, today.isoformat(), snapshot) for shard in range(shards))
+        stats["shards"] = len(tasks)
+
+        pending: Dict[str, List[Dict]] = {}
+        failed = set()
+        errors: Dict[str, List[str]] = {}
+        org_started = {org_id: time.perf_counter() for org_id in runs}
+
+        def finish(org_id: str, rows: int):
+            run = runs[org_id]
+            renewer.drop(run)
+            error = "; ".join(errors.get(org_id, [])) or None
+            try:
+                recorded = finish_run(db, run, "failed" if error else "succeeded",
+                                      round(time.perf_counter() - org_started[org_id], 3),
+                                      {"organization_id": org_id, "rows": rows, "batch": True}, error)
+            except Exception:
+                db.rollback()
+                logger.exception(f"Recording the priority cache run of org {org_id} failed")
+                return
+            if not recorded:
+                logger.warning(f"Priority cache run of org {org_id} was reaped before it finished")
+
+        def record(result: Dict):
+            org_id = result["organization_id"]
+            stats["cpu_seconds"] += result["cpu_seconds"]
+            if result["error"]:
+                failed.add(org_id)
+                errors.setdefault(org_id, []).append(result["error"])
+                stats["failed"].append({"organization_id": org_id, "shard": result["shard"], "error": result["error"]})
+            else:
+                for key, value in result["counts"].items():
+                    stats["donors" if key == "total_donors" else key] += value
+
+            if result["shards"] == 1:
+                stats["refreshed"] += org_id not in failed
+                finish(org_id, result["counts"]["total_donors"] if org_id not in failed else 0)
+                return
+
+            # Merge: publish the org once every one of its donor ranges is in
+            shards = pending.setdefault(org_id, [])
+            shards.append(result)
+            if len(shards) < result["shards"]:
+                return
+            del pending[org_id]
+            if org_id in failed:
+                finish(org_id, 0)
+                return
+            published = time.perf_counter()
+            rows = [row for shard in sorted(shards, key=lambda r: r["shard"]) for row in shard["rows"]]
+            try:
+                service._publish(UUID(org_id), rows)
+                stats["refreshed"] += 1
+            except Exception as e:
+                db.rollback()
+                logger.exception(f"Publishing the priority cache of org {org_id} failed")
+                errors.setdefault(org_id, []).append(f"{type(e).__name__}: {e}")
+                stats["failed"].append({"organization_id": org_id, "shard": None, "error": f"{type(e).__name__}: {e}"})
+            stats["publish_seconds"] += time.perf_counter() - published
+            finish(org_id, len(rows))
+
+        try:
+            if workers <= 1:
+                for task in tasks:
+                    record(_refresh_shard(task))
+            else:
+                with Pool(processes=workers, initializer=_reset_engine_in_worker) as pool:
+                    for result in pool.imap_unordered(_refresh_shard, tasks):
+                        record(result)
+        finally:
+            # Runs an interrupted pool left unfinished fail instead of waiting to be reaped
+            for org_id, run in runs.items():
+                if run.id in renewer.runs:
+                    errors.setdefault(org_id, []).append("Batch refresh stopped before the organization was published")
+                    finish(org_id, 0)
+    finally:
+        renewer.stop()
+        if snapshot_conn is not None:
+            snapshot_conn.close()
+        db.close()
+
+    seconds = time.perf_counter() - start
+    stats["seconds"] = round(seconds, 3)
+    stats["publish_seconds"] = round(stats["publish_seconds"], 3)
+    stats["cpu_seconds"] = round(stats["cpu_seconds"], 3)
+    stats["donors_per_second"] = round(stats["donors"] / seconds, 1) if seconds else 0.0
+    stats["donors_per_second_per_core"] = round(stats["donors"] / seconds / max(workers, 1), 1) if seconds else 0.0
+    logger.info(f"Priority caches refreshed: {stats}")
+    return stats
+
+
+def check_against_reference(db: Session, organization_id: UUID) -> Dict:
+    """Compare the vectorized scores of every donor with the Decimal _calculate_* methods"""
     service = PriorityCacheService(db)
-    return await service.refresh_organization_priorities(organization_id)
\ No newline at end of file
+    today = date.today()
+    rows, _ = service.score_rows(organization_id, today)
+
+    mismatches = []
+    for row in rows:
+        current_year, last_year = row["current_year_total"], row["last_year_total"]
+        year_2023, year_2022 = row["year_2023_total"], row["year_2022_total"]
+        priority = service._calculate_priority_level(current_year, last_year, year_2023, year_2022)
+        opportunity = service._calculate_opportunity_amount(priority, current_year, last_year, year_2023, year_2022)
+        yoy = None
+        if last_year > 0:
+            yoy = max(-MAX_YOY_PERCENTAGE, min(MAX_YOY_PERCENTAGE, (current_year - last_year) / last_year * 100))
+            yoy = yoy.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        expected = (
+            service._calculate_donor_level(row["largest_gift_amount"], current_year),
+            priority,
+            opportunity["amount"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP),
+            opportunity["basis"],
+            yoy,
+        )
+        actual = (row["current_donor_level"], row["priority_level"], row["opportunity_amount"],
+                  row["opportunity_basis"], row["yoy_percentage_change"])
+        if expected != actual:
+            mismatches.append({"donor_id": str(row["donor_id"]), "expected": expected, "actual": actual})
+
+    return {"organization_id": str(organization_id), "donors": len(rows), "mismatches": mismatches}
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Refresh the donor priority cache")
+    parser.add_argument("--org", action="append", help="Organization ID (repeatable)")
+    parser.add_argument("--all", action="store_true", help="Every organization with donors")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for --all or several --org")
+    parser.add_argument("--shard-donors", type=int, default=SHARD_DONORS,
+                        help="Split organizations with more donors into donor ranges")
+    parser.add_argument("--force", action="store_true", help="Recalculate even if the cache is current")
+    parser.add_argument("--check", action="store_true", help="Compare vectorized scores with the Decimal reference")
+    args = parser.parse_args()
+    if not args.org and not args.all:
+        parser.error("--org or --all is required")
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.check:
+        session = SessionLocal()
+        try:
+            for org in args.org or []:
+                report = check_against_reference(session, UUID(org))
+                print(f"{'✅' if not report['mismatches'] else '❌'} {org}: "
+                      f"{len(report['mismatches'])} mismatches in {report['donors']} donors")
+                for mismatch in report["mismatches"][:10]:
+                    print(f"   {mismatch}")
+        finally:
+            session.close()
+    elif args.all or args.workers > 1:
+        stats = refresh_all_priorities(
+            None if args.all else [UUID(o) for o in args.org],
+            workers=args.workers,
+            force_full_refresh=args.force,
+            shard_donors=args.shard_donors
+        )
+        print(f"✅ {stats['refreshed']} of {stats['organizations']} organizations refreshed "
+              f"({stats['skipped']} current, {stats['leased']} leased elsewhere, {len(stats['failed'])} failed shards): "
+              f"{stats['donors']} donors "
+              f"in {stats['seconds']}s over {stats['shards']} shards")
+        print(f"📊 {stats['donors_per_second']} donors/s, {stats['donors_per_second_per_core']} donors/s per worker "
+              f"({args.workers} workers, {stats['cpu_seconds']}s worker CPU, {stats['publish_seconds']}s merge/publish)")
+        for failure in stats["failed"]:
+            print(f"❌ {failure}")
+    else:
+        # Under the org's priority_cache lease, like a scheduled run
+        from scheduler.job_scheduler import run_now
+
+        for org in args.org:
+            result = run_now("priority_cache", UUID(org), {"force_full_refresh": args.force})
+            stats = result["stats"]
+            if result["status"] != "succeeded":
+                print(f"❌ {org}: {result['error'] or result['status']}")
+            elif stats["skipped"]:
+                print(f"⏭️  {org}: cache is current")
+            else:
+                print(f"✅ {org}: {stats['updated']} donors in {stats['seconds']}s "
+                      f"(P1 {stats['priority_1']}, P2 {stats['priority_2']}, P3 {stats['priority_3']}, "
+                      f"P4 {stats['priority_4']}, P5 {stats['priority_5']}, excluded {stats['excluded']})")
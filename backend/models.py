@@ -7,7 +7,7 @@ import enum
 import uuid
 from datetime import datetime
 from sqlalchemy import Column, String, Text, Integer, BigInteger, Float, Boolean, UniqueConstraint, CheckConstraint, \
-    func, Index
+    func, Index, text
 from sqlalchemy import DateTime, Date, Time, ForeignKey, Numeric, JSON, ARRAY, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID, JSONB,ENUM
 from sqlalchemy.orm import relationship, declarative_base
@@ -335,6 +335,11 @@ class Campaigns(Base):
     target_audience_size = Column(Integer, nullable=True)
     proposals = relationship("SolicitationProposals", back_populates="campaign")
 
+    __table_args__ = (
+        Index('idx_campaigns_org_status', 'organization_id', 'status'),
+        Index('idx_campaigns_org_end_date', 'organization_id', 'end_date'),
+    )
+
 # Relationships (add these)
 
 
@@ -389,7 +394,7 @@ class Beneficiaries(Base):
     enrolled_date = Column(Date)
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
-    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     organization = relationship("Organizations", back_populates="beneficiaries")
@@ -521,6 +526,14 @@ class Donors(Base):
     interactions = relationship("DonorInteraction", back_populates="donor")
     engagement_preference = relationship("EngagementPreference", back_populates="donor", uselist=False)
 
+    # Donor lists and segments are always scoped to one organization
+    __table_args__ = (
+        Index('idx_donors_org_status', 'organization_id', 'donor_status'),
+        Index('idx_donors_org_last_donation', 'organization_id', 'last_donation_date'),
+        Index('idx_donors_org_first_donation', 'organization_id', 'first_donation_date'),
+        Index('idx_donors_org_email', 'organization_id', 'email'),
+    )
+
 
 class Programs(Base):
     __tablename__ = "programs"
@@ -539,7 +552,7 @@ class Programs(Base):
     current_beneficiaries = Column(Integer, default=0)
     success_metrics = Column(JSONB, default=dict)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
-    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     organization = relationship("Organizations", back_populates="programs")
@@ -664,6 +677,115 @@ class DonorPriorityCache(Base):
     )
 
 
+class DonorImpactScore(Base):
+    """
+    High-impact target scores for the current priority cache, one row per donor
+    and meeting timeframe ("all", "90_day", "1_year").
+    Written in batches by majorgifts/impact_scoring.py so the high-impact
+    targets endpoint filters and ranks in SQL.
+    """
+    __tablename__ = "donor_impact_scores"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+    donor_id = Column(UUID(as_uuid=True), ForeignKey("donors.id", ondelete="CASCADE"), nullable=False)
+    timeframe = Column(String(10), nullable=False)
+
+    # Scores
+    impact_score = Column(Float, nullable=False, default=0)
+    engagement_level = Column(String(10), nullable=False)  # Hot, Warm, Cold
+    readiness_indicator = Column(String(20), nullable=False)  # Ready, Developing, Long-term
+
+    # Inputs prefetched for the batch
+    recent_meeting_count = Column(Integer, default=0)
+    last_interaction_date = Column(Date)
+    active_gift_goals_count = Column(Integer, default=0)
+    active_gift_goals_total = Column(Numeric(15, 2), default=0)
+    pending_proposals_count = Column(Integer, default=0)
+    pending_proposals_total = Column(Numeric(15, 2), default=0)
+    officer_id = Column(UUID(as_uuid=True), ForeignKey("major_gift_officers.id", ondelete="SET NULL"))
+    officer_name = Column(String(255))
+
+    scored_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'donor_id', 'timeframe', name='unique_donor_impact_score'),
+        Index('idx_impact_scores_org_timeframe_score', 'organization_id', 'timeframe', 'impact_score'),
+        Index('idx_impact_scores_org_timeframe_filters', 'organization_id', 'timeframe',
+              'engagement_level', 'readiness_indicator'),
+    )
+
+
+class ImpactScoreRefresh(Base):
+    """
+    Last high-impact scoring run of an organization. Marks the scores current
+    even when the run found no candidates (and wrote no donor_impact_scores rows).
+    """
+    __tablename__ = "impact_score_refreshes"
+
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True)
+    scored_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    candidates = Column(Integer, nullable=False, default=0)
+    rows = Column(Integer, nullable=False, default=0)
+
+
+class DonorFeature(Base):
+    """
+    Per-donor feature row shared by the churn, health, engagement and affinity
+    scorers: giving (recency, frequency, monetary, intervals), interactions,
+    event attendance and meetings. Windowed counts are relative to as_of.
+    Maintained by analytics/donor_features.py (full rebuild once a day,
+    incremental for donors whose source rows changed since computed_at).
+    """
+    __tablename__ = "donor_features"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+    donor_id = Column(UUID(as_uuid=True), ForeignKey("donors.id", ondelete="CASCADE"), nullable=False)
+    party_id = Column(UUID(as_uuid=True))
+    as_of = Column(Date, nullable=False)
+
+    # Giving
+    gift_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(15, 2), nullable=False, default=0)
+    largest_gift = Column(Numeric(15, 2))
+    first_gift_date = Column(Date)
+    last_gift_date = Column(Date)
+    previous_gift_date = Column(Date)
+    interval_mean_days = Column(Float)
+    interval_std_days = Column(Float)
+    first_two_avg = Column(Numeric(15, 2))
+    last_two_avg = Column(Numeric(15, 2))
+    gifts_90d = Column(Integer, nullable=False, default=0)
+    gifts_12m = Column(Integer, nullable=False, default=0)
+    amount_12m = Column(Numeric(15, 2), nullable=False, default=0)
+    gifts_prev_12m = Column(Integer, nullable=False, default=0)
+    amount_prev_12m = Column(Numeric(15, 2), nullable=False, default=0)
+
+    # Completed interactions
+    interaction_count = Column(Integer, nullable=False, default=0)
+    last_interaction_at = Column(DateTime)
+    interactions_30d = Column(Integer, nullable=False, default=0)
+    interactions_prev_30d = Column(Integer, nullable=False, default=0)
+    interactions_with_outcome = Column(Integer, nullable=False, default=0)
+    sentiment_mean = Column(Float)
+    top_channel = Column(String(50))
+
+    # Events (registrations matched on email) and meetings
+    events_registered = Column(Integer, nullable=False, default=0)
+    events_attended = Column(Integer, nullable=False, default=0)
+    meetings_completed = Column(Integer, nullable=False, default=0)
+    meetings_12m = Column(Integer, nullable=False, default=0)
+    last_meeting_date = Column(Date)
+
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'donor_id', name='unique_donor_feature'),
+        Index('idx_donor_features_org_computed', 'organization_id', 'computed_at'),
+    )
+
+
 class DonorExclusionTags(Base):
     """Tags to exclude donor types from analyses"""
     __tablename__ = "donor_exclusion_tags"
@@ -787,6 +909,26 @@ class Donations(Base):
 
     # Relationships (add these)
 
+    # Access paths of the analytics workload (see benchmarks/index_advisor.py):
+    # - org + date range aggregates, covered so they can run as index-only scans
+    # - per-donor history inside an org (RFM, retention, major gifts)
+    # - per-campaign totals
+    # - completed-only reporting through a partial index
+    # - BRIN on donation_date for org-wide range scans; rows arrive roughly in date order
+    __table_args__ = (
+        Index('idx_donations_org_date', 'organization_id', 'donation_date',
+              postgresql_include=['amount', 'donor_id']),
+        Index('idx_donations_org_donor_date', 'organization_id', 'donor_id', 'donation_date',
+              postgresql_include=['amount']),
+        Index('idx_donations_donor_date', 'donor_id', 'donation_date'),
+        Index('idx_donations_org_campaign', 'organization_id', 'campaign_id',
+              postgresql_include=['amount', 'donation_date']),
+        Index('idx_donations_completed_org_date', 'organization_id', 'donation_date',
+              postgresql_include=['amount', 'donor_id'],
+              postgresql_where=text("payment_status = 'completed'")),
+        Index('idx_donations_date_brin', 'donation_date', postgresql_using='brin'),
+    )
+
 
 class DonationLines(Base):
     __tablename__ = "donation_lines"
@@ -924,11 +1066,95 @@ class DonorPortfolioAssignment(Base):
     officer = relationship("MajorGiftOfficer", back_populates="portfolio_assignments")
 
 
+class MajorGiftsPipelineSnapshot(Base):
+    """
+    Precomputed major gifts pipeline, one row per prospect.
+    Refreshed by analytics/major_gifts_snapshot.py; read by the major gifts endpoints.
+    """
+    __tablename__ = "major_gifts_pipeline_snapshot"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+    donor_id = Column(UUID(as_uuid=True), ForeignKey("donors.id", ondelete="CASCADE"), nullable=False)
+    donor_name = Column(String(255))
+
+    # Giving history
+    total_gifts = Column(Integer, default=0)
+    lifetime_value = Column(Numeric(15, 2), default=0)
+    largest_gift = Column(Numeric(15, 2), default=0)
+    avg_gift = Column(Numeric(15, 2), default=0)
+    last_gift_amount = Column(Numeric(15, 2), default=0)
+    last_gift_date = Column(DateTime(timezone=True))
+
+    # Scoring
+    stage = Column(String(50), nullable=False)
+    stage_entered_at = Column(DateTime(timezone=True), nullable=False)
+    estimated_capacity = Column(Numeric(15, 2), default=0)
+    engagement_level = Column(Integer, default=1)
+    probability = Column(Float, default=0)
+    priority_score = Column(Float, default=0)
+    projected_ask_amount = Column(Numeric(15, 2), default=0)
+    projected_close_date = Column(DateTime(timezone=True))
+
+    # Next action
+    action_priority = Column(String(20))  # high, medium, low
+    action_type = Column(String(50))
+    next_action = Column(Text)
+    next_action_date = Column(DateTime(timezone=True))
+    urgency_score = Column(Float, default=0)
+
+    assigned_officer_id = Column(UUID(as_uuid=True), ForeignKey("major_gift_officers.id", ondelete="SET NULL"))
+    assigned_officer = Column(String(255))
+
+    computed_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+    organization = relationship("Organizations")
+    donor = relationship("Donors")
+
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'donor_id', name='unique_pipeline_snapshot_donor'),
+        Index('idx_pipeline_snapshot_org_capacity', 'organization_id', 'estimated_capacity'),
+        Index('idx_pipeline_snapshot_org_stage', 'organization_id', 'stage'),
+        Index('idx_pipeline_snapshot_org_urgency', 'organization_id', 'urgency_score'),
+        Index('idx_pipeline_snapshot_org_action_date', 'organization_id', 'next_action_date'),
+    )
+
+
+class MajorGiftsStageTransition(Base):
+    """
+    Pipeline stage history written by the snapshot job whenever a prospect's
+    stage changes. from_stage is NULL on entry and to_stage is NULL on exit.
+    """
+    __tablename__ = "major_gifts_stage_transitions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+    donor_id = Column(UUID(as_uuid=True), ForeignKey("donors.id", ondelete="CASCADE"), nullable=False)
+
+    from_stage = Column(String(50))
+    to_stage = Column(String(50))
+    days_in_previous_stage = Column(Integer)
+    transitioned_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+    organization = relationship("Organizations")
+    donor = relationship("Donors")
+
+    __table_args__ = (
+        Index('idx_stage_transitions_org_time', 'organization_id', 'transitioned_at'),
+        Index('idx_stage_transitions_org_donor', 'organization_id', 'donor_id', 'transitioned_at'),
+    )
+
 
 class DonorScores(Base):
+    """
+    Persisted donor scores, one row per donor. Written by
+    analytics/donor_scoring.py (score_version, calculated_at); the
+    (organization_id, score) indexes serve top-N and score-range queries.
+    Columns added after the first release: schemacreate/donor_scores_columns.py
+    """
     __tablename__ = "donor_scores"
 
-    id = Column(UUID(as_uuid=True), primary_key=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"))
     donor_id = Column(UUID(as_uuid=True), ForeignKey("donors.id", ondelete="CASCADE"))
     rfm_score = Column(Float)
@@ -936,15 +1162,26 @@ class DonorScores(Base):
     loyalty_score = Column(Float)
     influence_score = Column(Float)
     churn_risk_score = Column(Float)
+    affinity_score = Column(Float)
+    capacity_score = Column(Float)
     donor_segment = Column(String(50))
     lifecycle_stage = Column(String(50))
     score_components = Column(JSONB)
+    score_version = Column(Integer)
     calculated_at = Column(DateTime)
 
     # Relationships
     organization = relationship("Organizations", back_populates="donor_scores")
     donor = relationship("Donors", back_populates="donor_scores")
 
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'donor_id', name='unique_donor_score'),
+        Index('idx_donor_scores_org_affinity', 'organization_id', 'affinity_score'),
+        Index('idx_donor_scores_org_churn', 'organization_id', 'churn_risk_score'),
+        Index('idx_donor_scores_org_capacity', 'organization_id', 'capacity_score'),
+        Index('idx_donor_scores_org_rfm', 'organization_id', 'rfm_score'),
+    )
+
 class DonorsBackup(Base):
     __tablename__ = "donors_backup"
 
@@ -1397,7 +1634,7 @@ class ProgramEnrollments(Base):
     outcome_metrics = Column(JSONB, default=dict)
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
-    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     program = relationship("Programs", back_populates="program_enrollments")
@@ -1954,6 +2191,153 @@ class DonorChurnMetrics(Base):
         return f"<DonorChurnMetrics(org={self.organization_id}, status={self.equilibrium_status}, ratio={self.churn_ratio})>"
 
 
+class CohortRetentionCube(Base):
+    """
+    Donor cohort retention cube
+
+    One cell per first-gift period x activity period at month, quarter and year grain.
+    Built by analytics/cohort_cube.py and kept current as donations are written.
+    - donor_count: cohort donors who gave in the activity period
+    - retained_count: of those, donors who also gave in the previous period
+    """
+    __tablename__ = "cohort_retention_cube"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+
+    grain = Column(String(10), nullable=False)  # "month", "quarter", "year"
+    cohort_period = Column(Date, nullable=False)  # Start of the period holding the donor's first gift
+    activity_period = Column(Date, nullable=False)  # Start of the period the gifts fall in
+
+    donor_count = Column(Integer, nullable=False, default=0)
+    retained_count = Column(Integer, nullable=False, default=0)
+    gift_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(15, 2), nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+    organization = relationship("Organizations")
+
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'grain', 'cohort_period', 'activity_period',
+                         name='unique_cohort_retention_cell'),
+        Index('idx_cohort_cube_org_grain_activity', 'organization_id', 'grain', 'activity_period'),
+    )
+
+    def __repr__(self):
+        return f"<CohortRetentionCube(org={self.organization_id}, {self.grain} {self.cohort_period}->{self.activity_period}, donors={self.donor_count})>"
+
+
+class MonthlyForecastFit(Base):
+    """
+    Seasonal-trend model fitted to an organization's monthly series
+    ("revenue" from donations, "expenses" from expenses).
+    Written by analytics/forecast_engine.py together with its points.
+    """
+    __tablename__ = "monthly_forecast_fits"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+    series = Column(String(20), nullable=False)  # "revenue", "expenses"
+
+    method = Column(String(20), nullable=False)  # seasonal_trend, trend, mean, none
+    history_start = Column(Date)  # First month of the fitted history
+    history_months = Column(Integer, nullable=False, default=0)
+    as_of = Column(Date, nullable=False)  # First month that is not history (the current month at fit time)
+
+    level = Column(Float, default=0)  # Fitted value of the last history month, without seasonality
+    slope = Column(Float, default=0)  # Trend per month
+    seasonal_indices = Column(JSONB)  # Additive effect per calendar month, "1".."12"
+    residual_std = Column(Float, default=0)
+    r_squared = Column(Float)
+
+    fitted_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+    organization = relationship("Organizations")
+
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'series', name='unique_forecast_fit_series'),
+    )
+
+
+class MonthlyForecastPoint(Base):
+    """
+    One month of a fitted series: history months carry the actual total and the
+    fitted value, later months the forecast with its 95% prediction interval.
+    The month holding as_of also carries the month-to-date actual.
+    """
+    __tablename__ = "monthly_forecast_points"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+    series = Column(String(20), nullable=False)
+    period = Column(Date, nullable=False)  # First day of the month
+    is_forecast = Column(Boolean, nullable=False, default=False)
+
+    actual = Column(Numeric(15, 2))
+    predicted = Column(Numeric(15, 2), nullable=False, default=0)
+    lower_bound = Column(Numeric(15, 2), nullable=False, default=0)
+    upper_bound = Column(Numeric(15, 2), nullable=False, default=0)
+
+    organization = relationship("Organizations")
+
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'series', 'period', name='unique_forecast_point_period'),
+    )
+
+
+class JobLease(Base):
+    """
+    Lease held by a scheduler worker while it runs one job for one organization,
+    so two workers never refresh the same org at once. Expired leases (the
+    holder stopped renewing) may be taken over. Maintained by scheduler/job_scheduler.py.
+    """
+    __tablename__ = "job_leases"
+
+    job_name = Column(String(50), primary_key=True)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True)
+    holder = Column(String(255), nullable=False)  # host:pid of the worker
+    run_id = Column(UUID(as_uuid=True))
+    acquired_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    leased_until = Column(DateTime(timezone=True), nullable=False)
+
+
+class JobRun(Base):
+    """
+    One run of a scheduled job for one organization: queued by the schedule or
+    a manual trigger, then running, then succeeded or failed (a run whose worker
+    stopped renewing its lease is failed by the next scheduler tick). stats
+    holds what the job returned.
+    """
+    __tablename__ = "job_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_name = Column(String(50), nullable=False)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    trigger = Column(String(20), nullable=False, default="schedule")  # schedule, manual
+    requested_by = Column(UUID(as_uuid=True))
+    options = Column(JSONB)
+
+    queued_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    duration_seconds = Column(Float)
+    worker = Column(String(255))
+
+    stats = Column(JSONB)
+    error = Column(Text)
+
+    __table_args__ = (
+        Index('idx_job_runs_job_org_queued', 'job_name', 'organization_id', 'queued_at'),
+        Index('idx_job_runs_status', 'status'),
+        # At most one queued run per job and org; schedule and triggers insert with ON CONFLICT DO NOTHING
+        Index('uq_job_runs_one_queued', 'job_name', 'organization_id', unique=True,
+              postgresql_where=text("status = 'queued'")),
+    )
+
+
 class StaffingAnalysis(Base):
     """
     AI-Driven Staffing Recommendations
@@ -2174,6 +2558,35 @@ class WhatIfScenarios(Base):
         return f"<WhatIfScenarios(name={self.scenario_name}, type={self.scenario_type})>"
 
 
+class WhatIfSimulation(Base):
+    """
+    Monte Carlo results of a what-if scenario, written once when the scenario
+    is created (analytics/whatif_simulator.py) and read back by the scenario list.
+    """
+    __tablename__ = "whatif_simulations"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    scenario_id = Column(UUID(as_uuid=True), ForeignKey("whatif_scenarios.id", ondelete="CASCADE"), nullable=False)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+
+    paths = Column(Integer, nullable=False)
+    seed = Column(BigInteger, nullable=False)
+
+    calibration = Column(JSONB, default=dict)  # Sampled distributions and where they came from
+    yearly_bands = Column(JSONB, default=dict)  # metric -> year_n -> percentiles
+    monthly_net_revenue = Column(JSONB, default=list)  # Cumulative net revenue percentiles per month
+    breakeven = Column(JSONB, default=dict)  # Probability, percentiles and per-year distribution
+
+    simulated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+    scenario = relationship("WhatIfScenarios")
+
+    __table_args__ = (
+        UniqueConstraint('scenario_id', name='unique_whatif_simulation_scenario'),
+        Index('idx_whatif_simulations_org', 'organization_id'),
+    )
+
+
 class GoldenTriangle(Base):
     """
     Digital Marketing Golden Triangle Metrics
@@ -2286,6 +2699,40 @@ class CampaignAttribution(Base):
     donation = relationship("Donations")
 
 
+class AttributionCube(Base):
+    """
+    Precomputed multi-touch attribution per organization, month, channel and model.
+    Rebuilt from campaign_attributions by analytics/attribution_engine.py
+    """
+    __tablename__ = 'attribution_cube'
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey('organizations.id', ondelete="CASCADE"), nullable=False)
+
+    period_start = Column(Date, nullable=False)  # First day of the conversion month
+    channel = Column(String(50), nullable=False)
+    attribution_model = Column(String(20), nullable=False)  # first_touch, last_touch, linear, time_decay, position_based
+
+    # Credit assigned to the channel under this model
+    credited_revenue = Column(Numeric(15, 2), default=0)
+    credited_conversions = Column(Numeric(14, 4), default=0)
+
+    # Touch-level totals for the month (identical across models)
+    touch_count = Column(Integer, default=0)
+    click_count = Column(Integer, default=0)
+    channel_cost = Column(Numeric(15, 2), default=0)
+
+    computed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    organization = relationship("Organizations")
+
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'period_start', 'channel', 'attribution_model',
+                         name='unique_attribution_cube_cell'),
+        Index('idx_attribution_cube_org_model_period', 'organization_id', 'attribution_model', 'period_start'),
+    )
+
+
 # ============================================================================
 # 2. AB TEST MODEL
 # ============================================================================
@@ -3066,6 +3513,8 @@ class Communications(Base):
     opened_at = Column(DateTime, nullable=True)
 
     sent_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    # Set on rows recorded by a thank-you dispatch job (ai_analytics/thank_you_dispatch.py)
+    thank_you_job_id = Column(UUID(as_uuid=True), ForeignKey("thank_you_jobs.id", ondelete="SET NULL"), nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -3074,6 +3523,50 @@ class Communications(Base):
     organization = relationship("Organizations", back_populates="communications")
     donor = relationship("Donors", back_populates="communications")
 
+    __table_args__ = (
+        Index('idx_communications_thank_you_job', 'thank_you_job_id', 'channel', 'status'),
+    )
+
+
+class ThankYouJobs(Base):
+    """
+    A thank-you dispatch job. Donors up to prepared_offset have their
+    Communications rows recorded (linked by thank_you_job_id); delivery
+    progress is read from those rows. The worker in `worker` renews
+    leased_until while it runs the job; a running job whose lease expired is
+    picked up and resumed by another worker.
+    """
+    __tablename__ = "thank_you_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+
+    template_type = Column(String(50), nullable=False)
+    channels = Column(JSONB, nullable=False)
+    donor_ids = Column(JSONB, nullable=False)
+    org_name = Column(String(255))
+    subject = Column(String(500))
+    custom_message = Column(Text)
+    sent_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+
+    status = Column(String(30), nullable=False, default="running")  # running, completed, completed_with_errors, failed
+    prepared_offset = Column(Integer, nullable=False, default=0)
+    prepared = Column(Integer, nullable=False, default=0)
+    missing = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)  # donors left unprepared after a preparation error
+    retried = Column(Integer, nullable=False, default=0)
+    errors = Column(JSONB, nullable=False, default=list)
+
+    worker = Column(String(255))  # host:pid running the job
+    leased_until = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index('idx_thank_you_jobs_org_created', 'organization_id', 'created_at'),
+        Index('idx_thank_you_jobs_running', 'leased_until', postgresql_where=text("status = 'running'")),
+    )
+
 
 class ImpactCategoryEnum(str, enum.Enum):
     """Categories for impact metrics"""
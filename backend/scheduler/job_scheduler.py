@@ -0,0 +1,716 @@
+"""
+Job Scheduler
+Wise Investor Platform
+
+Runs the per-organization cache builders (priority cache, donor features and
+scores, impact scores, pipeline snapshot, forecasts, cohort cube) on a schedule, either
+inside the API process or as a separate worker:
+
+    SCHEDULER_ENABLED=1 uvicorn main:app          # in-process, started by the lifespan
+    python -m scheduler.job_scheduler             # standalone worker loop
+    python -m scheduler.job_scheduler --once      # one tick, wait for its runs, exit
+    python -m scheduler.job_scheduler --run priority_cache --org <id> --option force_full_refresh=true
+
+The queue and the history live in job_runs, so any number of workers can
+share it:
+
+    - every tick each worker queues the runs that are due (one queued run per
+      job and organization, enforced by a partial unique index), fails runs
+      whose worker stopped renewing its lease, and claims queued runs with
+      FOR UPDATE SKIP LOCKED up to SCHEDULER_MAX_PARALLEL in flight;
+    - a claimed run takes the (job, organization) row in job_leases in the
+      same transaction; a live lease held by another worker sends the run
+      back to the queue, so two workers never refresh the same org at once;
+    - while a run executes, a timer thread renews its lease every third of
+      the lease length (scheduled runs and run_now alike); the lease is
+      released when the run finishes and the run records its worker,
+      duration, the stats the job returned or the error. A run that was
+      reaped meanwhile keeps its failed status.
+
+Each run gets its own batch session (database.SessionLocal) and the job
+functions are the same sync refresh functions the CLIs call.
+
+    SCHEDULER_ENABLED=0               # start the in-process scheduler with the API
+    SCHEDULER_MAX_PARALLEL=2          # runs in flight per worker
+    SCHEDULER_TICK_SECONDS=30
+    SCHEDULER_RETRY_MINUTES=30        # wait after a failed run before queueing again
+    SCHEDULER_HISTORY_DAYS=30         # finished runs kept in job_runs
+    SCHEDULER_JOBS=                   # comma-separated jobs this worker runs; default all
+
+Manual triggers and status: scheduler/jobs_api.py
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+from sqlalchemy import bindparam, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import JobLease, JobRun
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "0") == "1"
+MAX_PARALLEL = int(os.getenv("SCHEDULER_MAX_PARALLEL", "2"))
+TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", "30"))
+RETRY_MINUTES = int(os.getenv("SCHEDULER_RETRY_MINUTES", "30"))
+HISTORY_DAYS = int(os.getenv("SCHEDULER_HISTORY_DAYS", "30"))
+ENABLED_JOBS = [name.strip() for name in os.getenv("SCHEDULER_JOBS", "").split(",") if name.strip()]
+
+PRUNE_INTERVAL_SECONDS = 3600
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+# =====================================================================
+# JOBS
+# =====================================================================
+# Loaded on first use to keep numpy out of worker startup
+
+def _priority_cache(db: Session, organization_id: UUID, force_full_refresh: bool = False) -> Dict:
+    from majorgifts.prioritycacheservice import refresh_priority_cache
+    return refresh_priority_cache(db, organization_id, force_full_refresh=force_full_refresh)
+
+
+def _donor_features(db: Session, organization_id: UUID, full: bool = False) -> Dict:
+    from analytics.donor_features import refresh_donor_features
+    return refresh_donor_features(db, organization_id, full=full)
+
+
+def _donor_scores(db: Session, organization_id: UUID) -> Dict:
+    from analytics.donor_scoring import refresh_donor_scores
+    return refresh_donor_scores(db, organization_id)
+
+
+def _impact_scores(db: Session, organization_id: UUID) -> Dict:
+    from majorgifts.impact_scoring import refresh_impact_scores
+    return refresh_impact_scores(db, organization_id)
+
+
+def _pipeline_snapshot(db: Session, organization_id: UUID) -> Dict:
+    from analytics.major_gifts_snapshot import refresh_pipeline_snapshot
+    return refresh_pipeline_snapshot(db, organization_id)
+
+
+def _forecasts(db: Session, organization_id: UUID) -> Dict:
+    from analytics.forecast_engine import refresh_forecasts
+    return refresh_forecasts(db, [organization_id])
+
+
+def _cohort_cube(db: Session, organization_id: UUID) -> Dict:
+    from analytics.cohort_cube import build_cohort_cube
+    return build_cohort_cube(db, organization_id)
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    """A per-organization job: daily at at_hour (server local time) or every every_hours"""
+    name: str
+    function: Callable[..., Dict]
+    description: str
+    at_hour: Optional[int] = None
+    every_hours: Optional[int] = None
+    lease_seconds: int = 300
+    options: Tuple[str, ...] = field(default_factory=tuple)  # boolean keyword arguments a trigger may pass
+
+    def slot_start(self, now: datetime) -> datetime:
+        """Start of the current schedule slot; a run that succeeded after it is not due"""
+        if self.every_hours:
+            return now - timedelta(hours=self.every_hours)
+        slot = now.replace(hour=self.at_hour, minute=0, second=0, microsecond=0)
+        return slot if slot <= now else slot - timedelta(days=1)
+
+
+JOBS: Dict[str, JobSpec] = {spec.name: spec for spec in (
+    JobSpec("priority_cache", _priority_cache, "Major gift priority levels and opportunities",
+            at_hour=2, lease_seconds=600, options=("force_full_refresh",)),
+    JobSpec("donor_features", _donor_features, "Donor feature store (incremental)",
+            every_hours=6, options=("full",)),
+    JobSpec("donor_scores", _donor_scores, "Persisted donor scores", every_hours=6),
+    JobSpec("impact_scores", _impact_scores, "Major gift impact scores", at_hour=3),
+    JobSpec("pipeline_snapshot", _pipeline_snapshot, "Major gifts pipeline snapshot", at_hour=1),
+    JobSpec("forecasts", _forecasts, "Revenue and expense forecasts", at_hour=4, lease_seconds=600),
+    JobSpec("cohort_cube", _cohort_cube, "Cohort retention cube rebuild", at_hour=5),
+)}
+
+
+def get_job(name: str) -> JobSpec:
+    if name not in JOBS:
+        raise KeyError(f"Unknown job '{name}'; expected one of {', '.join(JOBS)}")
+    return JOBS[name]
+
+
+# =====================================================================
+# QUEUE SQL
+# =====================================================================
+
+ENQUEUE_SQL = text("""
+    INSERT INTO job_runs (id, job_name, organization_id, status, trigger, queued_at)
+    SELECT gen_random_uuid(), :job_name, o.id, 'queued', 'schedule', now()
+    FROM organizations o
+    WHERE COALESCE(o.is_active, true)
+      AND NOT EXISTS (
+          SELECT 1 FROM job_runs r
+          WHERE r.job_name = :job_name
+            AND r.organization_id = o.id
+            AND (r.status IN ('queued', 'running')
+                 OR (r.status = 'succeeded' AND r.finished_at >= :slot_start)
+                 OR (r.status = 'failed' AND r.finished_at >= :retry_after))
+      )
+    ON CONFLICT DO NOTHING
+""")
+
+CLAIM_SQL = text("""
+    UPDATE job_runs
+    SET status = 'running', started_at = now(), worker = :worker
+    WHERE id IN (
+        SELECT r.id FROM job_runs r
+        WHERE r.status = 'queued'
+          AND r.job_name IN :jobs
+          AND (CAST(:run_id AS uuid) IS NULL OR r.id = CAST(:run_id AS uuid))
+          AND NOT EXISTS (
+              SELECT 1 FROM job_leases l
+              WHERE l.job_name = r.job_name
+                AND l.organization_id = r.organization_id
+                AND l.leased_until > now()
+          )
+        ORDER BY r.queued_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, job_name, organization_id, options, started_at
+""").bindparams(bindparam("jobs", expanding=True))
+
+# Takes a free or expired lease; returns no row while another worker holds a live one
+LEASE_SQL = text("""
+    INSERT INTO job_leases (job_name, organization_id, holder, run_id, acquired_at, leased_until)
+    VALUES (:job_name, :organization_id, :worker, :run_id, now(), now() + make_interval(secs => :seconds))
+    ON CONFLICT (job_name, organization_id) DO UPDATE
+    SET holder = EXCLUDED.holder,
+        run_id = EXCLUDED.run_id,
+        acquired_at = EXCLUDED.acquired_at,
+        leased_until = EXCLUDED.leased_until
+    WHERE job_leases.leased_until < now()
+    RETURNING run_id
+""")
+
+REQUEUE_SQL = text("""
+    UPDATE job_runs SET status = 'queued', started_at = NULL, worker = NULL WHERE id = :run_id
+""")
+
+RENEW_SQL = text("""
+    UPDATE job_leases
+    SET leased_until = now() + make_interval(secs => :seconds)
+    WHERE job_name = :job_name AND organization_id = :organization_id AND run_id = :run_id
+""")
+
+RELEASE_SQL = text("""
+    DELETE FROM job_leases
+    WHERE job_name = :job_name AND organization_id = :organization_id AND run_id = :run_id
+""")
+
+FINISH_SQL = text("""
+    UPDATE job_runs
+    SET status = :status,
+        finished_at = now(),
+        duration_seconds = :seconds,
+        stats = CAST(:stats AS jsonb),
+        error = :error
+    WHERE id = :run_id AND status = 'running' AND worker = :worker
+""")
+
+# Running runs whose lease expired: the worker died or hung without renewing
+REAP_SQL = text("""
+    UPDATE job_runs r
+    SET status = 'failed',
+        finished_at = now(),
+        duration_seconds = EXTRACT(EPOCH FROM now() - r.started_at),
+        error = 'Lease expired; worker ' || COALESCE(r.worker, 'unknown') || ' stopped renewing it'
+    WHERE r.status = 'running'
+      AND NOT EXISTS (
+          SELECT 1 FROM job_leases l
+          WHERE l.job_name = r.job_name
+            AND l.organization_id = r.organization_id
+            AND l.run_id = r.id
+            AND l.leased_until > now()
+      )
+    RETURNING r.id, r.job_name, r.organization_id, r.worker
+""")
+
+PRUNE_SQL = text("""
+    DELETE FROM job_runs
+    WHERE status IN ('succeeded', 'failed')
+      AND finished_at < now() - make_interval(days => :days)
+""")
+
+
+# =====================================================================
+# QUEUE
+# =====================================================================
+
+def enqueue_due(db: Session, jobs: List[str], now: Optional[datetime] = None) -> Dict[str, int]:
+    """Queue a scheduled run of each job for every active organization it is due for"""
+    now = now or datetime.now().astimezone()
+    queued = {}
+    for name in jobs:
+        spec = JOBS[name]
+        result = db.execute(ENQUEUE_SQL, {
+            "job_name": name,
+            "slot_start": spec.slot_start(now),
+            "retry_after": now - timedelta(minutes=RETRY_MINUTES),
+        })
+        queued[name] = result.rowcount
+    db.commit()
+    return {name: count for name, count in queued.items() if count}
+
+
+def enqueue_run(db: Session, job_name: str, organization_id: UUID, trigger: str = "manual",
+                options: Optional[Dict[str, bool]] = None,
+                requested_by: Optional[UUID] = None) -> Tuple[JobRun, bool]:
+    """
+    Queue one run; returns (run, created). An org that already has a queued
+    run of the job gets that run back instead of a second one.
+    """
+    spec = get_job(job_name)
+    options = options or {}
+    unknown = set(options) - set(spec.options)
+    if unknown:
+        raise ValueError(f"Job '{job_name}' does not take {', '.join(sorted(unknown))}; "
+                         f"options: {', '.join(spec.options) or 'none'}")
+
+    statement = insert(JobRun).values(
+        job_name=job_name,
+        organization_id=organization_id,
+        status="queued",
+        trigger=trigger,
+        requested_by=requested_by,
+        options={key: bool(value) for key, value in options.items()} or None,
+        queued_at=func.now(),
+    ).on_conflict_do_nothing().returning(JobRun.id)
+
+    for _ in range(3):
+        run_id = db.execute(statement).scalar()
+        db.commit()
+        if run_id is not None:
+            return db.get(JobRun, run_id), True
+        existing = db.query(JobRun).filter(
+            JobRun.job_name == job_name,
+            JobRun.organization_id == organization_id,
+            JobRun.status == "queued"
+        ).first()
+        if existing is not None:
+            return existing, False
+        # The queued run was claimed between the INSERT and the SELECT; queue again
+    raise RuntimeError(f"Could not queue {job_name} for {organization_id}: its queued run keeps being claimed")
+
+
+def claim_runs(db: Session, jobs: List[str], limit: int, worker: str = WORKER_ID,
+               run_id: Optional[UUID] = None) -> List:
+    """Move up to limit queued runs to running and lease their (job, org); in one transaction"""
+    if limit <= 0 or not jobs:
+        return []
+    claimed = db.execute(CLAIM_SQL, {
+        "worker": worker, "jobs": jobs, "limit": limit, "run_id": str(run_id) if run_id else None
+    }).fetchall()
+
+    leased = []
+    for run in claimed:
+        held = db.execute(LEASE_SQL, {
+            "job_name": run.job_name,
+            "organization_id": run.organization_id,
+            "worker": worker,
+            "run_id": run.id,
+            "seconds": JOBS[run.job_name].lease_seconds,
+        }).first()
+        if held is None:
+            db.execute(REQUEUE_SQL, {"run_id": run.id})
+        else:
+            leased.append(run)
+    db.commit()
+    return leased
+
+
+class LeaseRenewer:
+    """
+    Timer thread renewing the leases of running runs every third of their
+    lease length until each is dropped; one per execute_run, or one for all
+    the runs of a batch refresh
+    """
+
+    def __init__(self, runs: List = ()):
+        self.runs = {run.id: run for run in runs}
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LeaseRenewer":
+        self.thread = threading.Thread(target=self._loop, name="lease-renewer", daemon=True)
+        self.thread.start()
+        return self
+
+    def drop(self, run) -> None:
+        with self.lock:
+            self.runs.pop(run.id, None)
+
+    def stop(self) -> None:
+        self.done.set()
+        if self.thread:
+            self.thread.join()
+
+    def _loop(self):
+        interval = min((JOBS[run.job_name].lease_seconds for run in self.runs.values()), default=300) / 3
+        while not self.done.wait(interval):
+            with self.lock:
+                runs = list(self.runs.values())
+            if runs:
+                self.renew(runs)
+
+    def renew(self, runs: List) -> None:
+        db = SessionLocal()
+        try:
+            for run in runs:
+                renewed = db.execute(RENEW_SQL, {"job_name": run.job_name, "organization_id": run.organization_id,
+                                                 "run_id": run.id, "seconds": JOBS[run.job_name].lease_seconds}).rowcount
+                if not renewed:
+                    logger.warning(f"Job {run.job_name} for {run.organization_id} lost its lease while running")
+                    self.drop(run)
+            db.commit()
+        except Exception:
+            logger.exception("Could not renew job leases")
+        finally:
+            db.close()
+
+
+def finish_run(db: Session, run, status: str, seconds: float, stats: Optional[Dict] = None,
+               error: Optional[str] = None, worker: str = WORKER_ID) -> bool:
+    """
+    Record the outcome and release the lease; False when the run was reaped
+    meanwhile (its failed status and error stay)
+    """
+    recorded = db.execute(FINISH_SQL, {
+        "run_id": run.id,
+        "worker": worker,
+        "status": status,
+        "seconds": seconds,
+        "stats": json.dumps(stats, default=str) if stats is not None else None,
+        "error": error,
+    }).rowcount
+    db.execute(RELEASE_SQL, {"job_name": run.job_name, "organization_id": run.organization_id, "run_id": run.id})
+    db.commit()
+    return bool(recorded)
+
+
+def execute_run(run, worker: str = WORKER_ID) -> Dict:
+    """
+    Run a claimed run on its own session, renewing its lease meanwhile, and
+    record the outcome; always releases the lease
+    """
+    spec = JOBS[run.job_name]
+    options = run.options or {}
+    started = time.perf_counter()
+    stats, error = None, None
+
+    renewer = LeaseRenewer([run]).start()
+    db = SessionLocal()
+    try:
+        stats = spec.function(db, run.organization_id, **options)
+    except Exception as e:
+        db.rollback()
+        error = f"{type(e).__name__}: {e}"
+        logger.exception(f"Job {run.job_name} failed for {run.organization_id}")
+    finally:
+        renewer.stop()
+
+    seconds = round(time.perf_counter() - started, 3)
+    status = "failed" if error else "succeeded"
+    try:
+        recorded = finish_run(db, run, status, seconds, stats, error, worker)
+    finally:
+        db.close()
+
+    if not recorded:
+        logger.warning(f"Job {run.job_name} for {run.organization_id} {status} in {seconds}s after it was reaped")
+        status = "reaped"
+    else:
+        logger.info(f"Job {run.job_name} for {run.organization_id} {status} in {seconds}s")
+    return {"run_id": str(run.id), "status": status, "seconds": seconds, "stats": stats, "error": error}
+
+
+# =====================================================================
+# SCHEDULER
+# =====================================================================
+
+class JobScheduler:
+    """Tick thread plus a bounded pool of run threads; one per process"""
+
+    def __init__(self, jobs: Optional[List[str]] = None, max_parallel: int = MAX_PARALLEL,
+                 tick_seconds: float = TICK_SECONDS):
+        self.jobs = [get_job(name).name for name in (jobs or JOBS)]
+        self.max_parallel = max_parallel
+        self.tick_seconds = tick_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="scheduler")
+        self.in_flight: Dict[UUID, object] = {}
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.started_at: Optional[datetime] = None
+        self.last_tick: Optional[datetime] = None
+        self.last_prune = 0.0
+        self.succeeded = 0
+        self.failed = 0
+        self.reaped = 0
+
+    def start(self):
+        self.started_at = datetime.utcnow()
+        self.thread = threading.Thread(target=self._loop, name="scheduler-tick", daemon=True)
+        self.thread.start()
+        logger.info(f"Scheduler {WORKER_ID} started: {', '.join(self.jobs)} (max {self.max_parallel} in flight)")
+
+    def stop(self, wait: bool = False):
+        """Stop ticking; with wait=False unfinished runs are abandoned and reaped once their lease expires"""
+        self.stopping.set()
+        if self.thread:
+            self.thread.join(timeout=self.tick_seconds)
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _loop(self):
+        while not self.stopping.is_set():
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            self.stopping.wait(self.tick_seconds)
+
+    def tick(self) -> List:
+        """Queue due runs, reap dead ones and claim up to the free slots"""
+        db = SessionLocal()
+        try:
+            queued = enqueue_due(db, self.jobs)
+            if queued:
+                logger.info(f"Queued scheduled runs: {queued}")
+
+            reaped = db.execute(REAP_SQL).fetchall()
+            if time.monotonic() - self.last_prune > PRUNE_INTERVAL_SECONDS:
+                db.execute(PRUNE_SQL, {"days": HISTORY_DAYS})
+                self.last_prune = time.monotonic()
+            db.commit()
+            for run in reaped:
+                logger.warning(f"Job {run.job_name} for {run.organization_id} on {run.worker} lost its lease")
+            self.reaped += len(reaped)
+
+            with self.lock:
+                running = len(self.in_flight)
+            claimed = claim_runs(db, self.jobs, self.max_parallel - running)
+        finally:
+            db.close()
+
+        for run in claimed:
+            with self.lock:
+                self.in_flight[run.id] = run
+            self.executor.submit(self._run, run)
+        self.last_tick = datetime.utcnow()
+        return claimed
+
+    def _run(self, run):
+        try:
+            result = execute_run(run)
+            with self.lock:
+                if result["status"] == "succeeded":
+                    self.succeeded += 1
+                else:
+                    self.failed += 1
+        finally:
+            with self.lock:
+                self.in_flight.pop(run.id, None)
+
+    def wait_idle(self):
+        while True:
+            with self.lock:
+                if not self.in_flight:
+                    return
+            time.sleep(0.5)
+
+    def status(self) -> Dict:
+        with self.lock:
+            running = [
+                {"run_id": str(run.id), "job": run.job_name, "organization_id": str(run.organization_id),
+                 "started_at": run.started_at.isoformat() if run.started_at else None}
+                for run in self.in_flight.values()
+            ]
+        return {
+            "worker": WORKER_ID,
+            "running": self.thread is not None and self.thread.is_alive(),
+            "jobs": self.jobs,
+            "max_parallel": self.max_parallel,
+            "tick_seconds": self.tick_seconds,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "last_tick": self.last_tick.isoformat() if self.last_tick else None,
+            "in_flight": running,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "reaped": self.reaped,
+        }
+
+
+_scheduler: Optional[JobScheduler] = None
+
+
+def start_in_process_scheduler() -> Optional[JobScheduler]:
+    """Started by the API lifespan when SCHEDULER_ENABLED=1"""
+    global _scheduler
+    if SCHEDULER_ENABLED and _scheduler is None:
+        _scheduler = JobScheduler(ENABLED_JOBS or None)
+        _scheduler.start()
+    return _scheduler
+
+
+def stop_in_process_scheduler():
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.stop()
+        _scheduler = None
+
+
+def scheduler_status() -> Optional[Dict]:
+    return _scheduler.status() if _scheduler is not None else None
+
+
+def run_now(job_name: str, organization_id: UUID, options: Optional[Dict[str, bool]] = None) -> Dict:
+    """Queue a manual run and execute it in this process, still under the lease"""
+    db = SessionLocal()
+    try:
+        run, created = enqueue_run(db, job_name, organization_id, options=options)
+        claimed = claim_runs(db, [job_name], 1, run_id=run.id)
+    finally:
+        db.close()
+    if not claimed:
+        raise RuntimeError(f"{job_name} for {organization_id} is running on another worker; run {run.id} stays queued")
+    return execute_run(claimed[0])
+
+
+# =====================================================================
+# STATUS
+# =====================================================================
+
+def run_dict(run: JobRun) -> Dict:
+    return {
+        "run_id": str(run.id),
+        "job": run.job_name,
+        "organization_id": str(run.organization_id),
+        "status": run.status,
+        "trigger": run.trigger,
+        "options": run.options or {},
+        "queued_at": run.queued_at.isoformat() if run.queued_at else None,
+        "started_at": run.started_at.isoformat() if run.started_at else None,
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+        "duration_seconds": run.duration_seconds,
+        "worker": run.worker,
+        "stats": run.stats,
+        "error": run.error,
+    }
+
+
+def job_status(db: Session, organization_id: UUID) -> Dict:
+    """Per job: the active run, last success, last failure and current lease of the organization"""
+    latest = db.query(JobRun).filter(
+        JobRun.organization_id == organization_id
+    ).distinct(
+        JobRun.job_name, JobRun.status
+    ).order_by(
+        JobRun.job_name, JobRun.status, JobRun.queued_at.desc()
+    ).all()
+    leases = {
+        lease.job_name: lease
+        for lease in db.query(JobLease).filter(JobLease.organization_id == organization_id)
+    }
+
+    by_job: Dict[str, Dict[str, JobRun]] = {}
+    for run in latest:
+        by_job.setdefault(run.job_name, {})[run.status] = run
+
+    now = datetime.now().astimezone()
+    status = {}
+    for name, spec in JOBS.items():
+        runs = by_job.get(name, {})
+        active = runs.get("running") or runs.get("queued")
+        success = runs.get("succeeded")
+        lease = leases.get(name)
+        status[name] = {
+            "description": spec.description,
+            "schedule": f"every {spec.every_hours}h" if spec.every_hours else f"daily at {spec.at_hour:02d}:00",
+            "due": active is None and (success is None or success.finished_at < spec.slot_start(now)),
+            "active": run_dict(active) if active else None,
+            "queued": run_dict(runs["queued"]) if "running" in runs and "queued" in runs else None,
+            "last_success": run_dict(success) if success else None,
+            "last_failure": run_dict(runs["failed"]) if "failed" in runs else None,
+            "lease": {
+                "holder": lease.holder,
+                "run_id": str(lease.run_id) if lease.run_id else None,
+                "leased_until": lease.leased_until.isoformat(),
+            } if lease else None,
+        }
+    return status
+
+
+def run_history(db: Session, organization_id: UUID, job_name: Optional[str] = None, limit: int = 50) -> List[Dict]:
+    query = db.query(JobRun).filter(JobRun.organization_id == organization_id)
+    if job_name:
+        query = query.filter(JobRun.job_name == get_job(job_name).name)
+    return [run_dict(run) for run in query.order_by(JobRun.queued_at.desc()).limit(limit)]
+
+
+def _parse_option(value: str) -> Tuple[str, bool]:
+    key, _, flag = value.partition("=")
+    return key, flag.strip().lower() in ("1", "true", "yes", "")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the job scheduler or one job")
+    parser.add_argument("--once", action="store_true", help="Run a single tick and wait for its runs")
+    parser.add_argument("--run", choices=list(JOBS), help="Run one job now (needs --org)")
+    parser.add_argument("--org", action="append", help="Organization ID for --run (repeatable)")
+    parser.add_argument("--option", action="append", default=[], help="Job option key=true|false (repeatable)")
+    parser.add_argument("--jobs", help="Comma-separated jobs this worker runs; default SCHEDULER_JOBS or all")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.run:
+        if not args.org:
+            parser.error("--run needs --org")
+        for org in args.org:
+            result = run_now(args.run, UUID(org), dict(_parse_option(o) for o in args.option))
+            if result["status"] == "succeeded":
+                print(f"✅ {args.run} {org}: {result['seconds']}s {result['stats']}")
+            else:
+                print(f"❌ {args.run} {org}: {result['error'] or result['status']}")
+    else:
+        jobs = [name.strip() for name in args.jobs.split(",")] if args.jobs else (ENABLED_JOBS or None)
+        scheduler = JobScheduler(jobs)
+        if args.once:
+            claimed = scheduler.tick()
+            print(f"🚀 Claimed {len(claimed)} runs")
+            scheduler.wait_idle()
+            scheduler.stop(wait=True)
+            print(f"✅ {scheduler.succeeded} succeeded, {scheduler.failed} failed")
+        else:
+            scheduler.start()
+            try:
+                while scheduler.thread.is_alive():
+                    scheduler.thread.join(timeout=1)
+            except KeyboardInterrupt:
+                print("🛑 Stopping scheduler, waiting for running jobs...")
+                scheduler.stop(wait=True)
@@ -0,0 +1,100 @@
+"""
+Scheduled Jobs API
+Wise Investor Platform
+
+Manual triggers, status and run history of the per-organization jobs run by
+scheduler/job_scheduler.py. A trigger only queues the run; the in-process
+scheduler (SCHEDULER_ENABLED=1) or a standalone worker picks it up on its
+next tick under the organization's lease.
+"""
+
+from typing import Dict, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from analytics.analytics import get_current_user, verify_organization_access
+from database import get_db
+from scheduler.job_scheduler import (
+    JOBS,
+    enqueue_run,
+    get_job,
+    job_status,
+    run_dict,
+    run_history,
+    scheduler_status,
+)
+
+router = APIRouter(prefix="/api/v1/jobs", tags=["Scheduled Jobs"])
+
+
+@router.get("")
+async def list_jobs(current_user=Depends(get_current_user)):
+    """Registered jobs, their schedules and options, and this API worker's scheduler"""
+    return {
+        "jobs": [
+            {
+                "name": spec.name,
+                "description": spec.description,
+                "schedule": f"every {spec.every_hours}h" if spec.every_hours else f"daily at {spec.at_hour:02d}:00",
+                "options": list(spec.options),
+            }
+            for spec in JOBS.values()
+        ],
+        "scheduler": scheduler_status(),
+    }
+
+
+@router.post("/{job_name}/trigger/{organization_id}")
+def trigger_job(
+    job_name: str,
+    organization_id: UUID,
+    options: Optional[Dict[str, bool]] = Body(None, description="Job options, e.g. {\"force_full_refresh\": true}"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    """
+    Queue a manual run. When the organization already has a queued run of
+    the job that run is returned instead (created: false).
+    """
+    verify_organization_access(current_user, organization_id)
+    try:
+        get_job(job_name)
+        run, created = enqueue_run(db, job_name, organization_id, trigger="manual",
+                                   options=options, requested_by=current_user.id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"created": created, "run": run_dict(run)}
+
+
+@router.get("/status/{organization_id}")
+def get_job_status(
+    organization_id: UUID,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    """Per job: active run, last success and failure, lease holder and whether it is due"""
+    verify_organization_access(current_user, organization_id)
+    return {"organization_id": str(organization_id), "jobs": job_status(db, organization_id)}
+
+
+@router.get("/runs/{organization_id}")
+def get_job_runs(
+    organization_id: UUID,
+    job: Optional[str] = Query(None, description="Only runs of this job"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    """Run history, newest first, with durations, workers, stats and errors"""
+    verify_organization_access(current_user, organization_id)
+    try:
+        runs = run_history(db, organization_id, job, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    return {"organization_id": str(organization_id), "runs": runs}
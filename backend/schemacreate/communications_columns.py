@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+communications_columns.py - Bring an existing communications table up to the model
+
+The thank-you dispatcher (ai_analytics/thank_you_dispatch.py) links every row
+it records to its job and reads a job's progress from those rows, which needs
+on communications:
+
+- a thank_you_job_id column referencing thank_you_jobs
+- the idx_communications_thank_you_job index declared on models.Communications
+
+create_all creates both for a new database (and the thank_you_jobs table for an
+existing one). For an existing communications table the startup schema check
+(schemacreate/schema_version.py, SCHEMA_CHECK_MODE=migrate) runs migrate()
+after create_all; with strict or warn, or to do it ahead of a deploy, run this
+script (it is idempotent).
+
+Usage:
+    python -m schemacreate.communications_columns --check
+    python -m schemacreate.communications_columns --apply
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+from database import engine
+from models import Communications
+
+TABLE = "communications"
+
+NEW_COLUMNS = {
+    "thank_you_job_id": "UUID REFERENCES thank_you_jobs(id) ON DELETE SET NULL",
+}
+
+
+def missing_columns(conn) -> list:
+    existing = {row[0] for row in conn.execute(text("""
+        SELECT column_name FROM information_schema.columns WHERE table_name = :table
+    """), {"table": TABLE})}
+    return [name for name in NEW_COLUMNS if name not in existing]
+
+
+def missing_indexes(conn) -> list:
+    existing = {row[0] for row in conn.execute(text("""
+        SELECT indexname FROM pg_indexes WHERE tablename = :table
+    """), {"table": TABLE})}
+    return [index for index in Communications.__table__.indexes if index.name not in existing]
+
+
+def check() -> int:
+    with engine.connect() as conn:
+        columns = missing_columns(conn)
+        indexes = missing_indexes(conn)
+
+    print(f"  missing columns:    {', '.join(columns) or 'none'}")
+    print(f"  missing indexes:    {', '.join(i.name for i in indexes) or 'none'}")
+    if columns or indexes:
+        print("⚠️  communications needs --apply")
+        return 1
+    print("✅ communications is current")
+    return 0
+
+
+def migrate(conn) -> list:
+    """Add what is missing on conn's transaction; returns what was done"""
+    done = []
+    for name in missing_columns(conn):
+        conn.execute(text(f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS {name} {NEW_COLUMNS[name]}"))
+        done.append(f"column {name}")
+
+    for index in missing_indexes(conn):
+        conn.execute(CreateIndex(index, if_not_exists=True))
+        done.append(f"index {index.name}")
+    return done
+
+
+def apply() -> int:
+    with engine.begin() as conn:
+        for change in migrate(conn):
+            print(f"  + {change}")
+
+    print("✅ communications is current")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add the thank-you job column and index to communications")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--check", action="store_true", help="Report what is missing")
+    group.add_argument("--apply", action="store_true", help="Add the column and index")
+    args = parser.parse_args()
+
+    try:
+        return check() if args.check else apply()
+    except Exception as e:
+        print(f"\n❌ communications migration failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
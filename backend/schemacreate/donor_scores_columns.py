@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+donor_scores_columns.py - Bring an existing donor_scores table up to the model
+
+The scoring service (analytics/donor_scoring.py) upserts one row per donor
+and ranks by score, which needs on donor_scores:
+
+- affinity_score, capacity_score and score_version columns
+- one row per (organization_id, donor_id): duplicates are removed, keeping
+  the most recently calculated row, then unique_donor_score is added
+- the (organization_id, <score>) indexes declared on models.DonorScores
+
+create_all creates all of this for a new database. For an existing one the
+startup schema check (schemacreate/schema_version.py, SCHEMA_CHECK_MODE=migrate)
+runs migrate() after create_all, before it compares and stamps; with strict
+or warn, or to do it ahead of a deploy, run this script (it is idempotent).
+
+Usage:
+    python -m schemacreate.donor_scores_columns --check
+    python -m schemacreate.donor_scores_columns --apply
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+from database import engine
+from models import DonorScores
+
+TABLE = "donor_scores"
+CONSTRAINT = "unique_donor_score"
+
+NEW_COLUMNS = {
+    "affinity_score": "DOUBLE PRECISION",
+    "capacity_score": "DOUBLE PRECISION",
+    "score_version": "INTEGER",
+}
+
+
+def missing_columns(conn) -> list:
+    existing = {row[0] for row in conn.execute(text("""
+        SELECT column_name FROM information_schema.columns WHERE table_name = :table
+    """), {"table": TABLE})}
+    return [name for name in NEW_COLUMNS if name not in existing]
+
+
+def has_constraint(conn) -> bool:
+    return conn.execute(text("""
+        SELECT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = :name)
+    """), {"name": CONSTRAINT}).scalar()
+
+
+def missing_indexes(conn) -> list:
+    existing = {row[0] for row in conn.execute(text("""
+        SELECT indexname FROM pg_indexes WHERE tablename = :table
+    """), {"table": TABLE})}
+    return [index for index in DonorScores.__table__.indexes if index.name not in existing]
+
+
+def duplicate_rows(conn) -> int:
+    return conn.execute(text(f"""
+        SELECT COALESCE(SUM(n - 1), 0) FROM (
+            SELECT COUNT(*) AS n FROM {TABLE}
+            GROUP BY organization_id, donor_id HAVING COUNT(*) > 1
+        ) d
+    """)).scalar()
+
+
+def check() -> int:
+    with engine.connect() as conn:
+        columns = missing_columns(conn)
+        indexes = missing_indexes(conn)
+        constraint = has_constraint(conn)
+        duplicates = duplicate_rows(conn)
+
+    print(f"  missing columns:    {', '.join(columns) or 'none'}")
+    print(f"  missing indexes:    {', '.join(i.name for i in indexes) or 'none'}")
+    print(f"  {CONSTRAINT}: {'present' if constraint else 'missing'} ({duplicates} duplicate rows)")
+    if columns or indexes or not constraint:
+        print("⚠️  donor_scores needs --apply")
+        return 1
+    print("✅ donor_scores is current")
+    return 0
+
+
+def migrate(conn) -> list:
+    """Add what is missing on conn's transaction; returns what was done"""
+    done = []
+    for name in missing_columns(conn):
+        conn.execute(text(f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS {name} {NEW_COLUMNS[name]}"))
+        done.append(f"column {name}")
+
+    if not has_constraint(conn):
+        removed = conn.execute(text(f"""
+            DELETE FROM {TABLE} a
+            USING {TABLE} b
+            WHERE a.organization_id = b.organization_id
+              AND a.donor_id = b.donor_id
+              AND (COALESCE(a.calculated_at, '-infinity'), a.id::text)
+                < (COALESCE(b.calculated_at, '-infinity'), b.id::text)
+        """)).rowcount
+        conn.execute(text(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT {CONSTRAINT} UNIQUE (organization_id, donor_id)"
+        ))
+        done.append(f"constraint {CONSTRAINT} ({removed} duplicate rows removed)")
+
+    for index in missing_indexes(conn):
+        conn.execute(CreateIndex(index, if_not_exists=True))
+        done.append(f"index {index.name}")
+    return done
+
+
+def apply() -> int:
+    with engine.begin() as conn:
+        for change in migrate(conn):
+            print(f"  + {change}")
+
+    print("✅ donor_scores is current")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add the scoring columns and indexes to donor_scores")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--check", action="store_true", help="Report what is missing")
+    group.add_argument("--apply", action="store_true", help="Add columns, constraint and indexes")
+    args = parser.parse_args()
+
+    try:
+        return check() if args.check else apply()
+    except Exception as e:
+        print(f"\n❌ donor_scores migration failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
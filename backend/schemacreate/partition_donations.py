@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+partition_donations.py - Optional yearly range partitioning of donations
+
+Converts the donations table into a table partitioned by RANGE (donation_date)
+with one partition per calendar year plus a DEFAULT partition. Queries that
+filter donation_date with half-open ranges (utils.year_range / month_range /
+in_range) then only touch the partitions of the years they ask for, which
+matters for tenants with many years of history.
+
+The ORM model is unchanged: Donations keeps `id` as its mapper primary key,
+and the indexes declared on the model are created on the partitioned parent
+(and cascade to every partition).
+
+Trade-offs (why this is opt-in):
+- Postgres requires the partition key in every unique constraint, so the
+  primary key becomes (id, donation_date) and donation_date becomes NOT NULL
+  (NULL dates are backfilled from created_at).
+- Foreign keys that reference donations(id) cannot point at a partitioned
+  table without donation_date, so they are dropped and listed in the output.
+
+Usage:
+    python -m schemacreate.partition_donations --check
+    python -m schemacreate.partition_donations --apply [--keep-old]
+    python -m schemacreate.partition_donations --add-years 2   # run yearly from cron
+"""
+
+import argparse
+import sys
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+from database import engine
+
+TABLE = "donations"
+OLD_TABLE = "donations_unpartitioned"
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+def is_partitioned(conn) -> bool:
+    return conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = :table
+        )
+    """), {"table": TABLE}).scalar()
+
+
+def referencing_foreign_keys(conn, table: str):
+    """Foreign keys on other tables that point at `table`"""
+    return conn.execute(text("""
+        SELECT con.conname, src.relname AS source_table
+        FROM pg_constraint con
+        JOIN pg_class src ON src.oid = con.conrelid
+        JOIN pg_class dst ON dst.oid = con.confrelid
+        WHERE con.contype = 'f' AND dst.relname = :table
+        ORDER BY src.relname, con.conname
+    """), {"table": table}).all()
+
+
+def own_foreign_keys(conn, table: str):
+    """Foreign keys declared on `table` itself, as (name, definition)"""
+    return conn.execute(text("""
+        SELECT con.conname, pg_get_constraintdef(con.oid) AS definition
+        FROM pg_constraint con
+        JOIN pg_class c ON c.oid = con.conrelid
+        WHERE con.contype = 'f' AND c.relname = :table
+    """), {"table": table}).all()
+
+
+def year_bounds(conn):
+    row = conn.execute(text(f"""
+        SELECT EXTRACT(YEAR FROM MIN(donation_date))::int AS first_year,
+               EXTRACT(YEAR FROM MAX(donation_date))::int AS last_year
+        FROM {TABLE}
+    """)).first()
+    current_year = datetime.now().year
+    first_year = row.first_year or current_year
+    last_year = max(row.last_year or current_year, current_year)
+    return first_year, last_year
+
+
+def relation_exists(conn, name: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+
+def ensure_year_partitions(conn, first_year: int, last_year: int) -> list:
+    """
+    Create donations_<year> partitions for first_year..last_year that do not
+    exist yet. Postgres refuses a partition whose range matches rows in the
+    DEFAULT partition, so the default is detached meanwhile and rows of the new
+    years are moved out of it before it is attached again, all on conn's
+    transaction.
+    """
+    missing = [year for year in range(first_year, last_year + 1)
+               if not relation_exists(conn, f"{TABLE}_{year}")]
+    if not missing:
+        return []
+
+    has_default = relation_exists(conn, DEFAULT_PARTITION)
+    if has_default:
+        conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+
+    created = []
+    for year in missing:
+        name = f"{TABLE}_{year}"
+        conn.execute(text(f"""
+            CREATE TABLE {name} PARTITION OF {TABLE}
+            FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')
+        """))
+        moved = 0
+        if has_default:
+            moved = conn.execute(text(f"""
+                WITH moved AS (
+                    DELETE FROM {DEFAULT_PARTITION}
+                    WHERE donation_date >= '{year}-01-01' AND donation_date < '{year + 1}-01-01'
+                    RETURNING *
+                )
+                INSERT INTO {name} SELECT * FROM moved
+            """)).rowcount
+        created.append(f"{name} ({moved} rows from {DEFAULT_PARTITION})" if moved else name)
+
+    if has_default:
+        conn.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    return created
+
+
+def check():
+    with engine.connect() as conn:
+        if is_partitioned(conn):
+            partitions = conn.execute(text("""
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                JOIN pg_class p ON p.oid = i.inhparent
+                WHERE p.relname = :table
+                ORDER BY c.relname
+            """), {"table": TABLE}).scalars().all()
+            print(f"✅ {TABLE} is partitioned ({len(partitions)} partitions)")
+            for name in partitions:
+                print(f"   - {name}")
+            return
+
+        first_year, last_year = year_bounds(conn)
+        print(f"ℹ️  {TABLE} is not partitioned; data spans {first_year}-{last_year}")
+        incoming = referencing_foreign_keys(conn, TABLE)
+        if incoming:
+            print("⚠️  These foreign keys would be dropped by --apply:")
+            for fk in incoming:
+                print(f"   - {fk.source_table}.{fk.conname}")
+
+
+def apply(keep_old: bool = False, future_years: int = 1):
+    from models import Donations
+
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            print(f"✅ {TABLE} is already partitioned")
+            return
+
+        first_year, last_year = year_bounds(conn)
+        dropped = referencing_foreign_keys(conn, TABLE)
+        outgoing = own_foreign_keys(conn, TABLE)
+
+        print(f"\n🔒 Locking {TABLE} and partitioning {first_year}-{last_year + future_years}...")
+        conn.execute(text(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE"))
+
+        for fk in dropped:
+            conn.execute(text(f'ALTER TABLE "{fk.source_table}" DROP CONSTRAINT "{fk.conname}"'))
+
+        conn.execute(text(f"UPDATE {TABLE} SET donation_date = COALESCE(created_at, now()) "
+                          f"WHERE donation_date IS NULL"))
+        conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}"))
+
+        # Index names live in the schema namespace; free them for the new parent
+        for index in Donations.__table__.indexes:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{index.name}"'))
+
+        conn.execute(text(f"""
+            CREATE TABLE {TABLE} (
+                LIKE {OLD_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+            ) PARTITION BY RANGE (donation_date)
+        """))
+        conn.execute(text(f"ALTER TABLE {TABLE} ALTER COLUMN donation_date SET NOT NULL"))
+        conn.execute(text(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, donation_date)"))
+
+        created = ensure_year_partitions(conn, first_year, last_year + future_years)
+        conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+
+        conn.execute(text(f"INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}"))
+
+        for name, definition in outgoing:
+            conn.execute(text(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}'))
+        for index in Donations.__table__.indexes:
+            conn.execute(CreateIndex(index))
+
+        if not keep_old:
+            conn.execute(text(f"DROP TABLE {OLD_TABLE}"))
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"ANALYZE {TABLE}"))
+
+    print(f"✅ Created {len(created)} yearly partitions plus {DEFAULT_PARTITION}")
+    if keep_old:
+        print(f"ℹ️  Original rows kept in {OLD_TABLE}")
+    if dropped:
+        print("⚠️  Dropped foreign keys referencing donations(id):")
+        for fk in dropped:
+            print(f"   - {fk.source_table}.{fk.conname}")
+
+
+def add_years(years: int):
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            print(f"❌ {TABLE} is not partitioned; run --apply first")
+            return 1
+        current_year = datetime.now().year
+        created = ensure_year_partitions(conn, current_year, current_year + years)
+    print(f"✅ Created partitions: {', '.join(created) if created else 'none needed'}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partition donations by year")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--check", action="store_true", help="Show partitioning state")
+    group.add_argument("--apply", action="store_true", help="Convert donations to a partitioned table")
+    group.add_argument("--add-years", type=int, metavar="N",
+                       help="Create partitions for the current year and the next N years")
+    parser.add_argument("--keep-old", action="store_true",
+                        help=f"Keep the original table as {OLD_TABLE} after --apply")
+    parser.add_argument("--future-years", type=int, default=1,
+                        help="Empty partitions to create ahead of the latest donation (default: 1)")
+    args = parser.parse_args()
+
+    try:
+        if args.check:
+            check()
+        elif args.apply:
+            apply(keep_old=args.keep_old, future_years=args.future_years)
+        else:
+            return add_years(args.add_years)
+    except Exception as e:
+        print(f"\n❌ Partitioning failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
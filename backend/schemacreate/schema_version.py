@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+schema_version.py - Schema fingerprint check used at application startup
+
+Instead of running Base.metadata.create_all on every boot, the API compares a
+fingerprint of the models (tables, columns, types, keys, indexes) with the one
+stamped in the schema_version table. A match costs one single-row query.
+
+On a mismatch the behaviour depends on SCHEMA_CHECK_MODE:
+    migrate  (default) run create_all once under an advisory lock, then stamp
+             if the live schema has everything the models declare
+    strict   refuse to start until the schema is applied and stamped
+    warn     log and continue
+    off      skip the check entirely
+
+create_all only adds missing tables (and their indexes); the donor_scores
+and communications columns are added in place by
+schemacreate/donor_scores_columns.py and schemacreate/communications_columns.py,
+which apply_schema runs right after create_all. Before stamping
+the live schema is compared with the models (schema_gaps): every table,
+column, index and named unique constraint must exist. Anything still missing
+is logged with the script that adds it and the fingerprint is left
+unstamped, so the next boot and --check report it again.
+
+Usage:
+    python -m schemacreate.schema_version --check
+    python -m schemacreate.schema_version --apply    # create_all + stamp when complete
+    python -m schemacreate.schema_version --stamp    # record the fingerprint when complete
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sys
+from typing import Dict, List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_CHECK_MODE = os.getenv("SCHEMA_CHECK_MODE", "migrate")
+
+# Serializes create_all across workers booting at the same time
+SCHEMA_LOCK_ID = 72_551_001
+
+
+# Scripts that bring existing tables up to the models (create_all cannot)
+MIGRATION_HINTS = {
+    "donor_scores": "python -m schemacreate.donor_scores_columns --apply",
+    "communications": "python -m schemacreate.communications_columns --apply",
+    "donations": "python -m schemacreate.workload_indexes --apply",
+    "donors": "python -m schemacreate.workload_indexes --apply",
+    "campaigns": "python -m schemacreate.workload_indexes --apply",
+}
+
+
+class SchemaVersionMismatch(RuntimeError):
+    pass
+
+
+def schema_fingerprint(metadata) -> str:
+    """Stable hash of every table, column, key and index declared on metadata"""
+    dialect = postgresql.dialect()
+    parts = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        parts.append(f"table {table.name}")
+        for column in table.columns:
+            parts.append(
+                f"  column {column.name} {column.type.compile(dialect=dialect)}"
+                f" nullable={column.nullable} pk={column.primary_key}"
+                f" fk={sorted(fk.target_fullname for fk in column.foreign_keys)}"
+            )
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            parts.append(f"  index {index.name} {[c.name for c in index.columns]} unique={index.unique}")
+        for constraint in sorted(table.constraints, key=lambda c: c.name or ""):
+            if constraint.name:
+                parts.append(f"  constraint {constraint.name} {type(constraint).__name__}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def ensure_version_table(conn) -> None:
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+            fingerprint VARCHAR(64) NOT NULL,
+            table_count INTEGER,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """))
+
+
+def stamped_fingerprint(conn) -> Optional[str]:
+    exists = conn.execute(text("SELECT to_regclass('schema_version') IS NOT NULL")).scalar()
+    if not exists:
+        return None
+    return conn.execute(text("SELECT fingerprint FROM schema_version WHERE id = 1")).scalar()
+
+
+def stamp(conn, fingerprint: str, table_count: int) -> None:
+    ensure_version_table(conn)
+    conn.execute(text("""
+        INSERT INTO schema_version (id, fingerprint, table_count, applied_at)
+        VALUES (1, :fingerprint, :table_count, now())
+        ON CONFLICT (id) DO UPDATE
+        SET fingerprint = EXCLUDED.fingerprint,
+            table_count = EXCLUDED.table_count,
+            applied_at = EXCLUDED.applied_at
+    """), {"fingerprint": fingerprint, "table_count": table_count})
+
+
+def schema_gaps(conn, metadata) -> List[str]:
+    """Tables, columns, indexes and named unique constraints of the models missing from the database"""
+    inspector = inspect(conn)
+    live_tables = set(inspector.get_table_names())
+    wanted = [table for table in metadata.tables.values() if table.name in live_tables]
+    names = [table.name for table in wanted]
+
+    columns = inspector.get_multi_columns(filter_names=names) if names else {}
+    indexes = inspector.get_multi_indexes(filter_names=names) if names else {}
+    uniques = inspector.get_multi_unique_constraints(filter_names=names) if names else {}
+
+    gaps = [f"table {name}" for name in sorted(set(metadata.tables) - live_tables)]
+    for table in sorted(wanted, key=lambda t: t.name):
+        key = (None, table.name)
+        live_columns = {column["name"] for column in columns.get(key, [])}
+        live_names = {index["name"] for index in indexes.get(key, [])}
+        live_names |= {constraint["name"] for constraint in uniques.get(key, [])}
+
+        gaps += [f"column {table.name}.{column.name}" for column in table.columns if column.name not in live_columns]
+        gaps += [f"index {table.name}.{index.name}" for index in table.indexes
+                 if index.name and index.name not in live_names]
+        gaps += [f"constraint {table.name}.{constraint.name}" for constraint in table.constraints
+                 if constraint.name and type(constraint).__name__ == "UniqueConstraint"
+                 and constraint.name not in live_names]
+    return gaps
+
+
+def _gap_hints(gaps: List[str]) -> List[str]:
+    tables = {gap.split(" ", 1)[1].split(".")[0] for gap in gaps}
+    return sorted({MIGRATION_HINTS[table] for table in tables if table in MIGRATION_HINTS})
+
+
+def _run_migrations(conn, metadata) -> List[str]:
+    """In-place migrations create_all cannot do (columns on existing tables)"""
+    migrated = []
+    if "donor_scores" in metadata.tables:
+        from schemacreate.donor_scores_columns import migrate as migrate_donor_scores
+        migrated += [f"donor_scores: {change}" for change in migrate_donor_scores(conn)]
+    if "communications" in metadata.tables:
+        from schemacreate.communications_columns import migrate as migrate_communications
+        migrated += [f"communications: {change}" for change in migrate_communications(conn)]
+    return migrated
+
+
+def apply_schema(engine, metadata) -> Dict:
+    """
+    create_all and the in-place migrations, then stamp if nothing the models
+    declare is missing from the live schema; serialized with an advisory lock
+    """
+    expected = schema_fingerprint(metadata)
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": SCHEMA_LOCK_ID})
+        # Another worker may have applied it while we waited for the lock
+        if stamped_fingerprint(conn) == expected:
+            return {"fingerprint": expected, "gaps": [], "run": [], "migrated": []}
+        metadata.create_all(bind=conn)
+        migrated = _run_migrations(conn, metadata)
+        gaps = schema_gaps(conn, metadata)
+        if not gaps:
+            stamp(conn, expected, len(metadata.tables))
+    return {"fingerprint": expected, "gaps": gaps, "run": _gap_hints(gaps), "migrated": migrated}
+
+
+def check_schema_version(engine, metadata, mode: str = None) -> Dict:
+    """Startup check; returns what was found and done"""
+    mode = mode or SCHEMA_CHECK_MODE
+    if mode == "off":
+        return {"mode": mode, "status": "skipped"}
+
+    expected = schema_fingerprint(metadata)
+    with engine.connect() as conn:
+        current = stamped_fingerprint(conn)
+
+    if current == expected:
+        return {"mode": mode, "status": "current", "fingerprint": expected}
+
+    message = f"Schema fingerprint {current or 'missing'} does not match models ({expected})"
+    if mode == "strict":
+        raise SchemaVersionMismatch(f"{message}; run python -m schemacreate.schema_version --apply")
+    if mode == "warn":
+        logger.warning(message)
+        return {"mode": mode, "status": "mismatch", "fingerprint": current, "expected": expected}
+
+    applied = apply_schema(engine, metadata)
+    if applied["gaps"]:
+        logger.warning(
+            f"{message}; create_all left {len(applied['gaps'])} gaps, not stamped: "
+            f"{', '.join(applied['gaps'])}. Run: {'; '.join(applied['run']) or 'a migration'}"
+        )
+        return {"mode": mode, "status": "incomplete", "fingerprint": current, "expected": expected,
+                "gaps": applied["gaps"], "run": applied["run"]}
+    return {"mode": mode, "status": "applied", "previous": current, "fingerprint": expected,
+            "migrated": applied["migrated"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or apply the schema version")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--check", action="store_true", help="Compare the stamped fingerprint with the models")
+    group.add_argument("--apply", action="store_true", help="Run create_all and stamp the fingerprint if complete")
+    group.add_argument("--stamp", action="store_true", help="Stamp the fingerprint without create_all if complete")
+    args = parser.parse_args()
+
+    from database import engine, Base
+    import models  # noqa: F401 - registers every table on Base.metadata
+
+    expected = schema_fingerprint(Base.metadata)
+    try:
+        if args.check:
+            with engine.connect() as conn:
+                current = stamped_fingerprint(conn)
+            if current == expected:
+                print(f"✅ Schema is current ({expected})")
+                return 0
+            print(f"⚠️  Stamped {current or 'nothing'}, models are {expected}")
+            return 1
+        if args.apply:
+            applied = apply_schema(engine, Base.metadata)
+        else:
+            with engine.begin() as conn:
+                gaps = schema_gaps(conn, Base.metadata)
+                if not gaps:
+                    stamp(conn, expected, len(Base.metadata.tables))
+            applied = {"gaps": gaps, "run": _gap_hints(gaps)}
+
+        for change in applied.get("migrated", []):
+            print(f"  + {change}")
+        if applied["gaps"]:
+            print("⚠️  Not stamped; missing from the database:")
+            for gap in applied["gaps"]:
+                print(f"   - {gap}")
+            for command in applied["run"]:
+                print(f"   run: {command}")
+            return 1
+        print(f"✅ Schema current and stamped ({expected}, {len(Base.metadata.tables)} tables)")
+        return 0
+    except Exception as e:
+        print(f"\n❌ Schema version command failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+workload_indexes.py - Build the indexes declared on donations, donors and campaigns
+
+models.py declares the workload indexes (covering (org, date) indexes on
+donations, the completed-payment partial index, the BRIN index on
+donation_date, org-scoped donor and campaign indexes). create_all creates them
+for a new database only; existing databases need this script, which builds
+every missing one with CREATE INDEX CONCURRENTLY IF NOT EXISTS so writes keep
+going while it runs (it is idempotent; run it outside a transaction).
+
+A partitioned donations table (schemacreate/partition_donations.py) cannot
+take CREATE INDEX CONCURRENTLY on the parent: the index is created ON ONLY
+the parent, built concurrently on every partition and the partition indexes
+are attached, which makes the parent index valid.
+
+An interrupted concurrent build leaves an INVALID index behind that
+IF NOT EXISTS would skip; such indexes are dropped and built again.
+
+Run against the database of DATABASE_URL, then restart the API (the startup
+schema check stamps the fingerprint once nothing is missing):
+    python -m schemacreate.workload_indexes --check
+    python -m schemacreate.workload_indexes --apply
+"""
+
+import argparse
+import re
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+from database import engine, Base
+import models  # noqa: F401 - registers every table on Base.metadata
+
+TABLES = ("donations", "donors", "campaigns")
+
+
+def declared_indexes() -> dict:
+    return {
+        index.name: index
+        for table in Base.metadata.sorted_tables if table.name in TABLES
+        for index in table.indexes
+    }
+
+
+def index_state(conn, tables=TABLES) -> dict:
+    """name -> valid for the indexes that exist on the given tables"""
+    return {
+        row.name: row.valid for row in conn.execute(text("""
+            SELECT c.relname AS name, i.indisvalid AS valid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_class t ON t.oid = i.indrelid
+            WHERE t.relname = ANY(:tables)
+        """), {"tables": list(tables)})
+    }
+
+
+def partitions(conn, table: str) -> list:
+    """Partitions of table; empty when it is not partitioned"""
+    return [row[0] for row in conn.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :table AND p.relkind = 'p'
+        ORDER BY c.relname
+    """), {"table": table})]
+
+
+def missing_indexes(conn) -> list:
+    """Declared indexes that do not exist or are INVALID"""
+    state = index_state(conn)
+    return [index for name, index in sorted(declared_indexes().items()) if not state.get(name)]
+
+
+def index_ddl(index, name: str = None, table: str = None, concurrently: bool = True, only: bool = False) -> str:
+    """CREATE INDEX IF NOT EXISTS for index, optionally renamed onto another table (a partition)"""
+    ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+    return re.sub(
+        r"^CREATE (UNIQUE )?INDEX (\S+) ON (\S+)",
+        lambda m: (f"CREATE {m.group(1) or ''}INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+                   f"{name or m.group(2)} ON {'ONLY ' if only else ''}{table or m.group(3)}"),
+        ddl, count=1
+    )
+
+
+def partition_index_name(partition: str, index) -> str:
+    return f"{partition}_{index.name}"[:63]
+
+
+def build_partitioned(conn, index, table_partitions: list) -> None:
+    """Parent index ON ONLY, concurrent build per partition, then attach each"""
+    conn.execute(text(index_ddl(index, concurrently=False, only=True)))
+    state = index_state(conn, table_partitions)
+    for partition in table_partitions:
+        name = partition_index_name(partition, index)
+        if state.get(name) is False:
+            conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+        conn.execute(text(index_ddl(index, name=name, table=partition)))
+        conn.execute(text(f'ALTER INDEX "{index.name}" ATTACH PARTITION "{name}"'))
+        print(f"    + {partition}.{name}")
+
+
+def check() -> int:
+    with engine.connect() as conn:
+        state = index_state(conn)
+        missing = missing_indexes(conn)
+
+    for index in missing:
+        print(f"  missing: {index.table.name}.{index.name}{' (INVALID)' if index.name in state else ''}")
+    if missing:
+        print(f"⚠️  {len(missing)} index(es) need --apply")
+        return 1
+    print("✅ Workload indexes are current")
+    return 0
+
+
+def apply() -> int:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        state = index_state(conn)
+        missing = missing_indexes(conn)
+        for index in missing:
+            table_partitions = partitions(conn, index.table.name)
+            if table_partitions:
+                # An invalid parent index only waits for its partitions to be attached
+                build_partitioned(conn, index, table_partitions)
+            else:
+                if index.name in state:
+                    conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+                    print(f"  - invalid index {index.name}")
+                conn.execute(text(index_ddl(index)))
+            print(f"  + index {index.table.name}.{index.name}")
+        if missing:
+            conn.execute(text(f"ANALYZE {', '.join(sorted({index.table.name for index in missing}))}"))
+
+    print("✅ Workload indexes are current")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the declared workload indexes concurrently")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--check", action="store_true", help="Report missing or invalid indexes")
+    group.add_argument("--apply", action="store_true", help="Build them with CREATE INDEX CONCURRENTLY")
+    args = parser.parse_args()
+
+    try:
+        return check() if args.check else apply()
+    except Exception as e:
+        print(f"\n❌ Workload index migration failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
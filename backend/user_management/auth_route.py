@@ -6,26 +6,16 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 import uuid
 import os
-import hashlib
-#from passlib.context import CryptContext
 from database import get_db
 from models import Users as User, Organizations as Organization
+from user_management.credential_service import hash_password, verify_password, verify_and_rehash
 
 # Router
 router = APIRouter(prefix="/api/v1/auth", tags=["Authentication"])
 
-# Password hashing
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__ident="2b",  # Skip wrap bug detection
-    bcrypt__rounds=12,
-)
-
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7")
 ALGORITHM = "HS256"
@@ -74,31 +64,8 @@ class SuperadminLoginResponse(BaseModel):
 
 
 # Helper Functions
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    password_hash = hashlib.sha256(plain_password.encode('utf-8')).hexdigest()
-    return pwd_context.verify(password_hash, hashed_password)
-    #return pwd_context.verify(plain_password, hashed_password)
-
-
-def hash_password(password: str) -> str:
-    """Hash a password"""
-    print(f"\n=== HASH PASSWORD ===")
-    print(f"Input password: {password}")
-    print(f"Input length: {len(password)}")
-    # Handle bcrypt 72 byte limit
-   # password = password.replace('\x00', '')
-    #password_bytes = password.encode('utf-8')
-    
-    #if len(password_bytes) > 72:
-    #    password_bytes = password_bytes[:72]
-    #    password = password_bytes.decode('utf-8', errors='ignore')
-    password_hash = hashlib.sha256(password.encode('utf-8')).hexdigest()
-    print(f"SHA256 hash: {password_hash}")
-    result = pwd_context.hash(password_hash)
-    print(f"Final bcrypt hash: {result}")
-    print(f"=== END HASH ===\n")
-    return result
+# hash_password and verify_password live in user_management.credential_service
+# and are re-exported here for existing imports
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -167,8 +134,9 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Verify password
-    if not verify_password(credentials.password, user.password_hash):
+    # Verify password off the event loop; outdated bcrypt parameters are upgraded below
+    valid, new_hash = await verify_and_rehash(credentials.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -200,6 +168,8 @@ async def login(
     
     # Update last login
     user.last_login = datetime.utcnow()
+    if new_hash:
+        user.password_hash = new_hash
     db.commit()
     
     # Prepare user response
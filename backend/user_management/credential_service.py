@@ -0,0 +1,209 @@
+"""
+Credential Service
+Wise Investor Platform
+
+One place for password hashing and verification. Passwords are pre-hashed
+with SHA-256 (hex digest, which keeps them under bcrypt's 72 byte limit) and
+then hashed with bcrypt ($2b$, BCRYPT_ROUNDS rounds, default 12).
+
+bcrypt at 12 rounds costs roughly 250 ms of CPU, so async routes must not run
+it on the event loop: the *_async functions hand the work to a bounded thread
+pool (the bcrypt extension releases the GIL while hashing) and the loop keeps
+serving other requests:
+
+    CREDENTIAL_WORKERS=2                  # threads hashing at once per API worker
+    CREDENTIAL_MAX_PENDING=64             # requests allowed to queue for a thread
+    CREDENTIAL_QUEUE_TIMEOUT_SECONDS=10   # max wait for a hashing thread, see below
+
+A request waits first for one of the CREDENTIAL_WORKERS + CREDENTIAL_MAX_PENDING
+slots, then for a thread. Either wait running past the timeout raises
+CredentialPoolSaturated (503): a request that only gets a thread after it is
+rejected without hashing, so no login waits longer than the timeout plus one
+bcrypt run.
+
+A missing, unknown or malformed stored hash never matches (and is logged);
+any other error from the bcrypt backend is logged and raised.
+
+Hashes made with fewer rounds than BCRYPT_ROUNDS (or an older bcrypt ident)
+are upgraded on the next successful login: verify_and_rehash returns the new
+hash and the login route stores it.
+
+Sync callers (scripts, datagen) can keep using hash_password and
+verify_password directly.
+
+Throughput per worker: python -m benchmarks.login_throughput
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+WORKERS = int(os.getenv("CREDENTIAL_WORKERS", "2"))
+MAX_PENDING = int(os.getenv("CREDENTIAL_MAX_PENDING", "64"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("CREDENTIAL_QUEUE_TIMEOUT_SECONDS", "10"))
+
+# min_rounds marks cheaper hashes as needing an update, which drives rehash-on-login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__ident="2b",  # Skip wrap bug detection
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+# Modular crypt format of a bcrypt hash: ident, cost, 22 character salt and 31 character checksum
+BCRYPT_HASH = re.compile(r"^\$2[abxy]?\$\d{2}\$[./A-Za-z0-9]{53}$")
+
+
+class CredentialPoolSaturated(Exception):
+    """Too many password checks are already waiting for a hashing thread"""
+
+    def __init__(self, waited: float):
+        super().__init__(f"Credential service is saturated (waited {waited:.1f}s)")
+        self.waited = waited
+
+
+# =====================================================================
+# SYNC PRIMITIVES
+# =====================================================================
+
+def _prehash(password: str) -> str:
+    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+
+def hash_password(password: str) -> str:
+    """bcrypt hash of the SHA-256 pre-hashed password"""
+    return pwd_context.hash(_prehash(password))
+
+
+def _is_bcrypt_hash(hashed_password: Optional[str]) -> bool:
+    """Stored hashes that cannot match: missing, another scheme or a damaged bcrypt string"""
+    if not hashed_password:
+        return False
+    if not BCRYPT_HASH.match(hashed_password):
+        logger.warning("Stored password hash is not a bcrypt hash; treating it as no match")
+        return False
+    return True
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash; missing or malformed hashes never match"""
+    if not _is_bcrypt_hash(hashed_password):
+        return False
+    try:
+        return pwd_context.verify(_prehash(plain_password), hashed_password)
+    except Exception:
+        logger.exception("bcrypt verification failed")
+        raise
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new hash) where the new hash is set only when the stored one uses outdated parameters"""
+    if not _is_bcrypt_hash(hashed_password):
+        return False, None
+    try:
+        return pwd_context.verify_and_update(_prehash(plain_password), hashed_password)
+    except Exception:
+        logger.exception("bcrypt verification failed")
+        raise
+
+
+# =====================================================================
+# BOUNDED POOL
+# =====================================================================
+
+class CredentialPool:
+    """Thread pool for bcrypt work with a cap on queued requests"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="credentials")
+        self.semaphore = asyncio.Semaphore(workers + max_pending)
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_wait = 0.0
+
+    async def run(self, func, *args):
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise CredentialPoolSaturated(time.monotonic() - started)
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, self._timed, started, func, *args)
+            self.completed += 1
+            self.total_seconds += time.monotonic() - started
+            return result
+        except CredentialPoolSaturated:
+            self.rejected += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+
+    def _timed(self, submitted: float, func, *args):
+        """Runs on the hashing thread; gives up when the thread came too late"""
+        waited = time.monotonic() - submitted
+        self.max_wait = max(self.max_wait, waited)
+        if waited > QUEUE_TIMEOUT_SECONDS:
+            raise CredentialPoolSaturated(waited)
+        return func(*args)
+
+    def status(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_seconds": round(self.total_seconds / self.completed, 4) if self.completed else 0.0,
+            "max_queue_wait_seconds": round(self.max_wait, 4),
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+credential_pool = CredentialPool(WORKERS, MAX_PENDING)
+
+
+# =====================================================================
+# ASYNC API
+# =====================================================================
+
+async def hash_password_async(password: str) -> str:
+    return await credential_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await credential_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify off the event loop; returns a replacement hash when the cost parameters changed"""
+    valid, new_hash = await credential_pool.run(verify_and_update, plain_password, hashed_password)
+    if new_hash:
+        logger.info("Password hash upgraded to current bcrypt parameters")
+    return valid, new_hash
+
+
+def credential_status() -> Dict:
+    return credential_pool.status()
@@ -25,7 +25,7 @@ from user_management.registration_schema import (
     SELF_REGISTERABLE_ROLES
 )
 # Assuming you have a password hashing utility
-from user_management.auth_route import hash_password, verify_password
+from user_management.credential_service import hash_password_async, verify_password_async
 
 router = APIRouter(prefix="/api/v1/auth", tags=["Registration & User Management"])
 
@@ -177,7 +177,7 @@ async def register_staff(
     user = Users(
         id=uuid.uuid4(),
         email=staff_data.email,
-        password_hash=hash_password(staff_data.password),
+        password_hash=await hash_password_async(staff_data.password),
         first_name=staff_data.first_name,
         last_name=staff_data.last_name,
         role=staff_data.role.value,
@@ -283,7 +283,7 @@ async def invite_user(
         organization_id=current_user.organization_id if invitation.role != RoleType.DONOR else None,
         password_hash=None,  # No password until they complete invitation
         email_verified=False,
-        invitation_token=hash_password(invitation_token),  # Store hashed token
+        invitation_token=await hash_password_async(invitation_token),  # Store hashed token
         invitation_expires_at=expires_at,
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow()
@@ -342,7 +342,7 @@ async def complete_invitation(
 
     user = None
     for u in users:
-        if verify_password(completion.invitation_token, u.invitation_token):
+        if await verify_password_async(completion.invitation_token, u.invitation_token):
             user = u
             break
 
@@ -360,7 +360,7 @@ async def complete_invitation(
         )
 
     # Set password and activate account
-    user.password_hash = hash_password(completion.password)
+    user.password_hash = await hash_password_async(completion.password)
     user.is_active = True
     user.email_verified = True
     user.invitation_token = None
@@ -438,7 +438,7 @@ async def setup_donor_password(
         )
 
     # Set password
-    user.password_hash = hash_password(password)
+    user.password_hash = await hash_password_async(password)
     user.email_verified = True
     user.updated_at = datetime.utcnow()
 
@@ -645,7 +645,7 @@ async def resend_invitation(
     invitation_token = secrets.token_urlsafe(32)
     expires_at = datetime.utcnow() + timedelta(days=7)
 
-    user.invitation_token = hash_password(invitation_token)
+    user.invitation_token = await hash_password_async(invitation_token)
     user.invitation_expires_at = expires_at
     user.updated_at = datetime.utcnow()
 
@@ -7,9 +7,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, extract
 from typing import List
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
 import uuid
-import hashlib
 from database import get_db
 from models import Organizations as Organization, Users as User, Donations as Donation, Donors as Donor
 #from new_models import Donor
@@ -23,6 +21,7 @@ from user_management.superadmin_schemas import (
     UserResponse,
     SuperadminDashboard
 )
+from user_management.credential_service import hash_password_async
 from user_management.superadmin_auth import (
     get_current_superadmin,
     verify_superadmin_credentials,
@@ -35,17 +34,6 @@ router = APIRouter(
     tags=["Superadmin"]
 )
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__ident="2b",)
-
-
-def hash_password(password: str) -> str:
-    """Hash a password"""
-    password_hash = hashlib.sha256(password.encode('utf-8')).hexdigest()
-    return pwd_context.hash(password_hash)
-    #return pwd_context.hash(password)
-
-
 @router.post("/login", response_model=TokenResponse, summary="Superadmin Login")
 async def superadmin_login(
         credentials: SuperadminLogin,
@@ -313,7 +301,7 @@ async def create_user(
         )
 
     # Hash password
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password_async(user.password)
 
     # Create new user
     db_user = User(
@@ -419,7 +407,7 @@ async def update_user(
 
     # Update password if provided
     if user_update.password:
-        db_user.hashed_password = hash_password(user_update.password)
+        db_user.password_hash = await hash_password_async(user_update.password)
 
     db.commit()
     db.refresh(db_user)
@@ -9,8 +9,6 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from uuid import UUID
 from datetime import datetime
-import hashlib
-from passlib.context import CryptContext
 
 from user_management.auth_dependencies import (
     get_current_user,
@@ -19,6 +17,7 @@ from user_management.auth_dependencies import (
     CurrentUser
 )
 from user_management.rbac_extra_roles import RoleType, Permission, can_assign_role
+from user_management.credential_service import hash_password_async
 from database import get_db
 from models import Users as User, Organizations as Organization
 from user_management.schemas_enhanced import (
@@ -31,19 +30,6 @@ from user_management.schemas_enhanced import (
 
 router = APIRouter(prefix="/api/v1/users", tags=["User Management"])
 
-# Password hashing with SHA256 pre-hash
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__ident="2b",
-)
-
-def hash_password(password: str) -> str:
-    """Hash a password with SHA256 pre-hash"""
-    password_hash = hashlib.sha256(password.encode('utf-8')).hexdigest()
-    return pwd_context.hash(password_hash)
-
-
 # =====================================================================
 # USER CREATION - For ORG_ADMIN and SUPERADMIN
 # =====================================================================
@@ -105,7 +91,7 @@ async def create_user(
         )
 
     # Hash password
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
 
     # Create new user
     import uuid
@@ -13,12 +13,10 @@ from datetime import datetime
 from enum import Enum
 import jwt
 from jwt import PyJWTError, ExpiredSignatureError
-import bcrypt
-import hashlib
-from passlib.context import CryptContext
 
 from database import get_db
 from models import Organizations as Organization, Users as User
+from user_management.credential_service import hash_password_async
 #import schemas
 # You'll need to add this model to your models.py
 """
@@ -159,21 +157,6 @@ def verify_org_admin(user: User, organization_id: UUID, db: Session) -> None:
         pass
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def hash_password(password: str) -> str:
-    """
-    Hash password using SHA256 + passlib to match existing system.
-    This ensures new users can login with the same verify_password function.
-    """
-    # First: Hash with SHA256 (matches your existing system)
-    password_hash = hashlib.sha256(password.encode('utf-8')).hexdigest()
-
-    # Second: Hash with passlib (matches your existing system)
-    return pwd_context.hash(password_hash)
-
-
 # =====================================================================
 # PUBLIC ENDPOINT - User Registration Request
 # =====================================================================
@@ -223,8 +206,8 @@ async def create_registration_request(
             detail="A registration request with this email is already pending approval"
         )
 
-    # Hash the password
-    password_hash = hash_password(request_data.password)
+    # Hash the password (same scheme as login, off the event loop)
+    password_hash = await hash_password_async(request_data.password)
 
     # Create registration request
     new_request = UserRegistrationRequest(
@@ -183,6 +183,106 @@ def get_fiscal_year_dates(year: int, fiscal_start_month: int = 1) -> tuple:
     return start_date, end_date
 
 
+def month_range(year: int, month: int) -> tuple:
+    """
+    Half-open range [start, end) covering one calendar month.
+    
+    Half-open ranges compare donation_date directly, so unlike
+    extract('month', ...) == month they can use an index on the column
+    and let Postgres prune donation partitions.
+    
+    Example:
+        start, end = month_range(2024, 2)  # 2024-02-01 .. 2024-03-01
+    """
+    from datetime import datetime
+    
+    if month < 1 or month > 12:
+        raise ValueError("Month must be between 1 and 12")
+    
+    start_date = datetime(year, month, 1)
+    end_date = datetime(year + month // 12, month % 12 + 1, 1)
+    return start_date, end_date
+
+
+def quarter_range(year: int, quarter: int) -> tuple:
+    """
+    Half-open range [start, end) covering one calendar quarter.
+    
+    Example:
+        start, end = quarter_range(2024, 4)  # 2024-10-01 .. 2025-01-01
+    """
+    if quarter < 1 or quarter > 4:
+        raise ValueError("Quarter must be between 1 and 4")
+    
+    start_month = (quarter - 1) * 3 + 1
+    start_date, _ = month_range(year, start_month)
+    _, end_date = month_range(year, start_month + 2)
+    return start_date, end_date
+
+
+def year_range(start_year: int, end_year: Optional[int] = None) -> tuple:
+    """
+    Half-open range [start, end) covering calendar years start_year..end_year inclusive.
+    
+    Example:
+        start, end = year_range(2024)        # 2024-01-01 .. 2025-01-01
+        start, end = year_range(2022, 2024)  # 2022-01-01 .. 2025-01-01
+    """
+    from datetime import datetime
+    
+    end_year = start_year if end_year is None else end_year
+    return datetime(start_year, 1, 1), datetime(end_year + 1, 1, 1)
+
+
+def fiscal_year_range(year: int, fiscal_start_month: int = 1) -> tuple:
+    """
+    Half-open range [start, end) covering the fiscal year that starts in `year`.
+    Same fiscal year convention as get_fiscal_year_dates.
+    
+    Example:
+        start, end = fiscal_year_range(2024, fiscal_start_month=7)  # 2024-07-01 .. 2025-07-01
+    """
+    from datetime import datetime
+    
+    if fiscal_start_month < 1 or fiscal_start_month > 12:
+        raise ValueError("Fiscal start month must be between 1 and 12")
+    
+    return datetime(year, fiscal_start_month, 1), datetime(year + 1, fiscal_start_month, 1)
+
+
+def period_range(year: int, quarter: Optional[int] = None, month: Optional[int] = None,
+                 fiscal_start_month: Optional[int] = None) -> tuple:
+    """
+    Half-open range for a year, quarter, month or fiscal-year selection.
+    
+    Example:
+        period_range(2024)                        # calendar year
+        period_range(2024, quarter=3)             # Q3
+        period_range(2024, month=11)              # November
+        period_range(2024, fiscal_start_month=7)  # FY starting July 2024
+    """
+    if month is not None:
+        return month_range(year, month)
+    if quarter is not None:
+        return quarter_range(year, quarter)
+    if fiscal_start_month is not None:
+        return fiscal_year_range(year, fiscal_start_month)
+    return year_range(year)
+
+
+def in_range(column, date_range: tuple):
+    """
+    SQLAlchemy predicate `column >= start AND column < end` for a half-open range.
+    
+    Example:
+        db.query(Donation).filter(in_range(Donation.donation_date, month_range(2024, 2)))
+    """
+    from sqlalchemy import and_
+    
+    start_date, end_date = date_range
+    return and_(column >= start_date, column < end_date)
+
+
 def calculate_growth_rate(current: float, previous: float) -> float:
     """
     Calculate growth rate as a percentage.
@@ -437,6 +537,12 @@ __all__ = [
     'validate_date_range',
     'get_quarter_dates',
     'get_fiscal_year_dates',
+    'month_range',
+    'quarter_range',
+    'year_range',
+    'fiscal_year_range',
+    'period_range',
+    'in_range',
     'calculate_growth_rate',
     'chunk_list',
     'sanitize_filename',
@@ -545,7 +545,7 @@ const EnhancedLandingPage = () => {
         body: JSON.stringify(formData)
       });
 
-      alert(`${response.sent_count} thank you messages sent successfully!`);
+      alert(`Thank you messages queued for ${response.queued_count} donors`);
       setShowThankYouModal(false);
       setSelectedDonors([]);
     } catch (error) {